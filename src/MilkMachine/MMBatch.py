@@ -0,0 +1,234 @@
+"""
+Exports Google Earth tours of GPS tracks without opening QGIS.
+
+Each CSV, KML or GPX track is imported as the plugin's Import tab would, given the
+cameras described in a tour specification and exported to KML or KMZ.
+
+    python MMBatch.py tour.json track1.csv track2.kml track3.gpx
+    python MMBatch.py tour.json --output-dir tours --format kmz --jobs 8 tracks/*.csv
+
+The tour specification is a JSON file, every key is optional:
+
+    {
+        "dateFormat": "yyyy/mm/dd",
+        "tour": {"name": "Tour", "flyToMode": "smooth", "duration": null},
+        "camera": {"mode": "follow", "smoother": 10, "altitude": 10, "altitudemode": "relativeToGround",
+                   "gxaltitudemode": null, "gxhoriz": null, "tilt": 48, "range": 15, "follow_angle": 180,
+                   "hoffset": 0, "streetview": false},
+        "durationLimits": {"minimum": 0.1, "maximum": 10, "gap": 60},
+        "simplify": {"tolerance": 5, "method": "douglas-peucker", "timeAware": true},
+        "gxTrack": false,
+        "audio": {"href": "narration.mp3", "offset": 0}
+    }
+
+The camera mode is "follow" for a Follow Behind tour, where the camera
+values above are the defaults. "static" applies the Camera tab settings
+("longitude_off", "latitude_off", "altitude", "heading", "tilt", "roll", ...)
+to every point, the camera being placed on the point unless "longitude" and
+"latitude" are given. "none" exports the points only. A tour duration of null
+uses the time between points, within the durationLimits passed to
+MMExport.flyToDurations. With "simplify", the points within the tolerance in
+metres of the simplified track are left out of the tour, see
+MMSimplify.simplifyTrack; only the tolerance is required. With "gxTrack",
+the points are written as a single gx:Track rather than a placemark each,
+see MMExport.trackPlacemarks.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import traceback
+
+import MMCodec
+import MMEdit
+import MMExport
+import MMFollow
+import MMImport
+import MMSimplify
+
+from qgis.core import QgsApplication
+
+DEFAULT_TOUR = {'name': 'Tour', 'flyToMode': 'smooth', 'duration': None}
+# the defaults of the Follow Behind settings in the dialog
+DEFAULT_FOLLOW = {'smoother': 10, 'altitude': 10, 'altitudemode': 'relativeToGround', 'tilt': 48, 'range': 15, 'follow_angle': 180, 'hoffset': 0}
+
+_qgs = None
+
+class LogMessageBar(object):
+    """Stands in for the QGIS message bar, the messages go to the log."""
+    def __init__(self, logger):
+        self.logger = logger
+
+    def pushMessage(self, title, body, level=None, duration=None):
+        self.logger.info("{0}: {1}".format(title, body))
+
+class LogMessageBox(object):
+    """Stands in for QMessageBox, warnings go to the log and critical errors stop the job."""
+    logger = logging.getLogger('milkmachine')
+
+    @classmethod
+    def warning(cls, parent, title, text):
+        cls.logger.warning("{0}: {1}".format(title, text))
+
+    @classmethod
+    def critical(cls, parent, title, text):
+        raise ValueError("{0}: {1}".format(title, text))
+
+def initQgis():
+    """Starts QGIS without a GUI, once per process."""
+    global _qgs
+    if _qgs is None:
+        QgsApplication.setPrefixPath(os.environ.get('QGIS_PREFIX_PATH', '/usr/share/qgis'), True)
+        _qgs = QgsApplication([], False)
+        _qgs.initQgis()
+    return _qgs
+
+def loadSpec(path):
+    """
+    Reads a tour specification and fills in the defaults.
+
+    Returns:
+        A dictionary with the dateFormat, tour, camera, durationLimits, simplify, gxTrack and audio keys
+    """
+    with open(path, 'rb') as specfile:
+        spec = json.load(specfile)
+    tour = dict(DEFAULT_TOUR); tour.update(spec.get('tour') or {})
+    camera = dict(spec.get('camera') or {})
+    camera.setdefault('mode', 'follow')
+    if camera['mode'] == 'follow':
+        camera = dict(DEFAULT_FOLLOW, **camera)
+    if camera['mode'] not in ('follow', 'static', 'none'):
+        raise ValueError('Unknown camera mode: {0}'.format(camera['mode']))
+    simplify = spec.get('simplify') or None
+    if simplify is not None and simplify.get('method', 'douglas-peucker') not in MMSimplify.METHODS:
+        raise ValueError('Unknown simplification method: {0}'.format(simplify['method']))
+    return {
+        'dateFormat': spec.get('dateFormat', 'yyyy/mm/dd'),
+        'tour': tour,
+        'camera': camera,
+        'durationLimits': spec.get('durationLimits') or None,
+        'simplify': simplify,
+        'gxTrack': bool(spec.get('gxTrack', False)),
+        'audio': spec.get('audio') or {},
+    }
+
+def loadTrack(trackPath, dateFormat, logger):
+    """Imports a CSV, KML or GPX track into a working copy next to it, see MMImport.writeWorkingCopy, returns the QgsVectorLayer."""
+    ftype = trackPath.split(".")[-1].lower()
+    if ftype == 'csv':
+        layer = MMImport.loadCSVLayer(trackPath, logger, LogMessageBar(logger), dateFormat, None, LogMessageBox)
+    elif ftype == 'kml':
+        layer = MMImport.loadKMLLayer(trackPath, logger)
+    elif ftype == 'gpx':
+        layer = MMImport.loadGPXLayer(trackPath, logger)
+    else:
+        raise ValueError('Only .csv, .kml and .gpx tracks can be imported: {0}'.format(trackPath))
+    if layer is None or not layer.isValid():
+        raise IOError('Failed to import {0}'.format(trackPath))
+    return layer
+
+def applyCamera(layer, spec):
+    """Writes the camera and flyto attributes of the specification to every point of the layer."""
+    settings = spec['camera']
+    if settings['mode'] == 'none':
+        return
+    fields = MMImport.field_indices(layer)
+    camera = dict.fromkeys(MMCodec.CAMERA_KEYS)
+    camera.update((key, value) for key, value in settings.iteritems() if key in camera)
+    flyto = dict((key, spec['tour'][key]) for key in MMCodec.FLYTO_KEYS)
+
+    fids = []; points = []
+    for f in layer.getFeatures():
+        fids.append(f.id())
+        points.append(f.geometry().asPoint())
+    if settings['mode'] == 'follow':
+        headings = MMFollow.followHeadings([p[0] for p in points], [p[1] for p in points], int(settings['smoother']))
+
+    edit = MMEdit.BatchEdit(layer, 'Camera Editing')
+    for i, fid in enumerate(fids):
+        if settings['mode'] == 'follow':
+            camera['heading'] = round(headings[i], 1)
+            camera['longitude'] = points[i][0]; camera['latitude'] = points[i][1]
+        elif settings.get('longitude') is None or settings.get('latitude') is None:
+            camera['longitude'] = points[i][0]; camera['latitude'] = points[i][1]
+        # the lookat is emptied, a camera and a lookat conflict
+        edit.changeAttributeValues(fid, {fields['camera']: MMCodec.encode('camera', camera), fields['flyto']: MMCodec.encode('flyto', flyto), fields['lookat']: ''})
+    edit.commit()
+
+def exportTrack(trackPath, exportPath, spec, logger):
+    """Imports one track, applies the cameras and exports it. Returns the path of the export."""
+    layer = loadTrack(trackPath, spec['dateFormat'], logger)
+    applyCamera(layer, spec)
+    MMExport.exportToFile(
+        activeLayer=layer,
+        audioHREF=spec['audio'].get('href'),
+        audioOffset=spec['audio'].get('offset', 0),
+        exportPath=exportPath,
+        fields=MMImport.field_indices(layer),
+        lastDirectory=os.path.dirname(exportPath),
+        logger=logger,
+        loggerPath=None,
+        messageBar=LogMessageBar(logger),
+        durationLimits=spec['durationLimits'],
+        simplify=spec['simplify'],
+        gxtrack=spec['gxTrack']
+    )
+    return exportPath
+
+def _job(args):
+    trackPath, exportPath, spec = args
+    logger = logging.getLogger('milkmachine')
+    try:
+        initQgis()
+        return trackPath, exportTrack(trackPath, exportPath, spec, logger), None
+    except:
+        return trackPath, exportPath, traceback.format_exc()
+
+def exportPathOf(trackPath, outputDir, fmt):
+    name = os.path.splitext(os.path.basename(trackPath))[0] + '.' + fmt
+    return os.path.join(outputDir or os.path.dirname(os.path.abspath(trackPath)), name)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('spec', help='the tour specification, a JSON file')
+    parser.add_argument('tracks', nargs='+', help='the .csv, .kml or .gpx tracks to export')
+    parser.add_argument('--output-dir', help='where to write the tours, next to each track by default')
+    parser.add_argument('--format', choices=('kml', 'kmz'), default='kml', help='the export format (default kml)')
+    parser.add_argument('--jobs', type=int, default=1, help='number of tracks exported in parallel processes (default 1)')
+    parser.add_argument('--verbose', action='store_true', help='log every step, not only warnings and errors')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format='%(asctime)s - %(processName)s - %(levelname)s - %(message)s')
+    spec = loadSpec(args.spec)
+    if args.output_dir and not os.path.isdir(args.output_dir):
+        os.makedirs(args.output_dir)
+    jobs = [(os.path.abspath(track), exportPathOf(track, args.output_dir, args.format), spec) for track in args.tracks]
+
+    if args.jobs > 1:
+        pool = multiprocessing.Pool(args.jobs)
+        try:
+            results = pool.imap_unordered(_job, jobs)
+            failures = report(results)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        failures = report(_job(job) for job in jobs)
+    return 1 if failures else 0
+
+def report(results):
+    """Prints one line per finished track and the traceback of failures, returns the number of failures."""
+    failures = 0
+    for trackPath, exportPath, trace in results:
+        if trace is None:
+            print('exported {0} to {1}'.format(trackPath, exportPath))
+        else:
+            failures += 1
+            print('FAILED {0}\n{1}'.format(trackPath, trace))
+        sys.stdout.flush()
+    return failures
+
+if __name__ == '__main__':
+    sys.exit(main())
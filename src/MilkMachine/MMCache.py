@@ -0,0 +1,258 @@
+import os
+
+import numpy as np
+
+import MMProjection
+import MMTime
+import MMUtm
+
+# one row per point, in feature id order. The epoch is in microseconds since 1970/01/01 and the speed in metres per
+# second from the point before, NaN altitudes are points without one
+TRACK_DTYPE = np.dtype([('fid', '<i8'), ('lon', '<f8'), ('lat', '<f8'), ('alt', '<f8'), ('epoch', '<i8'), ('speed', '<f8')])
+SUFFIX = '.mmtrack.npy'
+
+_layers = {}
+_watched = set()
+
+def trackSpeeds(longitude, latitude, epoch):
+    """
+    Computes the speed at each point of a track from the distance and time to the point before it.
+
+    Args:
+        param1: Array of WGS84 longitudes, in track order.
+        param2: Array of WGS84 latitudes.
+        param3: Array of the times of the points in microseconds.
+
+    Returns:
+        An array of speeds in metres per second, 0 at the first point and where no time has passed
+
+    >>> longitude, latitude = MMUtm.fromUtm([500000.0, 500003.0, 500003.0], [4400000.0, 4400004.0, 4400004.0], 18, False)
+    >>> np.round(trackSpeeds(longitude, latitude, [0, 2000000, 3000000]), 6).tolist()
+    [0.0, 2.5, 0.0]
+    """
+    longitude = np.asarray(longitude, dtype=np.float64)
+    latitude = np.asarray(latitude, dtype=np.float64)
+    speeds = np.zeros(len(longitude))
+    if len(longitude) < 2:
+        return speeds
+    x, y = MMProjection.registry.zoneOf(longitude, latitude).forward(longitude, latitude)
+    seconds = np.diff(np.asarray(epoch, dtype=np.int64)) / 1e6
+    distances = np.hypot(np.diff(x), np.diff(y))
+    np.divide(distances, seconds, out=speeds[1:], where=seconds > 0)
+    return speeds
+
+def buildTrack(fids, longitude, latitude, altitude, epoch):
+    """
+    Builds the structured array of a track, sorted by feature id, with its speeds.
+
+    Args:
+        param1: Array of feature ids.
+        param2 to param5: Arrays of the longitudes, latitudes, altitudes and epoch microseconds of the features.
+
+    Returns:
+        A NumPy array of TRACK_DTYPE
+
+    >>> track = buildTrack([2, 1], [4.9, 4.9], [52.3, 52.3], [1.0, np.nan], [1000000, 0])
+    >>> track['fid'].tolist(), track['epoch'].tolist()
+    ([1, 2], [0, 1000000])
+    """
+    order = np.argsort(np.asarray(fids, dtype=np.int64), kind='mergesort')
+    track = np.zeros(len(order), dtype=TRACK_DTYPE)
+    track['fid'] = np.asarray(fids, dtype=np.int64)[order]
+    track['lon'] = np.asarray(longitude, dtype=np.float64)[order]
+    track['lat'] = np.asarray(latitude, dtype=np.float64)[order]
+    track['alt'] = np.asarray(altitude, dtype=np.float64)[order]
+    track['epoch'] = np.asarray(epoch, dtype=np.int64)[order]
+    track['speed'] = trackSpeeds(track['lon'], track['lat'], track['epoch'])
+    return track
+
+def rows(track, fids):
+    """Returns the rows of an array of feature ids in a track array, raises KeyError if one is not in the track."""
+    fids = np.asarray(fids, dtype=np.int64)
+    found = np.searchsorted(track['fid'], fids)
+    if len(track) == 0 or np.any(found >= len(track)) or np.any(track['fid'][np.minimum(found, len(track) - 1)] != fids):
+        raise KeyError('Unknown feature id in {0}'.format(fids))
+    return found
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def readTrack(layer):
+    """
+    Reads the points, altitudes and times of a track layer into a track array with a single pass over its features.
+
+    Args:
+        param1: The QgsVectorLayer holding the track, with its datetime column filled.
+
+    Returns:
+        A NumPy array of TRACK_DTYPE
+    """
+    from qgis.core import QgsFeatureRequest
+
+    idx_datetime = layer.fieldNameIndex('datetime')
+    idx_altitude = layer.fieldNameIndex('altitude')
+    request = QgsFeatureRequest().setSubsetOfAttributes([idx for idx in (idx_datetime, idx_altitude) if idx >= 0])
+    fids = []; longitude = []; latitude = []; altitude = []; values = []
+    for f in layer.getFeatures(request):
+        point = f.geometry().asPoint()
+        attributes = f.attributes()
+        fids.append(f.id()); longitude.append(point[0]); latitude.append(point[1])
+        altitude.append(_float(attributes[idx_altitude]) if idx_altitude >= 0 else np.nan)
+        values.append(attributes[idx_datetime])
+    return buildTrack(fids, longitude, latitude, altitude, MMTime.parseColumn(values))
+
+def cachePath(layer):
+    """
+    Returns the path of the sidecar cache of a layer, next to its file, or None if the layer is not read from a file.
+
+    Args:
+        param1: The QgsVectorLayer, e.g. the working copy track.gpkg, whose cache is track.mmtrack.npy.
+    """
+    if layer.providerType() != 'ogr':
+        return None
+    source = layer.source().split('|')[0]
+    if not os.path.isfile(source):
+        return None
+    return os.path.splitext(source)[0] + SUFFIX
+
+def _isFresh(path):
+    # newer than every file of the layer: the .shp, .dbf and .shx of a shapefile, the .gpkg and its journal. The
+    # shared memory index of a GeoPackage in WAL mode changes on reads too, and is left out
+    if not os.path.exists(path):
+        return False
+    stamp = os.path.getmtime(path)
+    folder, name = os.path.split(path)
+    base = name[:-len(SUFFIX)] + '.'
+    for other in os.listdir(folder or '.'):
+        if other.startswith(base) and other != name and not other.endswith('-shm') and os.path.getmtime(os.path.join(folder, other)) > stamp:
+            return False
+    return True
+
+def _save(path, track):
+    # written next to the cache and renamed over it, so that a cache is never read half written
+    partial = path + '.partial'
+    with open(partial, 'wb') as cachefile:
+        np.save(cachefile, track)
+    if os.name == 'nt' and os.path.exists(path):
+        os.remove(path)
+    os.rename(partial, path)
+
+def layerTrack(layer):
+    """
+    Returns the track array of a layer, memory mapped from its sidecar cache so that it is read without a pass over
+    the features.
+
+    The sidecar is written on the first call, and again whenever it is older than the layer's files, e.g. after an
+    edit session was saved. Edits written by MMEdit.BatchEdit are copied into it in place, see update. While the layer
+    has unsaved edits the track is read from the layer and not saved. The result is cached by layer id like
+    MMTime.layerTimes, and should be treated as read only.
+
+    Args:
+        param1: The QgsVectorLayer holding the track.
+
+    Returns:
+        A NumPy array of TRACK_DTYPE, sorted by feature id
+
+    Usage:
+        track = MMCache.layerTrack(layer)
+        selected = track[MMCache.rows(track, sorted(layer.selectedFeaturesIds()))]
+    """
+    key = layer.id()
+    track = _layers.get(key)
+    if track is None:
+        path = cachePath(layer)
+        if path is None or layer.isModified():
+            track = readTrack(layer)
+        elif _isFresh(path):
+            track = np.load(path, mmap_mode='r')
+        else:
+            track = readTrack(layer)
+            try:
+                _save(path, track)
+                track = np.load(path, mmap_mode='r')
+            except (IOError, OSError):
+                # a read only folder, the track is kept in memory
+                pass
+        _layers[key] = track
+        _watch(layer)
+    return track
+
+def _watch(layer):
+    key = layer.id()
+    if key in _watched:
+        return
+    _watched.add(key)
+
+    def forget(*args):
+        _layers.pop(key, None)
+
+    def destroyed(*args):
+        _layers.pop(key, None)
+        _watched.discard(key)
+
+    layer.layerModified.connect(forget)
+    layer.editingStopped.connect(forget)
+    layer.updatedFields.connect(forget)
+    layer.destroyed.connect(destroyed)
+
+def update(layer, attributes, geometries):
+    """
+    Copies a batch of changes written through the data provider into the sidecar cache of a layer, in place.
+
+    The datetime, altitude and geometry changes are written into the mapped rows of their features, and the speeds
+    recomputed. If the cache is not mapped, or a change can not be applied, it is dropped and rebuilt on the next read.
+
+    Args:
+        param1: The QgsVectorLayer.
+        param2: The new attributes, {fid: {field index: value}}.
+        param3: The new geometries, {fid: QgsGeometry}.
+    """
+    key = layer.id()
+    track = _layers.pop(key, None)
+    path = cachePath(layer)
+    if not isinstance(track, np.memmap) or path is None or not os.path.exists(path):
+        return
+    idx_datetime = layer.fieldNameIndex('datetime')
+    idx_altitude = layer.fieldNameIndex('altitude')
+    try:
+        writable = np.load(path, mmap_mode='r+')
+        changed = [(fid, values) for fid, values in attributes.iteritems() if idx_datetime in values or idx_altitude in values]
+        if changed:
+            fids = [fid for fid, values in changed]
+            found = rows(writable, fids)
+            for row, (fid, values) in zip(found.tolist(), changed):
+                if idx_altitude in values:
+                    writable['alt'][row] = _float(values[idx_altitude])
+            timed = [(row, values[idx_datetime]) for row, (fid, values) in zip(found.tolist(), changed) if idx_datetime in values]
+            if timed:
+                writable['epoch'][[row for row, value in timed]] = MMTime.parseColumn([value for row, value in timed])
+        if geometries:
+            found = rows(writable, list(geometries))
+            points = [geometry.asPoint() for geometry in geometries.itervalues()]
+            writable['lon'][found] = [point[0] for point in points]
+            writable['lat'][found] = [point[1] for point in points]
+        writable['speed'] = trackSpeeds(writable['lon'], writable['lat'], writable['epoch'])
+        writable.flush()
+        del writable
+        os.utime(path, None)
+    except (KeyError, ValueError, IndexError, IOError, OSError):
+        # an unknown feature or a datetime that does not parse, the cache is written again when it is next read
+        if os.path.exists(path):
+            os.utime(path, (0, 0))
+        return
+    # the read only map shares the file with the one just written
+    _layers[key] = track
+
+def invalidate(layer):
+    """Drops the cached track of a layer, and marks its sidecar as stale. Needed after adding or deleting features."""
+    _layers.pop(layer.id(), None)
+    path = cachePath(layer)
+    if path is not None and os.path.exists(path):
+        os.utime(path, (0, 0))
+
+def clearCache():
+    """Drops the cached tracks of every layer, the sidecars are left as they are."""
+    _layers.clear()
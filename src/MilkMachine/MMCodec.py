@@ -0,0 +1,145 @@
+import ast
+
+# The columns of each dictionary attribute, in the order they are encoded. Never reorder or remove a
+# column: add new ones at the end, older values simply decode them as None.
+CAMERA_KEYS = ('longitude', 'longitude_off', 'latitude', 'latitude_off', 'altitude', 'altitudemode', 'gxaltitudemode', 'gxhoriz', 'heading', 'roll', 'tilt', 'range', 'follow_angle', 'streetview', 'hoffset')
+LOOKAT_KEYS = ('longitude', 'latitude', 'altitude', 'altitudemode', 'gxaltitudemode', 'heading', 'tilt', 'range', 'duration', 'startheading', 'rotations', 'direction', 'streetview')
+FLYTO_KEYS = ('name', 'flyToMode', 'duration')
+ICONSTYLE_KEYS = ('color', 'transparency', 'colormode', 'scale', 'heading', 'icon', 'hotspot')
+LABELSTYLE_KEYS = ('color', 'colormode', 'scale')
+MODEL_KEYS = ('link', 'longitude', 'latitude', 'altitude', 'scale')
+
+SCHEMAS = {'camera': CAMERA_KEYS, 'lookat': LOOKAT_KEYS, 'flyto': FLYTO_KEYS, 'iconstyle': ICONSTYLE_KEYS, 'labelstyle': LABELSTYLE_KEYS, 'model': MODEL_KEYS}
+
+# single letter keys used to compress the camera and lookat dictionaries before MMCodec
+cameraBack = dict(zip('abcdefghijklmno', CAMERA_KEYS))
+lookatBack = dict(zip('abcdefghijklm', LOOKAT_KEYS))
+LEGACY_KEYS = {'camera': cameraBack, 'lookat': lookatBack}
+
+VERSION = 1
+HEADER = 'MM%d|' % VERSION
+SEPARATOR = '|'
+
+_cache = {}
+CACHE_SIZE = 50000
+
+def _encodeValue(value):
+    """
+    Encodes one column. None is empty, the other types are marked by their first character.
+
+    >>> [_encodeValue(v) for v in (None, u'a|b', 2.5, 3, True)]
+    ['', u'sa%7Cb', 'f2.5', 'i3', 'T']
+    """
+    if value is None:
+        return ''
+    if value is True:
+        return 'T'
+    if value is False:
+        return 'F'
+    if isinstance(value, float):
+        return 'f' + repr(value)
+    if isinstance(value, (int, long)):
+        return 'i' + str(value)
+    if not isinstance(value, basestring):
+        value = unicode(value)
+    return 's' + value.replace('%', '%25').replace(SEPARATOR, '%7C')
+
+def _decodeValue(token):
+    if not token:
+        return None
+    kind = token[0]
+    if kind == 's':
+        value = token[1:]
+        if '%' in value:
+            value = value.replace('%7C', SEPARATOR).replace('%25', '%')
+        return value
+    if kind == 'f':
+        return float(token[1:])
+    if kind == 'i':
+        return int(token[1:])
+    if kind == 'T':
+        return True
+    if kind == 'F':
+        return False
+    raise ValueError('Unknown MilkMachine attribute column: {0}'.format(token))
+
+def encode(kind, values):
+    """
+    Encodes a camera, lookat, flyto, iconstyle, labelstyle or model dictionary for the attribute table.
+
+    Args:
+        param1: The kind of dictionary, a key of SCHEMAS.
+        param2: The dictionary, with the full key names. Missing keys are stored as None.
+
+    Returns:
+        The encoded string, 'MM1|' followed by one column per key of the schema
+
+    >>> encode('flyto', {'name': u'Tour', 'flyToMode': u'smooth', 'duration': None})
+    u'MM1|sTour|ssmooth|'
+    """
+    keys = SCHEMAS[kind]
+    unknown = set(values) - set(keys)
+    if unknown:
+        raise KeyError('Unknown {0} keys: {1}'.format(kind, ', '.join(sorted(unknown))))
+    return HEADER + SEPARATOR.join(_encodeValue(values.get(key)) for key in keys)
+
+def _decodeLegacy(kind, value):
+    decoded = ast.literal_eval(value)
+    back = LEGACY_KEYS.get(kind)
+    result = dict.fromkeys(SCHEMAS[kind])
+    for key, val in decoded.iteritems():
+        result[back.get(key, key) if back else key] = val
+    return result
+
+def decode(kind, value):
+    """
+    Decodes an attribute written by encode, or by earlier versions as the str() of a dictionary.
+
+    Decoded values are cached by the raw string, so a track that repeats the same camera settings is only parsed once.
+
+    Args:
+        param1: The kind of dictionary, a key of SCHEMAS.
+        param2: The attribute value.
+
+    Returns:
+        A new dictionary with every key of the schema, or None if the attribute is empty
+
+    >>> decode('flyto', u'MM1|sTour|ssmooth|') == {'name': u'Tour', 'flyToMode': u'smooth', 'duration': None}
+    True
+    >>> decode('camera', "{'a': -75.1, 'c': 39.9, 'i': 90}")['heading']
+    90
+    """
+    if not value:
+        return None
+    try:
+        return dict(_cache[(kind, value)])
+    except KeyError:
+        pass
+    if value.startswith(HEADER):
+        keys = SCHEMAS[kind]
+        tokens = value[len(HEADER):].split(SEPARATOR)
+        result = dict.fromkeys(keys)
+        for key, token in zip(keys, tokens):
+            if token:
+                result[key] = _decodeValue(token)
+    elif value.startswith('MM'):
+        raise ValueError('Unsupported MilkMachine attribute version: {0}'.format(value[:8]))
+    else:
+        result = _decodeLegacy(kind, value)
+    if len(_cache) >= CACHE_SIZE:
+        _cache.clear()
+    _cache[(kind, value)] = result
+    return dict(result)
+
+def isEncoded(value):
+    """
+    Returns True if the attribute value holds an encoded dictionary, of this or an earlier version.
+
+    >>> isEncoded(u'MM1|sTour||'), isEncoded("{'a': 1}"), isEncoded(u'circlearound')
+    (True, True, False)
+    """
+    return bool(value) and (value.startswith(HEADER[:2]) or value[0] == '{')
+
+def clearCache():
+    """Empties the decode cache."""
+    _cache.clear()
@@ -0,0 +1,161 @@
+import MMCache
+import MMTime
+
+from PyQt4.QtGui import QUndoCommand
+
+from qgis.core import QgsFeatureRequest, QgsGeometry, QgsVectorDataProvider
+
+def _write(layer, attributes, geometries):
+    provider = layer.dataProvider()
+    if attributes and not provider.changeAttributeValues(attributes):
+        raise IOError('Failed to write the attributes of {0} features to {1}'.format(len(attributes), layer.name()))
+    if geometries:
+        if not provider.changeGeometryValues(geometries):
+            raise IOError('Failed to write the geometries of {0} features to {1}'.format(len(geometries), layer.name()))
+        layer.updateExtents()
+    MMCache.update(layer, attributes, geometries)
+    MMTime.invalidate(layer)
+    layer.triggerRepaint()
+
+
+class BatchEditCommand(QUndoCommand):
+    """
+    An undo command that writes a batch of attribute and geometry changes straight to the data provider of a layer.
+
+    Args:
+        param1: The QgsVectorLayer.
+        param2: The text of the command, shown in the undo history.
+        param3: The new attributes, {fid: {field index: value}}.
+        param4: The new geometries, {fid: QgsGeometry}.
+        param5: The attributes to restore on undo, in the same form.
+        param6: The geometries to restore on undo.
+    """
+    def __init__(self, layer, text, attributes, geometries, oldAttributes, oldGeometries):
+        QUndoCommand.__init__(self, text)
+        self.layer = layer
+        self.attributes = attributes
+        self.geometries = geometries
+        self.oldAttributes = oldAttributes
+        self.oldGeometries = oldGeometries
+        self.written = False
+
+    def redo(self):
+        # QUndoStack.push calls redo, skip it when the batch has just been written
+        if self.written:
+            self.written = False
+            return
+        _write(self.layer, self.attributes, self.geometries)
+
+    def undo(self):
+        _write(self.layer, self.oldAttributes, self.oldGeometries)
+
+
+class BatchEdit(object):
+    """
+    Collects attribute and geometry changes for a layer and writes them in one call to its data provider.
+
+    Changing features one value at a time through the layer's edit buffer creates an undo command and a round of
+    signals per value, which freezes QGIS for minutes on large selections. A batch is written as a single
+    BatchEditCommand instead. While the layer is being edited the command goes on the layer's undo stack, so the
+    whole batch can be undone and redone like any other edit. The changes go to the data source right away, but
+    rolling back the edit session unwinds the undo stack and so reverts them too.
+
+    The changes go through the edit buffer instead, as a single edit command, when the provider can not change
+    attributes or geometries, or when the buffer holds edits of its own to any of the batch's features: added or
+    deleted features, or changes that would hide the batch and overwrite it when the edits are saved.
+
+    Args:
+        param1: The QgsVectorLayer.
+        param2: The text of the edit command, e.g. 'Camera Editing'.
+
+    Usage:
+        edit = MMEdit.BatchEdit(layer, 'Camera Editing')
+        for fid in fids:
+            edit.changeAttributeValue(fid, fields['camera'], value)
+        edit.commit()
+    """
+    def __init__(self, layer, text):
+        self.layer = layer
+        self.text = text
+        self.attributes = {}
+        self.geometries = {}
+
+    def __len__(self):
+        return len(set(self.attributes) | set(self.geometries))
+
+    def changeAttributeValue(self, fid, field, value):
+        """Sets the value of one field of a feature, like QgsVectorLayer.changeAttributeValue."""
+        self.attributes.setdefault(fid, {})[field] = value
+
+    def changeAttributeValues(self, fid, values):
+        """Sets several fields of a feature from a {field index: value} dictionary."""
+        self.attributes.setdefault(fid, {}).update(values)
+
+    def changeGeometry(self, fid, geometry):
+        """Replaces the geometry of a feature, like QgsVectorLayer.changeGeometry."""
+        self.geometries[fid] = geometry
+
+    def _currentValues(self):
+        fields = set()
+        for values in self.attributes.itervalues():
+            fields.update(values)
+        request = QgsFeatureRequest().setSubsetOfAttributes(sorted(fields))
+        if not self.geometries:
+            request.setFlags(QgsFeatureRequest.NoGeometry)
+
+        oldAttributes = {}; oldGeometries = {}
+        for f in self.layer.dataProvider().getFeatures(request):
+            fid = f.id()
+            if fid in self.attributes:
+                attributes = f.attributes()
+                oldAttributes[fid] = dict((field, attributes[field]) for field in self.attributes[fid])
+            if fid in self.geometries:
+                oldGeometries[fid] = QgsGeometry(f.geometry())
+        return oldAttributes, oldGeometries
+
+    def _pendingInBuffer(self):
+        # True if the edit buffer has uncommitted edits of any feature in the batch
+        if not self.layer.isEditable():
+            return False
+        buffer = self.layer.editBuffer()
+        fids = set(self.attributes) | set(self.geometries)
+        pending = set(buffer.addedFeatures()) | set(buffer.deletedFeatureIds()) | set(buffer.changedAttributeValues()) | set(buffer.changedGeometries())
+        return any(fid < 0 for fid in fids) or not fids.isdisjoint(pending)
+
+    def _commitToEditBuffer(self):
+        self.layer.beginEditCommand(self.text)
+        try:
+            for fid, values in self.attributes.iteritems():
+                for field, value in values.iteritems():
+                    self.layer.changeAttributeValue(fid, field, value)
+            for fid, geometry in self.geometries.iteritems():
+                self.layer.changeGeometry(fid, geometry)
+        except:
+            self.layer.destroyEditCommand()
+            raise
+        self.layer.endEditCommand()
+
+    def commit(self):
+        """
+        Writes the collected changes and empties the batch.
+
+        Returns:
+            The BatchEditCommand, or None if there was nothing to write or the edit buffer was used
+        """
+        command = None
+        if self.attributes or self.geometries:
+            capabilities = self.layer.dataProvider().capabilities()
+            if (self.attributes and not capabilities & QgsVectorDataProvider.ChangeAttributeValues) or \
+                    (self.geometries and not capabilities & QgsVectorDataProvider.ChangeGeometries) or self._pendingInBuffer():
+                self._commitToEditBuffer()
+            else:
+                oldAttributes, oldGeometries = self._currentValues()
+                command = BatchEditCommand(self.layer, self.text, self.attributes, self.geometries, oldAttributes, oldGeometries)
+                # written here rather than by the undo stack, so that a failure reaches the caller
+                command.redo()
+                if self.layer.isEditable():
+                    command.written = True
+                    self.layer.undoStack().push(command)
+        self.attributes = {}
+        self.geometries = {}
+        return command
@@ -1,12 +1,24 @@
 import datetime
-import decimal
+import itertools
 import math
 import os
+
+import numpy as np
+
+import MMTrack
+import MMProjection
+import MMSimplify
 import simplekml
 
-from qgis.core import QgsCoordinateReferenceSystem, QgsCoordinateTransform, QgsPoint, QgsVectorFileWriter
+from qgis.core import QgsVectorFileWriter
 from qgis.gui import QgsMessageBar
 
+# writeKml reports its progress every PROGRESS_ROWS features
+PROGRESS_ROWS = 1000
+
+class ExportCancelled(Exception):
+    """Raised by a writeKml progress callback to stop the export."""
+
 def wgs84LatLonToUTMZone(latitude, longitude):
     """
     Finds the UTM zone which contains the given WGS84 point.
@@ -66,669 +78,437 @@ def makeCoordinateReferenceSystem(latitude, utmZone):
     >>> makeCoordinateReferenceSystem(13.41250188, 21442) is None
     True
     """
-    crs = QgsCoordinateReferenceSystem()
-    proj4String = "+proj=utm +ellps=WGS84 +datum=WGS84 +units=m +zone=%s" % utmZone
-    if latitude < 0:
-        proj4String += " +south"
-    result = crs.createFromProj4(proj4String)
-    return crs if result and crs.isValid() else None
-
-def exportToFile(activeLayer, audioHREF, audioOffset, exportPath, fields, lastDirectory, logger, loggerPath, messageBar):
-    cc = 0
-    kml = simplekml.Kml()
-    camStartTime = 0
-
-    featureIds = activeLayer.allFeatureIds()
-    features = list(activeLayer.getFeatures())
-
-    # run through the datetime field and get all of the durations. these will be used for FlyTo durations
-    allfids = featureIds
-    endRow = len(allfids) - 1
-    ttcount = 0
-    time1 = []
-    for fg in features: #  QgsFeatureIterator #[u'2014/06/06 10:38:48', u'Time:10:38:48, Latitude: 39.965949, Longitude: -75.172239, Speed: 0.102851, Altitude: -3.756733']
-        currentatt = fg.attributes()
-        # Start time. Will be used for TimeSpan tags
-        pointdate = currentatt[fields['datetime']].split(" ")[0]  #2014/06/06
-        pointtime = currentatt[fields['datetime']].split(" ")[1] #10:38:48
-        try:
-            pointtime_ms = currentatt[fields['datetime']].split(" ")[2]  # microsecond range(1000000)
-        except:
-            pointtime_ms = 0
-        current_dt = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]), int(pointtime_ms))
-        # time1.append(current_dt.second + round(current_dt.microsecond/float(1000000),6))
-        time1.append(current_dt)
-    # logger.info('time1: %s' % time1)
-    # iterate time1 and calculate the durations
-    Durations = []
-    for iii, vvv in enumerate(time1):
-        tdobj = time1[iii+1] - vvv
-        # durstring = str(tdobj.seconds) + '.' + str(tdobj.microseconds/float(1000000)).split('.')[1]
-        dur = tdobj.seconds + decimal.Decimal(tdobj.microseconds/float(1000000))
-        durstring = format(dur, '.6f')
-        Durations.append(durstring)
-        logger.info('start: {0}, end: {1}, diff: {2}'.format(vvv, time1[iii+1], durstring))
-        if (iii+1) == endRow:
-            Durations.append(durstring)
-            break
-    # logger.info('Durations: %s' % Durations)
-    # logger.info('Len Durations: %s' % len(Durations))
-
-    #################################
-    ## Tour and Camera
-    globalcounter = 0
-    for f in features: #  QgsFeatureIterator #[u'2014/06/06 10:38:48', u'Time:10:38:48, Latitude: 39.965949, Longitude: -75.172239, Speed: 0.102851, Altitude: -3.756733']
-        currentatt = f.attributes()
-
-        if currentatt[fields['lookat']] and currentatt[fields['lookat']] != 'circlearound':
-            lookatBack = {'a':'longitude','b' :'latitude','c' :'altitude','d' :'altitudemode','e':'gxaltitudemode','f':'heading','g':'tilt','h' :'range','i' :'duration','j' :'startheading', 'k': 'rotations', 'l': 'direction', 'm': 'streetview'}
-            lookat = eval(currentatt[fields['lookat']])
-            #convert back to full format
-            newlookat = {}
-            for kk,vv in lookat.iteritems():
-                newlookat[lookatBack[kk]] = vv
-            lookatdict = newlookat
-
-            flytodict = eval(currentatt[fields['flyto']])
-
-            if cc == 0:
-
-                # First, put in a <Camera> that matches the same <Camera> at the beginning of the tour, that
-                # there is no strange camera movement at the beginning.
+    return MMProjection.registry.get(utmZone, latitude < 0).crs()
 
-                #firstcam_pnt = kml.newpoint()
-                kml.document.lookat = simplekml.LookAt()
+altitudeModes = {'absolute': simplekml.AltitudeMode.absolute, 'clampToGround': simplekml.AltitudeMode.clamptoground,
+                 'relativeToGround': simplekml.AltitudeMode.relativetoground, 'relativeToPoint': simplekml.AltitudeMode.relativetoground,
+                 'relativeToModel': simplekml.AltitudeMode.relativetoground}
+gxAltitudeModes = {'clampToSeaFloor': simplekml.GxAltitudeMode.clampToSeaFloor, 'relativeToSeaFloor': simplekml.GxAltitudeMode.relativetoseafloor}
 
+def transtokmlhex(trans):
+    dec = int(float(trans) * 2.55)
+    if dec < 10:
+        return '0' + str(dec)
+    else:
+        return str(hex(dec)[2:4])
 
-                # Create a tour and attach a playlist to it
-                if flytodict['name']:
-                    tour = kml.newgxtour(name=flytodict['name'])
-                else:
-                    tour = kml.newgxtour(name="Tour")
-
-                playlist = tour.newgxplaylist()
+def flyToDurations(epoch, minimum=0.0, maximum=None, gap=None, logger=None):
+    """
+    Calculates the FlyTo durations from the timestamps of a track.
 
-                # Start time. Will be used for TimeSpan tags
-                pointdate = currentatt[fields['datetime']].split(" ")[0]  #2014/06/06
-                pointtime = currentatt[fields['datetime']].split(" ")[1] #10:38:48
-                try:
-                    pointtime_ms = currentatt[fields['datetime']].split(" ")[2]  # microsecond range(1000000)
-                except:
-                    pointtime_ms = 0
-                current_dt = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]), int(pointtime_ms))
-                camStartTime = current_dt.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+    Args:
+        param1: A NumPy int64 array of microseconds since the epoch.
+        param2: The shortest duration in seconds. Shorter steps, and the negative ones of points out of order, are raised to it (default 0).
+        param3: The longest duration in seconds, longer steps are lowered to it (default None, no limit).
+        param4: Steps longer than this many seconds are gaps in the recording, e.g. a paused GPS, and take the median step instead (default None, no gaps).
+        param5: A logger for a one line summary of the durations.
 
-                # Attach a gx:SoundCue to the playlist and delay playing by 2 second (sound clip is about 4 seconds long)
-                if audioHREF:
-                    soundcue = playlist.newgxsoundcue()
-                    soundcue.href = audioHREF
-                    soundcue.gxdelayedstart = audioOffset
+    Returns:
+        A NumPy float array of seconds between each point and the next. The last point repeats the previous duration.
+    """
+    if len(epoch) < 2:
+        return np.zeros(len(epoch))
+    durations = np.diff(epoch) / 1000000.0
+
+    gaps = np.zeros(len(durations), dtype=bool)
+    if gap is not None:
+        gaps = durations > gap
+        if gaps.any():
+            durations[gaps] = np.median(durations[~gaps]) if not gaps.all() else gap
+    upper = maximum if maximum is not None else np.inf
+    clamped = np.count_nonzero((durations < minimum) | (durations > upper))
+    durations = np.clip(durations, minimum, upper)
+
+    if logger:
+        logger.info('flyToDurations: {0} points, {1:.6f}/{2:.6f}/{3:.6f} s min/median/max, {4} gaps, {5} clamped'.format(
+            len(epoch), durations.min(), np.median(durations), durations.max(), np.count_nonzero(gaps), clamped))
+    return np.append(durations, durations[-1])
+
+def cameraCoordinates(track):
+    """
+    Calculates the longitude and latitude of every camera of a track, applying the UTM offset or range/heading placements.
 
+    The cameras that need placing are projected to their UTM zones, moved and projected back as whole arrays
+    with the shared MMProjection registry instead of one pair of QgsCoordinateTransforms per point.
 
-                cc += 1
+    Args:
+        param1: A MMTrack.TrackColumns snapshot.
 
+    Returns:
+        A list with one entry per feature, a tuple of the camera longitude and latitude,
+        or None if the feature has no camera coordinates
+    """
+    coordinates = [None] * len(track)
+    rows = []; longitudes = []; latitudes = []; dx = []; dy = []
+    for row, cameradict in enumerate(track.camera):
+        if not cameradict or not (cameradict['longitude'] and cameradict['latitude']):
+            continue
+        if cameradict['longitude_off'] or cameradict['latitude_off']: # If there is an offset
+            dx.append(float(cameradict['longitude_off']) if cameradict['longitude_off'] else 0.0)
+            dy.append(float(cameradict['latitude_off']) if cameradict['latitude_off'] else 0.0)
+
+        elif cameradict['range'] and cameradict['heading'] and cameradict['altitude']:
+            if cameradict['follow_angle']:
+                follow_angle = math.radians(float(cameradict['follow_angle']))
+            else:
+                follow_angle = math.pi
+            opp_rad = (math.radians(float(cameradict['heading'])) + follow_angle) % (2*math.pi) #opposite angle in radians from the heading. So you can calculate the direction whre the camerea should be placed
+
+            if cameradict['altitudemode'] == 'relativeToModel':
+                camaltitude = float(cameradict['altitude']) - float(track.model[row]['altitude'])
+            else:
+                camaltitude = float(cameradict['altitude'])
+            leg_distance = math.sqrt( float(cameradict['range'])**2 - camaltitude**2 ) # horizontal distance between the camera at altiduce and the range
+
+            dx.append(math.sin(opp_rad) * leg_distance)
+            dy.append(math.cos(opp_rad) * leg_distance)
+
+        else:
+            coordinates[row] = (cameradict['longitude'], cameradict['latitude'])
+            continue
+        rows.append(row)
+        longitudes.append(float(cameradict['longitude']))
+        latitudes.append(float(cameradict['latitude']))
+
+    if rows:
+        longitudes = np.array(longitudes)
+        latitudes = np.array(latitudes)
+        eastings, northings, zones, south = MMProjection.registry.forward(longitudes, latitudes)
+        longitudes, latitudes = MMProjection.registry.inverse(eastings + np.array(dx), northings + np.array(dy), zones, south)
+        for row, longitude, latitude in itertools.izip(rows, longitudes.tolist(), latitudes.tolist()):
+            coordinates[row] = (longitude, latitude)
+    return coordinates
+
+def lookatFlyTos(lookatdict, flytodict, camStartTime, camEndTime, startDatetime):
+    """
+    Builds the gx:FlyTo elements for a feature with a LookAt.
 
-            ##########################################
-            ##########################################
+    Args:
+        param1: The decoded lookat dictionary.
+        param2: The decoded flyto dictionary.
+        param3: The KML time string the tour started at.
+        param4: The KML time string of this feature.
+        param5: The datetime of this feature, used to step the TimeSpans of a circle around.
 
-            # Start time. Will be used for TimeSpan tags
-            pointdate = currentatt[fields['datetime']].split(" ")[0]  #2014/06/06
-            pointtime = currentatt[fields['datetime']].split(" ")[1] #10:38:48
-            try:
-                pointtime_ms = currentatt[fields['datetime']].split(" ")[2]  # microsecond range(1000000)
-            except:
-                pointtime_ms = 0
-            current_dt_end = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]), int(pointtime_ms)) #+ datetime.timedelta(seconds=5)
-            camendtime = current_dt_end.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
-
-            ## Cirle Around
-            if lookatdict['startheading'] and lookatdict['rotations']:  # lookatdict['duration']  this is for a circle around
-                if lookatdict['longitude'] and lookatdict['latitude'] and lookatdict['altitude'] and lookatdict['tilt'] and lookatdict['range']:
-                    circle_count = int(float(lookatdict['rotations']))
-                    if circle_count > 1:
-                        divisor = 36  #36
-                        bottomnum = (divisor+1) + ((circle_count-1)*divisor)
-                        duration = (float(lookatdict['duration']))/bottomnum
-                        timsspanDur = (float(lookatdict['duration']))/(circle_count * divisor)
-                        #duration = (float(lookatdict['duration']))/(circle_count * divisor)
-                    else:
-                        divisor = 36
-                        duration = (float(lookatdict['duration']))/(circle_count * (divisor+1))
-                        timsspanDur = (float(lookatdict['duration']))/(circle_count * divisor)
-                    timekeeper = current_dt_end
-
-                    # Loop through Circle Count
-                    for x in range(circle_count):
-                        # Define the initial heading based on current heading
-                        if x == 0:
-                            heading = float(lookatdict['startheading'])
-                            divisor = 37
-                        else:
-                            divisor = 36
-                        # 360 Degrees/10 = 36 intervals to iterate through
-##                                if x == range(circle_count)[-1]:
-##                                    divisor = 37
-                        for y in range(divisor):
-                            # New Fly To
-                            flyto = playlist.newgxflyto(gxduration=duration)
-                            if flytodict['flyToMode']:
-                                flyto.gxflytomode = flytodict['flyToMode']
-                            flyto.lookat.latitude = lookatdict['latitude']
-                            flyto.lookat.longitude = lookatdict['longitude']
-                            flyto.lookat.altitude =  lookatdict['altitude']
-                            if lookatdict['altitudemode'] == 'absolute':
-                                flyto.lookat.altitudemode = simplekml.AltitudeMode.absolute
-                            if lookatdict['altitudemode'] == 'clampToGround':
-                                flyto.lookat.altitudemode = simplekml.AltitudeMode.clamptoground
-                            if lookatdict['altitudemode'] == 'relativeToGround':
-                                flyto.lookat.altitudemode = simplekml.AltitudeMode.relativetoground
-                            if lookatdict['altitudemode'] == 'relativeToPoint':
-                                flyto.lookat.altitudemode = simplekml.AltitudeMode.relativetoground
-                            if lookatdict['altitudemode'] == 'relativeToModel':
-                                flyto.lookat.altitudemode = simplekml.AltitudeMode.relativetoground
-                            flyto.lookat.tilt = lookatdict['tilt']
-                            flyto.lookat.range = lookatdict['range']
-                            flyto.lookat.heading = heading
-
-                            # Time Span
-                            flyto.lookat.gxtimespan.begin = camStartTime
-                            flyto.lookat.gxtimespan.end = timekeeper.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
-
-                            timekeeper = timekeeper + datetime.timedelta(seconds = timsspanDur)
-
-                            # adjust the heading by 10 degrees
-                            if lookatdict['direction'] == 'clockwise':
-                                heading = (heading + 10) % 360
-                            if lookatdict['direction'] == 'counterclockwise':
-                                heading = (heading - 10) % 360
-
-            ## LookAt Custom
-            else:  # non circle around, just custom
-                if lookatdict['longitude'] and lookatdict['latitude'] and lookatdict['altitude'] and lookatdict['heading'] and lookatdict['tilt'] and lookatdict['range']:
-                    if flytodict['duration']:
-                        flyto = playlist.newgxflyto(gxduration=float(flytodict['duration']))
-                    else:
-                        flyto = playlist.newgxflyto()
+    Returns:
+        A list of simplekml.GxFlyTo, one for a custom LookAt or one per 10 degrees of a circle around
+    """
+    flytos = []
+    ## Cirle Around
+    if lookatdict['startheading'] and lookatdict['rotations']:  # lookatdict['duration']  this is for a circle around
+        if lookatdict['longitude'] and lookatdict['latitude'] and lookatdict['altitude'] and lookatdict['tilt'] and lookatdict['range']:
+            circle_count = int(float(lookatdict['rotations']))
+            if circle_count > 1:
+                divisor = 36  #36
+                bottomnum = (divisor+1) + ((circle_count-1)*divisor)
+                duration = (float(lookatdict['duration']))/bottomnum
+                timsspanDur = (float(lookatdict['duration']))/(circle_count * divisor)
+            else:
+                divisor = 36
+                duration = (float(lookatdict['duration']))/(circle_count * (divisor+1))
+                timsspanDur = (float(lookatdict['duration']))/(circle_count * divisor)
+            timekeeper = startDatetime
+
+            # Loop through Circle Count
+            for x in range(circle_count):
+                # Define the initial heading based on current heading
+                if x == 0:
+                    heading = float(lookatdict['startheading'])
+                    divisor = 37
+                else:
+                    divisor = 36
+                # 360 Degrees/10 = 36 intervals to iterate through
+                for y in range(divisor):
+                    # New Fly To
+                    flyto = simplekml.GxFlyTo(gxduration=duration)
                     if flytodict['flyToMode']:
                         flyto.gxflytomode = flytodict['flyToMode']
-                    flyto.lookat.longitude = lookatdict['longitude']
                     flyto.lookat.latitude = lookatdict['latitude']
-                    flyto.lookat.altitude = lookatdict['altitude']
-                    if lookatdict['altitudemode'] == 'absolute':
-                        flyto.lookat.altitudemode = simplekml.AltitudeMode.absolute
-                    if lookatdict['altitudemode'] == 'clampToGround':
-                        flyto.lookat.altitudemode = simplekml.AltitudeMode.clamptoground
-                    if lookatdict['altitudemode'] == 'relativeToGround':
-                        flyto.lookat.altitudemode = simplekml.AltitudeMode.relativetoground
-                    if lookatdict['altitudemode'] == 'relativeToPoint':
-                        flyto.lookat.altitudemode = simplekml.AltitudeMode.relativetoground
-                    if lookatdict['altitudemode'] == 'relativeToModel':
-                        flyto.lookat.altitudemode = simplekml.AltitudeMode.relativetoground
-                    flyto.lookat.heading = lookatdict['heading']
+                    flyto.lookat.longitude = lookatdict['longitude']
+                    flyto.lookat.altitude =  lookatdict['altitude']
+                    if lookatdict['altitudemode'] in altitudeModes:
+                        flyto.lookat.altitudemode = altitudeModes[lookatdict['altitudemode']]
                     flyto.lookat.tilt = lookatdict['tilt']
                     flyto.lookat.range = lookatdict['range']
-                    if lookatdict['gxaltitudemode']:
-                        flyto.lookat.gxaltitudemode = lookatdict['gxaltitudemode']
+                    flyto.lookat.heading = heading
+
                     # Time Span
                     flyto.lookat.gxtimespan.begin = camStartTime
-                    flyto.lookat.gxtimespan.end = camendtime
-
-
-
-            if cc == 1:  # this is the first thing, not camera
-                kml.document.lookat = flyto.lookat
-                if lookatdict['streetview']:
-                    kml.document.lookat.gxvieweroptions.newgxoption(name=simplekml.GxOption.streetview)
-
-            cc+=1
-
-
-        if currentatt[fields['camera']]:
-                # camera = {'longitude': None, 'longitude_off': None, 'latitude': None, 'latitude_off': None,
-                # 'altitude' : None, 'altitudemode': None,'gxaltitudemode' : None,'gxhoriz' : None,
-                # 'heading' : None,'roll' : None,'tilt' : None}
-
-            if cc == 0:  # establish this as the start of the tour
-                camera = eval(currentatt[fields['camera']])
-                cameraBack = {'a': 'longitude', 'b': 'longitude_off','c': 'latitude','d': 'latitude_off','e': 'altitude' ,'f': 'altitudemode', 'g': 'gxaltitudemode' ,'h': 'gxhoriz' ,'i': 'heading' ,'j': 'roll' ,'k': 'tilt' ,'l': 'range','m': 'follow_angle', 'n': 'streetview', 'o': 'hoffset'}
-
-                #convert back to full format
-                newcam = {}
-                for kk,vv in camera.iteritems():
-                    newcam[cameraBack[kk]] = vv
-                cameradict = newcam
-
-                flytodict = eval(currentatt[fields['flyto']])
-
-                # First, put in a <Camera> that matches the same <Camera> at the beginning of the tour, that
-                # there is no strange camera movement at the beginning.
-
-                #firstcam_pnt = kml.newpoint()
-                kml.document.camera = simplekml.Camera()
-
-
-                # Create a tour and attach a playlist to it
-                if flytodict['name']:
-                    tour = kml.newgxtour(name=flytodict['name'])
-                else:
-                    tour = kml.newgxtour(name="Tour")
-
-                playlist = tour.newgxplaylist()
-
-                # Start time. Will be used for TimeSpan tags
-                pointdate = currentatt[fields['datetime']].split(" ")[0]  #2014/06/06
-                pointtime = currentatt[fields['datetime']].split(" ")[1] #10:38:48
-                try:
-                    pointtime_ms = currentatt[fields['datetime']].split(" ")[2]  # microsecond range(1000000)
-                except:
-                    pointtime_ms = 0
-                current_dt = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]) )
-                current_dt_end = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]), int(pointtime_ms)) #+ datetime.timedelta(seconds=5)
-                camStartTime = current_dt.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
-                camendtime = current_dt_end.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
-
-
-                # Attach a gx:SoundCue to the playlist and delay playing by 2 second (sound clip is about 4 seconds long)
-                if audioHREF:
-                    soundcue = playlist.newgxsoundcue()
-                    soundcue.href = audioHREF
-                    soundcue.gxdelayedstart = audioOffset
-
-
-                if flytodict['duration']:
-                    flyto = playlist.newgxflyto(gxduration=float(flytodict['duration']))
-                elif flytodict['duration'] is None:
-                    flyto = playlist.newgxflyto(gxduration=float(Durations[globalcounter]))
-
-                else:
-                    flyto = playlist.newgxflyto()
-                if flytodict['flyToMode']:
-                    flyto.gxflytomode = flytodict['flyToMode']
-
-
-
-
-                if cameradict['longitude'] and cameradict['latitude']:
-                    if cameradict['longitude_off'] or cameradict['latitude_off']: # If there is an offset
-                        longitude = float(cameradict['longitude'])
-                        latitude = float(cameradict['latitude'])
-                        zone, band = wgs84LatLonToUTMZone(latitude, longitude)
-
-                        crsSrc = QgsCoordinateReferenceSystem(4326)    # WGS 84
-                        crsDest = makeCoordinateReferenceSystem(latitude, zone)
-                        xform = QgsCoordinateTransform(crsSrc, crsDest)
-                        xform2 = QgsCoordinateTransform(crsDest, crsSrc)
-
-                        utmpt = xform.transform(QgsPoint(longitude, latitude))
-                        utmptlist = [utmpt[0], utmpt[1]]
-                        # now add the utm point to the new feature
-                        if cameradict['longitude_off']:
-                            utmptlist[0] = float(utmpt[0]) + float(cameradict['longitude_off'])
-                        if cameradict['latitude_off']:
-                            utmptlist[1] = float(utmpt[1]) + float(cameradict['latitude_off'])
-
-                        offsetpt = xform2.transform(QgsPoint(utmptlist[0],utmptlist[1]))
-
-                        #firstcam_pnt.camera.longitude = offsetpt[0]
-                        #firstcam_pnt.camera.latitude = offsetpt[1]
-
-                        flyto.camera.longitude = offsetpt[0]
-                        flyto.camera.latitude = offsetpt[1]
-
-                    elif cameradict['range'] and cameradict['heading'] and cameradict['altitude']:
-                        longitude = float(cameradict['longitude'])
-                        latitude = float(cameradict['latitude'])
-                        zone, band = wgs84LatLonToUTMZone(latitude, longitude)
-
-                        crsSrc = QgsCoordinateReferenceSystem(4326)    # WGS 84
-                        crsDest = makeCoordinateReferenceSystem(latitude, zone)
-                        xform = QgsCoordinateTransform(crsSrc, crsDest)
-                        xform2 = QgsCoordinateTransform(crsDest, crsSrc)
-
-                        utmpt = xform.transform(QgsPoint(longitude, latitude))
-                        utmptlist = [utmpt[0], utmpt[1]]  # x,y utm
-
-                        if cameradict['follow_angle']:
-                            follow_angle = math.radians(float(cameradict['follow_angle']))
-                            # now you need to change heading. It should be rotated
-                        else:
-                            follow_angle = math.pi
-                        opp_rad = (math.radians(float(cameradict['heading'])) + follow_angle) % (2*math.pi) #opposite angle in radians
-                        #leg_distance = float(cameradict['range']) * sin(float(cameradict['tilt']))
-
-                        if cameradict['altitudemode'] == 'relativeToModel':
-                            modeldict = eval(currentatt[fields['model']])
-                            camaltitude = float(cameradict['altitude']) - float(modeldict['altitude'])
-                        else:
-                            camaltitude = float(cameradict['altitude'])
-
-                        leg_distance = math.sqrt( float(cameradict['range'])**2 - camaltitude**2 ) # horizontal distance between the camera at altiduce and the range
-                        heading_rad = math.radians(float(cameradict['heading']))
-                        x_dist = math.sin(opp_rad) * leg_distance
-                        y_dist = math.cos(opp_rad) * leg_distance
-
-                        utm_camera = ((utmpt[0] + x_dist), (utmpt[1] + y_dist))
-                        wgs_camera = xform2.transform(QgsPoint(utm_camera[0], utm_camera[1]))
-
-                        flyto.camera.longitude = wgs_camera[0]
-                        flyto.camera.latitude = wgs_camera[1]
-
-                        # camera tilt
-
-
-                    else:
-                        flyto.camera.longitude = cameradict['longitude']
-                        flyto.camera.latitude = cameradict['latitude']
-##                        if cameradict['latitude']:
-##                            ifcameradict['latitude_off']:
-##                                pass
-##                            else:
-##                                flyto.camera.latitude = cameradict['latitude']
-                if cameradict['altitude']:
-                    flyto.camera.altitude = cameradict['altitude']
-                if cameradict['altitudemode']:
-                    if cameradict['altitudemode'] == 'absolute':
-                        flyto.camera.altitudemode = simplekml.AltitudeMode.absolute
-                    if cameradict['altitudemode'] == 'clampToGround':
-                        flyto.camera.altitudemode = simplekml.AltitudeMode.clamptoground
-                    if cameradict['altitudemode'] == 'relativeToGround':
-                        flyto.camera.altitudemode = simplekml.AltitudeMode.relativetoground
-                    if cameradict['altitudemode'] == 'relativeToPoint':
-                        flyto.camera.altitudemode = simplekml.AltitudeMode.relativetoground
-                    if cameradict['altitudemode'] == 'relativeToModel':
-                        flyto.camera.altitudemode = simplekml.AltitudeMode.relativetoground
-
-##                        if cameradict['altitude']:
-##                            if cameradict['altitudemode'] == 'relativeToPoint':
-##                                flyto.camera.altitude = cameradict['altitude'] +
-##                            if cameradict['altitudemode'] == 'relativeToModel':
-##
-##                                flyto.camera.altitude = cameradict['altitude'] +
-##
-##                                loc.altitude = currentatt[fields['Descriptio']].split(",")[4].split(': ')[1]  #u'-3.756733'
-
-                if cameradict['gxaltitudemode']:
-                    if cameradict['gxaltitudemode'] == 'clampToSeaFloor':
-                        flyto.camera.gxaltitudemode = simplekml.GxAltitudeMode.clampToSeaFloor
-                    if cameradict['gxaltitudemode'] == 'relativeToSeaFloor':
-                        flyto.camera.gxaltitudemode = simplekml.GxAltitudeMode.relativetoseafloor
-                if cameradict['gxhoriz']:
-                    flyto.camera.gxhoriz = cameradict['gxhoriz']
-                if cameradict['heading']:
-                    if cameradict['follow_angle']:
-                        newhead = math.degrees((math.radians(float(cameradict['heading'])) + follow_angle + math.pi) % (2 * math.pi))
-                        if cameradict['hoffset']:
-                            flyto.camera.heading = round((newhead + float(cameradict['hoffset'])) % 360, 1)
-                        else:
-                            flyto.camera.heading = newhead
-                    else:
-                        flyto.camera.heading = cameradict['heading']
-                if cameradict['roll']:
-                    flyto.camera.roll = cameradict['roll']
-                if cameradict['tilt']:
-                    flyto.camera.tilt = cameradict['tilt']
-
-                # Time Span
-                flyto.camera.gxtimespan.begin = camStartTime
-                flyto.camera.gxtimespan.end = camendtime
-
-
-                #firstcam_pnt.camera = flyto.camera
-                kml.document.camera = flyto.camera
-                if cameradict['streetview']:
-                    kml.document.camera.gxvieweroptions.newgxoption(name=simplekml.GxOption.streetview)
-
-                cc += 1
-
-            else:  # everything after zero camera
-                camera = eval(currentatt[fields['camera']])
-                cameraBack = {'a': 'longitude', 'b': 'longitude_off','c': 'latitude','d': 'latitude_off','e': 'altitude' ,'f': 'altitudemode', 'g': 'gxaltitudemode' ,'h': 'gxhoriz' ,'i': 'heading' ,'j': 'roll' ,'k': 'tilt' ,'l': 'range','m': 'follow_angle', 'n': 'streetview', 'o': 'hoffset'}
-
-
-                #convert back to full format
-                newcam = {}
-                for kk,vv in camera.iteritems():
-                    newcam[cameraBack[kk]] = vv
-                cameradict = newcam
-                flytodict = eval(currentatt[fields['flyto']])
-
-                # Start time. Will be used for TimeSpan tags
-                pointdate = currentatt[fields['datetime']].split(" ")[0]  #2014/06/06
-                pointtime = currentatt[fields['datetime']].split(" ")[1] #10:38:48
-                try:
-                    pointtime_ms = currentatt[fields['datetime']].split(" ")[2]  # microsecond range(1000000)
-                except:
-                    pointtime_ms = 0
-                current_dt_end = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]), int(pointtime_ms))# + datetime.timedelta(seconds=5)
-                camendtime = current_dt_end.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
-
-                if flytodict['duration']:
-                    flyto = playlist.newgxflyto(gxduration=float(flytodict['duration']))
-                elif flytodict['duration'] is None:
-                    flyto = playlist.newgxflyto(gxduration=float(Durations[globalcounter]))
-                else:
-                    flyto = playlist.newgxflyto()
-                if flytodict['flyToMode']:
-                    flyto.gxflytomode = flytodict['flyToMode']
-
-                if cameradict['longitude'] and cameradict['latitude']:
-                    if cameradict['longitude_off'] or cameradict['latitude_off']: # If there is an offset
-                        longitude = float(cameradict['longitude'])
-                        latitude = float(cameradict['latitude'])
-                        zone, band = wgs84LatLonToUTMZone(latitude, longitude)
-
-                        crsSrc = QgsCoordinateReferenceSystem(4326)    # WGS 84
-                        crsDest = makeCoordinateReferenceSystem(latitude, zone)
-                        xform = QgsCoordinateTransform(crsSrc, crsDest)
-                        xform2 = QgsCoordinateTransform(crsDest, crsSrc)
-
-                        utmpt = xform.transform(QgsPoint(longitude, latitude))
-                        utmptlist = [utmpt[0], utmpt[1]]
-                        # now add the utm point to the new feature
-                        if cameradict['longitude_off']:
-                            utmptlist[0] = float(utmpt[0]) + float(cameradict['longitude_off'])
-                        if cameradict['latitude_off']:
-                            utmptlist[1] = float(utmpt[1]) + float(cameradict['latitude_off'])
-
-                        offsetpt = xform2.transform(QgsPoint(utmptlist[0],utmptlist[1]))
-
-                        flyto.camera.longitude = offsetpt[0]
-                        flyto.camera.latitude = offsetpt[1]
-
-                    elif cameradict['range'] and cameradict['heading'] and cameradict['altitude']:
-                        longitude = float(cameradict['longitude'])
-                        latitude = float(cameradict['latitude'])
-                        zone, band = wgs84LatLonToUTMZone(latitude, longitude)
-
-                        crsSrc = QgsCoordinateReferenceSystem(4326)    # WGS 84
-                        crsDest = makeCoordinateReferenceSystem(latitude, zone)
-                        xform = QgsCoordinateTransform(crsSrc, crsDest)
-                        xform2 = QgsCoordinateTransform(crsDest, crsSrc)
-
-                        utmpt = xform.transform(QgsPoint(longitude, latitude))
-                        utmptlist = [utmpt[0], utmpt[1]]  # x,y utm
-
-                        if cameradict['follow_angle']:
-                            follow_angle = math.radians(float(cameradict['follow_angle']))
-                        else:
-                            follow_angle = math.pi
-                        opp_rad = (math.radians(float(cameradict['heading'])) + follow_angle) % (2*math.pi) #opposite angle in radians from the heading. So you can calculate the direction whre the camerea should be placed
-
-                        if cameradict['altitudemode'] == 'relativeToModel':
-                            modeldict = eval(currentatt[fields['model']])
-                            camaltitude = float(cameradict['altitude']) - float(modeldict['altitude'])
-                        else:
-                            camaltitude = float(cameradict['altitude'])
-                        leg_distance = math.sqrt( float(cameradict['range'])**2 - camaltitude**2 ) # horizontal distance between the camera at altiduce and the range
-
-
-                        #leg_distance = math.sqrt( float(cameradict['range'])**2 - float(cameradict['altitude'])**2 ) # horizontal distance between the camera at altiduce and the range
-                        heading_rad = math.radians(float(cameradict['heading']))
-                        x_dist = math.sin(opp_rad) * leg_distance
-                        y_dist = math.cos(opp_rad) * leg_distance
-
-                        utm_camera = ((utmpt[0] + x_dist), (utmpt[1] + y_dist))
-                        wgs_camera = xform2.transform(QgsPoint(utm_camera[0], utm_camera[1]))
-
-                        #logger.info('wgs xy {0}'.format(wgs_camera))
-                        flyto.camera.longitude = wgs_camera[0]
-                        flyto.camera.latitude = wgs_camera[1]
-
-                        # camera tilt
-
-
-                    else:
-                        flyto.camera.longitude = cameradict['longitude']
-                        flyto.camera.latitude = cameradict['latitude']
-                if cameradict['altitude']:
-                    flyto.camera.altitude = cameradict['altitude']
-                if cameradict['altitudemode']:
-                    if cameradict['altitudemode'] == 'absolute':
-                        flyto.camera.altitudemode = simplekml.AltitudeMode.absolute
-                    if cameradict['altitudemode'] == 'clampToGround':
-                        flyto.camera.altitudemode = simplekml.AltitudeMode.clamptoground
-                    if cameradict['altitudemode'] == 'relativeToGround':
-                        flyto.camera.altitudemode = simplekml.AltitudeMode.relativetoground
-                    if cameradict['altitudemode'] == 'relativeToPoint':
-                        flyto.camera.altitudemode = simplekml.AltitudeMode.relativetoground
-                    if cameradict['altitudemode'] == 'relativeToModel':
-                        flyto.camera.altitudemode = simplekml.AltitudeMode.relativetoground
-                if cameradict['gxaltitudemode']:
-                    if cameradict['gxaltitudemode'] == 'clampToSeaFloor':
-                        flyto.camera.gxaltitudemode = simplekml.GxAltitudeMode.clampToSeaFloor
-                    if cameradict['gxaltitudemode'] == 'relativeToSeaFloor':
-                        flyto.camera.gxaltitudemode = simplekml.GxAltitudeMode.relativetoseafloor
-                if cameradict['gxhoriz']:
-                    flyto.camera.gxhoriz = cameradict['gxhoriz']
-                if cameradict['heading']:
-                    if cameradict['follow_angle']:
-                        newhead = math.degrees((math.radians(float(cameradict['heading'])) + follow_angle + math.pi) % (2 * math.pi))
-                        if cameradict['hoffset']:
-                            flyto.camera.heading = round((newhead + float(cameradict['hoffset'])) % 360, 1)
-                        else:
-                            flyto.camera.heading = newhead
-                    else:
-                        flyto.camera.heading = float(cameradict['heading'])
-                if cameradict['roll']:
-                    flyto.camera.roll = float(cameradict['roll'])
-                if cameradict['tilt']:
-                    flyto.camera.tilt = float(cameradict['tilt'])
-
-                # Time Span
-                flyto.camera.gxtimespan.begin = camStartTime
-                flyto.camera.gxtimespan.end = camendtime
-
-                # Gx Viewer Options
-##                        if cameradict['streetview']:
-##                            gxview = simplekml.GxViewerOptions(name=simplekml.GxOption.streetview, enabled = True)
+                    flyto.lookat.gxtimespan.end = timekeeper.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
+                    flytos.append(flyto)
+
+                    timekeeper = timekeeper + datetime.timedelta(seconds = timsspanDur)
+
+                    # adjust the heading by 10 degrees
+                    if lookatdict['direction'] == 'clockwise':
+                        heading = (heading + 10) % 360
+                    if lookatdict['direction'] == 'counterclockwise':
+                        heading = (heading - 10) % 360
+
+    ## LookAt Custom
+    else:  # non circle around, just custom
+        if lookatdict['longitude'] and lookatdict['latitude'] and lookatdict['altitude'] and lookatdict['heading'] and lookatdict['tilt'] and lookatdict['range']:
+            if flytodict['duration']:
+                flyto = simplekml.GxFlyTo(gxduration=float(flytodict['duration']))
+            else:
+                flyto = simplekml.GxFlyTo()
+            if flytodict['flyToMode']:
+                flyto.gxflytomode = flytodict['flyToMode']
+            flyto.lookat.longitude = lookatdict['longitude']
+            flyto.lookat.latitude = lookatdict['latitude']
+            flyto.lookat.altitude = lookatdict['altitude']
+            if lookatdict['altitudemode'] in altitudeModes:
+                flyto.lookat.altitudemode = altitudeModes[lookatdict['altitudemode']]
+            flyto.lookat.heading = lookatdict['heading']
+            flyto.lookat.tilt = lookatdict['tilt']
+            flyto.lookat.range = lookatdict['range']
+            if lookatdict['gxaltitudemode']:
+                flyto.lookat.gxaltitudemode = lookatdict['gxaltitudemode']
+            # Time Span
+            flyto.lookat.gxtimespan.begin = camStartTime
+            flyto.lookat.gxtimespan.end = camEndTime
+            flytos.append(flyto)
+
+    return flytos
+
+def cameraFlyTo(cameradict, flytodict, coordinates, duration, camStartTime, camEndTime):
+    """
+    Builds the gx:FlyTo element for a feature with a Camera.
 
+    Args:
+        param1: The decoded camera dictionary.
+        param2: The decoded flyto dictionary.
+        param3: The camera longitude and latitude from cameraCoordinates, or None.
+        param4: The duration in seconds to use when the flyto does not set one.
+        param5: The KML time string the tour started at.
+        param6: The KML time string of this feature.
 
-                cc += 1
+    Returns:
+        A simplekml.GxFlyTo
+    """
+    if flytodict['duration']:
+        flyto = simplekml.GxFlyTo(gxduration=float(flytodict['duration']))
+    elif flytodict['duration'] is None:
+        flyto = simplekml.GxFlyTo(gxduration=float(duration))
+    else:
+        flyto = simplekml.GxFlyTo()
+    if flytodict['flyToMode']:
+        flyto.gxflytomode = flytodict['flyToMode']
+
+    if coordinates is not None:
+        flyto.camera.longitude, flyto.camera.latitude = coordinates
+    if cameradict['altitude']:
+        flyto.camera.altitude = cameradict['altitude']
+    if cameradict['altitudemode'] in altitudeModes:
+        flyto.camera.altitudemode = altitudeModes[cameradict['altitudemode']]
+    if cameradict['gxaltitudemode'] in gxAltitudeModes:
+        flyto.camera.gxaltitudemode = gxAltitudeModes[cameradict['gxaltitudemode']]
+    if cameradict['gxhoriz']:
+        flyto.camera.gxhoriz = cameradict['gxhoriz']
+    if cameradict['heading']:
+        if cameradict['follow_angle']:
+            follow_angle = math.radians(float(cameradict['follow_angle']))
+            newhead = math.degrees((math.radians(float(cameradict['heading'])) + follow_angle + math.pi) % (2 * math.pi))
+            if cameradict['hoffset']:
+                flyto.camera.heading = round((newhead + float(cameradict['hoffset'])) % 360, 1)
+            else:
+                flyto.camera.heading = newhead
+        else:
+            flyto.camera.heading = float(cameradict['heading'])
+    if cameradict['roll']:
+        flyto.camera.roll = float(cameradict['roll'])
+    if cameradict['tilt']:
+        flyto.camera.tilt = float(cameradict['tilt'])
+
+    # Time Span
+    flyto.camera.gxtimespan.begin = camStartTime
+    flyto.camera.gxtimespan.end = camEndTime
+    return flyto
+
+def tourFlyTos(track, durations, rows=None):
+    """
+    Generates the gx:FlyTo elements of the tour, feature by feature.
 
-            #kml.document.camera = simplekml.Camera()
-            #kml.document.camera = flyto.camera
+    Args:
+        param1: A MMTrack.TrackColumns snapshot.
+        param2: The FlyTo durations of each feature, see flyToDurations.
+        param3: The rows to go through, all of them by default.
 
-        globalcounter += 1
+    Returns:
+        A generator of (row, lookat flytos, camera flyto) tuples for every feature with a camera or lookat.
+        The camera flyto is None if the feature has no camera.
+    """
+    camStartTime = None
+    coordinates = cameraCoordinates(track)
+    for row in rows if rows is not None else xrange(len(track)):
+        lookatdict = track.lookat[row]
+        cameradict = track.camera[row]
+        if not lookatdict and not cameradict:
+            continue
+
+        flytodict = track.flyto[row]
+        camEndTime = track.kmlTime(row)
+        if camStartTime is None:
+            # Start time. Will be used for TimeSpan tags. A tour starting with a camera starts on the whole second
+            camStartTime = camEndTime if lookatdict else camEndTime[:20] + '000000Z'
+
+        lookats = lookatFlyTos(lookatdict, flytodict, camStartTime, camEndTime, track.datetime(row)) if lookatdict else []
+        camera = cameraFlyTo(cameradict, flytodict, coordinates[row], durations[row], camStartTime, camEndTime) if cameradict else None
+        yield row, lookats, camera
+
+def _styled(icondict, labeldict):
+    # True if setStyle would set anything, a point without a style of its own gets the default one
+    return any(icondict[key] for key in ('color', 'colormode', 'scale', 'heading', 'icon')) or \
+        bool(labeldict and any(labeldict[key] for key in ('color', 'colormode', 'scale')))
+
+def setStyle(style, icondict, labeldict):
+    """
+    Sets the icon and label styles of a point on a simplekml.Style.
 
+    Args:
+        param1: The simplekml.Style.
+        param2: The decoded iconstyle attribute of the point.
+        param3: The decoded labelstyle attribute of the point, or None.
+    """
+    # Icon Style
+    # icon = {'color': None, 'colormode': None,'scale' : None, 'heading': None,'icon' : None ,'hotspot' : None}
+    if icondict['color']:
+        style.iconstyle.color = simplekml.Color.__dict__[icondict['color']]
+    if icondict['color'] and icondict['transparency']:
+        transvalue = transtokmlhex(icondict['transparency'])
+        colorpick = simplekml.Color.__dict__[icondict['color']]
+        style.iconstyle.color = transvalue + colorpick[2:8]
+    if icondict['colormode']:
+        style.iconstyle.colormode = icondict['colormode']
+    if icondict['scale']:
+        style.iconstyle.scale = icondict['scale']
+    if icondict['heading']:
+        style.iconstyle.heading = icondict['heading']
+    if icondict['icon']:
+        style.iconstyle.icon.href = icondict['icon']
+
+    # Label Style
+    # label = {'color': None, 'colormode': None,'scale' : None}
+    if labeldict:
+        if labeldict['color']:
+            style.labelstyle.color = simplekml.Color.__dict__[labeldict['color']]
+        if labeldict['colormode']:
+            style.labelstyle.colormode = labeldict['colormode']
+        if labeldict['scale']:
+            style.labelstyle.scale = labeldict['scale']
+
+def pointPlacemarks(track, rows=None):
+    """
+    Generates the Points folder placemarks, one for each feature with an icon style.
 
+    Args:
+        param1: A MMTrack.TrackColumns snapshot.
+        param2: The rows to go through, all of them by default.
 
-    ###############################3
-    ## Points
-    cc = 0
-    folder = kml.newfolder(name='Points')
-    for f in features: #  QgsFeatureIterator #[u'2014/06/06 10:38:48', u'Time:10:38:48, Latitude: 39.965949, Longitude: -75.172239, Speed: 0.102851, Altitude: -3.756733']
-        geom = f.geometry()
-        coords = geom.asPoint() #(-75.1722,39.9659)
-        currentatt = f.attributes()
+    Returns:
+        A generator of simplekml.Point
+    """
+    for row in rows if rows is not None else xrange(len(track)):
+        icondict = track.iconstyle[row]
+        if icondict:
+            pnt = simplekml.Point(name=str(row), coords=[(float(track.x[row]), float(track.y[row]))], description=str(track.description[row]))
+            pnt.timestamp.when = track.kmlTime(row)
+            if _styled(icondict, track.labelstyle[row]):
+                setStyle(pnt.style, icondict, track.labelstyle[row])
+            yield pnt
+
+def trackRuns(track, rows=None):
+    """
+    Splits a track into runs of consecutive features that share their icon and label styles.
 
-        if currentatt[fields['iconstyle']]:
+    Args:
+        param1: A MMTrack.TrackColumns snapshot.
+        param2: The rows to go through, all of them by default.
 
-            pointdate = currentatt[fields['datetime']].split(" ")[0]  #2014/06/06
-            pointtime = currentatt[fields['datetime']].split(" ")[1] #10:38:48
-            try:
-                pointtime_ms = currentatt[fields['datetime']].split(" ")[2]  # microsecond range(1000000)
-            except:
-                pointtime_ms = 0
-            current_dt = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]), int(pointtime_ms))
-
-            pnt = folder.newpoint(name=str(cc), coords=[(coords[0], coords[1])], description=str(currentatt[1]))
-            pnt.timestamp.when = current_dt.strftime('%Y-%m-%dT%H:%M:%S.%fZ')
-
-            def transtokmlhex(trans):
-                dec = int(float(icondict['transparency']) * 2.55)
-                if dec < 10:
-                    return '0' + str(dec)
-                else:
-                    return str(hex(dec)[2:4])
-
-        # Icon Style
-        # icon = {'color': None, 'colormode': None,'scale' : None, 'heading': None,'icon' : None ,'hotspot' : None}
-        #if currentatt[fields['iconstyle']]:
-            icondict = eval(currentatt[fields['iconstyle']])
-
-            if icondict['color']:
-                pnt.style.iconstyle.color = simplekml.Color.__dict__[icondict['color']]
-            if icondict['color'] and icondict['transparency']:
-                transvalue = transtokmlhex(icondict['transparency'])
-                colorpick = simplekml.Color.__dict__[icondict['color']]
-                pnt.style.iconstyle.color = transvalue + colorpick[2:8]
-            if icondict['colormode']:
-                pnt.style.iconstyle.colormode = icondict['colormode']
-            if icondict['scale']:
-                pnt.style.iconstyle.scale = icondict['scale']
-            if icondict['heading']:
-                pnt.style.iconstyle.heading = icondict['heading']
-            if icondict['icon']:
-                pnt.style.iconstyle.icon.href = icondict['icon']
-
-
-            # Label Style
-            # label = {'color': None, 'colormode': None,'scale' : None}
-            if currentatt[fields['labelstyle']]:
-                labeldict = eval(currentatt[fields['labelstyle']])
-                if labeldict['color']:
-                    pnt.style.labelstyle.color = simplekml.Color.__dict__[labeldict['color']]
-                if labeldict['colormode']:
-                    pnt.style.labelstyle.colormode = labeldict['colormode']
-                if labeldict['scale']:
-                    pnt.style.labelstyle.scale = labeldict['scale']
-
-        cc += 1
+    Returns:
+        A list of one simplekml.Style for each distinct pair of icon and label styles, in order of first use, None for
+        the features without an icon style, and a list of (style index, first row, row after the last) runs in track
+        order
+    """
+    styles = []; runs = []
+    indices = {}
+    previous = None
+    for row in rows if rows is not None else xrange(len(track)):
+        icondict = track.iconstyle[row]
+        labeldict = track.labelstyle[row] if icondict else None
+        key = (tuple(sorted(icondict.items())), tuple(sorted(labeldict.items())) if labeldict else None) if icondict else None
+        index = indices.get(key)
+        if index is None:
+            index = indices[key] = len(styles)
+            style = None
+            if icondict:
+                style = simplekml.Style()
+                setStyle(style, icondict, labeldict)
+            styles.append(style)
+        if index == previous:
+            runs[-1][2] = row + 1
+        else:
+            runs.append([index, row, row + 1])
+        previous = index
+    return styles, [tuple(run) for run in runs]
+
+def trackPlacemarks(track, styles, runs):
+    """
+    Generates the Points folder placemarks of a compact export, one gx:Track for each style with the times and
+    coordinates of its points, so that Google Earth animates the track without a placemark and style per point. Every
+    feature is written, the ones without an icon style with the default style. A style used by more than one run gets
+    a gx:MultiTrack of them, not interpolated across the gaps between them.
 
-    ###############################3
-    ## Models
-    cc = 0
-    mfolder = kml.newfolder(name='Models')
-    for f in features: #  QgsFeatureIterator #[u'2014/06/06 10:38:48', u'Time:10:38:48, Latitude: 39.965949, Longitude: -75.172239, Speed: 0.102851, Altitude: -3.756733']
-        geom = f.geometry()
-        coords = geom.asPoint() #(-75.1722,39.9659)
-        currentatt = f.attributes()
+    Args:
+        param1: A MMTrack.TrackColumns snapshot.
+        param2: The styles of trackRuns, each written once inside the placemark using it.
+        param3: The runs of trackRuns.
 
-        if currentatt[fields['model']]:
+    Returns:
+        A generator of simplekml.GxTrack or simplekml.GxMultiTrack
+    """
+    grouped = [[] for style in styles]
+    for index, first, last in runs:
+        grouped[index].append((first, last))
+    for index, style in enumerate(styles):
+        tracks = []
+        for first, last in grouped[index]:
+            trk = simplekml.GxTrack()
+            trk.newwhen(MMTrack.kmlTimes(track.epoch[first:last]).tolist())
+            trk.newgxcoord(zip(track.x[first:last].tolist(), track.y[first:last].tolist()))
+            tracks.append(trk)
+        if len(tracks) == 1:
+            geometry = tracks[0]
+            geometry.name = 'Track' if len(styles) == 1 else 'Track {0}'.format(index + 1)
+        else:
+            geometry = simplekml.GxMultiTrack(tracks=tracks, gxinterpolate=0, name='Track {0}'.format(index + 1))
+        if style is not None:
+            geometry.style = style
+        yield geometry
+
+def modelPlacemarks(track, logger, rows=None):
+    """
+    Generates the Models folder placemarks, one for each feature with a model.
 
-            mdl = mfolder.newmodel()
+    Args:
+        param1: A MMTrack.TrackColumns snapshot.
+        param2: The logger, for models without a GPS altitude.
+        param3: The rows to go through, all of them by default.
 
-            pointdate = currentatt[fields['datetime']].split(" ")[0]  #2014/06/06
-            pointtime = currentatt[fields['datetime']].split(" ")[1] #10:38:48
-            try:
-                pointtime_ms = currentatt[fields['datetime']].split(" ")[2]  # microsecond range(1000000)
-            except:
-                pointtime_ms = 0
-            current_dt = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]), int(pointtime_ms))
+    Returns:
+        A generator of simplekml.Model
+    """
+    for row in rows if rows is not None else xrange(len(track)):
+        modeldict = track.model[row]
+        if modeldict:
+            mdl = simplekml.Model()
 
+            current_dt = track.datetime(row)
             mdl.name = current_dt.strftime('%X %m/%d/%Y')
             mdl.description = current_dt.strftime('%X %m/%d/%Y')
 
-            #pnt = folder.newpoint(name=str(cc), coords=[(coords[0], coords[1])], description=str(currentatt[1]))
-            #pnt.timestamp.when = current_dt.strftime('%Y-%m-%dT%XZ')
-
-
-        # Model
-        #model = {'link': None, 'longitude': None, 'latitude': None, 'altitude' : None, 'scale': None}
-        #class simplekml.Model(altitudemode=None, gxaltitudemode=None, location=None, orientation=None, scale=None, link=None, resourcemap=None, **kwargs)
-        #if currentatt[fields['model']]:
-            modeldict = eval(currentatt[fields['model']])
-
+            # Model
+            #model = {'link': None, 'longitude': None, 'latitude': None, 'altitude' : None, 'scale': None}
             if modeldict['link']:
                 mdl.link = simplekml.Link(href = modeldict['link'])
 
@@ -736,58 +516,170 @@ def exportToFile(activeLayer, audioHREF, audioOffset, exportPath, fields, lastDi
                 if modeldict['longitude']:
                     loc.longitude = modeldict['longitude']
                 else:
-                    loc.longitude = coords[0]
+                    loc.longitude = float(track.x[row])
 
                 if modeldict['latitude']:
                     loc.latitude = modeldict['latitude']
                 else:
-                    loc.latitude = coords[1]
+                    loc.latitude = float(track.y[row])
 
                 if modeldict['altitude']:
-                    if modeldict['altitude'] == 'altitude':  # get the altitude from the gps  [u'2014/06/06 10:38:48', u'Time:10:38:48, Latitude: 39.965949, Longitude: -75.172239, Speed: 0.102851, Altitude: -3.756733']
-
-                        try:
-                            loc.altitude = currentatt[fields['descriptio']].split(",")[4].split(': ')[1]
-                        except:
-                            try:
-                                loc.altitude = currentatt[fields['Descriptio']].split(",")[4].split(': ')[1]
-                            except:
-                                logger.error('export function error')
-                                #logger.info('fields keys {0}'.format(fields.keys))
-                                logger.exception(traceback.format_exc())
-                                messageBar.pushMessage("Error", "exportToFile error. Please see error log at: {0}".format(loggerPath), level=QgsMessageBar.CRITICAL, duration=5)
-
-
+                    if modeldict['altitude'] == 'altitude':  # get the altitude from the gps
+                        loc.altitude = track.modelAltitude(row)
+                        if loc.altitude is None:
+                            logger.error('modelPlacemarks: no gps altitude for the model at fid {0}'.format(track.fids[row]))
                     else:
                         loc.altitude = modeldict['altitude']
                     mdl.altitudemode = 'relativeToGround'
                 mdl.location = loc
-                mdl.timestamp = simplekml.TimeStamp(when=current_dt.strftime('%Y-%m-%dT%H:%M:%S.%fZ'))
-
-
+                mdl.timestamp = simplekml.TimeStamp(when=track.kmlTime(row))
 
             scl = simplekml.Scale()
             if modeldict['scale']:
                 scl.x = modeldict['scale']; scl.y = modeldict['scale']; scl.z = modeldict['scale']
                 mdl.scale = scl
+            yield mdl
 
+def _reportedRows(count, stage, stream, progress):
+    # the three passes over the track are stages 0, 1 and 2 of the progress
+    for row in xrange(count):
+        if row % PROGRESS_ROWS == 0:
+            progress(stage * count + row, 3 * count, stream.bytes)
+        yield row
 
-        cc += 1
+def writeKml(fileobj, track, audioHREF, audioOffset, logger, kmz=False, durationLimits=None, progress=None, gxtrack=False):
+    """
+    Streams the tour, Points and Models of a track to a file as KML.
+
+    Nothing but the current feature's elements is held in memory, so the length of the track only affects the time taken.
 
-#            if self.dlg.ui.lineEdit_export_audio.currentText():  # there is a wav file to attach. So only offer kmz
+    Args:
+        param1: A file handle opened in binary mode.
+        param2: A MMTrack.TrackColumns snapshot.
+        param3: The href of the audio to play with the tour, or None.
+        param4: The delay in seconds before the audio starts.
+        param5: The logger.
+        param6: True if the KML is going into a KMZ, which rewrites the local hrefs.
+        param7: A dictionary of the minimum, maximum and gap keyword arguments of flyToDurations.
+        param8: Called as progress(rows done, total rows, bytes written) as the track is written, with three rows
+                for every feature, one for each of the tour, Points and Models. It may raise ExportCancelled to stop.
+        param9: True to write every point of the track into gx:Tracks with shared styles, see trackPlacemarks, rather
+                than a placemark for each point with an icon style.
 
+    Returns:
+        The simplekml.KmlStream, whose images are the local files to package with a KMZ
+    """
+    stream = simplekml.KmlStream(fileobj, kmz=kmz)
+    rows = lambda stage: _reportedRows(len(track), stage, stream, progress) if progress is not None else None
+    durations = flyToDurations(track.epoch, logger=logger, **(durationLimits or {}))
+    document = simplekml.Document()
+
+    #################################
+    ## Tour and Camera
+    # The first feature of the tour gives the document its view, so that there is no
+    # strange camera movement at the beginning.
+    tour = tourFlyTos(track, durations, rows(0))
+    first = next(tour, None)
+    if first is not None:
+        row, lookats, camera = first
+        if lookats:
+            document.lookat = lookats[-1].lookat
+            if track.lookat[row]['streetview']:
+                document.lookat.gxvieweroptions.newgxoption(name=simplekml.GxOption.streetview)
+        elif camera is not None:
+            document.camera = camera.camera
+            if track.camera[row]['streetview']:
+                document.camera.gxvieweroptions.newgxoption(name=simplekml.GxOption.streetview)
+
+    stream.begin(document)
+    if first is not None:
+        # Create a tour and attach a playlist to it
+        flytodict = track.flyto[first[0]]
+        stream.begintour(simplekml.GxTour(name=flytodict['name'] if flytodict['name'] else "Tour"))
+
+        # Attach a gx:SoundCue to the playlist and delay playing by 2 second (sound clip is about 4 seconds long)
+        if audioHREF:
+            stream.write(simplekml.GxSoundCue(href=audioHREF, gxdelayedstart=audioOffset))
+
+        for row, lookats, camera in itertools.chain([first], tour):
+            stream.writeall(lookats)
+            if camera is not None:
+                stream.write(camera)
+        stream.end()
+
+    ###############################3
+    ## Points
+    stream.beginfolder(simplekml.Folder(name='Points'))
+    if gxtrack:
+        styles, runs = trackRuns(track, rows(1))
+        stream.writeall(trackPlacemarks(track, styles, runs))
+    else:
+        stream.writeall(pointPlacemarks(track, rows(1)))
+    stream.end()
+
+    ###############################3
+    ## Models
+    stream.beginfolder(simplekml.Folder(name='Models'))
+    stream.writeall(modelPlacemarks(track, logger, rows(2)))
+    stream.end()
+
+    stream.close()
+    if progress is not None:
+        progress(3 * len(track), 3 * len(track), stream.bytes)
+    logger.info('writeKml: {0} elements written for {1} points, {2}'.format(stream.count, len(track), MMProjection.registry.cacheInfo()))
+    return stream
+
+def writeTrack(exportPath, track, audioHREF, audioOffset, logger, durationLimits=None, progress=None, gxtrack=False):
+    """
+    Writes a track snapshot to a .kml or .kmz file. Only plain Python and NumPy objects are used, so this can run
+    outside the GUI thread. A partly written file is removed if the export fails or is cancelled.
+
+    Args:
+        param1: The path of the .kml or .kmz file.
+        param2: A MMTrack.TrackColumns snapshot.
+        param3 to param8: The audio href and offset, logger, duration limits, progress callback and gx:Track mode of
+                          writeKml.
+    """
+    try:
+        if exportPath.split('.')[1] == 'kml':
+            kmlfile = open(exportPath, 'wb')
+            try:
+                writeKml(kmlfile, track, audioHREF, audioOffset, logger, durationLimits=durationLimits, progress=progress, gxtrack=gxtrack)
+            finally:
+                kmlfile.close()
+        else:
+            # doc.kml is compressed into the kmz as it is written, the audio and model files are added once it is closed
+            kmz = simplekml.KmzWriter(exportPath)
+            try:
+                kmlfile = kmz.open("doc.kml")
+                stream = writeKml(kmlfile, track, audioHREF, audioOffset, logger, kmz=True, durationLimits=durationLimits, progress=progress, gxtrack=gxtrack)
+                kmlfile.close()
+                kmz.addfiles(stream.images)
+            finally:
+                kmz.close()
+    except:
+        if os.path.exists(exportPath):
+            os.remove(exportPath)
+        raise
+
+def exportToFile(activeLayer, audioHREF, audioOffset, exportPath, fields, lastDirectory, logger, loggerPath, messageBar, durationLimits=None, simplify=None, gxtrack=False):
     if exportPath:
         # TODO: export this somehow
         lastDirectory = os.path.dirname(exportPath)
-        if exportPath.split('.')[1] == 'kml':
-            kml.save(exportPath)
-            messageBar.pushMessage("Success", "kml file exported to: {0}".format(exportPath), level=QgsMessageBar.INFO, duration=5)
-        if exportPath.split('.')[1] == 'kmz':
-            kml.savekmz(exportPath)
-            messageBar.pushMessage("Success", "kmz file exported to: {0}".format(exportPath), level=QgsMessageBar.INFO, duration=5)
+        if exportPath.split('.')[1] in ('kml', 'kmz'):
+            # read the layer once. The whole document is streamed from this snapshot
+            track = MMTrack.readLayer(activeLayer, fields)
+            if simplify and simplify.get('tolerance'):
+                # keyword arguments of MMSimplify.simplifyTrack, the layer itself is left as it is
+                track = MMSimplify.simplifyTrack(track, **simplify)
+            writeTrack(exportPath, track, audioHREF, audioOffset, logger, durationLimits=durationLimits, gxtrack=gxtrack)
+            messageBar.pushMessage("Success", "{0} file exported to: {1}".format(exportPath.split('.')[1], exportPath), level=QgsMessageBar.INFO, duration=5)
         if exportPath.split('.')[1] == 'gpx':
             QgsVectorFileWriter.writeAsVectorFormat(activeLayer, exportPath, "utf-8", None, "GPX")
             messageBar.pushMessage("Success", "gpx file exported to: {0}".format(exportPath), level=QgsMessageBar.INFO, duration=5)
+        if exportPath.split('.')[1] == 'gpkg':
+            QgsVectorFileWriter.writeAsVectorFormat(activeLayer, exportPath, "utf-8", None, "GPKG")
+            messageBar.pushMessage("Success", "GeoPackage exported to: {0}".format(exportPath), level=QgsMessageBar.INFO, duration=5)
         if exportPath.split('.')[1] == 'shp':
             QgsVectorFileWriter.writeAsVectorFormat(activeLayer, exportPath, "utf-8", None, "ESRI Shapefile")
             messageBar.pushMessage("Success", "ESRI shapefile exported to: {0}".format(exportPath), level=QgsMessageBar.INFO, duration=5)
@@ -0,0 +1,338 @@
+import numpy as np
+
+import MMProjection
+
+# how movingAverage treats the first and last (window - 1) / 2 points, which do not have a full window around them
+PADDING_MODES = ('keep', 'reflect', 'edge')
+
+def movingAverage(values, window, mode='keep'):
+    """
+    Smooths a track with a centred moving average, computed from cumulative sums in O(n) whatever the window.
+
+    Args:
+        param1: Array of the values to smooth, one row per point. A 2-D array, e.g. the x, y and z columns
+                side by side, is smoothed column by column in one pass.
+        param2: The window size, an odd number of points.
+        param3: The padding mode for the ends of the track, one of PADDING_MODES:
+                'keep' leaves the points without a full window as they are, as the Filtering tab always has,
+                'reflect' mirrors the track around its first and last points,
+                'edge' repeats the first and last points.
+
+    Returns:
+        A float64 array of the same shape
+
+    >>> movingAverage(np.array([0.0, 3.0, 0.0, 3.0, 0.0]), 3).tolist()
+    [0.0, 1.0, 2.0, 1.0, 0.0]
+    >>> movingAverage(np.array([0.0, 3.0, 0.0, 3.0, 0.0]), 3, 'reflect').tolist()
+    [2.0, 1.0, 2.0, 1.0, 2.0]
+    """
+    if window < 1 or window % 2 == 0:
+        raise ValueError('The window size must be an odd integer, not {0}'.format(window))
+    if mode not in PADDING_MODES:
+        raise ValueError('Unknown padding mode {0}, use one of {1}'.format(mode, ', '.join(PADDING_MODES)))
+    values = np.asarray(values, dtype=np.float64)
+    count = len(values)
+    pad = (window - 1) // 2
+    if count == 0 or pad == 0:
+        return values.copy()
+
+    # sums of values relative to the first point, so that the cumulative sum of long tracks far from
+    # 0,0 keeps its precision
+    origin = values[:1]
+    shifted = values - origin
+    if mode == 'keep':
+        padded = shifted
+    else:
+        if mode == 'reflect' and count <= pad:
+            raise ValueError('A track of {0} points is too short to reflect a window of {1}'.format(count, window))
+        padded = np.pad(shifted, [(pad, pad)] + [(0, 0)] * (values.ndim - 1), mode=mode)
+
+    sums = np.cumsum(padded, axis=0)
+    sums = np.concatenate([np.zeros_like(sums[:1]), sums])
+    means = (sums[window:] - sums[:-window]) / float(window) + origin
+
+    if mode == 'keep':
+        result = values.copy()
+        result[pad:count - pad] = means
+        return result
+    return means
+
+def _affineScan(a00, a01, a10, a11, b0, b1):
+    """
+    Runs the recursion state[k] = A[k] . state[k - 1] + b[k] over all rows, with state[0] = b[0].
+
+    A is given by its four entries, 1-D arrays, and b by its two rows, arrays of one row per point and one column
+    per smoothed column. The rows are cut into about sqrt(n) blocks of sqrt(n) rows: the recursion runs along all
+    blocks at once from a zero state, the state entering each block is then carried from block to block, and added
+    to every row through the running product of the block's maps. That is O(n) work in 2 sqrt(n) NumPy steps.
+    """
+    count, columns = b0.shape
+    size = max(int(np.ceil(np.sqrt(count))), 1)
+    blocks = -(-count // size)
+    pad = blocks * size - count
+
+    def blocked(values, fill):
+        values = np.concatenate([values, np.full((pad,) + values.shape[1:], fill)])
+        return values.reshape((blocks, size) + values.shape[1:])
+    # the padding rows are identity maps
+    a00 = blocked(a00, 1.0); a01 = blocked(a01, 0.0); a10 = blocked(a10, 0.0); a11 = blocked(a11, 1.0)
+    b0 = blocked(b0, 0.0); b1 = blocked(b1, 0.0)
+    a00[0, 0] = a01[0, 0] = a10[0, 0] = a11[0, 0] = 0.0
+
+    local0 = np.empty_like(b0); local1 = np.empty_like(b1)
+    p00 = np.empty_like(a00); p01 = np.empty_like(a01); p10 = np.empty_like(a10); p11 = np.empty_like(a11)
+    s0 = np.zeros((blocks, columns)); s1 = np.zeros((blocks, columns))
+    q00 = np.ones(blocks); q01 = np.zeros(blocks); q10 = np.zeros(blocks); q11 = np.ones(blocks)
+    for j in range(size):
+        m00 = a00[:, j, None]; m01 = a01[:, j, None]; m10 = a10[:, j, None]; m11 = a11[:, j, None]
+        s0, s1 = m00 * s0 + m01 * s1 + b0[:, j], m10 * s0 + m11 * s1 + b1[:, j]
+        local0[:, j] = s0; local1[:, j] = s1
+        m00 = a00[:, j]; m01 = a01[:, j]; m10 = a10[:, j]; m11 = a11[:, j]
+        q00, q01, q10, q11 = m00 * q00 + m01 * q10, m00 * q01 + m01 * q11, m10 * q00 + m11 * q10, m10 * q01 + m11 * q11
+        p00[:, j] = q00; p01[:, j] = q01; p10[:, j] = q10; p11[:, j] = q11
+
+    # the state entering each block
+    in0 = np.zeros((blocks, columns)); in1 = np.zeros((blocks, columns))
+    for i in range(1, blocks):
+        in0[i] = p00[i - 1, -1] * in0[i - 1] + p01[i - 1, -1] * in1[i - 1] + local0[i - 1, -1]
+        in1[i] = p10[i - 1, -1] * in0[i - 1] + p11[i - 1, -1] * in1[i - 1] + local1[i - 1, -1]
+
+    state0 = p00[:, :, None] * in0[:, None] + p01[:, :, None] * in1[:, None] + local0
+    state1 = p10[:, :, None] * in0[:, None] + p11[:, :, None] * in1[:, None] + local1
+    return state0.reshape(-1, columns)[:count], state1.reshape(-1, columns)[:count]
+
+def kalmanSmooth(values, seconds, measurementError=5.0, acceleration=1.0):
+    """
+    Smooths a track with a constant velocity Kalman filter and a Rauch-Tung-Striebel backward pass.
+
+    Each column is a position with its own velocity, driven by white noise acceleration between the points. The time
+    between points comes from the timestamps, so a gap in the track lets the position move further than a second
+    does. The covariances do not depend on the positions, they are found once for all columns in one pass over the
+    points, and the position and velocity means of all columns are then run forwards and backwards as NumPy prefix
+    scans. Both are O(n).
+
+    Args:
+        param1: Array of the projected positions to smooth in metres, one row per point, e.g. UTM eastings and
+                northings side by side, or a 1-D array of altitudes.
+        param2: Array of the times of the points in seconds, in track order.
+        param3: The standard deviation of the GPS error in metres (default 5).
+        param4: The standard deviation of the acceleration in metres per second squared (default 1). Lower
+                values give straighter, smoother tracks.
+
+    Returns:
+        A float64 array of the same shape
+
+    >>> kalmanSmooth(np.array([0.0, 10.0, 20.0, 30.0]), np.array([0.0, 1.0, 2.0, 3.0])).round(1).tolist()
+    [0.0, 10.0, 20.0, 30.0]
+    """
+    values = np.asarray(values, dtype=np.float64)
+    seconds = np.asarray(seconds, dtype=np.float64)
+    count = len(values)
+    if len(seconds) != count:
+        raise ValueError('There are {0} times for {1} points'.format(len(seconds), count))
+    if measurementError <= 0 or acceleration <= 0:
+        raise ValueError('The GPS error and acceleration must be positive')
+    if count < 2:
+        return values.copy()
+
+    # out of order or repeated times move nothing
+    dts = np.maximum(np.diff(seconds), 0.0)
+    # the last step of the run of equal time deltas each step is in, step k going from point k - 1 to point k
+    ends = np.flatnonzero(np.append(dts[1:] != dts[:-1], True))
+    runEnd = (ends[np.searchsorted(ends, np.arange(count - 1))] + 1).tolist()
+    dts = dts.tolist()
+    r = float(measurementError) ** 2
+    q = float(acceleration) ** 2
+
+    # covariance [[a, b], [b, c]] of the filtered position and velocity. The first point is taken as measured, its
+    # velocity is unknown
+    a = r; b = 0.0; c = 1e4
+    gain0 = [0.0] * count; gain1 = [0.0] * count
+    rts00 = [0.0] * count; rts01 = [0.0] * count; rts10 = [0.0] * count; rts11 = [0.0] * count
+    k = 1
+    while k < count:
+        dt = dts[k - 1]
+        # predict: F P F' + Q with F = [[1, dt], [0, 1]]
+        pa = a + dt * (2 * b + dt * c) + q * dt ** 3 / 3.0
+        pb = b + dt * c + q * dt ** 2 / 2.0
+        pc = c + q * dt
+        # the smoother gain of the point before, P F' inv(predicted P)
+        det = pa * pc - pb * pb
+        fa = a + dt * b; fb = b + dt * c
+        rts00[k - 1] = (fa * pc - b * pb) / det; rts01[k - 1] = (b * pa - fa * pb) / det
+        rts10[k - 1] = (fb * pc - c * pb) / det; rts11[k - 1] = (c * pa - fb * pb) / det
+        # update with the measured position
+        s = pa + r
+        k0 = pa / s; k1 = pb / s
+        gain0[k] = k0; gain1[k] = k1
+        olda, oldb, oldc = a, b, c
+        a = (1 - k0) * pa; b = (1 - k0) * pb; c = pc - k1 * pb
+
+        # with a steady logging interval the covariance soon stops changing, the rest of the run shares its gains
+        end = runEnd[k - 1]
+        if end > k and abs(a - olda) <= 1e-12 * a and abs(b - oldb) <= 1e-12 * abs(b) and abs(c - oldc) <= 1e-12 * c:
+            gain0[k + 1:end + 1] = [k0] * (end - k); gain1[k + 1:end + 1] = [k1] * (end - k)
+            for rts in (rts00, rts01, rts10, rts11):
+                rts[k:end] = [rts[k - 1]] * (end - k)
+            k = end
+        k += 1
+
+    # positions relative to the first point keep their precision far from 0,0
+    origin = values[:1]
+    z = (values - origin).reshape(count, -1)
+    dt = np.concatenate([[0.0], dts])
+    k0 = np.array(gain0); k1 = np.array(gain1)
+
+    # forward: x[k] = (I - K H) F x[k - 1] + K z[k]
+    h = 1 - k0
+    position, velocity = _affineScan(h, h * dt, -k1, 1 - k1 * dt, k0[:, None] * z, k1[:, None] * z)
+    # the first point is its measurement, standing still
+    position[0] = z[0]; velocity[0] = 0.0
+
+    # backward: smoothed[k] = C x_s[k + 1] + x[k] - C F x[k], scanned over the reversed rows. The last point has no
+    # gain, it keeps its filtered position
+    c00 = np.array(rts00)[:, None]; c01 = np.array(rts01)[:, None]; c10 = np.array(rts10)[:, None]; c11 = np.array(rts11)[:, None]
+    predicted = position + np.append(dt[1:], 0.0)[:, None] * velocity
+    offset0 = position - c00 * predicted - c01 * velocity
+    offset1 = velocity - c10 * predicted - c11 * velocity
+    smoothed, speeds = _affineScan(c00[::-1, 0], c01[::-1, 0], c10[::-1, 0], c11[::-1, 0], offset0[::-1], offset1[::-1])
+    return smoothed[::-1].reshape(values.shape) + origin
+
+def _projected(longitude, latitude):
+    # the whole track in the UTM zone of its middle point, so that a track crossing a zone border is not torn apart
+    utm = MMProjection.registry.zoneOf(longitude, latitude)
+    easting, northing = utm.forward(longitude, latitude)
+    return np.column_stack([easting, northing]), utm
+
+def kalmanSmoothTrack(longitude, latitude, seconds, measurementError=5.0, acceleration=1.0):
+    """
+    Smooths WGS84 track points with kalmanSmooth in the UTM zone of the track.
+
+    The whole track is projected into the zone of its middle point and the smoothed eastings and northings are
+    projected back.
+
+    Args:
+        param1: Array of WGS84 longitudes, in track order.
+        param2: Array of WGS84 latitudes.
+        param3: Array of the times of the points in seconds.
+        param4: The standard deviation of the GPS error in metres (default 5).
+        param5: The standard deviation of the acceleration in metres per second squared (default 1).
+
+    Returns:
+        A tuple of arrays of the smoothed longitudes and latitudes
+    """
+    if len(longitude) == 0:
+        return np.array(longitude, dtype=np.float64), np.array(latitude, dtype=np.float64)
+    xy, utm = _projected(longitude, latitude)
+    smoothed = kalmanSmooth(xy, seconds, measurementError, acceleration)
+    return utm.inverse(smoothed[:, 0], smoothed[:, 1])
+
+def noiseOf(values):
+    """
+    Estimates the standard deviation of the noise of a track column from its second differences.
+
+    The second difference of independent errors has 6 times their variance, and the median absolute deviation keeps
+    turns and gaps from counting as noise.
+
+    Args:
+        param1: Array of the values of one column, in track order.
+
+    Returns:
+        The standard deviation, 0 for fewer than 3 points
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) < 3:
+        return 0.0
+    second = np.diff(values, 2)
+    return float(1.4826 * np.median(np.abs(second - np.median(second))) / np.sqrt(6))
+
+def splineSmooth(values, seconds, degree=3, measurementError=None, window=500, overlap=50):
+    """
+    Smooths a track by fitting a smoothing spline to each column against time, x(t), y(t) and z(t).
+
+    As the columns are fitted against time rather than against each other, loops and back-tracking are smoothed
+    like any other stretch of the track and the points stay in their order. The track is fitted in windows of
+    `window` points that overlap by `overlap` points, which are cross-faded from one window to the next, so the cost
+    grows linearly with the length of the track.
+
+    Args:
+        param1: Array of the positions to smooth, one row per point, e.g. UTM eastings and northings side by side,
+                or a 1-D array of altitudes.
+        param2: Array of the times of the points in seconds, in track order. Repeated or out of order times are
+                taken as 1 ms apart.
+        param3: The degree of the spline, 1 to 5 (default 3, cubic).
+        param4: The standard deviation of the GPS error, in the units of the positions. The default, None, estimates
+                it for each column of the whole track with noiseOf.
+        param5: The number of points fitted at a time (default 500).
+        param6: The number of points shared by neighbouring windows (default 50).
+
+    Returns:
+        A float64 array of the same shape
+
+    >>> splineSmooth(np.array([0.0, 1.0, 2.0, 3.0, 4.0]), np.arange(5.0), 1, 0.1).round(6).tolist()
+    [0.0, 1.0, 2.0, 3.0, 4.0]
+    """
+    from scipy.interpolate import UnivariateSpline
+
+    values = np.asarray(values, dtype=np.float64)
+    seconds = np.asarray(seconds, dtype=np.float64)
+    count = len(values)
+    if len(seconds) != count:
+        raise ValueError('There are {0} times for {1} points'.format(len(seconds), count))
+    if not 1 <= degree <= 5:
+        raise ValueError('The spline degree must be between 1 and 5, not {0}'.format(degree))
+    if overlap < 0 or window <= max(2 * overlap, degree):
+        raise ValueError('The window, {0}, must be longer than twice the overlap, {1}, and the degree'.format(window, overlap))
+    if count <= degree:
+        return values.copy()
+
+    # the spline needs strictly increasing times
+    times = np.concatenate([[0.0], np.cumsum(np.maximum(np.diff(seconds), 1e-3))])
+    columns = values.reshape(count, -1)
+    if measurementError is None:
+        errors = [noiseOf(columns[:, column]) for column in range(columns.shape[1])]
+    else:
+        errors = [measurementError] * columns.shape[1]
+    result = np.zeros(columns.shape)
+    weights = np.zeros(count)
+
+    step = window - overlap
+    starts = list(range(0, max(count - window, 0) + 1, step))
+    if starts[-1] + window < count:
+        starts.append(count - window)
+    ramp = np.arange(1, overlap + 1) / float(overlap + 1)
+    for start in starts:
+        stop = min(start + window, count)
+        t = times[start:stop] - times[start]
+        weight = np.ones(stop - start)
+        if start > 0:
+            weight[:overlap] = ramp
+        if stop < count:
+            weight[len(weight) - overlap:] = ramp[::-1]
+        for column in range(columns.shape[1]):
+            z = columns[start:stop, column]
+            origin = z[0]
+            fit = UnivariateSpline(t, z - origin, k=degree, s=len(t) * errors[column] ** 2)(t) + origin
+            result[start:stop, column] += weight * fit
+        weights[start:stop] += weight
+    return (result / weights[:, None]).reshape(values.shape)
+
+def splineSmoothTrack(longitude, latitude, seconds, degree=3, measurementError=None):
+    """
+    Smooths WGS84 track points with splineSmooth in the UTM zone of the track.
+
+    Args:
+        param1: Array of WGS84 longitudes, in track order.
+        param2: Array of WGS84 latitudes.
+        param3: Array of the times of the points in seconds.
+        param4: The degree of the spline, 1 to 5 (default 3, cubic).
+        param5: The standard deviation of the GPS error in metres, estimated from the track by default.
+
+    Returns:
+        A tuple of arrays of the smoothed longitudes and latitudes
+    """
+    if len(longitude) == 0:
+        return np.array(longitude, dtype=np.float64), np.array(latitude, dtype=np.float64)
+    xy, utm = _projected(longitude, latitude)
+    smoothed = splineSmooth(xy, seconds, degree, measurementError)
+    return utm.inverse(smoothed[:, 0], smoothed[:, 1])
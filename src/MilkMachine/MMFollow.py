@@ -0,0 +1,45 @@
+import numpy as np
+
+import TeatDip
+
+def followHeadings(longitude, latitude, smoother=1):
+    """
+    Calculates the headings of a follow behind camera, looking from each point towards the points ahead of it.
+
+    Each heading is the circular mean of the compass bearings from the point to the next `smoother` points. The last
+    `smoother` points, which do not have that many points ahead of them, keep the heading of the point before.
+    The bearings of each offset are computed for the whole track at once with the array form of
+    TeatDip.compass_bearing, and their TeatDip.unit_vector added to running sums, so the cost is `smoother` array
+    operations rather than `smoother` scalar bearings per point, and memory does not grow with `smoother`.
+
+    Args:
+        param1: Sequence of WGS84 longitudes, in track order.
+        param2: Sequence of WGS84 latitudes.
+        param3: The number of points ahead to average over (default 1).
+
+    Returns:
+        A NumPy array of headings in degrees, [0, 360)
+
+    >>> followHeadings([0.0, 0.0, 0.001, 0.002], [0.0, 0.001, 0.001, 0.001], 1).round(1).tolist()
+    [0.0, 90.0, 90.0, 90.0]
+    """
+    longitude = np.asarray(longitude, dtype=np.float64)
+    latitude = np.asarray(latitude, dtype=np.float64)
+    count = len(longitude)
+    if smoother < 1 or smoother >= count:
+        raise ValueError('The smoother, {0}, must be between 1 and the number of points less one, {1}'.format(smoother, count - 1))
+
+    # rows 0 to count - 1 - smoother have every bearing of the window. The circular mean is the direction of the sum
+    # of the bearings' unit vectors, summed one offset at a time. A repeated point has a bearing of 0, due north
+    rows = count - smoother
+    sines = np.zeros(rows)
+    cosines = np.zeros(rows)
+    for offset in range(1, smoother + 1):
+        ahead = slice(offset, offset + rows)
+        sine, cosine = TeatDip.unit_vector(TeatDip.compass_bearing((latitude[:rows], longitude[:rows]), (latitude[ahead], longitude[ahead])))
+        sines += sine
+        cosines += cosine
+    headings = np.empty(count)
+    headings[:rows] = np.degrees(np.arctan2(sines, cosines)) % 360
+    headings[rows:] = headings[rows - 1]
+    return headings
@@ -1,11 +1,19 @@
 import csv
-import datetime
+import itertools
+import os
 import re
+import sqlite3
 import traceback
+from xml.etree import cElementTree as ElementTree
+
+import numpy as np
+
+import MMCache
+import MMTime
 
 from PyQt4.QtCore import QVariant
 
-from qgis.core import QgsField, QgsVectorFileWriter, QgsVectorLayer
+from qgis.core import QgsFeature, QgsField, QgsGeometry, QgsPoint, QgsVectorFileWriter, QgsVectorLayer
 from qgis.gui import QgsMessageBar
 
 # generic function for finding the idices of qgsvector layers
@@ -16,95 +24,315 @@ def field_indices(qgsvectorlayer):
         field_dict[f.name()] = qgsvectorlayer.fieldNameIndex(f.name())
     return field_dict
 
-# given the path to a CSV file, returns a QgsVectorLayer
-def loadCSVLayer(gpsPath, logger, messageBar, dateFormat, mainWindow, messageBox):
-    fields = ['date', 'time', 'x', 'y', 'altitude']
-    userfields = []
+def workingFormat():
+    """
+    Returns the OGR driver and file extension of the working copies, a GeoPackage where OGR can write one (GDAL 1.11
+    and later) and a shapefile otherwise.
+
+    A GeoPackage keeps whole field names and string values, which a shapefile cuts at 10 and 254 characters, and is
+    a single SQLite file that the provider updates in place.
+
+    Returns:
+        A tuple (driver, extension), e.g. ('GPKG', '.gpkg')
+    """
+    if 'GPKG' in QgsVectorFileWriter.ogrDriverList().values():
+        return 'GPKG', '.gpkg'
+    return 'ESRI Shapefile', '.shp'
+
+def indexGeoPackage(path, columns=('datetime',)):
+    """
+    Indexes columns of the feature tables of a GeoPackage, the fid being indexed as its primary key already.
+
+    Args:
+        param1: The path to the GeoPackage, which must not be open for writing.
+        param2: The names of the columns to index (default ('datetime',)).
+    """
+    connection = sqlite3.connect(path)
+    try:
+        with connection:
+            tables = [row[0] for row in connection.execute("SELECT table_name FROM gpkg_contents WHERE data_type = 'features'")]
+            for table in tables:
+                names = [row[1] for row in connection.execute('PRAGMA table_info("{0}")'.format(table))]
+                for column in columns:
+                    if column in names:
+                        connection.execute('CREATE INDEX IF NOT EXISTS "{0}_{1}_idx" ON "{0}" ("{1}")'.format(table, column))
+    finally:
+        connection.close()
+
+def writeWorkingCopy(memorylayer, basePath):
+    """
+    Writes an imported track, built in a memory layer, to the working copy that MilkMachine edits.
+
+    The copy is a GeoPackage with an indexed datetime column where OGR supports it, see workingFormat. Its features
+    are then numbered from 1, rather than from 0 as in a shapefile. Its MMCache sidecar is written as well.
+
+    Args:
+        param1: The memory QgsVectorLayer, named after the track.
+        param2: The path of the working copy without its extension, e.g. the track's path without '.csv'.
+
+    Returns:
+        The working copy QgsVectorLayer
+    """
+    driver, extension = workingFormat()
+    path = basePath + extension
+    if driver == 'GPKG' and os.path.exists(path):
+        # an earlier import of the same track, GeoPackages are not overwritten by the writer
+        os.remove(path)
+    QgsVectorFileWriter.writeAsVectorFormat(memorylayer, path, "utf-8", None, driver)
+    if driver == 'GPKG':
+        indexGeoPackage(path)
+    layer = QgsVectorLayer(path, memorylayer.name(), "ogr")
+    MMCache.layerTrack(layer)
+    return layer
+
+# the columns a CSV track must have
+CSV_COLUMNS = ('date', 'time', 'x', 'y', 'altitude')
+
+def readCSV(gpsPath):
+    """
+    Reads a CSV track into columns with a single pass over the file.
+
+    Args:
+        param1: The path to the CSV file, with the column names in its first row.
+
+    Returns:
+        A tuple (header, columns) of the column names and a list with the strings of each column, short rows being
+        padded with empty strings
+    """
     with open(gpsPath, 'rb') as csvfile:
         reader = csv.reader(csvfile, delimiter=',')
-        i = 0
-        for row in reader:
-            if i == 0: #header row
-                #check for x
-                for f in fields:
-                    Fre = re.search(f, str(row), re.I)
-                    if Fre:
-                        userfields.append(Fre.group())
-                    else:
-                        # hang an error
-                        logger.error('CSV column names import error. Failed on: %s' % f)
-                        messageBox.critical(mainWindow, "Column Name Error", "Missing column: %s\n\nPlease reformat csv file. Column headers should include: 'date', 'time', 'x', 'y', 'altitude'" %(f))
-            else:
-                pass
-            i += 1
-
-        if i < 10:
-            messageBox.warning(mainWindow, "Friendly Import Warning", "This track is pretty short, which if fine. However, some of the track smoothing and tour automation won't work great because it is geared for longer tracks. Give it a try anyway and let us know if you encounter an error or serious problem at https://github.com/EdFarrell/MilkMachine/issues" )
-
-    if len(userfields) == 5:
-        logger.info('headers %s' % userfields)
-        messageBar.pushMessage("Success", "User file column headers good: {0}".format(gpsPath), level=QgsMessageBar.INFO, duration=5)
-
-        #http://qgis.org/api/classQgsVectorLayer.html
-        layername = gpsPath.split(".")[0].split('/')[-1]
-        #crs = QgsCoordinateReferenceSystem(4326).toProj4()
-        crs = 'EPSG:4326'
-        uri = "file:/" + gpsPath + "?delimiter=%s&xField=%s&yField=%s&crs=%s" % (",", "x", "y", crs)
-        logger.info('uri: %s' % uri)
-        Qlayer = QgsVectorLayer(uri, layername, "delimitedtext")
-
-        # check the rest of the fields. required are date, time, and z
-        fdict = field_indices(Qlayer)
-        logger.info('fdict : %s' %(fdict))
-
-        # save the kml layer as
-        shapepath = gpsPath.split(".")[0] + '.shp'
-        shapepath_line = gpsPath.split(".")[0] + '_line.shp'
-        #shapepath_dup = gpsPath.split(".")[0] + '_duplicate.shp'
-
-        QgsVectorFileWriter.writeAsVectorFormat(Qlayer, shapepath, "utf-8", None, "ESRI Shapefile")  # working copy
-        #bring the shapefile back in, and render it on the map
-        shaper = QgsVectorLayer(shapepath, layername, "ogr")
-        shaper.dataProvider().addAttributes( [QgsField("datetime",QVariant.String), QgsField("camera",QVariant.String), QgsField("flyto",QVariant.String), QgsField("iconstyle", QVariant.String), QgsField("labelstyle", QVariant.String), QgsField("model", QVariant.String), QgsField("lookat", QVariant.String) , QgsField("symbtour", QVariant.String)])
-        shaper.updateFields()
-
-        fields = field_indices(shaper)
-        # calculate the datetime field
-        # idx = fields['datetime']  #feature.attributes()[idx]
-        fid_dt = []
-        # model_altitude = []
+        header = [name.strip() for name in next(reader, [])]
+        columns = [list(column) for column in itertools.izip_longest(*[row for row in reader if row], fillvalue='')]
+    rows = len(columns[0]) if columns else 0
+    columns = columns[:len(header)] + [[''] * rows for name in header[len(columns):]]
+    return header, columns
+
+# given the path to a CSV file, returns a QgsVectorLayer
+def loadCSVLayer(gpsPath, logger, messageBar, dateFormat, mainWindow, messageBox):
+    header, columns = readCSV(gpsPath)
+    index = dict((name.lower(), i) for i, name in enumerate(header))
+    missing = [f for f in CSV_COLUMNS if f not in index]
+    for f in missing:
+        # hang an error
+        logger.error('CSV column names import error. Failed on: %s' % f)
+        messageBox.critical(mainWindow, "Column Name Error", "Missing column: %s\n\nPlease reformat csv file. Column headers should include: 'date', 'time', 'x', 'y', 'altitude'" %(f))
+    if missing:
+        return None
+
+    rows = len(columns[0])
+    if rows < 9:
+        messageBox.warning(mainWindow, "Friendly Import Warning", "This track is pretty short, which if fine. However, some of the track smoothing and tour automation won't work great because it is geared for longer tracks. Give it a try anyway and let us know if you encounter an error or serious problem at https://github.com/EdFarrell/MilkMachine/issues" )
+    logger.info('headers %s' % header)
+    messageBar.pushMessage("Success", "User file column headers good: {0}".format(gpsPath), level=QgsMessageBar.INFO, duration=5)
+
+    try:
+        #['mm/dd/yyyy', 'dd/mm/yyyy', 'yyyy/mm/dd']
+        datetimes = MMTime.formatColumn(MMTime.parseDateTimeColumns(columns[index['date']], columns[index['time']], dateFormat))
+    except:
+        logger.error('Error writing time to datetime column, user presented with messagebox')
+        logger.exception(traceback.format_exc())
+        messageBox.critical(mainWindow,"Date & Time Import Error", "An error occured while converting the 'date' and 'time' fields into a Python datetime object. Please make sure that your specified the correct date format, and the time format is HH:MM:SS. If your seconds are fractional, then please express this as SS.xxxxxx")
+        return None
+
+    # the CSV columns are kept, as numbers where the whole column is, followed by the MilkMachine columns
+    fields = []; values = []
+    for name, column in zip(header, columns):
         try:
-            for f in shaper.getFeatures():
-                # currentatt = f.attributes()[fields['datetime']]  # this should be fields['Name']
-                pointdate = f.attributes()[fields['date']]  #2014/06/06
-                pointtime = f.attributes()[fields['time']]
-
-                # format for microseconds
-                sec_pieces = pointtime.split(':')[2].split('.')
-                if len(sec_pieces) == 1:
-                    microsec = 0
-                elif len(sec_pieces) == 2:
-                    microsec = int(float('0.' + sec_pieces[1]) * 1000000)
-
-                #['mm/dd/yyyy', 'dd/mm/yyyy', 'yyyy/mm/dd']
-                if dateFormat == 'mm/dd/yyyy':
-                    current_dt = datetime.datetime(int(pointdate.split('/')[2]), int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]), microsec)
-                elif dateFormat == 'dd/mm/yyyy':
-                    current_dt = datetime.datetime(int(pointdate.split('/')[2]), int(pointdate.split('/')[1]), int(pointdate.split('/')[0]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]), microsec)
-                elif dateFormat == 'yyyy/mm/dd':
-                    current_dt = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]), microsec)
-
-                fid_dt.append([f.id(), current_dt.strftime("%Y/%m/%d %H:%M:%S %f")])
-
-            shaper.startEditing()
-            shaper.beginEditCommand('datetime')
-            for i,v in enumerate(fid_dt):
-                shaper.changeAttributeValue(v[0],fields['datetime'], v[1])
-            shaper.endEditCommand()
-            shaper.commitChanges()
-
-            return shaper
-        except:
-            logger.error('Error writing time to datetime column, user presented with messagebox')
-            logger.exception(traceback.format_exc())
-            messageBox.critical(mainWindow,"Date & Time Import Error", "An error occured while converting the 'date' and 'time' fields into a Python datetime object. Please make sure that your specified the correct date format, and the time format is HH:MM:SS. If your seconds are fractional, then please express this as SS.xxxxxx")
+            values.append(np.array(column, dtype=np.float64).tolist())
+            fields.append(QgsField(name, QVariant.Double))
+        except ValueError:
+            values.append(column)
+            fields.append(QgsField(name, QVariant.String))
+    fields += [QgsField("datetime",QVariant.String), QgsField("camera",QVariant.String), QgsField("flyto",QVariant.String), QgsField("iconstyle", QVariant.String), QgsField("labelstyle", QVariant.String), QgsField("model", QVariant.String), QgsField("lookat", QVariant.String) , QgsField("symbtour", QVariant.String)]
+    x = np.array(columns[index['x']], dtype=np.float64).tolist()
+    y = np.array(columns[index['y']], dtype=np.float64).tolist()
+
+    layername = gpsPath.split(".")[0].split('/')[-1]
+    memorylayer = QgsVectorLayer("Point?crs=EPSG:4326", layername, "memory")
+    memorylayer.dataProvider().addAttributes(fields)
+    memorylayer.updateFields()
+    empty = [None] * 7
+    features = []
+    for px, py, attributes, dt in itertools.izip(x, y, itertools.izip(*values), datetimes):
+        f = QgsFeature(memorylayer.pendingFields())
+        f.setGeometry(QgsGeometry.fromPoint(QgsPoint(px, py)))
+        f.setAttributes(list(attributes) + [dt] + empty)
+        features.append(f)
+    memorylayer.dataProvider().addFeatures(features)
+    logger.info('loadCSVLayer: {0} points read from {1}'.format(len(features), gpsPath))
+    return writeWorkingCopy(memorylayer, gpsPath.split(".")[0])
+
+# the altitude in the description of a GPS logger placemark, e.g. u'Time:10:38:48, ..., Altitude: -3.756733'. The
+# descriptions are matched in one go, separated by NUL characters, so every description gives one match
+_ALTITUDES = re.compile(r'(?:[^\x00]*?Altitude:\s*([-+]?[0-9]*\.?[0-9]+(?:[eE][-+]?[0-9]+)?))?[^\x00]*\x00')
+
+def readKML(kmlPath):
+    """
+    Reads the point placemarks of a KML file written by a GPS logger into arrays, in file order.
+
+    The file is stream parsed, each <Placemark> being emptied once it has been read, and the coordinates and
+    descriptions of all the points are then parsed in one go. The time of a placemark is its <TimeStamp><when> if it
+    has one, else its <name>, e.g. u'2014/06/06 10:38:48'. The altitude is taken from its <description>, e.g.
+    u'Time:10:38:48, Latitude: 39.965949, Longitude: -75.172239, Speed: 0.102851, Altitude: -3.756733', or else from
+    its coordinates. Placemarks without a <Point> are skipped.
+
+    Args:
+        param1: The path to the KML file.
+
+    Returns:
+        A tuple (names, descriptions, longitude, latitude, altitude, epoch) of two lists of strings, None where the
+        placemark has none, and NumPy arrays, the altitude being NaN where the point has none and the epoch in
+        microseconds since 1970/01/01. Raises ValueError if the time of a point can not be read.
+    """
+    names = []; descriptions = []; coordinatelist = []; whens = []
+    events = ElementTree.iterparse(kmlPath, events=('start', 'end'))
+    # KML 2.1 and 2.2 differ in their namespace, taken from the <kml> element
+    event, root = next(events)
+    namespace = root.tag[:root.tag.rfind('}') + 1]
+    placemark = namespace + 'Placemark'; point = namespace + 'Point'
+    name = namespace + 'name'; description = namespace + 'description'; coordinates = namespace + 'coordinates'; when = namespace + 'when'
+    texts = {}
+    for event, element in events:
+        if event == 'start':
+            continue
+        tag = element.tag
+        if tag == coordinates or tag == when:
+            texts[tag] = element.text
+        elif tag == point:
+            texts[point] = True
+        elif tag == placemark:
+            if point in texts:
+                names.append(element.findtext(name))
+                descriptions.append(element.findtext(description))
+                coordinatelist.append(texts.get(coordinates) or '')
+                whens.append(texts.get(when))
+            texts = {}
+            # only the empty element is left in the document
+            element.clear()
+
+    # the coordinates of all the points parsed at once, a point having one value more than it has commas
+    counts = np.array([value.count(',') + 1 for value in coordinatelist], dtype=np.int64)
+    values = np.fromstring(u' '.join(coordinatelist).replace(u',', u' ').encode('ascii'), dtype=np.float64, sep=' ')
+    if len(values) != counts.sum() or np.any(counts < 2):
+        raise ValueError('Unreadable point coordinates in {0}'.format(kmlPath))
+    offsets = np.cumsum(counts) - counts
+    altitude = np.full(len(counts), np.nan)
+    altitude[counts > 2] = values[offsets[counts > 2] + 2]
+    # a GPS logger's altitude, in the description, is taken over that of the coordinates
+    logged = np.array(_ALTITUDES.findall(u''.join((text or u'') + u'\x00' for text in descriptions)), dtype=np.unicode_)
+    altitude[logged != u''] = logged[logged != u''].astype(np.float64)
+
+    epoch = np.zeros(len(names), dtype=np.int64)
+    stamped = np.array([value is not None for value in whens], dtype=bool)
+    if stamped.any():
+        epoch[stamped] = MMTime.parseIsoColumn([value for value in whens if value is not None])
+    if not stamped.all():
+        epoch[~stamped] = MMTime.parseColumn([value for value, stamp in zip(names, stamped.tolist()) if not stamp])
+    return names, descriptions, values[offsets], values[offsets + 1], altitude, epoch
+
+def writeTrackLayer(layername, basePath, names, descriptions, longitude, latitude, altitude, epoch):
+    """
+    Writes the working copy of a track read into arrays, with the columns of a KML import.
+
+    The points are built in a memory layer and written to the working copy in one go.
+
+    Args:
+        param1: The name of the layer.
+        param2: The path of the working copy without its extension, see writeWorkingCopy.
+        param3: The Name of each point.
+        param4: The Description of each point.
+        param5 to param8: Arrays of the longitudes, latitudes, altitudes (NaN where there is none) and epoch
+                          microseconds of the points.
+
+    Returns:
+        The working copy QgsVectorLayer
+    """
+    memorylayer = QgsVectorLayer("Point?crs=EPSG:4326", layername, "memory")
+    memorylayer.dataProvider().addAttributes([QgsField("Name", QVariant.String), QgsField("Description", QVariant.String), QgsField("datetime",QVariant.String), QgsField("audio",QVariant.String), QgsField("camera",QVariant.String), QgsField("flyto",QVariant.String), QgsField("iconstyle", QVariant.String), QgsField("labelstyle", QVariant.String), QgsField("model", QVariant.String), QgsField("lookat", QVariant.String) , QgsField("symbtour", QVariant.String), QgsField("altitude",QVariant.Double)])
+    memorylayer.updateFields()
+    fields = memorylayer.pendingFields()
+
+    empty = [None] * 8
+    features = []
+    for pointname, text, x, y, z, dt in itertools.izip(names, descriptions, longitude.tolist(), latitude.tolist(), np.round(altitude, 2).tolist(), MMTime.formatColumn(epoch)):
+        f = QgsFeature(fields)
+        f.setGeometry(QgsGeometry.fromPoint(QgsPoint(x, y)))
+        f.setAttributes([pointname, text, dt] + empty + [None if z != z else z])
+        features.append(f)
+    memorylayer.dataProvider().addFeatures(features)
+    return writeWorkingCopy(memorylayer, basePath)
+
+def writeLineCopy(layer, basePath):
+    """
+    Writes the line through the points of a track layer, in feature id order, next to its working copy.
+
+    Args:
+        param1: The QgsVectorLayer holding the track.
+        param2: The path of the line layer without its extension, e.g. the track's path without '.kml' plus '_line'.
+
+    Returns:
+        The line QgsVectorLayer, named after the track layer
+    """
+    track = MMCache.layerTrack(layer)
+    linelayer = QgsVectorLayer("LineString?crs=EPSG:4326", layer.name(), "memory")
+    line = QgsFeature()
+    line.setGeometry(QgsGeometry.fromPolyline([QgsPoint(x, y) for x, y in itertools.izip(track['lon'].tolist(), track['lat'].tolist())]))
+    linelayer.dataProvider().addFeatures([line])
+
+    driver, extension = workingFormat()
+    path = basePath + extension
+    if driver == 'GPKG' and os.path.exists(path):
+        os.remove(path)
+    QgsVectorFileWriter.writeAsVectorFormat(linelayer, path, "utf-8", None, driver)
+    return QgsVectorLayer(path, layer.name(), "ogr")
+
+# given the path to a KML file written by a GPS logger, returns a QgsVectorLayer
+def loadKMLLayer(kmlPath, logger):
+    names, descriptions, longitude, latitude, altitude, epoch = readKML(kmlPath)
+    layername = kmlPath.split(".")[0].split('/')[-1]
+    logger.info('loadKMLLayer: {0} points read from {1}'.format(len(names), kmlPath))
+    return writeTrackLayer(layername, kmlPath.split(".")[0], names, descriptions, longitude, latitude, altitude, epoch)
+
+def readGPX(gpxPath):
+    """
+    Reads the track points of a GPX file into arrays, in file order.
+
+    The file is stream parsed and each <trkpt> is dropped from its segment once it has been read, so only the arrays
+    are held in memory. The points of every <trk> and <trkseg> are read one after the other.
+
+    Args:
+        param1: The path to the GPX file.
+
+    Returns:
+        A tuple (longitude, latitude, elevation, epoch) of NumPy arrays, the elevation being NaN where the point has
+        none and the epoch in microseconds since 1970/01/01 UTC. Raises ValueError if a point has no <time>.
+    """
+    longitude = []; latitude = []; elevation = []; times = []
+    events = ElementTree.iterparse(gpxPath, events=('start', 'end'))
+    # GPX 1.0 and 1.1 differ in their namespace, taken from the <gpx> element
+    event, segment = next(events)
+    namespace = segment.tag[:segment.tag.rfind('}') + 1]
+    trkseg = namespace + 'trkseg'; trkpt = namespace + 'trkpt'; ele = namespace + 'ele'; time = namespace + 'time'
+    for event, element in events:
+        if element.tag == trkpt:
+            if event == 'end':
+                latitude.append(float(element.get('lat')))
+                longitude.append(float(element.get('lon')))
+                elevation.append(element.findtext(ele))
+                times.append(element.findtext(time))
+                segment.clear()
+        elif element.tag == trkseg and event == 'start':
+            segment = element
+    if None in times:
+        raise ValueError('Track point {0} of {1} has no time'.format(times.index(None), gpxPath))
+    return (np.array(longitude, dtype=np.float64), np.array(latitude, dtype=np.float64),
+            np.array([value or np.nan for value in elevation], dtype=np.float64), MMTime.parseIsoColumn(times))
+
+# given the path to a GPX file, returns a QgsVectorLayer
+def loadGPXLayer(gpxPath, logger):
+    longitude, latitude, elevation, epoch = readGPX(gpxPath)
+    layername = gpxPath.split(".")[0].split('/')[-1]
+    # named by their time, as the points of a KML
+    names = MMTime.formatColumn(epoch)
+    logger.info('loadGPXLayer: {0} points read from {1}'.format(len(names), gpxPath))
+    return writeTrackLayer(layername, gpxPath.split(".")[0], names, [None] * len(names), longitude, latitude, elevation, epoch)
@@ -0,0 +1,133 @@
+import collections
+import threading
+
+import numpy as np
+
+import MMUtm
+
+class UtmZone(object):
+    """
+    One UTM zone and hemisphere, with its QGIS coordinate reference system created on first use.
+
+    The array methods project with MMUtm and do not need QGIS at all, so the filters, the simplification and the
+    track cache use the registry outside QGIS too.
+    """
+    def __init__(self, zone, south):
+        self.zone = zone
+        self.south = south
+        self._crs = False
+
+    def crs(self):
+        """Returns the QgsCoordinateReferenceSystem of the zone, or None if QGIS can not create it."""
+        from qgis.core import QgsCoordinateReferenceSystem
+
+        if self._crs is False:
+            crs = QgsCoordinateReferenceSystem()
+            proj4String = "+proj=utm +ellps=WGS84 +datum=WGS84 +units=m +zone=%s" % self.zone
+            if self.south:
+                proj4String += " +south"
+            result = crs.createFromProj4(proj4String)
+            self._crs = crs if result and crs.isValid() else None
+        return self._crs
+
+    def forward(self, longitude, latitude):
+        """Projects arrays of WGS84 longitudes and latitudes to arrays of eastings and northings."""
+        return MMUtm.toUtm(longitude, latitude, self.zone, self.south)
+
+    def inverse(self, easting, northing):
+        """Unprojects arrays of eastings and northings to arrays of WGS84 longitudes and latitudes."""
+        return MMUtm.fromUtm(easting, northing, self.zone, self.south)
+
+
+class ProjectionRegistry(object):
+    """
+    A least recently used cache of UtmZones keyed by zone and hemisphere, shared by export, track details, filtering,
+    simplification and the track cache.
+    The export worker uses it off the GUI thread, so lookups are locked.
+
+    Args:
+        param1: The number of zones to keep (default 16).
+    """
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._zones = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, zone, south):
+        """Returns the UtmZone for the given zone number and hemisphere (True for south)."""
+        key = (int(zone), bool(south))
+        with self._lock:
+            try:
+                utm = self._zones.pop(key)
+                self.hits += 1
+            except KeyError:
+                utm = UtmZone(*key)
+                self.misses += 1
+                if len(self._zones) >= self.maxsize:
+                    self._zones.popitem(last=False)
+            self._zones[key] = utm
+        return utm
+
+    def zoneOf(self, longitude, latitude):
+        """
+        Returns the UtmZone of a track, the zone of its middle point.
+
+        Args:
+            param1: Array of WGS84 longitudes.
+            param2: Array of WGS84 latitudes.
+        """
+        zone, south = MMUtm.trackZone(longitude, latitude)
+        return self.get(zone, south)
+
+    def _groups(self, zones, south):
+        zones = np.asarray(zones)
+        south = np.asarray(south, dtype=bool) * np.ones(zones.shape, dtype=bool)
+        keys = zones * 2 + south
+        for key in np.unique(keys):
+            yield self.get(key // 2, key % 2), keys == key
+
+    def forward(self, longitude, latitude, zones=None, south=None):
+        """
+        Projects arrays of WGS84 points to UTM, each point into its own zone.
+
+        Args:
+            param1: Array of WGS84 longitudes.
+            param2: Array of WGS84 latitudes.
+            param3: Array of UTM zones, found from the points if not given.
+            param4: Boolean array, True for the southern hemisphere. Defaults to latitude < 0.
+
+        Returns:
+            A tuple of arrays of eastings, northings, zones and south flags, the last two to pass back to inverse
+        """
+        longitude = np.asarray(longitude, dtype=np.float64)
+        latitude = np.asarray(latitude, dtype=np.float64)
+        if zones is None:
+            zones, bands = MMUtm.utmZones(latitude, longitude)
+        if south is None:
+            south = latitude < 0
+        easting = np.empty(longitude.shape); northing = np.empty(longitude.shape)
+        for utm, rows in self._groups(zones, south):
+            easting[rows], northing[rows] = utm.forward(longitude[rows], latitude[rows])
+        return easting, northing, zones, south
+
+    def inverse(self, easting, northing, zones, south):
+        """
+        Unprojects arrays of UTM points back to WGS84, each point from its own zone.
+
+        Returns:
+            A tuple of arrays of WGS84 longitudes and latitudes
+        """
+        easting = np.asarray(easting, dtype=np.float64)
+        northing = np.asarray(northing, dtype=np.float64)
+        longitude = np.empty(easting.shape); latitude = np.empty(easting.shape)
+        for utm, rows in self._groups(zones, south):
+            longitude[rows], latitude[rows] = utm.inverse(easting[rows], northing[rows])
+        return longitude, latitude
+
+    def cacheInfo(self):
+        """Returns a string with the hit and miss counters, for the log."""
+        return 'projection cache: {0} hits, {1} misses, {2} zones'.format(self.hits, self.misses, len(self._zones))
+
+registry = ProjectionRegistry()
@@ -0,0 +1,207 @@
+import heapq
+
+import numpy as np
+
+import MMCache
+import MMProjection
+import MMTime
+
+METHODS = ('douglas-peucker', 'visvalingam')
+
+def _distances(x, y, seconds, first, last):
+    # distances of the points between first and last from the segment joining them. With times, from where the
+    # segment puts the point at its time (the synchronized distance), else from the segment itself
+    inner = slice(first + 1, last)
+    dx = x[last] - x[first]; dy = y[last] - y[first]
+    px = x[inner] - x[first]; py = y[inner] - y[first]
+    if seconds is not None and seconds[last] > seconds[first]:
+        fraction = (seconds[inner] - seconds[first]) / (seconds[last] - seconds[first])
+    else:
+        length = dx * dx + dy * dy
+        fraction = (px * dx + py * dy) / length if length > 0 else np.zeros(last - first - 1)
+    fraction = np.clip(fraction, 0.0, 1.0)
+    return np.hypot(px - fraction * dx, py - fraction * dy)
+
+def douglasPeucker(x, y, tolerance, seconds=None):
+    """
+    Simplifies a track with the Douglas-Peucker algorithm, using a stack rather than recursion.
+
+    Each segment keeps the point furthest from it if that point is more than `tolerance` away, and is split there.
+    The distances of a segment's points are computed in one NumPy operation.
+
+    Args:
+        param1: Array of projected x coordinates in metres, e.g. UTM eastings.
+        param2: Array of projected y coordinates in metres.
+        param3: The largest distance in metres a removed point may be from the simplified track.
+        param4: Array of the times of the points in seconds. If given, a point is measured from where the simplified
+                track is at its time rather than from the closest point of the simplified track, so that stops and
+                changes of speed are kept as well as turns (default None).
+
+    Returns:
+        A boolean array, True for the points to keep
+
+    >>> douglasPeucker([0.0, 1.0, 2.0, 3.0, 4.0], [0.0, 0.1, 0.0, 5.0, 0.0], 1.0).tolist()
+    [True, False, True, True, True]
+    >>> douglasPeucker([0.0, 1.0, 2.0], [0.0, 0.0, 0.0], 0.5, seconds=[0.0, 9.0, 10.0]).tolist()
+    [True, True, True]
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    if seconds is not None:
+        seconds = np.asarray(seconds, dtype=np.float64)
+    count = len(x)
+    keep = np.zeros(count, dtype=bool)
+    if count == 0:
+        return keep
+    keep[0] = keep[-1] = True
+
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        distances = _distances(x, y, seconds, first, last)
+        furthest = int(np.argmax(distances))
+        if distances[furthest] > tolerance:
+            split = first + 1 + furthest
+            keep[split] = True
+            stack.append((split, last))
+            stack.append((first, split))
+    return keep
+
+def visvalingam(x, y, tolerance):
+    """
+    Simplifies a track with the Visvalingam-Whyatt algorithm.
+
+    The point making the smallest triangle with its neighbours is removed until every remaining triangle has an
+    area of at least tolerance squared. A removed point's area is carried over to its neighbours, so that a point
+    is never removed before the ones removed around it.
+
+    Args:
+        param1: Array of projected x coordinates in metres, e.g. UTM eastings.
+        param2: Array of projected y coordinates in metres.
+        param3: The tolerance in metres, the square root of the smallest area kept.
+
+    Returns:
+        A boolean array, True for the points to keep
+
+    >>> visvalingam([0.0, 1.0, 2.0, 3.0, 4.0], [0.0, 0.1, 0.0, 5.0, 0.0], 1.0).tolist()
+    [True, False, True, True, True]
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    count = len(x)
+    if count < 3:
+        return np.ones(count, dtype=bool)
+
+    # the areas of all the first triangles at once, the removals then update the neighbours one at a time
+    areas = np.zeros(count)
+    areas[1:-1] = np.abs((x[:-2] - x[2:]) * (y[1:-1] - y[2:]) - (x[1:-1] - x[2:]) * (y[:-2] - y[2:])) / 2.0
+    threshold = tolerance * tolerance
+    heap = [(area, i) for i, area in enumerate(areas.tolist()) if 0 < i < count - 1 and area < threshold]
+    heapq.heapify(heap)
+    areas = areas.tolist()
+    xs = x.tolist(); ys = y.tolist()
+    keep = [True] * count
+    previous = list(range(-1, count - 1))
+    following = list(range(1, count + 1))
+
+    while heap:
+        smallest, i = heapq.heappop(heap)
+        if not keep[i] or smallest != areas[i]:
+            # removed, or an outdated entry of a point whose area has changed
+            continue
+        keep[i] = False
+        a = previous[i]; b = following[i]
+        following[a] = b; previous[b] = a
+        for neighbour in (a, b):
+            if 0 < neighbour < count - 1:
+                p = previous[neighbour]; n = following[neighbour]
+                area = abs((xs[p] - xs[n]) * (ys[neighbour] - ys[n]) - (xs[neighbour] - xs[n]) * (ys[p] - ys[n])) / 2.0
+                areas[neighbour] = area = max(area, smallest)
+                if area < threshold:
+                    heapq.heappush(heap, (area, neighbour))
+    return np.array(keep, dtype=bool)
+
+def simplify(longitude, latitude, tolerance, seconds=None, method='douglas-peucker'):
+    """
+    Finds the points of a WGS84 track to keep, measuring the tolerance in metres in the UTM zone of the track.
+
+    Args:
+        param1: Array of WGS84 longitudes, in track order.
+        param2: Array of WGS84 latitudes.
+        param3: The tolerance in metres, see douglasPeucker and visvalingam.
+        param4: Array of the times of the points in seconds, for a time aware douglasPeucker (default None).
+        param5: One of METHODS (default 'douglas-peucker').
+
+    Returns:
+        A boolean array, True for the points to keep
+    """
+    if method not in METHODS:
+        raise ValueError('Unknown simplification method {0}, use one of {1}'.format(method, ', '.join(METHODS)))
+    if len(longitude) == 0:
+        return np.zeros(0, dtype=bool)
+    x, y = MMProjection.registry.zoneOf(longitude, latitude).forward(longitude, latitude)
+    if method == 'visvalingam':
+        return visvalingam(x, y, tolerance)
+    return douglasPeucker(x, y, tolerance, seconds)
+
+def simplifyTrack(track, tolerance, method='douglas-peucker', timeAware=True):
+    """
+    Drops the points of a track snapshot that the tour does not need, keeping its timing.
+
+    The FlyTo durations are taken from the time between points, so the points kept simply take longer to reach the
+    next one. Points with a FlyTo duration of their own pass the durations of the points dropped after them on to the
+    point before them, and points with a LookAt, whose tours are timed on their own, are always kept.
+
+    Args:
+        param1: A MMTrack.TrackColumns snapshot.
+        param2: The tolerance in metres.
+        param3: One of METHODS (default 'douglas-peucker').
+        param4: If True, and the method is 'douglas-peucker', measure points from where the simplified track is at
+                their time, see douglasPeucker (default True).
+
+    Returns:
+        A new MMTrack.TrackColumns
+    """
+    seconds = track.epoch / 1e6 if timeAware else None
+    keep = simplify(track.x, track.y, tolerance, seconds, method)
+    keep |= np.array([lookat is not None for lookat in track.lookat], dtype=bool)
+
+    rows = np.flatnonzero(keep)
+    simplified = track.take(rows)
+    steps = np.append(np.diff(track.epoch) / 1e6, 0.0)
+    ends = np.append(rows[1:], len(track))
+    for i, (row, end) in enumerate(zip(rows, ends)):
+        flyto = track.flyto[row]
+        if end - row > 1 and flyto and flyto['duration']:
+            duration = 0.0
+            for dropped in range(row, end):
+                own = track.flyto[dropped]['duration'] if track.flyto[dropped] else None
+                duration += float(own) if own else steps[dropped]
+            simplified.flyto[i] = dict(flyto, duration=duration)
+    return simplified
+
+def simplifyLayer(layer, tolerance, method='douglas-peucker', timeAware=True):
+    """
+    Deletes the points of an imported track layer that are within the tolerance of the simplified track.
+
+    Args:
+        param1: The QgsVectorLayer holding the track, with its datetime column filled.
+        param2: The tolerance in metres.
+        param3: One of METHODS (default 'douglas-peucker').
+        param4: See simplifyTrack (default True).
+
+    Returns:
+        The number of points deleted
+    """
+    track = MMCache.layerTrack(layer)
+    seconds = track['epoch'] / 1e6 if timeAware else None
+    keep = simplify(track['lon'], track['lat'], tolerance, seconds, method)
+    dropped = track['fid'][~keep].tolist()
+    if dropped:
+        layer.dataProvider().deleteFeatures(dropped)
+        layer.updateExtents()
+        MMCache.invalidate(layer)
+        MMTime.invalidate(layer)
+    return len(dropped)
@@ -0,0 +1,337 @@
+import datetime
+
+import numpy as np
+
+EPOCH = datetime.datetime(1970, 1, 1)
+DATETIME_FORMAT = "%Y/%m/%d %H:%M:%S %f"
+
+# character positions of "YYYY/MM/DD HH:MM:SS ffffff"
+_DIGITS = (0, 1, 2, 3, 5, 6, 8, 9, 11, 12, 14, 15, 17, 18)
+_SEPARATORS = ((4, u'/'), (7, u'/'), (10, u' '), (13, u':'), (16, u':'))
+_WIDTH = 26
+_DAYS_IN_MONTH = np.array([0, 31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+
+_layers = {}
+_watched = set()
+
+def parseDatetime(value):
+    """
+    Converts a MilkMachine datetime attribute to microseconds since the epoch.
+
+    Args:
+        param1: The datetime string, formatted as "%Y/%m/%d %H:%M:%S %f". The microsecond part is optional,
+                and the seconds may instead be fractional as in the KML names, "%Y/%m/%d %H:%M:%S.%f".
+
+    Returns:
+        The number of microseconds since 1970/01/01 as an integer
+
+    >>> parseDatetime(u'2014/06/06 10:38:48 500000')
+    1402051128500000
+    >>> parseDatetime(u'2014/06/06 10:38:48.5')
+    1402051128500000
+    """
+    pieces = value.split(" ")
+    pointdate = pieces[0].split('/')
+    pointtime = pieces[1].split(':')
+    seconds = pointtime[2].split('.')
+    if len(seconds) == 2:
+        microsecond = int((seconds[1] + '000000')[:6])
+    else:
+        try:
+            microsecond = int(pieces[2])
+        except (IndexError, ValueError):
+            microsecond = 0
+    dt = datetime.datetime(int(pointdate[0]), int(pointdate[1]), int(pointdate[2]), int(pointtime[0]), int(pointtime[1]), int(seconds[0]), microsecond)
+    delta = dt - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
+
+def epochToDatetime(epoch):
+    """
+    Converts microseconds since the epoch back to a naive datetime.
+
+    Args:
+        param1: The number of microseconds since 1970/01/01.
+
+    Returns:
+        A datetime.datetime
+
+    >>> epochToDatetime(1402051128500000)
+    datetime.datetime(2014, 6, 6, 10, 38, 48, 500000)
+    """
+    return EPOCH + datetime.timedelta(microseconds=int(epoch))
+
+def _daysFromCivil(year, month, day):
+    # days since 1970/01/01 of proleptic Gregorian dates, http://howardhinnant.github.io/date_algorithms.html
+    year = year - (month <= 2)
+    era = year // 400
+    yoe = year - era * 400
+    doy = (153 * (month + np.where(month > 2, -3, 9)) + 2) // 5 + day - 1
+    doe = yoe * 365 + yoe // 4 - yoe // 100 + doy
+    return era * 146097 + doe - 719468
+
+def _characters(values):
+    """Returns the strings as a 2D array of character codes, at least _WIDTH columns wide and zero padded."""
+    strings = np.asarray(values)
+    if strings.dtype.kind == 'S':
+        codes = strings.view(np.uint8)
+        width = strings.dtype.itemsize
+    else:
+        codes = strings.view(np.uint32)
+        width = strings.dtype.itemsize // 4
+    codes = codes.reshape(len(strings), width)
+    if width < _WIDTH:
+        codes = np.hstack([codes, np.zeros((len(strings), _WIDTH - width), dtype=codes.dtype)])
+    return codes
+
+def parseColumn(values):
+    """
+    Converts a whole column of datetime attributes to microseconds since the epoch.
+
+    Values laid out as "YYYY/MM/DD HH:MM:SS", with an optional " ffffff" microsecond or ".fff" fraction part,
+    are converted with array arithmetic on their characters. Anything else goes through parseDatetime.
+
+    Args:
+        param1: A sequence of datetime strings.
+
+    Returns:
+        A NumPy int64 array of microseconds since 1970/01/01
+
+    >>> list(parseColumn([u'2014/06/06 10:38:48 500000', u'2014/06/06 10:38:49', u'2014/06/06 10:38:49.25', u'2014/6/6 10:38:50']))
+    [1402051128500000, 1402051129000000, 1402051129250000, 1402051130000000]
+    """
+    values = list(values)
+    strings = np.asarray(values)
+    epoch = np.zeros(len(values), dtype=np.int64)
+    if not values or strings.dtype.kind not in 'SU':
+        slow = np.ones(len(values), dtype=bool)
+    else:
+        codes = _characters(strings)
+        fast = np.ones(len(values), dtype=bool)
+        if codes.shape[1] > _WIDTH:
+            fast &= codes[:, _WIDTH] == 0
+        codes = codes[:, :_WIDTH].astype(np.int64)
+        digits = codes - ord('0')
+        isdigit = (digits >= 0) & (digits <= 9)
+
+        fast &= isdigit[:, _DIGITS].all(axis=1)
+        for position, separator in _SEPARATORS:
+            fast &= codes[:, position] == ord(separator)
+
+        # fraction part: nothing, or a ' ' or '.' followed by 1 to 6 digits
+        fraction = digits[:, 20:_WIDTH]
+        count = isdigit[:, 20:_WIDTH].sum(axis=1)
+        padded = codes[:, 20:_WIDTH] == 0
+        contiguous = (isdigit[:, 20:_WIDTH] == (np.arange(_WIDTH - 20) < count[:, None])).all(axis=1) & (isdigit[:, 20:_WIDTH] | padded).all(axis=1)
+        nofraction = (codes[:, 19] == 0) & padded.all(axis=1)
+        microsecond = codes[:, 19] == ord(' ')
+        decimal = codes[:, 19] == ord('.')
+        fast &= nofraction | ((microsecond | decimal) & (count > 0) & contiguous)
+
+        def number(start, stop):
+            result = np.zeros(len(values), dtype=np.int64)
+            for position in range(start, stop):
+                result = result * 10 + digits[:, position]
+            return result
+
+        year = number(0, 4); month = number(5, 7); day = number(8, 10)
+        hour = number(11, 13); minute = number(14, 16); second = number(17, 19)
+        fast &= (year >= 1) & (month >= 1) & (month <= 12) & (day >= 1) & (hour <= 23) & (minute <= 59) & (second <= 59)
+        leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+        fast &= day <= _DAYS_IN_MONTH[np.clip(month, 0, 12)] - ((month == 2) & ~leap)
+
+        fractionvalue = np.zeros(len(values), dtype=np.int64)
+        for column in range(_WIDTH - 20):
+            fractionvalue = np.where(column < count, fractionvalue * 10 + fraction[:, column], fractionvalue)
+        fractionvalue = np.where(decimal, fractionvalue * 10 ** (6 - np.clip(count, 0, 6)), fractionvalue)
+        fractionvalue[nofraction] = 0
+
+        seconds = _daysFromCivil(year, month, day) * 86400 + hour * 3600 + minute * 60 + second
+        epoch[fast] = (seconds * 1000000 + fractionvalue)[fast]
+        slow = ~fast
+
+    for row in np.flatnonzero(slow):
+        epoch[row] = parseDatetime(values[row])
+    return epoch
+
+def formatColumn(epoch):
+    """
+    Formats microseconds since the epoch as MilkMachine datetime attributes, "%Y/%m/%d %H:%M:%S %f".
+
+    Args:
+        param1: A NumPy int64 array of microseconds since 1970/01/01.
+
+    Returns:
+        A list of unicode strings
+
+    >>> formatColumn(np.array([1402051128500000]))
+    [u'2014/06/06 10:38:48 500000']
+    """
+    stamps = np.datetime_as_string(np.asarray(epoch, dtype=np.int64).astype('datetime64[us]')).astype('U%d' % _WIDTH)
+    codes = stamps.view(np.uint32).reshape(len(stamps), _WIDTH)
+    codes[:, [4, 7]] = ord('/')
+    codes[:, [10, 19]] = ord(' ')
+    return stamps.tolist()
+
+def parseIsoColumn(values):
+    """
+    Converts a column of XML dateTime strings, as in GPX <time> and KML <when> elements, to microseconds since the epoch.
+
+    The values are laid out as "YYYY-MM-DDTHH:MM:SS" with optional fractional seconds, and end in "Z", in nothing or in
+    a "+HH:MM" or "-HH:MM" offset from UTC, which is removed. They are rearranged as MilkMachine datetime attributes
+    and converted by parseColumn.
+
+    Args:
+        param1: A sequence of dateTime strings.
+
+    Returns:
+        A NumPy int64 array of microseconds since 1970/01/01, in UTC
+
+    >>> list(parseIsoColumn([u'2014-06-06T10:38:48Z', u'2014-06-06T10:38:48.5Z', u'2014-06-06T12:38:48+02:00']))
+    [1402051128000000, 1402051128500000, 1402051128000000]
+    """
+    values = list(values)
+    offsets = np.zeros(len(values), dtype=np.int64)
+    if not values:
+        return offsets
+    # "YYYY-MM-DDT...Z" values are rearranged on their characters, the others one at a time
+    strings = np.asarray(values, dtype=np.unicode_)
+    codes = _characters(strings).copy()
+    last = codes[np.arange(len(values)), np.maximum((codes != 0).sum(axis=1) - 1, 0)]
+    fast = (codes[:, 4] == ord(u'-')) & (codes[:, 7] == ord(u'-')) & (codes[:, 10] == ord(u'T')) & (last == ord(u'Z'))
+    codes[:, [4, 7]] = ord(u'/')
+    codes[:, 10] = ord(u' ')
+    codes[codes == ord(u'Z')] = 0
+    local = strings.tolist()
+    for row, value in zip(np.flatnonzero(fast), codes[fast].view('U%d' % codes.shape[1]).ravel().tolist()):
+        local[row] = value
+    for row in np.flatnonzero(~fast):
+        value = values[row].strip()
+        if value.endswith(u'Z'):
+            value = value[:-1]
+        elif len(value) > 19 and value[-6] in u'+-' and value[-3] == u':':
+            offset = (int(value[-5:-3]) * 3600 + int(value[-2:]) * 60) * 1000000
+            offsets[row] = offset if value[-6] == u'+' else -offset
+            value = value[:-6]
+        local[row] = value.replace(u'-', u'/', 2).replace(u'T', u' ', 1)
+    return parseColumn(local) - offsets
+
+def parseDateTimeColumns(dates, times, dateFormat='yyyy/mm/dd'):
+    """
+    Converts separate date and time columns, as found in imported CSV files, to microseconds since the epoch.
+
+    A log has few distinct dates, each is converted once. The times are converted together by parseColumn.
+
+    Args:
+        param1: A sequence of date strings.
+        param2: A sequence of time strings, "HH:MM:SS" with optionally fractional seconds.
+        param3: The order of the date, 'mm/dd/yyyy', 'dd/mm/yyyy' or 'yyyy/mm/dd'.
+
+    Returns:
+        A NumPy int64 array of microseconds since 1970/01/01
+
+    >>> parseDateTimeColumns([u'06/06/2014', u'6/6/2014'], [u'10:38:48.5', u'10:38:48'], 'dd/mm/yyyy')
+    array([1402051128500000, 1402051128000000])
+    """
+    order = {'mm/dd/yyyy': (2, 0, 1), 'dd/mm/yyyy': (2, 1, 0), 'yyyy/mm/dd': (0, 1, 2)}[dateFormat]
+    days = {}
+    for pointdate in set(dates):
+        pieces = pointdate.split('/')
+        days[pointdate] = (datetime.date(int(pieces[order[0]]), int(pieces[order[1]]), int(pieces[order[2]])) - EPOCH.date()).days
+    # the time of day, as the time on the epoch's date
+    timeofday = parseColumn([u'1970/01/01 ' + pointtime for pointtime in times])
+    return np.array([days[pointdate] for pointdate in dates], dtype=np.int64) * 86400000000 + timeofday
+
+class LayerTimes(object):
+    """
+    The datetime column of a track layer as an int64 array of microseconds since the epoch, in feature id order.
+    """
+    def __init__(self, fids, epoch):
+        order = np.argsort(fids, kind='mergesort')
+        self.fids = np.asarray(fids, dtype=np.int64)[order]
+        self.epoch = np.asarray(epoch, dtype=np.int64)[order]
+
+    def __len__(self):
+        return len(self.fids)
+
+    def rows(self, fids):
+        """Returns the rows of an array of feature ids, raises KeyError if one is not in the layer."""
+        fids = np.asarray(fids, dtype=np.int64)
+        rows = np.searchsorted(self.fids, fids)
+        if len(self.fids) == 0 or np.any(rows >= len(self.fids)) or np.any(self.fids[np.minimum(rows, len(self.fids) - 1)] != fids):
+            raise KeyError('Unknown feature id in {0}'.format(fids))
+        return rows
+
+    def at(self, row, wholeSeconds=False):
+        """
+        Returns the naive datetime of a row, the first feature being row 0 and the last -1.
+
+        Args:
+            param1: The row.
+            param2: If True, drop the microseconds, as the audio sync compares whole seconds.
+        """
+        epoch = int(self.epoch[row])
+        if wholeSeconds:
+            epoch -= epoch % 1000000
+        return epochToDatetime(epoch)
+
+    def datetime(self, fid, wholeSeconds=False):
+        """Returns the naive datetime of a feature id, see at."""
+        return self.at(self.rows([fid])[0], wholeSeconds)
+
+    def datetimes(self, wholeSeconds=False):
+        """Returns the naive datetimes of all rows as a list."""
+        epoch = self.epoch
+        if wholeSeconds:
+            epoch = epoch - epoch % 1000000
+        return epoch.astype('datetime64[us]').tolist()
+
+
+def layerTimes(layer):
+    """
+    Returns the LayerTimes of a track layer, taken from its MMCache track on the first call only.
+
+    The result is cached by layer id until the layer is edited, see invalidate.
+
+    Args:
+        param1: The QgsVectorLayer holding the track.
+
+    Returns:
+        A LayerTimes instance
+    """
+    import MMCache
+
+    key = layer.id()
+    times = _layers.get(key)
+    if times is None:
+        track = MMCache.layerTrack(layer)
+        times = LayerTimes(track['fid'], track['epoch'])
+        _layers[key] = times
+        _watch(layer)
+    return times
+
+def _watch(layer):
+    key = layer.id()
+    if key in _watched:
+        return
+    _watched.add(key)
+
+    def forget(*args):
+        _layers.pop(key, None)
+
+    def destroyed(*args):
+        _layers.pop(key, None)
+        _watched.discard(key)
+
+    # layerModified covers every change to the edit buffer, undo and redo included
+    layer.layerModified.connect(forget)
+    layer.editingStopped.connect(forget)
+    layer.updatedFields.connect(forget)
+    layer.destroyed.connect(destroyed)
+
+def invalidate(layer):
+    """Drops the cached times of a layer. Needed after writing through its data provider, which the layer does not signal."""
+    _layers.pop(layer.id(), None)
+
+def clearCache():
+    """Drops the cached times of every layer."""
+    _layers.clear()
@@ -0,0 +1,170 @@
+import numpy as np
+
+import MMCache
+import MMCodec
+import MMTime
+
+def kmlTimes(epoch):
+    """
+    Formats an array of epoch microseconds as KML time strings in a single call.
+
+    Args:
+        param1: A NumPy int64 array of microseconds since the epoch.
+
+    Returns:
+        A NumPy array of strings formatted as '%Y-%m-%dT%H:%M:%S.%fZ'
+
+    >>> list(kmlTimes(np.array([1402051128500000], dtype=np.int64)))
+    ['2014-06-06T10:38:48.500000Z']
+    """
+    stamps = np.datetime_as_string(np.asarray(epoch, dtype=np.int64).astype('datetime64[us]'))
+    return np.char.add(stamps.astype(str), 'Z')
+
+def descriptionAltitude(description):
+    """
+    Pulls the GPS altitude out of a KML description string.
+
+    Args:
+        param1: The description, e.g. u'Time:10:38:48, Latitude: 39.965949, Longitude: -75.172239, Speed: 0.102851, Altitude: -3.756733'
+
+    Returns:
+        The altitude as a string, or None if it can not be found
+
+    >>> descriptionAltitude(u'Time:10:38:48, Latitude: 39.965949, Longitude: -75.172239, Speed: 0.102851, Altitude: -3.756733')
+    u'-3.756733'
+    """
+    try:
+        return description.split(",")[4].split(': ')[1]
+    except (AttributeError, IndexError):
+        return None
+
+
+class TrackColumns(object):
+    """
+    A columnar snapshot of a track layer.
+
+    Coordinates, altitudes and timestamps are held as NumPy arrays. The dictionary attributes
+    (camera, lookat, flyto, iconstyle, labelstyle and model) are decoded once into lists with
+    one entry per feature, None where the attribute is empty.
+    """
+    def __init__(self, fids, x, y, altitude, epoch, description, camera, lookat, flyto, iconstyle, labelstyle, model):
+        self.fids = fids
+        self.x = x
+        self.y = y
+        self.altitude = altitude
+        self.epoch = epoch
+        self.description = description
+        self.camera = camera
+        self.lookat = lookat
+        self.flyto = flyto
+        self.iconstyle = iconstyle
+        self.labelstyle = labelstyle
+        self.model = model
+        self._kmltimes = None
+
+    def __len__(self):
+        return len(self.fids)
+
+    def kmlTime(self, row):
+        """Returns the KML time string for the given row."""
+        if self._kmltimes is None:
+            self._kmltimes = kmlTimes(self.epoch)
+        return self._kmltimes[row]
+
+    def datetime(self, row):
+        """Returns the naive datetime for the given row."""
+        return MMTime.epochToDatetime(self.epoch[row])
+
+    def modelAltitude(self, row):
+        """Returns the GPS altitude for the given row as a string, or None if the layer has none."""
+        if np.isnan(self.altitude[row]):
+            return descriptionAltitude(self.description[row])
+        return str(float(self.altitude[row]))
+
+    def take(self, rows):
+        """
+        Returns a new TrackColumns holding only the given rows, in the given order.
+
+        Args:
+            param1: Array of row numbers, or a boolean mask with one entry per feature.
+        """
+        rows = np.asarray(rows)
+        if rows.dtype == bool:
+            rows = np.flatnonzero(rows)
+        pick = lambda values: [values[row] for row in rows]
+        return TrackColumns(
+            fids=self.fids[rows],
+            x=self.x[rows],
+            y=self.y[rows],
+            altitude=self.altitude[rows],
+            epoch=self.epoch[rows],
+            description=pick(self.description),
+            camera=pick(self.camera),
+            lookat=pick(self.lookat),
+            flyto=pick(self.flyto),
+            iconstyle=pick(self.iconstyle),
+            labelstyle=pick(self.labelstyle),
+            model=pick(self.model)
+        )
+
+
+def readLayer(activeLayer, fields):
+    """
+    Reads a MilkMachine track layer into a TrackColumns snapshot with a single pass over its features.
+
+    The points, altitudes and times come from the layer's MMCache track, so only the attributes are read here.
+
+    Args:
+        param1: The QgsVectorLayer holding the track.
+        param2: A dictionary of field names to attribute indices.
+
+    Returns:
+        A TrackColumns instance
+    """
+    from qgis.core import QgsFeatureRequest
+
+    def column(name):
+        return fields[name] if name in fields else None
+
+    idx_camera = column('camera')
+    idx_lookat = column('lookat')
+    idx_flyto = column('flyto')
+    idx_iconstyle = column('iconstyle')
+    idx_labelstyle = column('labelstyle')
+    idx_model = column('model')
+
+    fids = []; description = []
+    camera = []; lookat = []; flyto = []; iconstyle = []; labelstyle = []; model = []
+
+    for f in activeLayer.getFeatures(QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry)):
+        currentatt = f.attributes()
+
+        fids.append(f.id())
+        description.append(currentatt[1] if len(currentatt) > 1 else None)
+
+        lookatvalue = currentatt[idx_lookat] if idx_lookat is not None else None
+        lookat.append(MMCodec.decode('lookat', lookatvalue) if lookatvalue != 'circlearound' else None)
+        camera.append(MMCodec.decode('camera', currentatt[idx_camera]) if idx_camera is not None else None)
+        flyto.append(MMCodec.decode('flyto', currentatt[idx_flyto]) if idx_flyto is not None else None)
+        iconstyle.append(MMCodec.decode('iconstyle', currentatt[idx_iconstyle]) if idx_iconstyle is not None else None)
+        labelstyle.append(MMCodec.decode('labelstyle', currentatt[idx_labelstyle]) if idx_labelstyle is not None else None)
+        model.append(MMCodec.decode('model', currentatt[idx_model]) if idx_model is not None else None)
+
+    fids = np.array(fids, dtype=np.int64)
+    track = MMCache.layerTrack(activeLayer)
+    rows = MMCache.rows(track, fids)
+
+    return TrackColumns(
+        fids=fids,
+        x=track['lon'][rows],
+        y=track['lat'][rows],
+        altitude=track['alt'][rows],
+        epoch=track['epoch'][rows],
+        description=description,
+        camera=camera,
+        lookat=lookat,
+        flyto=flyto,
+        iconstyle=iconstyle,
+        labelstyle=labelstyle,
+        model=model
+    )
@@ -0,0 +1,161 @@
+import numpy as np
+
+# WGS84 ellipsoid and UTM constants
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+UTM_K0 = 0.9996
+UTM_FALSE_EASTING = 500000.0
+UTM_FALSE_NORTHING = 10000000.0
+
+# Krueger series to 6th order in the third flattening n, as in
+# http://www.movable-type.co.uk/scripts/latlong-utm-mgrs.html
+_e = np.sqrt(WGS84_F * (2 - WGS84_F))
+_n = WGS84_F / (2 - WGS84_F)
+_n2 = _n * _n; _n3 = _n2 * _n; _n4 = _n3 * _n; _n5 = _n4 * _n; _n6 = _n5 * _n
+_A = WGS84_A / (1 + _n) * (1 + 1 / 4.0 * _n2 + 1 / 64.0 * _n4 + 1 / 256.0 * _n6)
+_alpha = np.array([
+    1 / 2.0 * _n - 2 / 3.0 * _n2 + 5 / 16.0 * _n3 + 41 / 180.0 * _n4 - 127 / 288.0 * _n5 + 7891 / 37800.0 * _n6,
+    13 / 48.0 * _n2 - 3 / 5.0 * _n3 + 557 / 1440.0 * _n4 + 281 / 630.0 * _n5 - 1983433 / 1935360.0 * _n6,
+    61 / 240.0 * _n3 - 103 / 140.0 * _n4 + 15061 / 26880.0 * _n5 + 167603 / 181440.0 * _n6,
+    49561 / 161280.0 * _n4 - 179 / 168.0 * _n5 + 6601661 / 7257600.0 * _n6,
+    34729 / 80640.0 * _n5 - 3418889 / 1995840.0 * _n6,
+    212378941 / 319334400.0 * _n6])
+_beta = np.array([
+    1 / 2.0 * _n - 2 / 3.0 * _n2 + 37 / 96.0 * _n3 - 1 / 360.0 * _n4 - 81 / 512.0 * _n5 + 96199 / 604800.0 * _n6,
+    1 / 48.0 * _n2 + 1 / 15.0 * _n3 - 437 / 1440.0 * _n4 + 46 / 105.0 * _n5 - 1118711 / 3870720.0 * _n6,
+    17 / 480.0 * _n3 - 37 / 840.0 * _n4 - 209 / 4480.0 * _n5 + 5569 / 90720.0 * _n6,
+    4397 / 161280.0 * _n4 - 11 / 504.0 * _n5 - 830251 / 7257600.0 * _n6,
+    4583 / 161280.0 * _n5 - 108847 / 3991680.0 * _n6,
+    20648693 / 638668800.0 * _n6])
+_j2 = 2 * np.arange(1, 7, dtype=np.float64)
+
+_mgrsLatBands = np.array(list('CDEFGHJKLMNPQRSTUVWXX')) # X is repeated for 80-84N
+
+def utmZones(latitude, longitude):
+    """
+    Finds the UTM zones which contain the given WGS84 points, the array version of MMExport.wgs84LatLonToUTMZone.
+
+    Args:
+        param1: Array of WGS84 latitudes.
+        param2: Array of WGS84 longitudes.
+
+    Returns:
+        A tuple of an int array of UTM zones and an array of UTM latitude band characters
+
+    >>> utmZones(np.array([13.41250188, 60.0, 78.0]), np.array([103.86666901, 5.0, 10.0]))
+    (array([48, 32, 33]), array(['P', 'V', 'X'], dtype='|S1'))
+    """
+    latitude = np.asarray(latitude, dtype=np.float64)
+    longitude = np.asarray(longitude, dtype=np.float64)
+    zone = np.floor((longitude + 180) / 6).astype(np.int64) + 1
+    band = _mgrsLatBands[np.clip(np.floor(latitude / 8 + 10).astype(np.int64), 0, len(_mgrsLatBands) - 1)]
+
+    # Norway
+    zone[(zone == 31) & (band == 'V') & (longitude >= 3)] += 1
+    # Svalbard
+    svalbard = band == 'X'
+    for odd, split in ((32, 9), (34, 21), (36, 33)):
+        inzone = svalbard & (zone == odd)
+        zone[inzone & (longitude < split)] -= 1
+        zone[inzone & (longitude >= split)] += 1
+    return zone, band
+
+def trackZone(longitude, latitude):
+    """
+    Finds the UTM zone and hemisphere of a whole track, those of the middle of its extent.
+
+    Args:
+        param1: Array of WGS84 longitudes.
+        param2: Array of WGS84 latitudes.
+
+    Returns:
+        A tuple of the zone number and True for the southern hemisphere
+
+    >>> trackZone([-75.18, -75.16], [39.96, 39.97])
+    (18, False)
+    """
+    longitude = np.asarray(longitude, dtype=np.float64)
+    latitude = np.asarray(latitude, dtype=np.float64)
+    middle = np.array([(longitude.min() + longitude.max()) / 2.0])
+    center = np.array([(latitude.min() + latitude.max()) / 2.0])
+    zones, bands = utmZones(center, middle)
+    return int(zones[0]), bool(center[0] < 0)
+
+def centralMeridian(zone):
+    """Returns the central meridian in degrees of the given UTM zone(s)."""
+    return (np.asarray(zone) - 1) * 6 - 180 + 3
+
+def toUtm(longitude, latitude, zone, south):
+    """
+    Projects WGS84 points to UTM, each into its own zone.
+
+    Args:
+        param1: Array of WGS84 longitudes.
+        param2: Array of WGS84 latitudes.
+        param3: Array (or scalar) of UTM zones.
+        param4: Boolean array (or scalar), True for the southern hemisphere false northing.
+
+    Returns:
+        A tuple of arrays of UTM eastings and northings in metres
+
+    >>> e, n = toUtm(np.array([2.2945]), np.array([48.8583]), 31, False)
+    >>> round(e[0], 3), round(n[0], 3)
+    (448251.898, 5411943.794)
+    """
+    phi = np.radians(np.asarray(latitude, dtype=np.float64))
+    lam = np.radians(np.asarray(longitude, dtype=np.float64) - centralMeridian(zone))
+
+    tau = np.tan(phi)
+    sigma = np.sinh(_e * np.arctanh(_e * tau / np.sqrt(1 + tau * tau)))
+    taup = tau * np.sqrt(1 + sigma * sigma) - sigma * np.sqrt(1 + tau * tau)
+    cosl = np.cos(lam)
+    xip = np.arctan2(taup, cosl)
+    etap = np.arcsinh(np.sin(lam) / np.sqrt(taup * taup + cosl * cosl))
+
+    xi = xip + np.sum(_alpha[:, None] * np.sin(_j2[:, None] * xip) * np.cosh(_j2[:, None] * etap), axis=0)
+    eta = etap + np.sum(_alpha[:, None] * np.cos(_j2[:, None] * xip) * np.sinh(_j2[:, None] * etap), axis=0)
+
+    easting = UTM_K0 * _A * eta + UTM_FALSE_EASTING
+    northing = UTM_K0 * _A * xi + np.where(south, UTM_FALSE_NORTHING, 0.0)
+    return easting, northing
+
+def fromUtm(easting, northing, zone, south):
+    """
+    Unprojects UTM points back to WGS84, each from its own zone.
+
+    Args:
+        param1: Array of UTM eastings in metres.
+        param2: Array of UTM northings in metres.
+        param3: Array (or scalar) of UTM zones.
+        param4: Boolean array (or scalar), True if the northings carry the southern hemisphere false northing.
+
+    Returns:
+        A tuple of arrays of WGS84 longitudes and latitudes
+
+    >>> lon, lat = fromUtm(np.array([448251.898]), np.array([5411943.794]), 31, False)
+    >>> round(lon[0], 7), round(lat[0], 7)
+    (2.2945, 48.8583)
+    """
+    eta = (np.asarray(easting, dtype=np.float64) - UTM_FALSE_EASTING) / (UTM_K0 * _A)
+    xi = (np.asarray(northing, dtype=np.float64) - np.where(south, UTM_FALSE_NORTHING, 0.0)) / (UTM_K0 * _A)
+
+    xip = xi - np.sum(_beta[:, None] * np.sin(_j2[:, None] * xi) * np.cosh(_j2[:, None] * eta), axis=0)
+    etap = eta - np.sum(_beta[:, None] * np.cos(_j2[:, None] * xi) * np.sinh(_j2[:, None] * eta), axis=0)
+
+    sinhetap = np.sinh(etap)
+    cosxip = np.cos(xip)
+    taup = np.sin(xip) / np.sqrt(sinhetap * sinhetap + cosxip * cosxip)
+
+    # Newton-Raphson for tau, converges in 2-3 iterations
+    tau = taup.copy()
+    for i in range(10):
+        sigma = np.sinh(_e * np.arctanh(_e * tau / np.sqrt(1 + tau * tau)))
+        taui = tau * np.sqrt(1 + sigma * sigma) - sigma * np.sqrt(1 + tau * tau)
+        delta = (taup - taui) / np.sqrt(1 + taui * taui) * (1 + (1 - _e * _e) * tau * tau) / ((1 - _e * _e) * np.sqrt(1 + tau * tau))
+        tau += delta
+        if not np.any(np.abs(delta) > 1e-12):
+            break
+
+    latitude = np.degrees(np.arctan(tau))
+    longitude = np.degrees(np.arctan2(sinhetap, cosxip)) + centralMeridian(zone)
+    return longitude, latitude
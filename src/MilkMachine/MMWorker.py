@@ -0,0 +1,75 @@
+import traceback
+
+import MMExport
+
+from PyQt4.QtCore import QObject, QThread, pyqtSignal
+
+class ExportWorker(QObject):
+    """
+    Writes a KML or KMZ export in a QThread, so that QGIS stays responsive during large exports.
+
+    The layer is read into a MMTrack.TrackColumns snapshot on the GUI thread before the worker starts, the worker
+    itself only touches that snapshot and the output file. Use start() rather than creating the thread yourself. The
+    worker holds the only reference to its thread, so keep the worker until thread.finished has been sent, not just
+    until one of the final signals.
+
+    Args:
+        param1: The MMTrack.TrackColumns snapshot.
+        param2: The path of the .kml or .kmz file.
+        param3: The href of the audio to play with the tour, or None.
+        param4: The delay in seconds before the audio starts.
+        param5: The logger.
+        param6: A dictionary of the minimum, maximum and gap keyword arguments of MMExport.flyToDurations.
+        param7: True to write the points as gx:Tracks, see MMExport.writeKml.
+
+    Signals:
+        progress(rows done, total rows, bytes written), see MMExport.writeKml.
+        finished(exportPath) once the file is complete.
+        cancelled(exportPath) if cancel() stopped the export, the partial file has been removed.
+        error(traceback) if the export failed.
+    """
+    progress = pyqtSignal(int, int, 'qint64')
+    finished = pyqtSignal(str)
+    cancelled = pyqtSignal(str)
+    error = pyqtSignal(str)
+
+    def __init__(self, track, exportPath, audioHREF, audioOffset, logger, durationLimits=None, gxtrack=False):
+        QObject.__init__(self)
+        self.track = track
+        self.exportPath = exportPath
+        self.audioHREF = audioHREF
+        self.audioOffset = audioOffset
+        self.logger = logger
+        self.durationLimits = durationLimits
+        self.gxtrack = gxtrack
+        # created here so that thread.finished can be connected before start()
+        self.thread = QThread()
+        self._cancel = False
+
+    def start(self):
+        """Starts the export in its QThread, which quits once one of the final signals is sent."""
+        self.moveToThread(self.thread)
+        self.thread.started.connect(self.run)
+        for signal in (self.finished, self.cancelled, self.error):
+            signal.connect(self.thread.quit)
+        self.thread.start()
+
+    def cancel(self):
+        """Asks the export to stop at the next progress report. Safe to call from any thread."""
+        self._cancel = True
+
+    def _progress(self, rows, total, written):
+        if self._cancel:
+            raise MMExport.ExportCancelled()
+        self.progress.emit(rows, total, written)
+
+    def run(self):
+        try:
+            MMExport.writeTrack(self.exportPath, self.track, self.audioHREF, self.audioOffset, self.logger, durationLimits=self.durationLimits, progress=self._progress, gxtrack=self.gxtrack)
+        except MMExport.ExportCancelled:
+            self.logger.info('ExportWorker: export to {0} cancelled'.format(self.exportPath))
+            self.cancelled.emit(self.exportPath)
+        except:
+            self.error.emit(traceback.format_exc())
+        else:
+            self.finished.emit(self.exportPath)
@@ -3,8 +3,10 @@ import gpxpy.gpx
 import simplekml
 import os, sys
 import time, wave
-from qgis.core import *
-from qgis.gui import *
+import math
+import numpy as np
+
+_SCALARS = (int, long, float)
 
 class Wave(object):
     def __init__(self, wavfilepath):
@@ -65,6 +67,8 @@ class mmGPX(object):
             self.kml.save(path)
             mmGPX.outfile = path
     def toGeoJSON(self, path=None):
+        # QGIS is only needed here, so that the bearing functions work without it
+        from qgis.core import QgsVectorFileWriter, QgsVectorLayer
         if not path:
             self.jsonpath = self.filepath.split(".")[0]# + ".json"
             Qkml = QgsVectorLayer(mmGPX.outfile, 'importkml', "ogr")
@@ -75,50 +79,108 @@ class mmGPX(object):
 
 def compass_bearing(pointA, pointB):
     """
-    Calculates the bearing between two points.
+    Calculates the bearing between two points, or between two arrays of points.
 
     :Parameters:
-    - pointA: The tuple representing the latitude/longitude for the
-    first point. Latitude and longitude must be in decimal degrees
-    - pointB: The tuple representing the latitude/longitude for the
-    second point. Latitude and longitude must be in decimal degrees
+    - pointA: The (latitude, longitude) of the first point, in decimal degrees. Each may be a
+    scalar or a NumPy array, arrays are broadcast against each other and against pointB
+    - pointB: The (latitude, longitude) of the second point, in decimal degrees
 
     :Returns:
-    The bearing in degrees
+    The bearing in degrees, [0, 360)
 
     :Returns Type:
-    float
-    """
+    float if every coordinate is a scalar, otherwise a NumPy array
 
+    >>> round(compass_bearing((0.0, 0.0), (0.0, 1.0)), 6)
+    90.0
+    >>> compass_bearing((np.zeros(2), np.zeros(2)), (np.array([1.0, -1.0]), 0.0)).tolist()
+    [0.0, 180.0]
+    """
+    if len(pointA) != 2 or len(pointB) != 2:
+        raise TypeError("Points must be (latitude, longitude) pairs")
 
-    import math
-    if (type(pointA) != tuple) or (type(pointB) != tuple):
-        raise TypeError("Only tuples are supported as arguments")
+    if isinstance(pointA[0], _SCALARS) and isinstance(pointA[1], _SCALARS) and isinstance(pointB[0], _SCALARS) and isinstance(pointB[1], _SCALARS):
+        # a single pair, the math module is much faster than NumPy on scalars
+        lat1 = math.radians(pointA[0]); lat2 = math.radians(pointB[0])
+        diffLong = math.radians(pointB[1] - pointA[1])
+        x = math.sin(diffLong) * math.cos(lat2)
+        y = math.cos(lat1) * math.sin(lat2) - (math.sin(lat1) * math.cos(lat2) * math.cos(diffLong))
+        return (math.degrees(math.atan2(x, y)) + 360) % 360
 
-    lat1 = math.radians(pointA[0])
-    lat2 = math.radians(pointB[0])
+    lat1 = np.radians(pointA[0])
+    lat2 = np.radians(pointB[0])
 
-    diffLong = math.radians(pointB[1] - pointA[1])
+    diffLong = np.radians(np.subtract(pointB[1], pointA[1]))
 
-    x = math.sin(diffLong) * math.cos(lat2)
-    y = math.cos(lat1) * math.sin(lat2) - (math.sin(lat1)
-    * math.cos(lat2) * math.cos(diffLong))
+    x = np.sin(diffLong) * np.cos(lat2)
+    y = np.cos(lat1) * np.sin(lat2) - (np.sin(lat1)
+    * np.cos(lat2) * np.cos(diffLong))
 
-    initial_bearing = math.atan2(x, y)
+    initial_bearing = np.arctan2(x, y)
 
-    # Now we have the initial bearing but math.atan2 return values
+    # Now we have the initial bearing but arctan2 return values
     # from -180 to + 180 which is not what we want for a compass bearing
     # The solution is to normalize the initial bearing as shown below
-    initial_bearing = math.degrees(initial_bearing)
+    initial_bearing = np.degrees(initial_bearing)
     compass_bearing = (initial_bearing + 360) % 360
 
     return compass_bearing
 
 
-def mean_angle(deg):
-    from cmath import rect, phase
-    from math import radians, degrees
-    return degrees(phase(sum(rect(1, radians(d)) for d in deg)/len(deg))) % 360
+def unit_vector(deg):
+    """
+    Calculates the unit vectors of angles, to be summed for a circular mean without keeping the angles.
+
+    :Parameters:
+    - deg: A scalar, sequence or NumPy array of angles in degrees
+
+    :Returns:
+    The (sine, cosine) of each angle, NumPy arrays shaped like deg
+
+    >>> [v.round(6).tolist() for v in unit_vector([0.0, 90.0])]
+    [[0.0, 1.0], [1.0, 0.0]]
+    """
+    radians = np.radians(np.asarray(deg, dtype=np.float64))
+    return np.sin(radians), np.cos(radians)
+
+def mean_angle(deg, weights=None, axis=-1):
+    """
+    Calculates the circular mean of angles, the direction of the sum of their unit vectors.
+
+    :Parameters:
+    - deg: Sequence or NumPy array of angles in degrees
+    - weights: Optional weights of the angles, broadcast against deg
+    - axis: The axis to average over, the last by default
+
+    :Returns:
+    The mean angle in degrees, [0, 360). A float for a 1-D deg, otherwise a NumPy array
+
+    >>> round(mean_angle([350, 10]), 6) % 360
+    0.0
+    >>> round(mean_angle([0, 90], weights=[3, 1]), 6)
+    18.434949
+    """
+    if weights is None and isinstance(deg, (list, tuple)):
+        # a short list of angles, the math module is much faster than NumPy on scalars
+        try:
+            sines = 0.0; cosines = 0.0
+            for d in deg:
+                r = math.radians(d)
+                sines += math.sin(r); cosines += math.cos(r)
+            return math.degrees(math.atan2(sines, cosines)) % 360
+        except TypeError:
+            pass
+
+    sines, cosines = unit_vector(deg)
+    if weights is None:
+        weights = 1.0
+    sines = np.sum(weights * sines, axis=axis)
+    cosines = np.sum(weights * cosines, axis=axis)
+    mean = np.degrees(np.arctan2(sines, cosines)) % 360
+    if np.ndim(mean) == 0:
+        return float(mean)
+    return mean
 
 def rolling_window(array, window=(0,), asteps=None, wsteps=None, axes=None, toend=True):
     import numpy as np
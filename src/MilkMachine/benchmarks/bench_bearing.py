@@ -0,0 +1,64 @@
+"""
+Compares scalar and array calls of TeatDip.compass_bearing and TeatDip.mean_angle.
+
+Times one compass_bearing call per pair of points against a single call on
+arrays of N pairs, and one mean_angle call per window of K bearings against a
+single call on an (N, K) array, then checks both give the same angles.
+
+    python benchmarks/bench_bearing.py
+    python benchmarks/bench_bearing.py --sizes 1000 100000 --window 25
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+import TeatDip
+
+def timed(function, *args):
+    start = time.time()
+    result = function(*args)
+    return result, time.time() - start
+
+def scalarBearings(lat1, lon1, lat2, lon2):
+    return [TeatDip.compass_bearing((a, b), (c, d)) for a, b, c, d in zip(lat1, lon1, lat2, lon2)]
+
+def arrayBearings(lat1, lon1, lat2, lon2):
+    return TeatDip.compass_bearing((lat1, lon1), (lat2, lon2))
+
+def scalarMeans(windows):
+    return [TeatDip.mean_angle(window) for window in windows]
+
+def arrayMeans(windows):
+    return TeatDip.mean_angle(windows)
+
+def same(a, b):
+    # compare on the circle, 359.9999 and 0.0001 are close
+    return bool(np.abs((np.asarray(a) - np.asarray(b) + 180) % 360 - 180).max() < 1e-6)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000], help='number of point pairs and windows')
+    parser.add_argument('--window', type=int, default=10, help='number of bearings averaged by each mean_angle call')
+    args = parser.parse_args()
+
+    print('{0:>14} {1:>10} {2:>10} {3:>10} {4:>9} {5:>7}'.format('function', 'calls', 'scalar/s', 'array/s', 'speedup', 'equal'))
+    for size in args.sizes:
+        random = np.random.RandomState(1)
+        lat1 = random.uniform(-80, 80, size); lon1 = random.uniform(-180, 180, size)
+        lat2 = random.uniform(-80, 80, size); lon2 = random.uniform(-180, 180, size)
+        theirs, theirtime = timed(scalarBearings, lat1.tolist(), lon1.tolist(), lat2.tolist(), lon2.tolist())
+        ours, ourtime = timed(arrayBearings, lat1, lon1, lat2, lon2)
+        print('{0:>14} {1:>10} {2:>10.0f} {3:>10.0f} {4:>8.0f}x {5:>7}'.format('compass_bearing', size, size / theirtime, size / ourtime, theirtime / ourtime, str(same(theirs, ours))))
+
+        windows = random.uniform(0, 360, (size, args.window))
+        theirs, theirtime = timed(scalarMeans, windows.tolist())
+        ours, ourtime = timed(arrayMeans, windows)
+        print('{0:>14} {1:>10} {2:>10.0f} {3:>10.0f} {4:>8.0f}x {5:>7}'.format('mean_angle', size, size / theirtime, size / ourtime, theirtime / ourtime, str(same(theirs, ours))))
+
+if __name__ == '__main__':
+    main()
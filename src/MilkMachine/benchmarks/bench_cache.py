@@ -0,0 +1,64 @@
+"""
+Times reading a track from its MMCache sidecar against parsing it from attribute values.
+
+Builds a 10 Hz track of N points as the lists of coordinates and datetime strings a pass over the features of a
+layer would collect, and times turning them into a track array (MMCache.readTrack without the QGIS feature
+iteration, which comes on top of it) against mapping the saved sidecar and taking a selection from it.
+
+    python benchmarks/bench_cache.py
+    python benchmarks/bench_cache.py --sizes 1000000 --selection 36000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+import MMCache
+import MMTime
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100000, 1000000, 5000000], help='number of track points')
+    parser.add_argument('--selection', type=int, default=6000, help='number of consecutive points selected, 10 minutes by default')
+    args = parser.parse_args()
+
+    folder = tempfile.mkdtemp()
+    try:
+        print('{0:>10} {1:>12} {2:>12} {3:>12} {4:>10}'.format('points', 'parse s', 'map ms', 'select ms', 'MB'))
+        for size in args.sizes:
+            random = np.random.RandomState(1)
+            fids = np.arange(1, size + 1)
+            longitude = (4.89 + np.cumsum(random.normal(0, 1e-5, size))).tolist()
+            latitude = (52.37 + np.cumsum(random.normal(0, 1e-5, size))).tolist()
+            altitude = random.normal(0, 1, size).tolist()
+            values = MMTime.formatColumn(1402051128000000 + np.arange(size, dtype=np.int64) * 100000)
+
+            start = time.time()
+            track = MMCache.buildTrack(fids, longitude, latitude, altitude, MMTime.parseColumn(values))
+            parsetime = time.time() - start
+
+            path = os.path.join(folder, 'track' + MMCache.SUFFIX)
+            MMCache._save(path, track)
+            start = time.time()
+            mapped = np.load(path, mmap_mode='r')
+            maptime = time.time() - start
+
+            selected = fids[size // 2:size // 2 + args.selection]
+            start = time.time()
+            rows = MMCache.rows(mapped, selected)
+            seconds = (mapped['epoch'][rows[-1]] - mapped['epoch'][rows[0]]) / 1e6
+            speed = mapped['speed'][rows].mean()
+            selecttime = time.time() - start
+            print('{0:>10} {1:>12.2f} {2:>12.3f} {3:>12.3f} {4:>10.1f}'.format(size, parsetime, maptime * 1000, selecttime * 1000, os.path.getsize(path) / 1048576.0))
+            del mapped
+    finally:
+        shutil.rmtree(folder)
+
+if __name__ == '__main__':
+    main()
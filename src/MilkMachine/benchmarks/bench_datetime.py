@@ -0,0 +1,71 @@
+"""
+Compares MMTime.parseColumn with the per-row string splitting it replaced.
+
+Builds a track of N datetime attributes, "%Y/%m/%d %H:%M:%S %f" as written by
+the plugin, then times the old split(" ")/split('/')/split(':') conversion to
+datetime objects against the vectorised epoch column and checks they agree.
+
+    python benchmarks/bench_datetime.py
+    python benchmarks/bench_datetime.py --sizes 10000 500000 --fraction
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+import MMTime
+
+def buildColumn(size, fraction):
+    start = MMTime.parseDatetime(u'2014/06/06 10:38:48 000000')
+    steps = np.random.RandomState(1).choice([200000, 1000000, 1500000], size)
+    epoch = start + np.cumsum(steps)
+    values = MMTime.formatColumn(epoch)
+    if fraction:
+        # the KML names, with fractional seconds
+        values = [v[:19] + '.' + v[20:23] for v in values]
+        epoch = epoch - epoch % 1000
+    return values, epoch
+
+def splitRows(values):
+    # the conversion the plugin repeated at every call site
+    result = []
+    for currentatt in values:
+        pointdate = currentatt.split(" ")[0]  #2014/06/06
+        pointtime = currentatt.split(" ")[1]
+        sec_pieces = pointtime.split(':')[2].split('.')
+        if len(sec_pieces) == 1:
+            try:
+                microsec = int(currentatt.split(" ")[2])
+            except IndexError:
+                microsec = 0
+        elif len(sec_pieces) == 2:
+            microsec = int(float('0.' + sec_pieces[1]) * 1000000)
+        result.append(datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(sec_pieces[0]), microsec))
+    return result
+
+def timed(function, argument):
+    start = time.time()
+    result = function(argument)
+    return result, time.time() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 500000], help='number of track points')
+    parser.add_argument('--fraction', action='store_true', help='use fractional seconds, "%%H:%%M:%%S.fff"')
+    args = parser.parse_args()
+
+    print('{0:>10} {1:>10} {2:>12} {3:>9} {4:>8}'.format('points', 'split s', 'parseColumn s', 'speedup', 'equal'))
+    for size in args.sizes:
+        values, expected = buildColumn(size, args.fraction)
+        theirs, theirtime = timed(splitRows, values)
+        ours, ourtime = timed(MMTime.parseColumn, values)
+        equal = ours.tolist() == expected.tolist() and ours.astype('datetime64[us]').tolist() == theirs
+        print('{0:>10} {1:>10.2f} {2:>12.2f} {3:>8.1f}x {4:>8}'.format(size, theirtime, ourtime, theirtime / ourtime, str(equal)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Compares MMFilter.movingAverage with the rolling_window loop it replaced.
+
+Builds a random walk of N points and smooths x, y and z with the old
+TeatDip.rolling_window view, one np.mean per window and list padding per
+column, then with one cumulative-sum pass over the (N, 3) array, and checks
+they agree to 1e-8.
+
+    python benchmarks/bench_filter.py
+    python benchmarks/bench_filter.py --sizes 1000000 --windows 5 51
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+import MMFilter
+import TeatDip
+
+def rollingMeans(columns, window):
+    # the loop the Filtering tab ran for each column
+    result = []
+    pad = (window - 1)/2
+    for pt in columns:
+        roll = TeatDip.rolling_window(pt, window)
+        mean = []
+        for i in range(pad):
+            mean.append(pt[i])
+        for rr in roll:
+            mean.append(np.mean(rr))
+        for l in pt[len(pt) - pad:]:
+            mean.append(l)
+        result.append(mean)
+    return np.column_stack(result)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000], help='number of track points')
+    parser.add_argument('--windows', type=int, nargs='+', default=[5, 51], help='odd window sizes')
+    args = parser.parse_args()
+
+    print('{0:>10} {1:>7} {2:>10} {3:>10} {4:>9} {5:>7}'.format('points', 'window', 'loop s', 'cumsum s', 'speedup', 'equal'))
+    for size in args.sizes:
+        random = np.random.RandomState(1)
+        xyz = np.column_stack([-75.17 + np.cumsum(random.normal(0, 0.0001, size)),
+                               39.96 + np.cumsum(random.normal(0, 0.0001, size)),
+                               10 + np.cumsum(random.normal(0, 0.5, size))])
+        for window in args.windows:
+            start = time.time()
+            theirs = rollingMeans([xyz[:, 0], xyz[:, 1], xyz[:, 2]], window)
+            theirtime = time.time() - start
+            start = time.time()
+            ours = MMFilter.movingAverage(xyz, window)
+            ourtime = time.time() - start
+            # the altitudes are stored to 2 decimals, a nanometre is well within that
+            equal = np.allclose(ours, theirs, rtol=0, atol=1e-8)
+            print('{0:>10} {1:>7} {2:>10.2f} {3:>10.3f} {4:>8.0f}x {5:>7}'.format(size, window, theirtime, ourtime, theirtime / ourtime, str(equal)))
+
+if __name__ == '__main__':
+    main()
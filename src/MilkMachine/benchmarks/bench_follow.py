@@ -0,0 +1,60 @@
+"""
+Compares MMFollow.followHeadings with the per-point loop follow_apply used to run.
+
+Builds a random walk of N points and times the loop of TeatDip.compass_bearing
+and TeatDip.mean_angle calls against the array version, for several smoother
+values, and checks the headings agree once rounded as they are stored.
+
+    python benchmarks/bench_follow.py
+    python benchmarks/bench_follow.py --sizes 100000 --smoothers 10 100
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+import MMFollow
+import TeatDip
+
+def loopHeadings(longitude, latitude, smoother):
+    headinglist = []
+    forwardlen = len(longitude) - 1 - smoother
+    for i in range(len(longitude)):
+        if i <= forwardlen:
+            forwardlist = []
+            for ii in range(smoother):
+                forwardlist.append(TeatDip.compass_bearing((latitude[i], longitude[i]), (latitude[i+ii+1], longitude[i+ii+1])))
+            headinglist.append(TeatDip.mean_angle(forwardlist) % 360)
+        else:
+            headinglist.append(headinglist[i-1])
+    return headinglist
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000], help='number of track points')
+    parser.add_argument('--smoothers', type=int, nargs='+', default=[1, 10, 50], help='smoother values')
+    args = parser.parse_args()
+
+    print('{0:>10} {1:>9} {2:>9} {3:>9} {4:>9} {5:>8}'.format('points', 'smoother', 'loop s', 'array s', 'speedup', 'equal'))
+    for size in args.sizes:
+        random = np.random.RandomState(1)
+        longitude = -75.17 + np.cumsum(random.normal(0, 0.0001, size))
+        latitude = 39.96 + np.cumsum(random.normal(0, 0.0001, size))
+        lonlist = longitude.tolist(); latlist = latitude.tolist()
+        for smoother in args.smoothers:
+            start = time.time()
+            theirs = loopHeadings(lonlist, latlist, smoother)
+            theirtime = time.time() - start
+            start = time.time()
+            ours = MMFollow.followHeadings(longitude, latitude, smoother)
+            ourtime = time.time() - start
+            difference = (ours - np.array(theirs) + 180) % 360 - 180
+            equal = np.abs(difference).max() < 1e-6
+            print('{0:>10} {1:>9} {2:>9.2f} {3:>9.3f} {4:>8.0f}x {5:>8}'.format(size, smoother, theirtime, ourtime, theirtime / ourtime, str(equal)))
+
+if __name__ == '__main__':
+    main()
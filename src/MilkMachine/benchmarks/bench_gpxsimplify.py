@@ -0,0 +1,74 @@
+"""
+Compares gpxpy.geo.simplify_polyline with the recursive version it replaced.
+
+Builds a GPX track segment of N points logged every second at walking speed
+with GPS noise, and simplifies it with the recursive list slicing version of
+gpxpy 0.9.8 and the stack based version working on coordinate arrays. The
+recursive version is given a recursion limit large enough for the track, the
+number of points kept by each is printed (the old one looked at the wrong
+points for the furthest one, so they differ slightly).
+
+    python benchmarks/bench_gpxsimplify.py
+    python benchmarks/bench_gpxsimplify.py --sizes 1000000 --old-max 0
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+import gpxpy.geo
+import gpxpy.gpx
+
+def old_simplify_polyline(points, max_distance):
+    # gpxpy 0.9.8
+    if len(points) < 3:
+        return points
+    begin, end = points[0], points[-1]
+    a, b, c = gpxpy.geo.get_line_equation_coefficients(begin, end)
+    tmp_max_distance = -1000000
+    tmp_max_distance_position = None
+    for point_no in range(len(points[1:-1])):
+        point = points[point_no]
+        d = abs(a * point.latitude + b * point.longitude + c)
+        if d > tmp_max_distance:
+            tmp_max_distance = d
+            tmp_max_distance_position = point_no
+    real_max_distance = gpxpy.geo.distance_from_line(points[tmp_max_distance_position], begin, end)
+    if real_max_distance < max_distance:
+        return [begin, end]
+    return (old_simplify_polyline(points[:tmp_max_distance_position + 2], max_distance) +
+            old_simplify_polyline(points[tmp_max_distance_position + 1:], max_distance)[1:])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000], help='number of track points')
+    parser.add_argument('--old-max', type=int, default=100000, help='largest track to simplify with the recursive version')
+    parser.add_argument('--max-distance', type=float, default=10.0, help='max_distance in metres')
+    args = parser.parse_args()
+
+    print('{0:>10} {1:>10} {2:>10} {3:>9} {4:>10} {5:>10}'.format('points', 'old s', 'new s', 'speedup', 'old kept', 'new kept'))
+    for size in args.sizes:
+        random = np.random.RandomState(1)
+        heading = np.cumsum(random.normal(0, 0.05, size))
+        latitudes = 52.37 + np.cumsum(np.sin(heading)) * 1.3e-5 + random.normal(0, 3e-5, size)
+        longitudes = 4.89 + np.cumsum(np.cos(heading)) * 2.1e-5 + random.normal(0, 5e-5, size)
+        points = [gpxpy.gpx.GPXTrackPoint(lat, lon) for lat, lon in zip(latitudes.tolist(), longitudes.tolist())]
+
+        start = time.time()
+        new = gpxpy.geo.simplify_polyline(points, args.max_distance)
+        newtime = time.time() - start
+        if size > args.old_max:
+            print('{0:>10} {1:>10} {2:>10.2f} {3:>9} {4:>10} {5:>10}'.format(size, '-', newtime, '-', '-', len(new)))
+            continue
+        sys.setrecursionlimit(max(sys.getrecursionlimit(), size + 100))
+        start = time.time()
+        old = old_simplify_polyline(points, args.max_distance)
+        oldtime = time.time() - start
+        print('{0:>10} {1:>10.2f} {2:>10.2f} {3:>8.0f}x {4:>10} {5:>10}'.format(size, oldtime, newtime, oldtime / newtime, len(old), len(new)))
+
+if __name__ == '__main__':
+    main()
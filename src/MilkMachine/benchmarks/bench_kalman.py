@@ -0,0 +1,73 @@
+"""
+Times MMFilter.kalmanSmooth against a textbook Kalman and RTS smoother loop.
+
+Builds a noisy walk of N points in UTM metres, logged every second or at
+random intervals, and smooths the eastings and northings with one 2x2 matrix
+product per point and column, then with kalmanSmooth, checking they agree to
+1e-6 m. The loop is only run up to --loop-max points, larger tracks show how
+kalmanSmooth alone scales.
+
+    python benchmarks/bench_kalman.py
+    python benchmarks/bench_kalman.py --sizes 1000000 --loop-max 0
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+import MMFilter
+
+def rtsSmooth(values, seconds, measurementError, acceleration):
+    # the filter and smoother as written in the literature
+    r = measurementError ** 2; q = acceleration ** 2
+    H = np.array([[1.0, 0.0]])
+    x = np.array([values[0], 0.0]); P = np.diag([r, 1e4])
+    filtered = [(x, P)]; predicted = []
+    for k in range(1, len(values)):
+        dt = max(seconds[k] - seconds[k - 1], 0.0)
+        F = np.array([[1.0, dt], [0.0, 1.0]])
+        Q = q * np.array([[dt ** 3 / 3, dt ** 2 / 2], [dt ** 2 / 2, dt]])
+        xp = F.dot(x); Pp = F.dot(P).dot(F.T) + Q
+        K = Pp[:, 0] / (Pp[0, 0] + r)
+        x = xp + K * (values[k] - xp[0]); P = (np.eye(2) - np.outer(K, H)).dot(Pp)
+        filtered.append((x, P)); predicted.append((F, xp, Pp))
+    smoothed = [None] * len(values)
+    smoothed[-1] = filtered[-1][0]
+    for k in range(len(values) - 2, -1, -1):
+        (x, P), (F, xp, Pp) = filtered[k], predicted[k]
+        C = P.dot(F.T).dot(np.linalg.inv(Pp))
+        smoothed[k] = x + C.dot(smoothed[k + 1] - xp)
+    return np.array([s[0] for s in smoothed])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000], help='number of track points')
+    parser.add_argument('--loop-max', type=int, default=100000, help='largest track to run the textbook loop on')
+    args = parser.parse_args()
+
+    print('{0:>10} {1:>8} {2:>10} {3:>10} {4:>9} {5:>7}'.format('points', 'times', 'loop s', 'numpy s', 'speedup', 'equal'))
+    for size in args.sizes:
+        random = np.random.RandomState(1)
+        track = np.column_stack([500000 + np.cumsum(random.normal(0, 1.5, size)),
+                                 4400000 + np.cumsum(random.normal(0, 1.5, size))])
+        track += random.normal(0, 5, track.shape)
+        for name, seconds in (('steady', np.arange(size, dtype=np.float64)),
+                              ('random', np.cumsum(random.uniform(0.5, 3, size)))):
+            start = time.time()
+            ours = MMFilter.kalmanSmooth(track, seconds)
+            ourtime = time.time() - start
+            if size > args.loop_max:
+                print('{0:>10} {1:>8} {2:>10} {3:>10.2f} {4:>9} {5:>7}'.format(size, name, '-', ourtime, '-', '-'))
+                continue
+            start = time.time()
+            theirs = np.column_stack([rtsSmooth(track[:, i], seconds, 5.0, 1.0) for i in range(2)])
+            theirtime = time.time() - start
+            equal = np.allclose(ours, theirs, rtol=0, atol=1e-6)
+            print('{0:>10} {1:>8} {2:>10.2f} {3:>10.2f} {4:>8.0f}x {5:>7}'.format(size, name, theirtime, ourtime, theirtime / ourtime, str(equal)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Compares the simplekml pretty printer with the xml.dom.minidom path it replaced.
+
+Builds a tour of N camera FlyTos, then times the indented serialisation against
+minidom pretty printing the compact one and checks that their output is identical.
+
+    python benchmarks/bench_prettyprint.py
+    python benchmarks/bench_prettyprint.py --sizes 10000 100000 1000000 --minidom-max 100000
+"""
+import argparse
+import os
+import sys
+import time
+import xml.dom.minidom
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import simplekml
+from simplekml.base import Kmlable, KmlElement
+
+def buildTour(size):
+    kml = simplekml.Kml()
+    playlist = kml.newgxtour(name='Benchmark').newgxplaylist()
+    for i in xrange(size):
+        flyto = playlist.newgxflyto(gxduration=0.1)
+        flyto.gxflytomode = 'smooth'
+        flyto.camera.longitude = -75.172239 + i * 1e-6
+        flyto.camera.latitude = 39.965949 + i * 1e-6
+        flyto.camera.altitude = 40
+        flyto.camera.heading = i % 360
+        flyto.camera.tilt = 60
+        flyto.camera.altitudemode = simplekml.AltitudeMode.relativetoground
+        flyto.camera.gxtimespan.begin = '2014-06-06T10:38:48.000000Z'
+        flyto.camera.gxtimespan.end = '2014-06-06T10:38:49.000000Z'
+    return kml
+
+def minidomPretty(xml_str):
+    KmlElement.patch()
+    dom = xml.dom.minidom.parseString(xml_str.encode("utf-8"))
+    KmlElement.unpatch()
+    return dom.toprettyxml(indent="    ", newl="\n", encoding="UTF-8").decode("utf-8")
+
+def simplekmlPretty(kml):
+    return kml._genkml(format=True)
+
+def timed(function, argument):
+    start = time.time()
+    result = function(argument)
+    return result, time.time() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000], help='number of tour primitives')
+    parser.add_argument('--minidom-max', type=int, default=100000, help='largest size to run through minidom')
+    args = parser.parse_args()
+
+    print('{0:>10} {1:>12} {2:>12} {3:>12} {4:>8} {5:>9}'.format('primitives', 'xml MB', 'minidom s', 'simplekml s', 'speedup', 'identical'))
+    for size in args.sizes:
+        kml = buildTour(size)
+        ours, ourtime = timed(simplekmlPretty, kml)
+        xml_str = kml._genkml(format=False)
+        if size <= args.minidom_max:
+            theirs, theirtime = timed(minidomPretty, xml_str)
+            print('{0:>10} {1:>12.1f} {2:>12.2f} {3:>12.2f} {4:>7.1f}x {5:>9}'.format(size, len(xml_str) / 1e6, theirtime, ourtime, theirtime / ourtime, str(theirs == ours)))
+            del theirs
+        else:
+            print('{0:>10} {1:>12.1f} {2:>12} {3:>12.2f} {4:>8} {5:>9}'.format(size, len(xml_str) / 1e6, '-', ourtime, '-', '-'))
+        del ours, xml_str, kml
+        Kmlable._clearimages()
+
+if __name__ == '__main__':
+    main()
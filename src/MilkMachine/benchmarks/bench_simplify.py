@@ -0,0 +1,49 @@
+"""
+Times MMSimplify on 10 Hz logger tracks and counts the points each method keeps.
+
+Builds a walk of N points logged every 0.1 s at a few metres per second, with
+GPS noise and a stop every ten minutes, and simplifies it with Douglas-Peucker,
+time aware Douglas-Peucker and Visvalingam-Whyatt. The tour gets a FlyTo,
+Placemark and possibly a Model for every point kept.
+
+    python benchmarks/bench_simplify.py
+    python benchmarks/bench_simplify.py --sizes 1000000 --tolerance 2 --visvalingam-max 0
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+import MMSimplify
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000], help='number of track points')
+    parser.add_argument('--tolerance', type=float, default=5.0, help='tolerance in metres')
+    parser.add_argument('--visvalingam-max', type=int, default=100000, help='largest track to simplify with Visvalingam-Whyatt')
+    args = parser.parse_args()
+
+    print('{0:>10} {1:>22} {2:>10} {3:>10}'.format('points', 'method', 'seconds', 'kept'))
+    for size in args.sizes:
+        random = np.random.RandomState(1)
+        seconds = np.arange(size) * 0.1
+        heading = np.cumsum(random.normal(0, 0.02, size))
+        speed = np.where((np.arange(size) // 600) % 10 == 9, 0.0, 0.4)
+        x = np.cumsum(speed * np.cos(heading)) + random.normal(0, 1.0, size)
+        y = np.cumsum(speed * np.sin(heading)) + random.normal(0, 1.0, size)
+
+        runs = [('douglas-peucker', lambda: MMSimplify.douglasPeucker(x, y, args.tolerance)),
+                ('douglas-peucker timed', lambda: MMSimplify.douglasPeucker(x, y, args.tolerance, seconds))]
+        if size <= args.visvalingam_max:
+            runs.append(('visvalingam', lambda: MMSimplify.visvalingam(x, y, args.tolerance)))
+        for name, run in runs:
+            start = time.time()
+            keep = run()
+            print('{0:>10} {1:>22} {2:>10.2f} {3:>10}'.format(size, name, time.time() - start, np.count_nonzero(keep)))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""
+Compares MMFilter.splineSmooth with one smoothing spline over the whole track.
+
+Builds a noisy walk of N points logged every second and fits a cubic
+UnivariateSpline to it against time, once over the whole track and then in
+the overlapping windows of splineSmooth. The single fit adds knots all over
+the track and slows down faster than the track grows, the windows grow
+linearly. The mean distance of each fit from the walk without its noise is
+printed to show the windows smooth as well as the single fit.
+
+    python benchmarks/bench_spline.py
+    python benchmarks/bench_spline.py --sizes 1000000 --single-max 0
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+from scipy.interpolate import UnivariateSpline
+
+import MMFilter
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 30000, 100000, 1000000], help='number of track points')
+    parser.add_argument('--single-max', type=int, default=100000, help='largest track to fit with a single spline')
+    parser.add_argument('--noise', type=float, default=3.0, help='standard deviation of the GPS noise in metres')
+    args = parser.parse_args()
+
+    print('{0:>10} {1:>10} {2:>10} {3:>9} {4:>10} {5:>10}'.format('points', 'single s', 'windows s', 'speedup', 'single m', 'windows m'))
+    for size in args.sizes:
+        random = np.random.RandomState(1)
+        seconds = np.arange(size, dtype=np.float64)
+        truth = np.cumsum(random.normal(0, 1, size))
+        noisy = truth + random.normal(0, args.noise, size)
+
+        start = time.time()
+        ours = MMFilter.splineSmooth(noisy, seconds, 3, args.noise)
+        ourtime = time.time() - start
+        ourerror = np.abs(ours - truth).mean()
+        if size > args.single_max:
+            print('{0:>10} {1:>10} {2:>10.2f} {3:>9} {4:>10} {5:>10.3f}'.format(size, '-', ourtime, '-', '-', ourerror))
+            continue
+        start = time.time()
+        theirs = UnivariateSpline(seconds, noisy, k=3, s=size * args.noise ** 2)(seconds)
+        theirtime = time.time() - start
+        theirerror = np.abs(theirs - truth).mean()
+        print('{0:>10} {1:>10.2f} {2:>10.2f} {3:>8.0f}x {4:>10.3f} {5:>10.3f}'.format(size, theirtime, ourtime, theirtime / ourtime, theirerror, ourerror))
+
+if __name__ == '__main__':
+    main()
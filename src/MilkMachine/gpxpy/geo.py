@@ -19,6 +19,8 @@ import pdb
 import logging as mod_logging
 import math as mod_math
 
+import numpy as mod_numpy
+
 from . import utils as mod_utils
 
 # Generic geo related function and class(es)
@@ -244,40 +246,78 @@ def get_line_equation_coefficients(location1, location2):
         return float(1), float(-a), float(-b)
 
 
+def simplify_polyline_mask(latitudes, longitudes, max_distance):
+    """
+    Does Ramer-Douglas-Peucker algorithm for simplification of polyline given
+    as arrays of latitudes and longitudes.
+
+    Segments waiting to be split are kept on a stack instead of recursing, so
+    long tracks don't hit the recursion limit, and the distances of all the
+    points of a segment are computed at once with numpy.
+
+    The points are projected with the same flat approximation used by
+    distance() for close points, with the latitude of the middle of the
+    track. Returns a numpy array of booleans, True for the points to keep.
+    """
+    latitudes = mod_numpy.asarray(latitudes, dtype=mod_numpy.float64)
+    longitudes = mod_numpy.asarray(longitudes, dtype=mod_numpy.float64)
+
+    points_no = len(latitudes)
+    if points_no < 3:
+        return mod_numpy.ones(points_no, dtype=bool)
+
+    coef = mod_math.cos(to_rad((latitudes.min() + latitudes.max()) / 2.))
+    x = longitudes * coef * ONE_DEGREE
+    y = latitudes * ONE_DEGREE
+
+    keep = mod_numpy.zeros(points_no, dtype=bool)
+    keep[0] = keep[-1] = True
+
+    stack = [(0, points_no - 1)]
+    while stack:
+        begin, end = stack.pop()
+        if end - begin < 2:
+            continue
+
+        x_begin, y_begin = float(x[begin]), float(y[begin])
+        dx = float(x[end]) - x_begin
+        dy = float(y[end]) - y_begin
+        line_length = mod_math.sqrt(dx * dx + dy * dy)
+
+        # Distance from the line through begin and end, as distance_from_line(),
+        # times the length of the line:
+        if line_length == 0:
+            distances = mod_numpy.hypot(x[begin + 1:end] - x_begin, y[begin + 1:end] - y_begin)
+            line_length = 1.
+        else:
+            distances = x[begin + 1:end] * dy
+            distances -= y[begin + 1:end] * dx
+            distances -= x_begin * dy - y_begin * dx
+            mod_numpy.abs(distances, out=distances)
+
+        max_distance_position = int(distances.argmax())
+        if distances[max_distance_position] < max_distance * line_length:
+            continue
+
+        split = begin + 1 + max_distance_position
+        keep[split] = True
+        stack.append((split, end))
+        stack.append((begin, split))
+
+    return keep
+
+
 def simplify_polyline(points, max_distance):
     """Does Ramer-Douglas-Peucker algorithm for simplification of polyline """
 
     if len(points) < 3:
         return points
 
-    begin, end = points[0], points[-1]
-
-    # Use a "normal" line just to detect the most distant point (not its real distance)
-    # this is because this is faster to compute than calling distance_from_line() for
-    # every point.
-    #
-    # This is an approximation and may have some errors near the poles and if
-    # the points are too distant, but it should be good enough for most use
-    # cases...
-    a, b, c = get_line_equation_coefficients(begin, end)
-
-    tmp_max_distance = -1000000
-    tmp_max_distance_position = None
-    for point_no in range(len(points[1:-1])):
-        point = points[point_no]
-        d = abs(a * point.latitude + b * point.longitude + c)
-        if d > tmp_max_distance:
-            tmp_max_distance = d
-            tmp_max_distance_position = point_no
-
-    # Now that we have the most distance point, compute its real distance:
-    real_max_distance = distance_from_line(points[tmp_max_distance_position], begin, end)
-
-    if real_max_distance < max_distance:
-        return [begin, end]
-
-    return (simplify_polyline(points[:tmp_max_distance_position + 2], max_distance) +
-            simplify_polyline(points[tmp_max_distance_position + 1:], max_distance)[1:])
+    keep = simplify_polyline_mask([point.latitude for point in points],
+                                  [point.longitude for point in points],
+                                  max_distance)
+
+    return [points[point_no] for point_no in mod_numpy.flatnonzero(keep)]
 
 
 class Location:
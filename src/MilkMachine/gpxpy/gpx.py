@@ -1040,6 +1040,9 @@ class GPXTrackSegment:
     def simplify(self, max_distance=None):
         """
         Simplify using the Ramer-Douglas-Peucker algorithm: http://en.wikipedia.org/wiki/Ramer-Douglas-Peucker_algorithm
+
+        Points further than max_distance meters (default 10) from the
+        simplified segment are kept, see geo.simplify_polyline_mask().
         """
         if not max_distance:
             max_distance = 10
@@ -1783,6 +1786,8 @@ class GPX:
     def simplify(self, max_distance=None):
         """
         Simplify using the Ramer-Douglas-Peucker algorithm: http://en.wikipedia.org/wiki/Ramer-Douglas-Peucker_algorithm
+
+        Every segment is simplified on its own, see GPXTrackSegment.simplify().
         """
         for track in self.tracks:
             track.simplify(max_distance=max_distance)
@@ -49,12 +49,21 @@ import numpy as np
 #import matplotlib.pyplot as plt
 from numpy import linspace,exp
 from numpy.random import randn
-from scipy.interpolate import UnivariateSpline
 #from pylab import *
 
 # helper functions
+import MMCache
+import MMCodec
+import MMEdit
 import MMExport
+import MMFilter
+import MMFollow
 import MMImport
+import MMProjection
+import MMSimplify
+import MMTime
+import MMTrack
+import MMWorker
 
 UserOs = platform.platform()
 WindOs = re.search('Windows', UserOs, re.I)
@@ -105,6 +114,7 @@ class MilkMachine:
         self.dlg.timer.timeout.connect(self.Time)
 
         self.lastdirectory = ''
+        self.exportWorker = None
 
         if WindOs:
             if WindOs.group() == 'Windows':
@@ -231,19 +241,6 @@ class MilkMachine:
             field_dict[f.name()] = qgsvectorlayer.fieldNameIndex(f.name())
         return field_dict
 
-    def to_dt(self, dt_string):
-        import datetime
-        pointdate = dt_string.split(" ")[0]  #2014/06/06
-        pointtime = dt_string.split(" ")[1]
-        # format for microseconds
-        sec_pieces = pointtime.split(':')[2].split('.')
-        if len(sec_pieces) == 1:
-            microsec = 0
-        elif len(sec_pieces) == 2:
-            microsec = int(float('0.' + sec_pieces[1]) * 1000000)
-        dt = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]), microsec)
-        return dt
-
     def tiltpopulate(self):
         if self.dlg.ui.lineEdit_visualization_follow_altitude.text() and self.dlg.ui.lineEdit__visualization_follow_range.text() and not self.dlg.ui.lineEdit__visualization_follow_tilt.text():
             try:
@@ -259,18 +256,11 @@ class MilkMachine:
         if self.dlg.ui.lineEdit_visualization_circle_altitude.text():
             self.ActiveLayer = self.iface.activeLayer()
             self.fields = self.field_indices(self.ActiveLayer)
-            features = self.ActiveLayer.selectedFeatures()
-            selected = []
-            for f in features:
-                selected.append([f.id(), f.attributes()[self.fields['datetime']]])
-
-            def getKey(item):
-                return item[0]
-            selected = sorted(selected, key=getKey)  #[[id, (x,y), altitude]]
-            first = selected[0][1]; last = selected[-1][1]
+            times = MMTime.layerTimes(self.ActiveLayer)
+            selected = sorted(self.ActiveLayer.selectedFeaturesIds())
 
-            sel_start_dt = self.to_dt(first)
-            sel_end_dt = self.to_dt(last)
+            sel_start_dt = times.datetime(selected[0])
+            sel_end_dt = times.datetime(selected[-1])
             diff = sel_end_dt - sel_start_dt
             self.dlg.ui.lineEdit__visualization_circle_duration.setText(str(diff.seconds+1))
 
@@ -312,30 +302,8 @@ class MilkMachine:
 
                     # If XY filtering
                     if self.dlg.ui.radioButton_filtering_xy.isChecked():
-                        xroll = TeatDip.rolling_window(ptx, window); yroll = TeatDip.rolling_window(pty, window)
-                        xmean = []; ymean = []
-                        pad = (window - 1)/2
-                        counter = 0
-                        for i in range(pad):
-                            xmean.append(ptx[i])
-                            counter += 1
-                        for xx in xroll:
-                            xmean.append(np.mean(xx))
-                            counter += 1
-                        lastx = ptx[-pad:]
-                        for l in lastx:
-                            xmean.append(l)
-
-                        counter = 0
-                        for i in range(pad):
-                            ymean.append(pty[i])
-                            counter += 1
-                        for yy in yroll:
-                            ymean.append(np.mean(yy))
-                            counter += 1
-                        lasty = pty[-pad:]
-                        for l in lasty:
-                            ymean.append(l)
+                        xymean = MMFilter.movingAverage(np.column_stack([ptx, pty]), window)
+                        xmean = xymean[:, 0]; ymean = xymean[:, 1]
 
                         if self.dlg.ui.checkBox_filtering_showplot.isChecked() and self.os == 'Windows':
                             plt.plot(ptx,pty, 'b.', markersize=15)
@@ -346,36 +314,24 @@ class MilkMachine:
                             plt.show()
 
                         self.ActiveLayer.startEditing()
-                        self.ActiveLayer.beginEditCommand('Moving Average Filter')
+                        edit = MMEdit.BatchEdit(self.ActiveLayer, 'Moving Average Filter')
                         for i,f in enumerate(selectList):    #[[id, (x,y), altitude]]
                             fet = QgsGeometry.fromPoint(QgsPoint(xmean[i],ymean[i]))
-                            self.ActiveLayer.changeGeometry(f[0],fet)
-                        self.ActiveLayer.endEditCommand()
+                            edit.changeGeometry(f[0],fet)
+                        edit.commit()
                         self.canvas.refresh()
 
                         self.iface.messageBar().pushMessage("Success", "Applied interpolation to XY points", level=QgsMessageBar.INFO, duration=5)
 
                     # z filtering
                     if self.dlg.ui.radioButton_filtering_z.isChecked():
-                        zroll = TeatDip.rolling_window(ptz, window)
-                        zmean = []
-                        pad = (window - 1)/2
-                        counter = 0
-                        for i in range(pad):
-                            zmean.append(ptz[i])
-                            counter += 1
-                        for zz in zroll:
-                            zmean.append(np.mean(zz))
-                            counter += 1
-                        lastz = ptz[-pad:]
-                        for l in lastz:
-                            zmean.append(l)
+                        zmean = MMFilter.movingAverage(ptz, window)
 
                         self.ActiveLayer.startEditing()
-                        self.ActiveLayer.beginEditCommand('Moving Average Filter')
+                        edit = MMEdit.BatchEdit(self.ActiveLayer, 'Moving Average Filter')
                         for i,f in enumerate(selectList):    #[[id, (x,y), altitude]]
-                            self.ActiveLayer.changeAttributeValue(f[0], self.fields['altitude'], round(float(zmean[i]),2))
-                        self.ActiveLayer.endEditCommand()
+                            edit.changeAttributeValue(f[0], self.fields['altitude'], round(float(zmean[i]),2))
+                        edit.commit()
                         self.canvas.refresh()
 
                         self.iface.messageBar().pushMessage("Success", "Applied interpolation to Z points", level=QgsMessageBar.INFO, duration=5)
@@ -410,11 +366,11 @@ class MilkMachine:
                     plt.show()
 
                 self.ActiveLayer.startEditing()
-                self.ActiveLayer.beginEditCommand('Linear Filter')
+                edit = MMEdit.BatchEdit(self.ActiveLayer, 'Linear Filter')
                 for i,f in enumerate(selectList):    #[[id, (x,y), altitude]]
                     fet = QgsGeometry.fromPoint(QgsPoint(xgeo[i],ygeo[i]))  #fet = QgsGeometry.fromPoint(QgsPoint(ptx[i],yp[i]))
-                    self.ActiveLayer.changeGeometry(f[0],fet)
-                self.ActiveLayer.endEditCommand()
+                    edit.changeGeometry(f[0],fet)
+                edit.commit()
                 self.canvas.refresh()
 
                 self.iface.messageBar().pushMessage("Success", "Applied interpolation to points", level=QgsMessageBar.INFO, duration=5)
@@ -432,11 +388,11 @@ class MilkMachine:
                 xnew = ptx + (xdist * weight); ynew = pty + (ydist * weight)
 
                 self.ActiveLayer.startEditing()
-                self.ActiveLayer.beginEditCommand('Moving Average Filter')
+                edit = MMEdit.BatchEdit(self.ActiveLayer, 'Moving Average Filter')
                 for i,f in enumerate(selectList):    #[[id, (x,y), altitude]]
                     fet = QgsGeometry.fromPoint(QgsPoint(xnew[i],ynew[i]))
-                    self.ActiveLayer.changeGeometry(f[0],fet)
-                self.ActiveLayer.endEditCommand()
+                    edit.changeGeometry(f[0],fet)
+                edit.commit()
                 self.canvas.refresh()
 
                 if self.dlg.ui.checkBox_filtering_showplot.isChecked() and self.os == 'Windows':
@@ -446,64 +402,51 @@ class MilkMachine:
                     plt.title("Filtering: Blue = Original, Red = Filtered, Weight = {0}".format(weight), size=20)
                     plt.show()
 
-            # Spline Regression ------------------
-            if self.dlg.ui.radioButton_filtering_quad.isChecked() and self.dlg.ui.radioButton_filtering_xy.isChecked():
-                #slope, intercept, r_value, p_value, std_err = stats.linregress(ptx,pty)
+            # Spline ------------------
+            if self.dlg.ui.radioButton_filtering_quad.isChecked():
                 method = self.dlg.ui.comboBox_filtering_spline.currentText()
                 sweight = float(self.dlg.ui.doubleSpinBox_filtering_spline_weight.value())
                 methdict = {'Quadratic': 2, 'Cubic': 3, '4th Order': 4, '5th Order': 5}
                 meth = methdict[method]
+                # the spline is fitted along time, x(t), y(t) or z(t), so loops and back-tracking keep their order
+                times = MMTime.layerTimes(self.ActiveLayer)
+                seconds = times.epoch[times.rows([f[0] for f in selectList])] / 1e6
 
-                # resort selectList by x. x has to be increasing!
-                def getKeyX(item):
-                    return item[1][0]
-                selectListX = selectList
-                selectListX = sorted(selectListX, key=getKeyX)  #[[id, (x,y), altitude]]
-                # turn the coordinates into numpy arrays
-                xarr = []; yarr = [];
-                for val in selectListX:
-                    xarr.append(val[1][0]);yarr.append(val[1][1])
-                ptx = np.array(xarr); pty = np.array(yarr)
-
-                s = UnivariateSpline(ptx,pty, k=meth, s=5e8)
-                #s = interpolate.interp1d(ptx,pty, kind=meth, assume_sorted=False)
-                ys = s(ptx)
-                diff = ys - pty
-                ynew = pty + (diff * sweight)
-                # get rid of nan
-                for i,v in enumerate(ynew):
-                    if np.isnan(v):
-                        ynew[i] = pty[i]
-
-##                self.logger.info('pty: {0}'.format(pty))
-##                self.logger.info('ys: {0}'.format(ys))
-##                self.logger.info('ynew: {0}'.format(ynew))
-##                self.logger.info('ptx: {0}'.format(ptx))
-##                self.logger.info('selectListX: {0}'.format(selectListX))
-##                (a,b,c) = np.polyfit(ptx,pty,2)
-##                yp = np.polyval([a,b,c],ptx)
+                if self.dlg.ui.radioButton_filtering_xy.isChecked():
+                    xs, ys = MMFilter.splineSmoothTrack(ptx, pty, seconds, meth)
+                    xnew = ptx + ((xs - ptx) * sweight)
+                    ynew = pty + ((ys - pty) * sweight)
 
-                if self.dlg.ui.checkBox_filtering_showplot.isChecked() and self.os == 'Windows':
-                    plt.plot(ptx,pty, 'b.', markersize=15)
-                    #plt.plot(ptx,ys, 'g.', markersize=15)
-                    plt.plot(ptx,ynew,'r-',linewidth=2)
-                    plt.plot(ptx,ynew,'r.', markersize=15)
-                    plt.xlabel('Longitude', size=10); plt.ylabel('Latitude', size=10); plt.axis('equal')
-                    plt.title("Filtering: Blue = Original, Red = Filtered", size=20)
-                    plt.show()
+                    if self.dlg.ui.checkBox_filtering_showplot.isChecked() and self.os == 'Windows':
+                        plt.plot(ptx,pty, 'b.', markersize=15)
+                        plt.plot(xnew,ynew,'r-',linewidth=2)
+                        plt.plot(xnew,ynew,'r.', markersize=15)
+                        plt.xlabel('Longitude', size=10); plt.ylabel('Latitude', size=10); plt.axis('equal')
+                        plt.title("Filtering: Blue = Original, Red = Filtered", size=20)
+                        plt.show()
 
-                self.ActiveLayer.startEditing()
-                self.ActiveLayer.beginEditCommand('Quadratic Filter')
-                for i,f in enumerate(selectListX):    #[[id, (x,y), altitude]]
-                    fet = QgsGeometry.fromPoint(QgsPoint(ptx[i],ynew[i]))
-                    self.ActiveLayer.changeGeometry(f[0],fet)
-                self.ActiveLayer.endEditCommand()
-                self.canvas.refresh()
+                    self.ActiveLayer.startEditing()
+                    edit = MMEdit.BatchEdit(self.ActiveLayer, 'Spline Filter')
+                    for i,f in enumerate(selectList):    #[[id, (x,y), altitude]]
+                        fet = QgsGeometry.fromPoint(QgsPoint(xnew[i],ynew[i]))
+                        edit.changeGeometry(f[0],fet)
+                    edit.commit()
+                    self.canvas.refresh()
+
+                    self.iface.messageBar().pushMessage("Success", "Applied spline interpolation to points", level=QgsMessageBar.INFO, duration=5)
+
+                if self.dlg.ui.radioButton_filtering_z.isChecked():
+                    zs = MMFilter.splineSmooth(ptz, seconds, meth)
+                    znew = ptz + ((zs - ptz) * sweight)
 
-                self.iface.messageBar().pushMessage("Success", "Applied spline interpolation to points", level=QgsMessageBar.INFO, duration=5)
+                    self.ActiveLayer.startEditing()
+                    edit = MMEdit.BatchEdit(self.ActiveLayer, 'Spline Filter')
+                    for i,f in enumerate(selectList):    #[[id, (x,y), altitude]]
+                        edit.changeAttributeValue(f[0], self.fields['altitude'], round(float(znew[i]),2))
+                    edit.commit()
+                    self.canvas.refresh()
 
-            elif self.dlg.ui.radioButton_filtering_quad.isChecked() and self.dlg.ui.radioButton_filtering_z.isChecked():
-                self.iface.messageBar().pushMessage("Error", "Quadratic can only be used for X,Y filtering", level=QgsMessageBar.CRITICAL, duration=7)
+                    self.iface.messageBar().pushMessage("Success", "Applied spline interpolation to Z points", level=QgsMessageBar.INFO, duration=5)
 
             # Z Scaling ------------------
             if self.dlg.ui.radioButton_filtering_zscale.isChecked() and self.dlg.ui.radioButton_filtering_z.isChecked():
@@ -547,14 +490,55 @@ class MilkMachine:
 
 
                     self.ActiveLayer.startEditing()
-                    self.ActiveLayer.beginEditCommand('Z Scaling')
+                    edit = MMEdit.BatchEdit(self.ActiveLayer, 'Z Scaling')
                     for i,f in enumerate(selectList):    #[[id, (x,y), altitude]]
-                        self.ActiveLayer.changeAttributeValue(f[0], self.fields['altitude'], round(float(ptz_new[i]),2))
-                    self.ActiveLayer.endEditCommand()
+                        edit.changeAttributeValue(f[0], self.fields['altitude'], round(float(ptz_new[i]),2))
+                    edit.commit()
                     self.canvas.refresh()
 
                     self.iface.messageBar().pushMessage("Success", "Applied Z Scaling to points.", level=QgsMessageBar.INFO, duration=5)
 
+            # Kalman ------------------
+            if self.dlg.ui.radioButton_filtering_kalman.isChecked():
+                error = float(self.dlg.ui.doubleSpinBox_filtering_kalman_error.value())
+                accel = float(self.dlg.ui.doubleSpinBox_filtering_kalman_accel.value())
+                # seconds between the selected points, from the datetime field
+                times = MMTime.layerTimes(self.ActiveLayer)
+                seconds = times.epoch[times.rows([f[0] for f in selectList])] / 1e6
+
+                if self.dlg.ui.radioButton_filtering_xy.isChecked():
+                    xnew, ynew = MMFilter.kalmanSmoothTrack(ptx, pty, seconds, error, accel)
+
+                    if self.dlg.ui.checkBox_filtering_showplot.isChecked() and self.os == 'Windows':
+                        plt.plot(ptx,pty, 'b.', markersize=15)
+                        plt.plot(xnew,ynew,'r-',linewidth=2)
+                        plt.plot(xnew,ynew,'r.',markersize=15)
+                        plt.xlabel('Longitude', size=10); plt.ylabel('Latitude', size=10); plt.axis('equal')
+                        plt.title("Filtering: Blue = Original, Red = Filtered", size=20)
+                        plt.show()
+
+                    self.ActiveLayer.startEditing()
+                    edit = MMEdit.BatchEdit(self.ActiveLayer, 'Kalman Filter')
+                    for i,f in enumerate(selectList):    #[[id, (x,y), altitude]]
+                        fet = QgsGeometry.fromPoint(QgsPoint(xnew[i],ynew[i]))
+                        edit.changeGeometry(f[0],fet)
+                    edit.commit()
+                    self.canvas.refresh()
+
+                    self.iface.messageBar().pushMessage("Success", "Applied Kalman filter to XY points", level=QgsMessageBar.INFO, duration=5)
+
+                if self.dlg.ui.radioButton_filtering_z.isChecked():
+                    znew = MMFilter.kalmanSmooth(ptz, seconds, error, accel)
+
+                    self.ActiveLayer.startEditing()
+                    edit = MMEdit.BatchEdit(self.ActiveLayer, 'Kalman Filter')
+                    for i,f in enumerate(selectList):    #[[id, (x,y), altitude]]
+                        edit.changeAttributeValue(f[0], self.fields['altitude'], round(float(znew[i]),2))
+                    edit.commit()
+                    self.canvas.refresh()
+
+                    self.iface.messageBar().pushMessage("Success", "Applied Kalman filter to Z points", level=QgsMessageBar.INFO, duration=5)
+
 
         except:
             self.dlg.ui.checkBox_filtering_edit.setChecked(False)
@@ -585,6 +569,11 @@ class MilkMachine:
                 self.dlg.ui.radioButton_filtering_quad.setEnabled(True)
                 self.dlg.ui.radioButton_filtering_moving.setEnabled(True)
                 self.dlg.ui.spinBox_filtering_moving.setEnabled(True)
+                self.dlg.ui.radioButton_filtering_kalman.setEnabled(True)
+                self.dlg.ui.label_69.setEnabled(True)
+                self.dlg.ui.doubleSpinBox_filtering_kalman_error.setEnabled(True)
+                self.dlg.ui.label_70.setEnabled(True)
+                self.dlg.ui.doubleSpinBox_filtering_kalman_accel.setEnabled(True)
 
                 self.dlg.ui.radioButton_filtering_zscale.setEnabled(False)
                 self.dlg.ui.label_48.setEnabled(False)
@@ -610,16 +599,21 @@ class MilkMachine:
                 self.dlg.ui.label_47.setEnabled(False)
                 self.dlg.ui.label_66.setEnabled(False)
                 self.dlg.ui.doubleSpinBox_filtering_yweight.setEnabled(False)
-                self.dlg.ui.label_64.setEnabled(False)
-                self.dlg.ui.comboBox_filtering_spline.setEnabled(False)
-                self.dlg.ui.label_65.setEnabled(False)
-                self.dlg.ui.doubleSpinBox_filtering_spline_weight.setEnabled(False)
+                self.dlg.ui.label_64.setEnabled(True)
+                self.dlg.ui.comboBox_filtering_spline.setEnabled(True)
+                self.dlg.ui.label_65.setEnabled(True)
+                self.dlg.ui.doubleSpinBox_filtering_spline_weight.setEnabled(True)
                 self.dlg.ui.radioButton_filtering_center.setEnabled(False)
                 self.dlg.ui.label_63.setEnabled(False)
                 self.dlg.ui.doubleSpinBox_filtering_center_weight.setEnabled(False)
-                self.dlg.ui.radioButton_filtering_quad.setEnabled(False)
+                self.dlg.ui.radioButton_filtering_quad.setEnabled(True)
                 self.dlg.ui.radioButton_filtering_moving.setEnabled(True)
                 self.dlg.ui.spinBox_filtering_moving.setEnabled(True)
+                self.dlg.ui.radioButton_filtering_kalman.setEnabled(True)
+                self.dlg.ui.label_69.setEnabled(True)
+                self.dlg.ui.doubleSpinBox_filtering_kalman_error.setEnabled(True)
+                self.dlg.ui.label_70.setEnabled(True)
+                self.dlg.ui.doubleSpinBox_filtering_kalman_accel.setEnabled(True)
                 self.dlg.ui.radioButton_filtering_zscale.setEnabled(True)
                 self.dlg.ui.label_48.setEnabled(True)
                 self.dlg.ui.lineEdit_filtering_min.setEnabled(True)
@@ -675,6 +669,11 @@ class MilkMachine:
                             self.dlg.ui.radioButton_filtering_quad.setEnabled(True)
                             self.dlg.ui.radioButton_filtering_moving.setEnabled(True)
                             self.dlg.ui.spinBox_filtering_moving.setEnabled(True)
+                            self.dlg.ui.radioButton_filtering_kalman.setEnabled(True)
+                            self.dlg.ui.label_69.setEnabled(True)
+                            self.dlg.ui.doubleSpinBox_filtering_kalman_error.setEnabled(True)
+                            self.dlg.ui.label_70.setEnabled(True)
+                            self.dlg.ui.doubleSpinBox_filtering_kalman_accel.setEnabled(True)
 
                             if self.dlg.ui.radioButton_filtering_z.isChecked():
                                 self.dlg.ui.radioButton_filtering_zscale.setEnabled(True)
@@ -711,6 +710,11 @@ class MilkMachine:
                 self.dlg.ui.radioButton_filtering_quad.setEnabled(False)
                 self.dlg.ui.radioButton_filtering_moving.setEnabled(False)
                 self.dlg.ui.spinBox_filtering_moving.setEnabled(False)
+                self.dlg.ui.radioButton_filtering_kalman.setEnabled(False)
+                self.dlg.ui.label_69.setEnabled(False)
+                self.dlg.ui.doubleSpinBox_filtering_kalman_error.setEnabled(False)
+                self.dlg.ui.label_70.setEnabled(False)
+                self.dlg.ui.doubleSpinBox_filtering_kalman_accel.setEnabled(False)
                 self.dlg.ui.radioButton_filtering_zscale.setEnabled(False)
                 self.dlg.ui.label_48.setEnabled(False)
                 self.dlg.ui.lineEdit_filtering_min.setEnabled(False)
@@ -768,27 +772,17 @@ class MilkMachine:
                             # self.dlg.ui.checkBox_time_after.setEnabled(True)
 
                             #populate
-                            features = self.ActiveLayer.selectedFeatures()
-                            selectList = []
-                            for f in features:
-                                selectList.append([f.id(), f.attributes()[self.fields['datetime']]])
-                            def getKey(item):
-                                return item[0]
-                            selectList = sorted(selectList, key=getKey)
-                            sel_start = selectList[0][1]
-                            sel_end = selectList[-1][1]
-
-                            sel_start2 = sel_start.split(' ')
-                            sel_start2 = ' '.join(sel_start2[0:2])
-                            sel_end2 = sel_end.split(' ')
-                            sel_end2 = ' '.join(sel_end2[0:2])
+                            times = MMTime.layerTimes(self.ActiveLayer)
+                            selectfids = sorted(self.ActiveLayer.selectedFeaturesIds())
+                            sel_start2 = times.datetime(selectfids[0], wholeSeconds=True)
+                            sel_end2 = times.datetime(selectfids[-1], wholeSeconds=True)
 
-                            self.logger.info('sel start %s' % sel_start2)
+                            self.logger.info('sel start %s' % sel_start2.strftime("%Y/%m/%d %H:%M:%S"))
 
 
-                            qdt_start = QDateTime.fromString(sel_start2, "yyyy/MM/dd hh:mm:ss")
+                            qdt_start = QDateTime(sel_start2)
                             self.dlg.ui.dateTimeEdit_start.setDateTime(qdt_start)
-                            qdt_end = QDateTime.fromString(sel_end2, "yyyy/MM/dd hh:mm:ss")
+                            qdt_end = QDateTime(sel_end2)
                             self.dlg.ui.dateTimeEdit_end.setDateTime(qdt_end)
 
                             # Apply Buttons
@@ -849,72 +843,44 @@ class MilkMachine:
             allfids = self.ActiveLayer.allFeatureIds()
             selectfids = self.ActiveLayer.selectedFeaturesIds()
 
-            features = self.ActiveLayer.getFeatures()
-            FList = []
-            for f in features:
+            times = MMTime.layerTimes(self.ActiveLayer)
 
-                FList.append([f.id(), f.attributes()[self.fields['datetime']]])
-            def getKey(item):
-                return item[0]
-            FList = sorted(FList, key=getKey)
-            layer_start = FList[0][1]
-            layer_end = FList[-1][1]
-            ## calculate the time difference factor between each time stamp
-            FListDiff = []
-            FList_break = len(FList)-2
-            for i,v in enumerate(FList):
-                tdiff = self.to_dt(FList[i+1][1]) - self.to_dt(v[1])
-                tdiff_seconds = float(str(tdiff.seconds)+'.'+str(tdiff.microseconds))
-                FListDiff.append([v[0], v[1], tdiff_seconds])
-                if i == FList_break:
-                    FListDiff.append([FList[i+1][0], FList[i+1][1], tdiff_seconds])
-                    break
+            ## calculate the time difference factor between each time stamp, [[fid, seconds to the next point], ...]
+            ## the last point repeats the difference before it
+            def timeDiffs(fids):
+                epoch = times.epoch[times.rows(fids)]
+                diffs = np.diff(epoch) / 1000000.0
+                diffs = np.append(diffs, diffs[-1:])
+                return [[fid, tdiff_seconds] for fid, tdiff_seconds in zip(fids, diffs.tolist())]
 
+            FListDiff = timeDiffs(times.fids.tolist())
             # self.logger.info('FListDiff: %s' % FListDiff)
 
+            selectfids = sorted(selectfids)
+            SListDiff = timeDiffs(selectfids)
 
-            features = self.ActiveLayer.selectedFeatures()
-            selectList = []
-            for f in features:
-                selectList.append([f.id(), f.attributes()[self.fields['datetime']]])
-            def getKey(item):
-                return item[0]
-            selectList = sorted(selectList, key=getKey)
-            sel_start = selectList[0][1]
-            sel_end = selectList[-1][1]
-            ## calculate the time difference factor between each time stamp
-            SListDiff = []
-            SList_break = len(selectList)-2
-            for i,v in enumerate(selectList):
-                tdiff = self.to_dt(selectList[i+1][1]) - self.to_dt(v[1])
-                tdiff_seconds = float(str(tdiff.seconds)+'.'+str(tdiff.microseconds))
-                SListDiff.append([v[0], v[1], tdiff_seconds])
-                if i == SList_break:
-                    SListDiff.append([selectList[i+1][0], selectList[i+1][1], tdiff_seconds])
-                    break
-
-            layer_start_dt = self.to_dt(layer_start)
-            layer_end_dt = self.to_dt(layer_end)
-            sel_start_dt = self.to_dt(sel_start)
-            sel_end_dt = self.to_dt(sel_end)
+            layer_start_dt = times.at(0)
+            layer_end_dt = times.at(-1)
+            sel_start_dt = times.datetime(selectfids[0])
+            sel_end_dt = times.datetime(selectfids[-1])
 
             seldiff = sel_end_dt - sel_start_dt
             newdiff = dt_end - dt_start
 
-            newdiff_seconds = float(str(newdiff.seconds)+'.'+str(newdiff.microseconds))
-            seldiff_seconds = float(str(seldiff.seconds)+'.'+str(seldiff.microseconds))
+            newdiff_seconds = newdiff.total_seconds()
+            seldiff_seconds = seldiff.total_seconds()
             newinterval = newdiff_seconds / float(seldiff_seconds)
 
             newtimelist2 = [dt_start]
             mill_interval = round(newinterval * 1000000)
             for i,v in enumerate(SListDiff):
                 ct2 = newtimelist2[i]
-                newtimelist2.append(ct2 + datetime.timedelta(microseconds = (mill_interval * v[2])))
+                newtimelist2.append(ct2 + datetime.timedelta(microseconds = (mill_interval * v[1])))
 
             # self.logger.info('XX %s, %s' % (len(newtimelist2), len(selectfids)))
 
             self.ActiveLayer.startEditing()
-            self.ActiveLayer.beginEditCommand('datetime edit selected')
+            edit = MMEdit.BatchEdit(self.ActiveLayer, 'datetime edit selected')
             # for i,v in enumerate(newtimelist2):
             #     valstr = v.strftime("%Y/%m/%d %H:%M:%S %f")
             #     # self.logger.info('valstring %s' % v.strftime("%Y/%m/%d %H:%M:%S.%f"))
@@ -922,8 +888,8 @@ class MilkMachine:
             for i,v in enumerate(SListDiff):
                 valstr = newtimelist2[i].strftime("%Y/%m/%d %H:%M:%S %f")
                 # self.logger.info('valstring %s' % v.strftime("%Y/%m/%d %H:%M:%S.%f"))
-                self.ActiveLayer.changeAttributeValue(v[0], self.fields['datetime'], valstr)
-            self.ActiveLayer.endEditCommand()
+                edit.changeAttributeValue(v[0], self.fields['datetime'], valstr)
+            edit.commit()
 
 
             # If the user wants to adjust the time beforehand by the chosen interval...
@@ -933,14 +899,14 @@ class MilkMachine:
             #         # get all of the FListDiff fids that are after sel_end_dt
             #         Fbefore = []
             #         for rec in FListDiff:
-            #             if rec[0] < selectList[0][0]:
+            #             if rec[0] < selectfids[0]:
             #                 Fbefore.append(rec)
             #
             #         Fbefore.reverse()
             #         newtimelist = [dt_start]
             #         for i,v in enumerate(Fbefore):
             #             ct = newtimelist[i]
-            #             newtimelist.append(ct - datetime.timedelta(microseconds = (mill_interval * v[2])))
+            #             newtimelist.append(ct - datetime.timedelta(microseconds = (mill_interval * v[1])))
             #         newtimelist.reverse()
             #         newtimelist.pop()
             #         newtimelist.reverse()
@@ -959,13 +925,13 @@ class MilkMachine:
             #         # get all of the FListDiff fids that are after sel_end_dt
             #         Fafter = []
             #         for rec in FListDiff:
-            #             if rec[0] > selectList[-1][0]:
+            #             if rec[0] > selectfids[-1]:
             #                 Fafter.append(rec)
             #
             #         newtimelist = [dt_end]
             #         for i,v in enumerate(Fafter):
             #             ct = newtimelist[i]
-            #             newtimelist.append(ct + datetime.timedelta(microseconds = (mill_interval * v[2])))
+            #             newtimelist.append(ct + datetime.timedelta(microseconds = (mill_interval * v[1])))
             #         newtimelist.reverse()
             #         newtimelist.pop() # remove last item
             #         newtimelist.reverse()
@@ -1073,18 +1039,17 @@ class MilkMachine:
             try:
                 if len(self.selectList) >= 1:
                     self.ActiveLayer.startEditing()
-                    self.ActiveLayer.beginEditCommand("Rendering Editing")
+                    edit = MMEdit.BatchEdit(self.ActiveLayer, "Rendering Editing")
                     for i,f in enumerate(self.selectList):
                         if self.dlg.ui.lineEdit_rendering_model_altitude.text() == 'altitude':
                             model['altitude'] = model_altitude[i]
-                            self.ActiveLayer.changeAttributeValue(f, self.fields['model'], str(model))
+                            edit.changeAttributeValue(f, self.fields['model'], MMCodec.encode('model', model))
                         else:
-                            self.ActiveLayer.changeAttributeValue(f, self.fields['model'], str(model))
-                    self.ActiveLayer.endEditCommand()
+                            edit.changeAttributeValue(f, self.fields['model'], MMCodec.encode('model', model))
+                    edit.commit()
                 else:
                     QMessageBox.warning( self.iface.mainWindow(),"Active Layer Warning", "Please select points in the active layer to be edited." )
             except:
-                self.ActiveLayer.destroyEditCommand()
                 self.logger.error('model_apply destroy edit session')
                 self.logger.exception(traceback.format_exc())
                 self.iface.messageBar().pushMessage("Error", "Failed to apply model style parameters. Please see error log at: {0}".format(self.loggerpath), level=QgsMessageBar.CRITICAL, duration=5)
@@ -1227,17 +1192,14 @@ class MilkMachine:
 
 
             try:
-                self.ActiveLayer.beginEditCommand("Rendering Editing")
                 if len(self.selectList) >= 1:
-                    self.ActiveLayer.beginEditCommand("Rendering Editing")
+                    edit = MMEdit.BatchEdit(self.ActiveLayer, "Rendering Editing")
                     for f in self.selectList:
-                        self.ActiveLayer.changeAttributeValue(f, self.fields['iconstyle'], str(icon))
-                    self.ActiveLayer.updateFields()
-                    self.ActiveLayer.endEditCommand()
+                        edit.changeAttributeValue(f, self.fields['iconstyle'], MMCodec.encode('iconstyle', icon))
+                    edit.commit()
                 else:
                     QMessageBox.warning( self.iface.mainWindow(),"Active Layer Warning", "Please select points in the active layer to be edited." )
             except:
-                self.ActiveLayer.destroyEditCommand()
                 self.logger.error('icon_apply destroy edit session')
                 self.logger.exception(traceback.format_exc())
                 self.iface.messageBar().pushMessage("Error", "Failed to apply icon style parameters. Please see error log at: {0}".format(self.loggerpath), level=QgsMessageBar.CRITICAL, duration=5)
@@ -1273,17 +1235,14 @@ class MilkMachine:
                 self.selectList.append(f.id())  #[u'689',u'2014-06-06 13:30:54']  #[u'2014/06/06 10:30:10', u'Time:10:30:10, Latitude: 39.966531, Longitude: -75.172003, Speed: 3.382047, Altitude: 1.596764']
 
             try:
-                self.ActiveLayer.beginEditCommand("Rendering Editing")
                 if len(self.selectList) >= 1:
-                    self.ActiveLayer.beginEditCommand("Rendering Editing")
+                    edit = MMEdit.BatchEdit(self.ActiveLayer, "Rendering Editing")
                     for f in self.selectList:
-                        self.ActiveLayer.changeAttributeValue(f, self.fields['labelstyle'], str(label))
-                    self.ActiveLayer.updateFields()
-                    self.ActiveLayer.endEditCommand()
+                        edit.changeAttributeValue(f, self.fields['labelstyle'], MMCodec.encode('labelstyle', label))
+                    edit.commit()
                 else:
                     QMessageBox.warning( self.iface.mainWindow(),"Active Layer Warning", "Please select points in the active layer to be edited." )
             except:
-                self.ActiveLayer.destroyEditCommand()
                 self.logger.error('label_apply destroy edit session')
                 self.logger.exception(traceback.format_exc())
                 self.iface.messageBar().pushMessage("Error", "Failed to apply label style parameters. Please see error log at: {0}".format(self.loggerpath), level=QgsMessageBar.CRITICAL, duration=5)
@@ -1309,31 +1268,31 @@ class MilkMachine:
         try:
 
             if self.selectedCamera:
-                if self.selectedCamera['e']:
-                    self.dlg.ui.lineEdit_visualization_follow_altitude.setText(str(self.selectedCamera['e']))
-                if self.selectedCamera['f']:
+                if self.selectedCamera['altitude']:
+                    self.dlg.ui.lineEdit_visualization_follow_altitude.setText(str(self.selectedCamera['altitude']))
+                if self.selectedCamera['altitudemode']:
                     altitudemode = [None, 'absolute', 'clampToGround', 'relativeToGround', 'relativeToModel']
                     c = 0
                     for alt in altitudemode:
-                        if self.selectedCamera['f'] == alt:
+                        if self.selectedCamera['altitudemode'] == alt:
                             self.dlg.ui.comboBox_follow_altitudemode.setCurrentIndex(c)
                         c += 1
-                if self.selectedCamera['g']:
+                if self.selectedCamera['gxaltitudemode']:
                     gxaltitudemode = [None, 'clampToSeaFloor', 'relativeToSeaFloor']
                     c = 0
                     for alt in gxaltitudemode:
-                        if self.selectedCamera['g'] == alt:
+                        if self.selectedCamera['gxaltitudemode'] == alt:
                             self.dlg.ui.comboBox_follow_gxaltitudemode.setCurrentIndex(c)
                         c += 1
 
-                if self.selectedCamera['h']:
-                    self.dlg.ui.lineEdit__visualization_follow_gxhoriz.setText(str(self.selectedCamera['h']))
-                if self.selectedCamera['k']:
-                    self.dlg.ui.lineEdit__visualization_follow_tilt.setText(str(self.selectedCamera['k']))
-                if self.selectedCamera['l']:
-                    self.dlg.ui.lineEdit__visualization_follow_range.setText(str(self.selectedCamera['l']))
-                if self.selectedCamera['m']:
-                    self.dlg.ui.lineEdit__visualization_follow_follow_angle.setText(str(self.selectedCamera['m']))
+                if self.selectedCamera['gxhoriz']:
+                    self.dlg.ui.lineEdit__visualization_follow_gxhoriz.setText(str(self.selectedCamera['gxhoriz']))
+                if self.selectedCamera['tilt']:
+                    self.dlg.ui.lineEdit__visualization_follow_tilt.setText(str(self.selectedCamera['tilt']))
+                if self.selectedCamera['range']:
+                    self.dlg.ui.lineEdit__visualization_follow_range.setText(str(self.selectedCamera['range']))
+                if self.selectedCamera['follow_angle']:
+                    self.dlg.ui.lineEdit__visualization_follow_follow_angle.setText(str(self.selectedCamera['follow_angle']))
                 self.iface.messageBar().pushMessage("Success", "Applied the camera settings to the follow tab fields", level=QgsMessageBar.INFO, duration=5)
 
         except:
@@ -1349,39 +1308,39 @@ class MilkMachine:
         try:
 
             if self.selectedCamera:
-                if self.selectedCamera['a']:
-                    self.dlg.ui.lineEdit_visualization_camera_longitude.setText(str(self.selectedCamera['a']))
-                if self.selectedCamera['b']:
-                    self.dlg.ui.lineEdit_visualization_camera_longitude_off.setText(str(self.selectedCamera['b']))
-                if self.selectedCamera['c']:
-                    self.dlg.ui.lineEdit_visualization_camera_latitude.setText(str(self.selectedCamera['c']))
-                if self.selectedCamera['d']:
-                    self.dlg.ui.lineEdit_visualization_camera_latitude_off.setText(str(self.selectedCamera['d']))
-                if self.selectedCamera['e']:
-                    self.dlg.ui.lineEdit_visualization_camera_altitude.setText(str(self.selectedCamera['e']))
-                if self.selectedCamera['f']:
+                if self.selectedCamera['longitude']:
+                    self.dlg.ui.lineEdit_visualization_camera_longitude.setText(str(self.selectedCamera['longitude']))
+                if self.selectedCamera['longitude_off']:
+                    self.dlg.ui.lineEdit_visualization_camera_longitude_off.setText(str(self.selectedCamera['longitude_off']))
+                if self.selectedCamera['latitude']:
+                    self.dlg.ui.lineEdit_visualization_camera_latitude.setText(str(self.selectedCamera['latitude']))
+                if self.selectedCamera['latitude_off']:
+                    self.dlg.ui.lineEdit_visualization_camera_latitude_off.setText(str(self.selectedCamera['latitude_off']))
+                if self.selectedCamera['altitude']:
+                    self.dlg.ui.lineEdit_visualization_camera_altitude.setText(str(self.selectedCamera['altitude']))
+                if self.selectedCamera['altitudemode']:
                     altitudemode = [None, 'absolute', 'clampToGround', 'relativeToGround', 'relativeToModel']
                     c = 0
                     for alt in altitudemode:
-                        if self.selectedCamera['f'] == alt:
+                        if self.selectedCamera['altitudemode'] == alt:
                             self.dlg.ui.comboBox_altitudemode.setCurrentIndex(c)
                         c += 1
-                if self.selectedCamera['g']:
+                if self.selectedCamera['gxaltitudemode']:
                     gxaltitudemode = [None, 'clampToSeaFloor', 'relativeToSeaFloor']
                     c = 0
                     for alt in gxaltitudemode:
-                        if self.selectedCamera['g'] == alt:
+                        if self.selectedCamera['gxaltitudemode'] == alt:
                             self.dlg.ui.comboBox_gxaltitudemode.setCurrentIndex(c)
                         c += 1
 
-                if self.selectedCamera['h']:
-                    self.dlg.ui.lineEdit__visualization_camera_gxhoriz.setText(str(self.selectedCamera['h']))
-                if self.selectedCamera['i']:
-                    self.dlg.ui.lineEdit__visualization_camera_heading.setText(str(self.selectedCamera['i']))
-                if self.selectedCamera['j']:
-                    self.dlg.ui.lineEdit__visualization_camera_roll.setText(str(self.selectedCamera['j']))
-                if self.selectedCamera['k']:
-                    self.dlg.ui.lineEdit__visualization_camera_tilt.setText(str(self.selectedCamera['k']))
+                if self.selectedCamera['gxhoriz']:
+                    self.dlg.ui.lineEdit__visualization_camera_gxhoriz.setText(str(self.selectedCamera['gxhoriz']))
+                if self.selectedCamera['heading']:
+                    self.dlg.ui.lineEdit__visualization_camera_heading.setText(str(self.selectedCamera['heading']))
+                if self.selectedCamera['roll']:
+                    self.dlg.ui.lineEdit__visualization_camera_roll.setText(str(self.selectedCamera['roll']))
+                if self.selectedCamera['tilt']:
+                    self.dlg.ui.lineEdit__visualization_camera_tilt.setText(str(self.selectedCamera['tilt']))
 
                 self.iface.messageBar().pushMessage("Success", "Applied the camera settings to the custom tab fields", level=QgsMessageBar.INFO, duration=5)
 
@@ -1409,31 +1368,30 @@ class MilkMachine:
 
 
 
-            allfeats1 = self.ActiveLayer.getFeatures()
+            # one pass over the attributes, the geometries are not needed
+            allfeats1 = self.ActiveLayer.getFeatures(QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry))
 
             featlist = []
             for feat1 in allfeats1:
                 featlist.append([feat1.attributes(),feat1.id()])
-            allfeats = self.ActiveLayer.getFeatures()
+            edit = MMEdit.BatchEdit(self.ActiveLayer, 'Tour Symbolization')
             cnt = 0; cntatt = 0;
-            for feat in allfeats:
+            for currentatt, featid in featlist:
                 if cnt > 0:
-                    currentatt = feat.attributes(); lastatt = featlist[cnt-1][0]
+                    lastatt = featlist[cnt-1][0]
                     if currentatt:
                         if currentatt[self.fields['flyto']] and currentatt[self.fields['camera']]:
                             #self.logger.info('here@@@@@@ {0}, {1}'.format(currentatt[self.fields['flyto']],currentatt[self.fields['camera']]))
-                            flytodict = eval(currentatt[self.fields['flyto']])
-                            cameradict = eval(currentatt[self.fields['camera']])
-                            flytodict.pop('a',None);flytodict.pop('b',None);flytodict.pop('c',None);flytodict.pop('d',None);
-                            cameradict.pop('a',None);cameradict.pop('b',None);cameradict.pop('c',None);cameradict.pop('d',None);cameradict.pop('i',None);
+                            flytodict = MMCodec.decode('flyto', currentatt[self.fields['flyto']])
+                            cameradict = MMCodec.decode('camera', currentatt[self.fields['camera']])
+                            cameradict.pop('longitude',None);cameradict.pop('longitude_off',None);cameradict.pop('latitude',None);cameradict.pop('latitude_off',None);cameradict.pop('heading',None);
                             # not look at the last row
                             if lastatt:
 
                                 if lastatt[self.fields['flyto']] and lastatt[self.fields['camera']]:
-                                    flytodict2 = eval(lastatt[self.fields['flyto']])
-                                    cameradict2 = eval(lastatt[self.fields['camera']])
-                                    flytodict2.pop('a',None);flytodict2.pop('b',None);flytodict2.pop('c',None);flytodict2.pop('d',None);
-                                    cameradict2.pop('a',None);cameradict2.pop('b',None);cameradict2.pop('c',None);cameradict2.pop('d',None);cameradict2.pop('i',None);
+                                    flytodict2 = MMCodec.decode('flyto', lastatt[self.fields['flyto']])
+                                    cameradict2 = MMCodec.decode('camera', lastatt[self.fields['camera']])
+                                    cameradict2.pop('longitude',None);cameradict2.pop('longitude_off',None);cameradict2.pop('latitude',None);cameradict2.pop('latitude_off',None);cameradict2.pop('heading',None);
                                     if cmp(cameradict,cameradict2) == 0: # they are the same
                                         pass
                                     else:
@@ -1442,8 +1400,9 @@ class MilkMachine:
                             if flytodict and cameradict:
                                 name = flytodict['name'] + "_" + str(cntatt)
                                 if name:
-                                    self.ActiveLayer.changeAttributeValue(feat.id(), self.fields['symbtour'], str(name))
+                                    edit.changeAttributeValue(featid, self.fields['symbtour'], str(name))
                 cnt += 1
+            edit.commit()
 
             self.iface.messageBar().pushMessage("Success", "Applied tour name to the 'symbcamera' field. Use these categories for symbolization.", level=QgsMessageBar.INFO, duration=5)
         except:
@@ -1463,8 +1422,6 @@ class MilkMachine:
             # make a dictionary of all of the camera parameters
             flyto = {'name': None, 'flyToMode': None, 'duration': None}
             lookat = {'longitude': None, 'latitude': None, 'altitude' : None, 'altitudemode': None,'gxaltitudemode' : None,'heading' : None,'tilt' : None, 'range': None, 'duration': None, 'startheading': None, 'rotations': None, 'direction': None, 'streetview': None}
-            lookatAlpha = {'longitude': 'a', 'latitude': 'b', 'altitude' : 'c', 'altitudemode': 'd','gxaltitudemode' : 'e','heading' : 'f','tilt' : 'g', 'range': 'h', 'duration': 'i', 'startheading': 'j', 'rotations': 'k', 'direction': 'l', 'streetview': 'm'}
-            lookattemp = {}
 
             flyto['name'] = self.dlg.ui.lineEdit_tourname.text()
             flyto['flyToMode'] = self.dlg.ui.comboBox_flyto_mode.currentText()
@@ -1492,7 +1449,7 @@ class MilkMachine:
                 for f in self.ActiveLayer.selectedFeatures():          #getFeatures():
                     geom = f.geometry()
                     if lookat['altitudemode'] == 'relativeToModel':
-                        modelfield = eval(f.attributes()[self.fields['model']])
+                        modelfield = MMCodec.decode('model', f.attributes()[self.fields['model']])
                         if not lookat['altitude']:
                             alt = 0
                         else:
@@ -1511,23 +1468,17 @@ class MilkMachine:
                 self.iface.messageBar().pushMessage("Error", "Failed to apply lookat view parameters for Follow Tour. Please see error log at: {0}".format(self.loggerpath), level=QgsMessageBar.CRITICAL, duration=5)
 
             try:
-                self.ActiveLayer.beginEditCommand("LookAt Editing")
                 if len(self.selectList) >= 1:
-                    self.ActiveLayer.beginEditCommand("LookAt Editing")
+                    edit = MMEdit.BatchEdit(self.ActiveLayer, "LookAt Editing")
                     for i,f in enumerate(self.selectList):
                         if len(f) == 3:
                             lookat['altitude'] = f[2]
                         lookat['longitude'] = f[1][0]; lookat['latitude'] = f[1][1]
-                        for key,value in lookat.iteritems():
-                            lookattemp[lookatAlpha[key]] = value
-                        self.ActiveLayer.changeAttributeValue(f[0], self.fields['lookat'], str(lookattemp))
-                        self.ActiveLayer.changeAttributeValue(f[0], self.fields['flyto'], str(flyto))
-                        self.ActiveLayer.changeAttributeValue(f[0], self.fields['camera'], '')
-                    self.ActiveLayer.endEditCommand()
+                        edit.changeAttributeValues(f[0], {self.fields['lookat']: MMCodec.encode('lookat', lookat), self.fields['flyto']: MMCodec.encode('flyto', flyto), self.fields['camera']: ''})
+                    edit.commit()
                 else:
                     QMessageBox.warning( self.iface.mainWindow(),"Active Layer Warning", "Please select points in the active layer to be edited." )
             except:
-                self.ActiveLayer.destroyEditCommand()
                 self.logger.error('lookat_apply destroy edit session')
                 self.logger.exception(traceback.format_exc())
                 self.iface.messageBar().pushMessage("Error", "Failed to apply lookat view parameters. Please see error log at: {0}".format(self.loggerpath), level=QgsMessageBar.CRITICAL, duration=5)
@@ -1553,9 +1504,7 @@ class MilkMachine:
             # make a dictionary of all of the camera parameters
             flyto = {'name': None, 'flyToMode': None, 'duration': None}
             lookat = {'longitude': None, 'latitude': None, 'altitude' : None, 'altitudemode': None,'gxaltitudemode' : None,'heading' : None,'tilt' : None, 'range': None, 'duration': None, 'startheading': None, 'rotations': None, 'direction': None, 'streetview': None}
-            lookatAlpha = {'longitude': 'a', 'latitude': 'b', 'altitude' : 'c', 'altitudemode': 'd','gxaltitudemode' : 'e','heading' : 'f','tilt' : 'g', 'range': 'h', 'duration': 'i', 'startheading': 'j', 'rotations': 'k', 'direction': 'l', 'streetview': 'm'}
 
-            lookattemp = {}
 
             flyto['name'] = self.dlg.ui.lineEdit_tourname.text()
             flyto['flyToMode'] = self.dlg.ui.comboBox_flyto_mode.currentText()
@@ -1590,7 +1539,7 @@ class MilkMachine:
                     if clookat == 'circlearound':
                         conflict = (True, f.id())
                     if lookat['altitudemode'] == 'relativeToModel':
-                        modelfield = eval(f.attributes()[self.fields['model']])
+                        modelfield = MMCodec.decode('model', f.attributes()[self.fields['model']])
                         if not lookat['altitude']:
                             alt = 0
                         else:
@@ -1620,7 +1569,7 @@ class MilkMachine:
                 # find the indices of the last lookat flyto
                 self.cLayer = self.iface.mapCanvas().currentLayer()
                 AllList = []
-                allfeats = self.cLayer.getFeatures()
+                allfeats = self.cLayer.getFeatures(QgsFeatureRequest().setFlags(QgsFeatureRequest.NoGeometry))
                 for feat in allfeats:
                     cff = feat.attributes()[self.fields['lookat']]
                     AllList.append([feat.id(), cff])
@@ -1632,7 +1581,7 @@ class MilkMachine:
                 circleList = []
                 for ii,vv in enumerate(AllList):
                     if vv[1]:
-                        if vv[1][0] == '{' or vv[1] == 'circlearound':
+                        if MMCodec.isEncoded(vv[1]) or vv[1] == 'circlearound':
                             circleList.append(vv[0])
 
                 #self.logger.info('circleList {0}'.format(circleList))
@@ -1689,12 +1638,10 @@ class MilkMachine:
 
                 if ret == 0:
                     #erase the conflict
-                    self.ActiveLayer.beginEditCommand("LookAt Editing Remove Conflict")
+                    edit = MMEdit.BatchEdit(self.ActiveLayer, "LookAt Editing Remove Conflict")
                     for i,f in enumerate(BadOnes):
-                        self.ActiveLayer.changeAttributeValue(f, self.fields['flyto'], '')
-                        self.ActiveLayer.changeAttributeValue(f, self.fields['camera'], '')
-                        self.ActiveLayer.changeAttributeValue(f, self.fields['lookat'], '')
-                    self.ActiveLayer.endEditCommand()
+                        edit.changeAttributeValues(f, {self.fields['flyto']: '', self.fields['camera']: '', self.fields['lookat']: ''})
+                    edit.commit()
 
             else:
                 ret = 0
@@ -1702,28 +1649,20 @@ class MilkMachine:
             if ret == 0:
 
                 try:
-                    self.ActiveLayer.beginEditCommand("LookAt Editing")
                     if len(self.selectList) >= 1:
-                        self.ActiveLayer.beginEditCommand("LookAt Editing")
+                        edit = MMEdit.BatchEdit(self.ActiveLayer, "LookAt Editing")
                         for i,f in enumerate(self.selectList):
                             if i == 0:
                                 if len(f) == 3:
                                     lookat['altitude'] = f[2]
                                 lookat['longitude'] = BigXY[0]; lookat['latitude'] = BigXY[1]
-                                for key,value in lookat.iteritems():
-                                    lookattemp[lookatAlpha[key]] = value
-                                self.ActiveLayer.changeAttributeValue(f[0], self.fields['lookat'], str(lookattemp))
-                                self.ActiveLayer.changeAttributeValue(f[0], self.fields['flyto'], str(flyto))
-                                self.ActiveLayer.changeAttributeValue(f[0], self.fields['camera'], '')
+                                edit.changeAttributeValues(f[0], {self.fields['lookat']: MMCodec.encode('lookat', lookat), self.fields['flyto']: MMCodec.encode('flyto', flyto), self.fields['camera']: ''})
                             else: # clear out the opposing cameras and flyto's
-                                self.ActiveLayer.changeAttributeValue(f[0], self.fields['flyto'], '')
-                                self.ActiveLayer.changeAttributeValue(f[0], self.fields['camera'], '')
-                                self.ActiveLayer.changeAttributeValue(f[0], self.fields['lookat'], 'circlearound')
-                        self.ActiveLayer.endEditCommand()
+                                edit.changeAttributeValues(f[0], {self.fields['flyto']: '', self.fields['camera']: '', self.fields['lookat']: 'circlearound'})
+                        edit.commit()
                     else:
                         QMessageBox.warning( self.iface.mainWindow(),"Active Layer Warning", "Please select points in the active layer to be edited." )
                 except:
-                    self.ActiveLayer.destroyEditCommand()
                     self.logger.error('lookat_apply destroy edit session')
                     self.logger.exception(traceback.format_exc())
                     self.iface.messageBar().pushMessage("Error", "Failed to apply lookat view parameters. Please see error log at: {0}".format(self.loggerpath), level=QgsMessageBar.CRITICAL, duration=5)
@@ -1763,10 +1702,7 @@ class MilkMachine:
                 self.fields = self.field_indices(self.ActiveLayer)
                 # make a dictionary of all of the camera parameters
                 camera = {'longitude': None, 'longitude_off': None, 'latitude': None, 'latitude_off': None, 'altitude' : None, 'altitudemode': None,'gxaltitudemode' : None,'gxhoriz' : None,'heading' : None,'roll' : None,'tilt' : None, 'range': None, 'follow_angle': None, 'streetview': None, 'hoffset': None}
-                cameraAlpha = {'longitude': 'a', 'longitude_off': 'b', 'latitude': 'c', 'latitude_off': 'd', 'altitude' : 'e', 'altitudemode': 'f','gxaltitudemode' : 'g','gxhoriz' : 'h','heading' : 'i','roll' : 'j','tilt' : 'k', 'range': 'l', 'follow_angle': 'm', 'streetview': 'n', 'hoffset': 'o'}
-                cameraBack = {'a': 'longitude', 'b': 'longitude_off','c': 'latitude','d': 'latitude_off','e': 'altitude' ,'f': 'altitudemode', 'g': 'gxaltitudemode' ,'h': 'gxhoriz' ,'i': 'heading' ,'j': 'roll' ,'k': 'tilt' ,'l': 'range','m': 'follow_angle', 'n': 'streetview', 'o': 'hoffset'}
 
-                cameratemp = {}
                 flyto = {'name': None, 'flyToMode': None, 'duration': None}
 
 
@@ -1799,6 +1735,7 @@ class MilkMachine:
                 altitudelist = []
                 self.selectList = []  #[[id, (x,y), altitude]]
                 selectflyto = []
+                times = MMTime.layerTimes(self.ActiveLayer)
 
                 try:
                     for f in self.ActiveLayer.selectedFeatures():          #getFeatures():
@@ -1806,7 +1743,7 @@ class MilkMachine:
 
                         try:
                             if camera['altitudemode'] == 'relativeToModel':
-                                modelfield = eval(f.attributes()[self.fields['model']])
+                                modelfield = MMCodec.decode('model', f.attributes()[self.fields['model']])
                                 if not camera['altitude']:
                                     alt = 0
                                 else:
@@ -1821,10 +1758,7 @@ class MilkMachine:
                             QMessageBox.warning( self.iface.mainWindow(),"Follow Behind Error", "Models have not been added. Please add models ('Placemarks' tab), and try again." )
 
                         # get the time vector in order to calculate duration of the flyto
-                        currentatt = f.attributes()
-                        pointdate = currentatt[self.fields['datetime']].split(" ")[0]  #2014/06/06
-                        pointtime = currentatt[self.fields['datetime']].split(" ")[1]
-                        current_dt = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]))
+                        current_dt = times.datetime(f.id(), wholeSeconds=True)
                         selectflyto.append([f.id(), flyto, current_dt])  # [[fid, {'name', 'flytomode', 'duration'}, dt], ...]
 
                     # sort self.selectList by fid
@@ -1854,26 +1788,12 @@ class MilkMachine:
                     self.logger.exception(traceback.format_exc())
                     self.iface.messageBar().pushMessage("Error", "Failed to apply camera view parameters for Follow Tour. Please see error log at: {0}".format(self.loggerpath), level=QgsMessageBar.CRITICAL, duration=5)
 
-                headinglist = []
-                featurelen = len(self.selectList) - 1
-                forwardlen = featurelen - forward_int
-                #self.logger.info(self.selectList)
-                for i,v in enumerate(self.selectList):
-                    if i >= 0 and i <= forwardlen:
-                        forwardlist = []
-                        for ii in range(forward_int):
-                            forwardlist.append(TeatDip.compass_bearing((v[1][1],v[1][0]),(self.selectList[i+ii+1][1][1] ,self.selectList[i+ii+1][1][0])))
-                        #self.logger.info('list: {0}, mean: {1}'.format(forwardlist,TeatDip.mean_angle(forwardlist) ))
-                        headinglist.append((TeatDip.mean_angle(forwardlist)) % 360)
-                        #headinglist.append(TeatDip.compass_bearing((cordslist[i-1][1] , cordslist[i-1][0]), (v[1],v[0])) )
-                    else:
-                        headinglist.append(headinglist[i-1])
-                #self.logger.info('HEADINGLIST: {0}'.format(headinglist))
+                headinglist = MMFollow.followHeadings([v[1][0] for v in self.selectList], [v[1][1] for v in self.selectList], forward_int)
 
                 try:
                     if len(self.selectList) >= 1:
                         self.ActiveLayer.startEditing()
-                        self.ActiveLayer.beginEditCommand("Camera Editing")
+                        edit = MMEdit.BatchEdit(self.ActiveLayer, "Camera Editing")
                         for i,f in enumerate(self.selectList):   #[[id, (x,y), altitude]]
                             #self.logger.info('enum {0} {1}'.format(i,f))
                             if len(f) == 3:
@@ -1881,19 +1801,12 @@ class MilkMachine:
                             camera['heading'] = round(headinglist[i],1)
                             camera['longitude'] = f[1][0]; camera['latitude'] = f[1][1]
 
-                            #convert to cameratemp
-                            for key,value in camera.iteritems():
-                                cameratemp[cameraAlpha[key]] = value
-
-                            self.ActiveLayer.changeAttributeValue(f[0], self.fields['camera'], str(cameratemp))
-                            self.ActiveLayer.changeAttributeValue(f[0], self.fields['flyto'], str(flyto))
-                            # self.ActiveLayer.changeAttributeValue(f[0], self.fields['flyto'], str(newlistwithflyto[i]))
-                            self.ActiveLayer.changeAttributeValue(f[0], self.fields['lookat'], '') # get rid of lookats
-                        self.ActiveLayer.endEditCommand()
+                            # the lookat is emptied, a camera and a lookat conflict
+                            edit.changeAttributeValues(f[0], {self.fields['camera']: MMCodec.encode('camera', camera), self.fields['flyto']: MMCodec.encode('flyto', flyto), self.fields['lookat']: ''})
+                        edit.commit()
                     else:
                         QMessageBox.warning( self.iface.mainWindow(),"Active Layer Warning", "Please select points in the active layer to be edited." )
                 except:
-                    self.ActiveLayer.destroyEditCommand()
                     self.logger.error('follow_apply error.')
                     self.logger.exception(traceback.format_exc())
                     self.iface.messageBar().pushMessage("Error", "Failed to apply camera view parameters for Follow Tour. Please see error log at: {0}".format(self.loggerpath), level=QgsMessageBar.CRITICAL, duration=5)
@@ -1936,8 +1849,15 @@ class MilkMachine:
                     self.dlg.ui.checkBox_filtering_edit.setEnabled(True)
                     self.dlg.ui.checkBox_time_edit.setEnabled(True)
                     # export
-                    if self.ActiveLayer.storageType() == 'ESRI Shapefile' and self.ActiveLayer.geometryType() == 0:
+                    if self.ActiveLayer.storageType() in ('ESRI Shapefile', 'GPKG') and self.ActiveLayer.geometryType() == 0:
                         self.dlg.ui.lineEdit_export_audio.setEnabled(True)
+                        self.dlg.ui.label_72.setEnabled(True)
+                        self.dlg.ui.doubleSpinBox_export_simplify.setEnabled(True)
+                        self.dlg.ui.checkBox_export_gxtrack.setEnabled(True)
+                        self.dlg.ui.label_73.setEnabled(True)
+                        self.dlg.ui.doubleSpinBox_export_flyto_min.setEnabled(True)
+                        self.dlg.ui.doubleSpinBox_export_flyto_max.setEnabled(True)
+                        self.dlg.ui.doubleSpinBox_export_flyto_gap.setEnabled(True)
                         if self.dlg.ui.lineEdit_InAudio1.text():
                             self.dlg.ui.lineEdit_export_audio.setText(self.dlg.ui.lineEdit_InAudio1.text())
                         else:
@@ -1949,6 +1869,13 @@ class MilkMachine:
                         #self.dlg.ui.pushButton_google_earth.setEnabled(True)
                     else:
                         self.dlg.ui.lineEdit_export_audio.setEnabled(False)
+                        self.dlg.ui.label_72.setEnabled(False)
+                        self.dlg.ui.doubleSpinBox_export_simplify.setEnabled(False)
+                        self.dlg.ui.checkBox_export_gxtrack.setEnabled(False)
+                        self.dlg.ui.label_73.setEnabled(False)
+                        self.dlg.ui.doubleSpinBox_export_flyto_min.setEnabled(False)
+                        self.dlg.ui.doubleSpinBox_export_flyto_max.setEnabled(False)
+                        self.dlg.ui.doubleSpinBox_export_flyto_gap.setEnabled(False)
                         self.dlg.ui.pushButton_export_audio_file.setEnabled(False)
                         self.dlg.ui.buttonExportTrack.setEnabled(False)
                         self.dlg.ui.pushButton_TrackInfo.setEnabled(False)
@@ -1956,6 +1883,13 @@ class MilkMachine:
                         self.dlg.ui.pushButton_sync.setEnabled(False)
                 else:
                     self.dlg.ui.lineEdit_export_audio.setEnabled(False)
+                    self.dlg.ui.label_72.setEnabled(False)
+                    self.dlg.ui.doubleSpinBox_export_simplify.setEnabled(False)
+                    self.dlg.ui.checkBox_export_gxtrack.setEnabled(False)
+                    self.dlg.ui.label_73.setEnabled(False)
+                    self.dlg.ui.doubleSpinBox_export_flyto_min.setEnabled(False)
+                    self.dlg.ui.doubleSpinBox_export_flyto_max.setEnabled(False)
+                    self.dlg.ui.doubleSpinBox_export_flyto_gap.setEnabled(False)
                     self.dlg.ui.pushButton_export_audio_file.setEnabled(False)
                     self.dlg.ui.buttonExportTrack.setEnabled(False)
                     self.dlg.ui.pushButton_TrackInfo.setEnabled(False)
@@ -2011,6 +1945,13 @@ class MilkMachine:
 
                 #export
                 self.dlg.ui.lineEdit_export_audio.setEnabled(False)
+                self.dlg.ui.label_72.setEnabled(False)
+                self.dlg.ui.doubleSpinBox_export_simplify.setEnabled(False)
+                self.dlg.ui.checkBox_export_gxtrack.setEnabled(False)
+                self.dlg.ui.label_73.setEnabled(False)
+                self.dlg.ui.doubleSpinBox_export_flyto_min.setEnabled(False)
+                self.dlg.ui.doubleSpinBox_export_flyto_max.setEnabled(False)
+                self.dlg.ui.doubleSpinBox_export_flyto_gap.setEnabled(False)
                 self.dlg.ui.pushButton_export_audio_file.setEnabled(False)
                 self.dlg.ui.buttonExportTrack.setEnabled(False)
                 self.dlg.ui.pushButton_TrackInfo.setEnabled(False)
@@ -2189,9 +2130,7 @@ class MilkMachine:
             # make a dictionary of all of the camera parameters
             flyto = {'name': None, 'flyToMode': None, 'duration': None}
             camera = {'longitude': None, 'longitude_off': None, 'latitude': None, 'latitude_off': None, 'altitude' : None, 'altitudemode': None,'gxaltitudemode' : None,'gxhoriz' : None,'heading' : None,'roll' : None,'tilt' : None, 'range': None, 'follow_angle': None, 'streetview': None, 'hoffset': None}
-            cameraAlpha = {'longitude': 'a', 'longitude_off': 'b', 'latitude': 'c', 'latitude_off': 'd', 'altitude' : 'e', 'altitudemode': 'f','gxaltitudemode' : 'g','gxhoriz' : 'h','heading' : 'i','roll' : 'j','tilt' : 'k', 'range': 'l', 'follow_angle': 'm', 'streetview': 'n', 'hoffset': 'o'}
 
-            cameratemp = {}
 
             flyto['name'] = self.dlg.ui.lineEdit_tourname.text()
             flyto['flyToMode'] = self.dlg.ui.comboBox_flyto_mode.currentText()
@@ -2221,23 +2160,15 @@ class MilkMachine:
                 self.selectList.append(f.id())  #[u'689',u'2014-06-06 13:30:54']  #[u'2014/06/06 10:30:10', u'Time:10:30:10, Latitude: 39.966531, Longitude: -75.172003, Speed: 3.382047, Altitude: 1.596764']
 
             try:
-                self.ActiveLayer.beginEditCommand("Camera Editing")
                 if len(self.selectList) >= 1:
-                    self.ActiveLayer.beginEditCommand("Camera Editing")
+                    edit = MMEdit.BatchEdit(self.ActiveLayer, "Camera Editing")
                     for f in self.selectList:
-                        #convert to cameratemp
-                        for key,value in camera.iteritems():
-                            cameratemp[cameraAlpha[key]] = value
-
-                        self.ActiveLayer.changeAttributeValue(f, self.fields['camera'], str(cameratemp))
-                        self.ActiveLayer.changeAttributeValue(f, self.fields['flyto'], str(flyto))
-                        self.ActiveLayer.changeAttributeValue(f, self.fields['lookat'], '') # get rid of lookats
-                    #self.ActiveLayer.updateFields()
-                    self.ActiveLayer.endEditCommand()
+                        # the lookat is emptied, a camera and a lookat conflict
+                        edit.changeAttributeValues(f, {self.fields['camera']: MMCodec.encode('camera', camera), self.fields['flyto']: MMCodec.encode('flyto', flyto), self.fields['lookat']: ''})
+                    edit.commit()
                 else:
                     QMessageBox.warning( self.iface.mainWindow(),"Active Layer Warning", "Please select points in the active layer to be edited." )
             except:
-                self.ActiveLayer.destroyEditCommand()
                 self.logger.error('camera_apply destroy edit session')
                 self.logger.exception(traceback.format_exc())
                 self.iface.messageBar().pushMessage("Error", "Failed to apply camera view parameters. Please see error log at: {0}".format(self.loggerpath), level=QgsMessageBar.CRITICAL, duration=5)
@@ -2261,14 +2192,14 @@ class MilkMachine:
 
 
     def browseOpen(self):
-        self.gpsfile = QFileDialog.getOpenFileName(None, "Import Raw GPS File", self.lastdirectory, "(*.kml *.csv)")  #C:\Users\Edward\Documents\Philly250\Scratch
+        self.gpsfile = QFileDialog.getOpenFileName(None, "Import Raw GPS File", self.lastdirectory, "(*.kml *.csv *.gpx)")  #C:\Users\Edward\Documents\Philly250\Scratch
         if self.gpsfile:
             self.lastdirectory = os.path.dirname(self.gpsfile)
 
         try:
             if self.gpsfile:
                 ftype = self.gpsfile.split(".")[-1].lower()
-                if ftype == 'kml':
+                if ftype in ('kml', 'gpx'):
                     #gpx = TeatDip.mmGPX(self.gpsfile)  # make the gpx class object
                     #gpx.tokml()  # convert the gpx to kml
                     self.dlg.ui.lineEdit_ImportGPS.setText(self.gpsfile) # set the text in the lineedit to the kml path
@@ -2276,7 +2207,7 @@ class MilkMachine:
                     #gpx.toGeoJSON()
                     self.dlg.ui.buttonDrawTrack.setEnabled(True)
                     self.dlg.ui.checkBox_headoftrack.setEnabled(True)
-                    self.iface.messageBar().pushMessage("Success", "kml file imported into Milk Machine: {0}".format(self.gpsfile), level=QgsMessageBar.INFO, duration=5)
+                    self.iface.messageBar().pushMessage("Success", "{0} file imported into Milk Machine: {1}".format(ftype, self.gpsfile), level=QgsMessageBar.INFO, duration=5)
                 if ftype == 'csv':
                     self.dlg.ui.lineEdit_ImportGPS.setText(self.gpsfile) # set the text in the lineedit to the kml path
                     self.dlg.ui.lineEdit_ImportGPS.setText(self.gpsfile)
@@ -2306,80 +2237,23 @@ class MilkMachine:
                         messageBar=self.iface.messageBar(),
                         messageBox=QMessageBox
                     )
+                    if shaper:
+                        self.simplifyImport(shaper)
                     QgsMapLayerRegistry.instance().addMapLayer(shaper)
-                if ftype == 'kml':
+                if ftype in ('kml', 'gpx'):
 
                     self.dlg.ui.lineEdit_ImportGPS.setText("")  # clear the text of the input
 
-                    # make a qgs layer out of the kml, in memory. Then save it as a shapefile. The name of the shapefile will be the same as the kml
                     layername = self.gpsfile.split(".")[0].split('/')[-1]
-                    kmllayer = QgsVectorLayer(self.gpsfile, layername, "ogr")
-                    # save the kml layer as
-                    shapepath = self.gpsfile.split(".")[0] + '.shp'
-                    shapepath_line = self.gpsfile.split(".")[0] + '_line.shp'
-                    shapepath_dup = self.gpsfile.split(".")[0] + '_duplicate.shp'
-
-                    QgsVectorFileWriter.writeAsVectorFormat(kmllayer, shapepath, "utf-8", None, "ESRI Shapefile")  # working copy
-                    QgsVectorFileWriter.writeAsVectorFormat(kmllayer, shapepath_dup, "utf-8", None, "ESRI Shapefile")  # duplicate of original
-                    #bring the shapefile back in, and render it on the map
-                    shaper = QgsVectorLayer(shapepath, layername, "ogr")
-                    shaper.dataProvider().addAttributes( [QgsField("datetime",QVariant.String), QgsField("audio",QVariant.String), QgsField("camera",QVariant.String), QgsField("flyto",QVariant.String), QgsField("iconstyle", QVariant.String), QgsField("labelstyle", QVariant.String), QgsField("model", QVariant.String), QgsField("lookat", QVariant.String) , QgsField("symbtour", QVariant.String), QgsField("altitude",QVariant.Double)])
-                    shaper.updateFields()
+                    if ftype == 'kml':
+                        shaper = MMImport.loadKMLLayer(self.gpsfile, self.logger)
+                    else:
+                        shaper = MMImport.loadGPXLayer(self.gpsfile, self.logger)
+                    self.simplifyImport(shaper)  # before the line is drawn through the points
                     self.fields = self.field_indices(shaper)
-                    # calculate the datetime field
-                    idx = self.fields['datetime']  #feature.attributes()[idx]
-                    fid_dt = []
-                    model_altitude = []
-                    cc = 0
-                    for f in shaper.getFeatures():
-                        currentatt = f.attributes()[0]  # this should be self.fields['Name']
-                        pointdate = currentatt.split(" ")[0]  #2014/06/06
-                        pointtime = currentatt.split(" ")[1]
-                        # format for microseconds
-                        sec_pieces = pointtime.split(':')[2].split('.')
-                        if len(sec_pieces) == 1:
-                            microsec = 0
-                        elif len(sec_pieces) == 2:
-                            microsec = int(float('0.' + sec_pieces[1]) * 1000000)
-
-
-                        current_dt = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]), microsec)
-                        fid_dt.append(current_dt.strftime("%Y/%m/%d %H:%M:%S %f"))
-                        try:
-                            model_altitude.append([f.id(), round(float(f.attributes()[self.fields['descriptio']].split(",")[4].split(': ')[1]),2) ])
-                        except:
-                            try:
-                                model_altitude.append([f.id(), round(float(f.attributes()[self.fields['Descriptio']].split(",")[4].split(': ')[1]),2)])
-                            except:
-                                model_altitude.append([f.id(),None])
-
-                        cc += 1
 
-                    shaper.startEditing()
-                    shaper.beginEditCommand('datetime')
-                    for i,v in enumerate(fid_dt):
-                        shaper.changeAttributeValue(i, idx, v)
-                    shaper.endEditCommand()
-                    shaper.commitChanges()
-
-                    shaper.startEditing()
-                    shaper.beginEditCommand('altitude')
-                    for i,v in enumerate(model_altitude):
-                        shaper.changeAttributeValue(v[0], self.fields['altitude'], v[1])
-                    shaper.endEditCommand()
-                    shaper.commitChanges()
-
-                    # make the line shapefile
-                    ptlist = []
-                    for f in shaper.getFeatures():
-                        ptlist.append(f.geometry().asPoint())
-                    linelayer = QgsVectorLayer("LineString?crs=EPSG:4326", layername, "memory")
-                    pr = linelayer.dataProvider()
-                    seg = QgsFeature()
-                    seg.setGeometry(QgsGeometry.fromPolyline(ptlist))
-                    pr.addFeatures([seg])
-                    QgsVectorFileWriter.writeAsVectorFormat(linelayer, shapepath_line, "utf-8", None, "ESRI Shapefile")
-                    shaper_line = QgsVectorLayer(shapepath_line, layername, "ogr")
+                    # make the line layer
+                    shaper_line = MMImport.writeLineCopy(shaper, self.gpsfile.split(".")[0] + '_line')
 
                     # define the layer properties as a dict
                     properties = {'size': '3.0'}
@@ -2399,15 +2273,8 @@ class MilkMachine:
                     self.gpsfile = None
 
                     if self.dlg.ui.checkBox_headoftrack.isChecked(): # draw the head of track
-                        headof = {}
-                        cc = 0
-                        for f in shaper.getFeatures():
-                            if cc == 0:
-                                geom = f.geometry()
-                                if geom.type() == QGis.Point:
-                                    headof['coordinates'] = geom.asPoint()
-                            cc += 1
-                            break
+                        track = MMCache.layerTrack(shaper)
+                        headof = {'coordinates': (float(track['lon'][0]), float(track['lat'][0]))}
 
                         # create layer
                         lname = layername + '_head'
@@ -2447,6 +2314,13 @@ class MilkMachine:
             self.iface.messageBar().pushMessage("Error", "Failed to draw track. Please see error log at: {0}".format(self.loggerpath), level=QgsMessageBar.CRITICAL, duration=5)
 
 
+    def simplifyImport(self, layer):
+        # drop the points within the import tolerance of the simplified track
+        tolerance = self.dlg.ui.doubleSpinBox_import_simplify.value()
+        if tolerance > 0:
+            dropped = MMSimplify.simplifyLayer(layer, tolerance)
+            self.logger.info('simplifyImport: {0} points within {1} m dropped from {2}'.format(dropped, tolerance, layer.name()))
+
     def browseOpenAudio(self):
         self.audiopath = QFileDialog.getOpenFileName(None, "Import Audio File",self.lastdirectory, "(*.wav *.mp3)")
         if self.audiopath:
@@ -2549,7 +2423,7 @@ class MilkMachine:
                     # Point ID
                     pointid += 1
                     self.lcd1_P.display(str(pointid))
-                    self.cLayer.setSelectedFeatures([pointid])
+                    self.cLayer.setSelectedFeatures([AllList[min(pointid, len(AllList) - 1)][0]])
 
                     if self.dlg.ui.checkBox_import_indicator.isChecked():
                         features = self.cLayer.selectedFeatures()
@@ -2574,7 +2448,7 @@ class MilkMachine:
                     # Point ID
                     pointid += 1
                     self.lcd1_P.display(str(pointid))
-                    self.cLayer.setSelectedFeatures([pointid])
+                    self.cLayer.setSelectedFeatures([AllList[min(pointid, len(AllList) - 1)][0]])
 
                     if self.dlg.ui.checkBox_import_indicator.isChecked():
                         features = self.cLayer.selectedFeatures()
@@ -2630,19 +2504,9 @@ class MilkMachine:
                 self.fields = self.field_indices(self.cLayer)
                 selectList = []
 
-                # get all the features and make a list of [[fid, datetime]]
-                AllList = []
-                allfeats = self.cLayer.getFeatures()
-                for feat in allfeats:
-                    currentatt = feat.attributes()
-                    pointdate = currentatt[self.fields['datetime']].split(" ")[0]  #2014/06/06
-                    pointtime = currentatt[self.fields['datetime']].split(" ")[1]
-                    current_dt = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]))
-                    AllList.append([feat.id(), current_dt])
-                # sort self.selectList by fid
-                def getKey(item):
-                    return item[0]
-                AllList = sorted(AllList, key=getKey)
+                # get all the features and make a list of [[fid, datetime]], sorted by fid
+                times = MMTime.layerTimes(self.cLayer)
+                AllList = [list(v) for v in zip(times.fids.tolist(), times.datetimes(wholeSeconds=True))]
 
                 try:
                     features = self.cLayer.selectedFeatures()
@@ -2653,14 +2517,13 @@ class MilkMachine:
                     QMessageBox.warning( self.iface.mainWindow(),"Selected Layer Warning", "Please select the layer and starting point where you would like the audio to start." )
 
                 if len(selectList) == 1:
-                    pointid = fid
-                    pointdate = selectList[0][self.fields['datetime']].split(" ")[0]  #2014/06/06
-                    pointtime = selectList[0][self.fields['datetime']].split(" ")[1]  #10:30:10
+                    # the row of the point in AllList, the fids of a GeoPackage start at 1
+                    pointid = int(times.rows([fid])[0])
 
                     # global date and time for the selected point
-                    ClockDateTime = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]))
+                    ClockDateTime = times.datetime(fid, wholeSeconds=True)
                     # local date and time for the selected point
-                    selected_dt = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]))
+                    selected_dt = times.datetime(fid, wholeSeconds=True)
 
                     # Start the video using VLC Media player. Start the video at the specified time
                     # in the video file...
@@ -2816,84 +2679,44 @@ class MilkMachine:
                 else:
 
                     self.fields = self.field_indices(self.aLayer)
+                    # the points and times from the track cache, compared to the audio in whole seconds
+                    track = MMCache.layerTrack(self.aLayer)
+                    seconds = track['epoch'] - track['epoch'] % 1000000
+                    audio_start = np.datetime64(self.audio_start, 'us').astype(np.int64)
+                    audio_end = np.datetime64(self.audio_end, 'us').astype(np.int64)
                     matchdict = {}
                     matchdict_end = {}
-                    cc = 0
                     try:
-                        for f in self.aLayer.getFeatures(): #  QgsFeatureIterator #[u'2014/06/06 10:38:48', u'Time:10:38:48, Latitude: 39.965949, Longitude: -75.172239, Speed: 0.102851, Altitude: -3.756733']
-                            currentatt = f.attributes()
-                            pointdate = currentatt[self.fields['datetime']].split(" ")[0]  #2014/06/06
-                            pointtime = currentatt[self.fields['datetime']].split(" ")[1]
-                            current_dt = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]))
-                            matchrow = []
-                            if cc == 0:
-                                track_start_dt = current_dt
-                                if current_dt == self.audio_start:
-                                    self.aLayer.setSelectedFeatures([int(f.id())])
-                                    matchdict['fid'] = f.id()
-                                    matchdict['attributes'] = currentatt
-                                    geom = f.geometry()  # QgsGeometry object, get the geometry
-                                    if geom.type() == QGis.Point:
-                                        matchdict['coordinates'] = geom.asPoint() #(-75.1722,39.9659)
-                                    matchrow = 0
-                                    break
-                                elif current_dt > self.audio_start: # if it is the first attribute and there is no match and the track time is larger than the start of the audio.
-                                    diff = current_dt - self.audio_start
-                                    QMessageBox.information(self.iface.mainWindow(),"Audio File Sync Info", 'Audio starts before the begining of the track by {0}'.format(diff) )
-                                    break
-                            elif current_dt == self.audio_start: # the track time and the audio start match
-                                self.aLayer.setSelectedFeatures([int(f.id())])
-                                matchdict['fid'] = f.id()
-                                matchdict['attributes'] = currentatt
-                                geom = f.geometry()  # QgsGeometry object, get the geometry
-                                if geom.type() == QGis.Point:
-                                    matchdict['coordinates'] = geom.asPoint() #(-75.1722,39.9659)
-                                matchrow = cc
-                                break
-                            cc += 1
+                        track_start_dt = MMTime.epochToDatetime(seconds[0])
+                        starts = np.flatnonzero(seconds == audio_start)
+                        if seconds[0] > audio_start: # if there is no match at the first point and the track starts after the audio.
+                            diff = track_start_dt - self.audio_start
+                            QMessageBox.information(self.iface.mainWindow(),"Audio File Sync Info", 'Audio starts before the begining of the track by {0}'.format(diff) )
+                        elif len(starts): # the track time and the audio start match
+                            matchrow = int(starts[0])
+                            matchdict['fid'] = int(track['fid'][matchrow])
+                            matchdict['coordinates'] = (float(track['lon'][matchrow]), float(track['lat'][matchrow])) #(-75.1722,39.9659)
+                            self.aLayer.setSelectedFeatures([matchdict['fid']])
 
                         if not matchdict and self.audio_start > track_start_dt:
                             QMessageBox.warning(self.iface.mainWindow(),"Audio File Sync Error", 'The audio start time occurs after the start of the track. However, there is no matching time for the start of the audio file. This may indicate a missing point.')
 
-                        for f in self.aLayer.getFeatures(): #  QgsFeatureIterator #[u'2014/06/06 10:38:48', u'Time:10:38:48, Latitude: 39.965949, Longitude: -75.172239, Speed: 0.102851, Altitude: -3.756733']
-                            currentatt = f.attributes()
-                            pointdate = currentatt[self.fields['datetime']].split(" ")[0]  #2014/06/06
-                            pointtime = currentatt[self.fields['datetime']].split(" ")[1]
-                            current_dt = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]))
-                            matchrow2 = []
-                            if current_dt == self.audio_end: # the track time and the audio start match
-                                #self.aLayer.setSelectedFeatures([int(f.id())])
-                                matchdict_end['fid'] = f.id()
-                                matchdict_end['attributes'] = currentatt
-                                geom = f.geometry()  # QgsGeometry object, get the geometry
-                                if geom.type() == QGis.Point:
-                                    matchdict_end['coordinates'] = geom.asPoint() #(-75.1722,39.9659)
-                                matchrow2 = cc
-                                break
+                        ends = np.flatnonzero(seconds == audio_end)
+                        if len(ends): # the track time and the audio end match
+                            matchdict_end['fid'] = int(track['fid'][ends[0]])
+                            matchdict_end['coordinates'] = (float(track['lon'][ends[0]]), float(track['lat'][ends[0]]))
 
                         # calculate the audio field
                         try:
                             idx = self.aLayer.fieldNameIndex('audio')  #feature.attributes()[idx]
-                            fid_dt = []
-                            cc = 0
-                            self.aLayer.startEditing()
-                            self.aLayer.beginEditCommand('audio sync')
-                            for f in self.aLayer.getFeatures():
-                                currentatt = f.attributes()
-                                pointdate = currentatt[self.fields['datetime']].split(" ")[0]  #2014/06/06
-                                pointtime = currentatt[self.fields['datetime']].split(" ")[1]
-                                current_dt = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]))
-                                if current_dt >= self.audio_start and current_dt <= self.audio_end:
-                                    self.aLayer.changeAttributeValue(cc, idx, '1')
-                                else:
-                                    self.aLayer.changeAttributeValue(cc, idx, '0')
-                                cc += 1
-                            self.aLayer.endEditCommand()
-                            self.aLayer.commitChanges()
+                            during = (seconds >= audio_start) & (seconds <= audio_end)
+                            edit = MMEdit.BatchEdit(self.aLayer, 'audio sync')
+                            for fid, value in zip(track['fid'].tolist(), np.where(during, '1', '0').tolist()):
+                                edit.changeAttributeValue(fid, idx, value)
+                            edit.commit()
 
 
                         except:
-                            self.aLayer.destroyEditCommand()
                             self.logger.error('audio sync field destroy edit session')
                             self.logger.exception(traceback.format_exc())
                             self.iface.messageBar().pushMessage("Error", "Failed to apply audio category values. Please see error log at: {0}".format(self.loggerpath), level=QgsMessageBar.CRITICAL, duration=5)
@@ -3008,16 +2831,9 @@ class MilkMachine:
             audio_end = audio_start + datetime.timedelta(seconds=length)
 
         # Track start and end
-        cc = 0
-        for f in self.ActiveLayer.getFeatures(): #  QgsFeatureIterator #[u'2014/06/06 10:38:48', u'Time:10:38:48, Latitude: 39.965949, Longitude: -75.172239, Speed: 0.102851, Altitude: -3.756733']
-            currentatt = f.attributes()
-            pointdate = currentatt[self.fields['datetime']].split(" ")[0]  #2014/06/06
-            pointtime = currentatt[self.fields['datetime']].split(" ")[1] #10:38:48
-            if cc == 0:
-                track_dt_start = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]))
-            else:
-                track_dt_end = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]))
-            cc += 1
+        times = MMTime.layerTimes(self.ActiveLayer)
+        track_dt_start = times.at(0, wholeSeconds=True)
+        track_dt_end = times.at(-1, wholeSeconds=True)
 
         if audio_start >= track_dt_start:  #and audio_end <= track_dt_end
             diff = audio_start - track_dt_start
@@ -3052,16 +2868,9 @@ class MilkMachine:
                         audio_end = audio_start + datetime.timedelta(seconds=length)
 
                     # Track start and end
-                    cc = 0
-                    for f in self.ActiveLayer.getFeatures(): #  QgsFeatureIterator #[u'2014/06/06 10:38:48', u'Time:10:38:48, Latitude: 39.965949, Longitude: -75.172239, Speed: 0.102851, Altitude: -3.756733']
-                        currentatt = f.attributes()
-                        pointdate = currentatt[self.fields['datetime']].split(" ")[0]  #2014/06/06
-                        pointtime = currentatt[self.fields['datetime']].split(" ")[1] #10:38:48
-                        if cc == 0:
-                            track_dt_start = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]))
-                        else:
-                            track_dt_end = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]))
-                        cc += 1
+                    times = MMTime.layerTimes(self.ActiveLayer)
+                    track_dt_start = times.at(0, wholeSeconds=True)
+                    track_dt_end = times.at(-1, wholeSeconds=True)
 
                     if audio_start >= track_dt_start:  #and audio_end <= track_dt_end
                         self.dlg.ui.lineEdit_export_audio.setText(self.audio_export)
@@ -3080,23 +2889,89 @@ class MilkMachine:
         try:
             audioHREF = self.dlg.ui.lineEdit_export_audio.text()
             audioOffset = self.audio_offset(audioHREF) if audioHREF is not None and len(os.path.splitext(audioHREF)[1]) > 0 else None
-            exportPath = QFileDialog.getSaveFileName(None, "Save Track", self.lastdirectory, "(*.kml *.kmz *.gpx *.shp *.geojson *.csv)")
-            MMExport.exportToFile(
-                activeLayer=self.ActiveLayer,
-                audioHREF=audioHREF,
-                audioOffset=audioOffset,
-                exportPath=exportPath,
-                fields=self.field_indices(self.ActiveLayer),
-                lastDirectory=self.lastdirectory,
-                logger=self.logger,
-                loggerPath=self.loggerpath,
-                messageBar=self.iface.messageBar()
-            )
+            exportPath = QFileDialog.getSaveFileName(None, "Save Track", self.lastdirectory, "(*.kml *.kmz *.gpx *.gpkg *.shp *.geojson *.csv)")
+            if exportPath and exportPath.split('.')[1] in ('kml', 'kmz'):
+                if self.exportWorker is not None:
+                    QMessageBox.warning(self.iface.mainWindow(), "Export Warning", "An export is already running. Please wait for it to finish or cancel it.")
+                    return
+                # the layer is read on this thread, the KML is built and written by the worker
+                track = MMTrack.readLayer(self.ActiveLayer, self.field_indices(self.ActiveLayer))
+                if self.dlg.ui.doubleSpinBox_export_simplify.value() > 0:
+                    track = MMSimplify.simplifyTrack(track, self.dlg.ui.doubleSpinBox_export_simplify.value())
+                # keyword arguments of MMExport.flyToDurations, none (0) is no limit
+                durationLimits = {
+                    'minimum': self.dlg.ui.doubleSpinBox_export_flyto_min.value(),
+                    'maximum': self.dlg.ui.doubleSpinBox_export_flyto_max.value() or None,
+                    'gap': self.dlg.ui.doubleSpinBox_export_flyto_gap.value() or None
+                }
+                self.exportStart(track, exportPath, audioHREF, audioOffset, durationLimits, self.dlg.ui.checkBox_export_gxtrack.isChecked())
+            else:
+                MMExport.exportToFile(
+                    activeLayer=self.ActiveLayer,
+                    audioHREF=audioHREF,
+                    audioOffset=audioOffset,
+                    exportPath=exportPath,
+                    fields=self.field_indices(self.ActiveLayer),
+                    lastDirectory=self.lastdirectory,
+                    logger=self.logger,
+                    loggerPath=self.loggerpath,
+                    messageBar=self.iface.messageBar()
+                )
         except:
             self.logger.error('export function error')
             self.logger.exception(traceback.format_exc())
             self.iface.messageBar().pushMessage("Error", "exportToFile error. Please see error log at: {0}".format(self.loggerpath), level=QgsMessageBar.CRITICAL, duration=5)
 
+    def exportStart(self, track, exportPath, audioHREF, audioOffset, durationLimits=None, gxtrack=False):
+        self.exportMessage = self.iface.messageBar().createMessage("Export", "Writing {0}".format(exportPath))
+        self.exportProgressBar = QProgressBar()
+        self.exportProgressBar.setMaximum(100)
+        cancelButton = QPushButton("Cancel")
+        # not connected to the worker itself: its thread is busy exporting and would never get the queued call
+        cancelButton.clicked.connect(self.exportCancel)
+        self.exportMessage.layout().addWidget(self.exportProgressBar)
+        self.exportMessage.layout().addWidget(cancelButton)
+        self.iface.messageBar().pushWidget(self.exportMessage, QgsMessageBar.INFO)
+
+        self.exportWorker = MMWorker.ExportWorker(track, exportPath, audioHREF, audioOffset, self.logger, durationLimits=durationLimits, gxtrack=gxtrack)
+        self.exportWorker.progress.connect(self.exportProgress)
+        self.exportWorker.finished.connect(self.exportFinished)
+        self.exportWorker.cancelled.connect(self.exportCancelled)
+        self.exportWorker.error.connect(self.exportError)
+        # the worker, and with it the thread, is only let go of once the thread has stopped
+        self.exportWorker.thread.finished.connect(self.exportThreadFinished)
+        self.exportWorker.start()
+
+    def exportProgress(self, rows, total, written):
+        if total:
+            self.exportProgressBar.setValue(100 * rows / total)
+        self.exportMessage.setText("Writing {0}: {1} of {2} features, {3:.1f} MB".format(self.exportWorker.exportPath, rows / 3, total / 3, written / 1048576.0))
+
+    def exportCancel(self):
+        if self.exportWorker is not None:
+            self.exportWorker.cancel()
+
+    def exportDone(self):
+        self.iface.messageBar().popWidget(self.exportMessage)
+        self.exportMessage = None; self.exportProgressBar = None
+
+    def exportThreadFinished(self):
+        self.exportWorker = None
+
+    def exportFinished(self, exportPath):
+        self.exportDone()
+        self.iface.messageBar().pushMessage("Success", "{0} file exported to: {1}".format(exportPath.split('.')[1], exportPath), level=QgsMessageBar.INFO, duration=5)
+
+    def exportCancelled(self, exportPath):
+        self.exportDone()
+        self.iface.messageBar().pushMessage("Export", "Export to {0} cancelled".format(exportPath), level=QgsMessageBar.WARNING, duration=5)
+
+    def exportError(self, trace):
+        self.exportDone()
+        self.logger.error('export worker error')
+        self.logger.error(trace)
+        self.iface.messageBar().pushMessage("Error", "exportToFile error. Please see error log at: {0}".format(self.loggerpath), level=QgsMessageBar.CRITICAL, duration=5)
+
 
     def trackdetails(self):
         try:
@@ -3105,53 +2980,28 @@ class MilkMachine:
             self.extent = {'xmin' : rectangle.xMinimum(), 'xmax' : rectangle.xMaximum(), 'ymin' : rectangle.yMinimum(), 'ymax' : rectangle.yMaximum()}
             featcount = self.ActiveLayer.featureCount()
 
-            # create layer
-
-            utmpts = QgsVectorLayer("Point?crs=EPSG:26918", 'utmpts', "memory")
-            pr = utmpts.dataProvider()
-            # add a feature
-            fet = QgsFeature()
-
-
-            crsSrc = QgsCoordinateReferenceSystem(4326)    # WGS 84
-            crsDest = QgsCoordinateReferenceSystem(26918)  # WGS 84 / UTM zone 33N
-            xform = QgsCoordinateTransform(crsSrc, crsDest)
-
-            speedlist = []; altitudelist = []; ptlist = []; i = 0
-            for f in self.ActiveLayer.getFeatures(): #  QgsFeatureIterator #[u'2014/06/06 10:38:48', u'Time:10:38:48, Latitude: 39.965949, Longitude: -75.172239, Speed: 0.102851, Altitude: -3.756733']
-                currentatt = f.attributes()
-                geom = f.geometry().asPoint()
-                utmpt = xform.transform(QgsPoint(geom[0], geom[1]))
-                ptlist.append(utmpt)
-
-                # now add the utm 18n point to the new feature
-                fet.setGeometry( QgsGeometry.fromPoint(QgsPoint(utmpt[0],utmpt[1])) )
-                pr.addFeatures([fet])
-
-
-                if i == 0:
-                    pointdate = currentatt[0].split(" ")[0]; pointtime = currentatt[0].split(" ")[1]
-                    start_dt = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]))
-                else:
-                    pointdate = currentatt[0].split(" ")[0]; pointtime = currentatt[0].split(" ")[1]
-                    end_dt = datetime.datetime(int(pointdate.split('/')[0]), int(pointdate.split('/')[1]), int(pointdate.split('/')[2]), int(pointtime.split(':')[0]), int(pointtime.split(':')[1]), int(pointtime.split(':')[2]))
-
-                speedlist.append(float(f.attributes()[1].split(',')[3].split(':')[1]))
-                altitudelist.append(float(f.attributes()[1].split(',')[4].split(':')[1]))
-                i += 1
+            # project the whole track into the UTM zone it lies in
+            utm = MMProjection.registry.zoneOf([self.extent['xmin'], self.extent['xmax']], [self.extent['ymin'], self.extent['ymax']])
 
+            # points, altitudes and speeds from the track cache, the speeds computed between the points
+            track = MMCache.layerTrack(self.ActiveLayer)
+            times = MMTime.layerTimes(self.ActiveLayer)
+            start_dt = times.at(0, wholeSeconds=True)
+            end_dt = times.at(-1, wholeSeconds=True)
             dura = end_dt - start_dt # duration
 
+            eastings, northings = utm.forward(track['lon'], track['lat'])
+            ptlist = [QgsPoint(e, n) for e, n in zip(eastings.tolist(), northings.tolist())]
             d = QgsDistanceArea()  # create an instance of the distance area class
             d.setEllipsoidalMode(True)
-            d.setSourceCrs(26918)
+            d.setSourceCrs(utm.crs().srsid())
             distancekm = d.measureLine(ptlist)/1000
             distancemi = distancekm * 0.621371
 
 
             featmess = 'Features:\t\t{0}\n'.format(featcount)
-            elevmess = 'Elevation (min, max):\t{0}, {1}\n'.format("%.2f" % min(altitudelist),"%.2f" %  max(altitudelist))
-            speedmess = 'Speed (min, max):\t{0}, {1}\n'.format("%.2f" % min(speedlist), "%.2f" % max(speedlist))
+            elevmess = 'Elevation (min, max):\t{0}, {1}\n'.format("%.2f" % np.nanmin(track['alt']),"%.2f" %  np.nanmax(track['alt']))
+            speedmess = 'Speed (min, max):\t{0}, {1}\n'.format("%.2f" % track['speed'].min(), "%.2f" % track['speed'].max())
             duramess = 'Duration:\t\t{0}\n'.format(dura)
             lenmess = 'Distance (km, mi):\t{0}, {1}\n'.format("%.2f" % distancekm, "%.2f" % distancemi)
 
@@ -3160,8 +3010,8 @@ class MilkMachine:
             message = featmess + elevmess + speedmess + duramess + lenmess + bmessage
 
             QMessageBox.information( self.iface.mainWindow(),"Track Details", message )
-
-            #QgsMapLayerRegistry.instance().addMapLayer(utmpts)
+            if self.logging == True:
+                self.logger.info('trackdetails: UTM zone {0}{1}, {2}'.format(utm.zone, 'S' if utm.south else 'N', MMProjection.registry.cacheInfo()))
 
         except:
             if self.logging == True:
@@ -3206,16 +3056,15 @@ class MilkMachine:
             self.ActiveLayer.removeSelection()
             self.ActiveLayer.select(rect,False)
 
-            cameraBack = {'a': 'longitude', 'b': 'longitude_off','c': 'latitude','d': 'latitude_off','e': 'altitude' ,'f': 'altitudemode', 'g': 'gxaltitudemode' ,'h': 'gxhoriz' ,'i': 'heading' ,'j': 'roll' ,'k': 'tilt' ,'l': 'range','m': 'follow_angle', 'n': 'streetview', 'o': 'hoffset'}
 
             for f in self.ActiveLayer.selectedFeatures():
                 currentatt = f.attributes()
                 if currentatt:
                     if currentatt[self.fields['camera']]:
-                        cameradict = eval(currentatt[self.fields['camera']])
+                        cameradict = MMCodec.decode('camera', currentatt[self.fields['camera']])
                         display = ''
-                        for key,val in cameradict.iteritems():
-                            display = display + str(cameraBack[key]) + ": " + str(val) + "\n"
+                        for key in MMCodec.CAMERA_KEYS:
+                            display = display + key + ": " + str(cameradict[key]) + "\n"
                         display = display + "Raw: " + currentatt[self.fields['camera']]
                         self.dlg.ui.txtFeedback.setText(display)
                         self.selectedCamera = cameradict
@@ -3236,6 +3085,7 @@ class MilkMachine:
         # Remove the plugin menu item and icon
         global NOW, pointid, ClockDateTime
         NOW = None; pointid = None; ClockDateTime = None
+        self.exportCancel()
         self.logger.info('Quit Milk Machine')
         self.logger.removeHandler(self.handler)
         self.iface.removePluginMenu(u"&Milk Machine", self.action)
@@ -3551,6 +3401,11 @@ class MilkMachine:
         self.dlg.ui.radioButton_filtering_quad.setEnabled(False)
         self.dlg.ui.radioButton_filtering_moving.setEnabled(False)
         self.dlg.ui.spinBox_filtering_moving.setEnabled(False)
+        self.dlg.ui.radioButton_filtering_kalman.setEnabled(False)
+        self.dlg.ui.label_69.setEnabled(False)
+        self.dlg.ui.doubleSpinBox_filtering_kalman_error.setEnabled(False)
+        self.dlg.ui.label_70.setEnabled(False)
+        self.dlg.ui.doubleSpinBox_filtering_kalman_accel.setEnabled(False)
         self.dlg.ui.radioButton_filtering_zscale.setEnabled(False)
         self.dlg.ui.label_48.setEnabled(False)
         self.dlg.ui.lineEdit_filtering_min.setEnabled(False)
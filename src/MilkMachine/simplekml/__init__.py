@@ -25,9 +25,11 @@ from simplekml.coordinates import Coordinates
 from simplekml.featgeom import Container,Document, Folder,GroundOverlay,GxMultiTrack,GxTrack,LinearRing,LineString,Model,MultiGeometry,NetworkLink,Point,Polygon,PhotoOverlay,ScreenOverlay
 from simplekml.icon import Icon,ItemIcon,Link
 from simplekml.kml import Kml
+from simplekml.kmz import KmzEntry,KmzWriter
 from simplekml.model import Alias,Location,Orientation,ResourceMap,Scale
 from simplekml.overlay import GridOrigin,ImagePyramid,ViewVolume
 from simplekml.region import Box,GxLatLonQuad,LatLonAltBox,LatLonBox,Lod,Region
+from simplekml.stream import KmlStream
 from simplekml.schema import Data,ExtendedData,GxSimpleArrayData,GxSimpleArrayField,SchemaData,SimpleData,Schema,SimpleField
 from simplekml.styleselector import Style,StyleMap
 from simplekml.substyle import BalloonStyle,IconStyle,LabelStyle,LineStyle,ListStyle,PolyStyle
@@ -36,12 +36,11 @@ class GxViewerOptions(Kmlable):
         """Creates a :class:`simplekml.GxOption` with name `name` and sets it to `enabled`."""
         self.gxoptions.append(GxOption(name, enabled))
 
-    def __str__(self):
-        buf = ['<gx:ViewerOptions>']
+    def _write(self, writer):
+        writer.start('gx:ViewerOptions')
         for gxoption in self.gxoptions:
-            buf.append(gxoption.__str__())
-        buf.append("</gx:ViewerOptions>")
-        return "".join(buf)
+            gxoption._write(writer)
+        writer.end('gx:ViewerOptions')
 
 
 class AbstractView(Kmlable):
@@ -314,11 +313,12 @@ class GxOption(Kmlable):
     def enabled(self, enabled):
         self._kml['enabled'] = enabled
 
-    def __str__(self):
+    def _write(self, writer):
         enabledText = '0'
         if self._kml['enabled']:
             enabledText = '1'
-        return '<gx:option name="{0}" enabled="{1}"></gx:option>'.format(self._kml['name'], enabledText)
+        writer.start('gx:option', [('name', self._kml['name']), ('enabled', enabledText)])
+        writer.end('gx:option')
 
 
 
@@ -21,6 +21,15 @@ import os
 import cgi
 import xml.dom.minidom
 from simplekml.makeunicode import u
+from simplekml.pretty import KmlWriter
+
+
+def _tostring(kmlable):
+    """Returns the kml of anything with a `_write` method as a single line."""
+    buf = []
+    kmlable._write(KmlWriter(buf.append))
+    return "".join(buf)
+
 
 class Kmlable(object):
     """Enables a subclass to be converted into KML."""
@@ -38,12 +47,17 @@ class Kmlable(object):
             self._kml = {}
 
     def __str__(self):
+        return _tostring(self)
+
+    def _write(self, writer):
         """This is where the magic happens."""
-        buf = []
         for var, val in self._kml.items():
             if val is not None:  # Exclude all variables that are None
                 if var.endswith("_"):
-                    buf.append(u"{0}".format(val))  # Use the variable's __str__ as is
+                    if hasattr(val, '_write'):  # Use the variable's own serialiser as is
+                        val._write(writer)
+                    else:
+                        writer.text(u"{0}".format(val))
                 else:
                     if var in ['name', 'description', 'text', 'linkname', 'linkdescription', 'message', 'change', 'create', 'delete'] and Kmlable._parse: # Parse value for HTML and convert
                         val = Kmlable._chrconvert(val)
@@ -51,13 +65,13 @@ class Kmlable(object):
                             or (var == 'targetHref' and os.path.exists(val) and Kmlable._kmz == True): # Check for images
                         Kmlable._addimage(val)
                         val = os.path.join('files', os.path.split(val)[1]).replace('\\', '/')
-                    buf.append(u("<{0}>{1}</{0}>").format(var, val))  # Enclose the variable's __str__ with its name
-                    # Add namespaces
-                    if var.startswith("atom:") and 'xmlns:atom="http://www.w3.org/2005/Atom"' not in Kmlable._namespaces:
-                        Kmlable._namespaces.append('xmlns:atom="http://www.w3.org/2005/Atom"')
-                    elif var.startswith("xal:") and 'xmlns:xal="urn:oasis:names:tc:ciq:xsdschema:xAL:2.0"' not in Kmlable._namespaces:
-                        Kmlable._namespaces.append('xmlns:xal="urn:oasis:names:tc:ciq:xsdschema:xAL:2.0"')
-        return "".join(buf)
+                    if hasattr(val, '_write'):  # Enclose the variable's own kml with its name
+                        writer.start(var)
+                        val._write(writer)
+                        writer.end(var)
+                    else:
+                        writer.element(var, u("{0}").format(val))
+                    Kmlable._addnamespace(var)  # Add namespaces
 
     @classmethod
     def _parsetext(cls, parse=True):
@@ -97,11 +111,28 @@ class Kmlable(object):
     def _setkmz(cls, kmz=True):
         Kmlable._kmz = kmz
 
+    @classmethod
+    def _addnamespace(cls, var):
+        """Declares the namespace of the variable `var`, if it is an atom or xal one."""
+        if var.startswith("atom:") and 'xmlns:atom="http://www.w3.org/2005/Atom"' not in Kmlable._namespaces:
+            Kmlable._namespaces.append('xmlns:atom="http://www.w3.org/2005/Atom"')
+        elif var.startswith("xal:") and 'xmlns:xal="urn:oasis:names:tc:ciq:xsdschema:xAL:2.0"' not in Kmlable._namespaces:
+            Kmlable._namespaces.append('xmlns:xal="urn:oasis:names:tc:ciq:xsdschema:xAL:2.0"')
+
     @classmethod
     def _getnamespaces(cls):
         """Return the namespaces as a string."""
         return " ".join(Kmlable._namespaces)
 
+    @classmethod
+    def _getnamespaceattrs(cls):
+        """Return the namespaces as (name, value) pairs of attributes."""
+        attrs = []
+        for namespace in Kmlable._namespaces:
+            name, value = namespace.split('=', 1)
+            attrs.append((name, value[1:-1]))
+        return attrs
+
 
 class Vector2(object):
     """Abstract class representing a vector.
@@ -165,9 +196,12 @@ class Vector2(object):
         self._kml['yunits'] = yunits
 
     def __str__(self):
+        return _tostring(self)
+
+    def _write(self, writer):
         cname = self.__class__.__name__[0].lower() + self.__class__.__name__[1:]
-        return '<{0} x="{1}" y="{2}" xunits="{3}" yunits="{4}" />'.format(cname, self._kml['x'], self._kml['y'],
-                                                                          self._kml['xunits'], self._kml['yunits'])
+        writer.vector(cname, [('x', self._kml['x']), ('y', self._kml['y']),
+                              ('xunits', self._kml['xunits']), ('yunits', self._kml['yunits'])])
 
 
 class OverlayXY(Vector2):
@@ -253,10 +287,13 @@ class Snippet(object):
         self._kml['maxlines'] = maxlines
         
     def __str__(self):
+        return _tostring(self)
+
+    def _write(self, writer):
         if self._kml['maxlines'] is not None:
-            return u'<Snippet maxLines="{0}">{1}</Snippet>'.format(self._kml['maxlines'],Kmlable._chrconvert(self._kml['content']))
+            writer.element('Snippet', Kmlable._chrconvert(self._kml['content']), [('maxLines', self._kml['maxlines'])])
         else:
-            return u'<Snippet>{0}</Snippet>'.format(Kmlable._chrconvert(self._kml['content']))
+            writer.element('Snippet', Kmlable._chrconvert(self._kml['content']))
 
 
 
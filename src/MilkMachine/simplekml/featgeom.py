@@ -21,6 +21,7 @@ from simplekml.abstractview import Camera, LookAt
 from simplekml.base import Kmlable, Snippet, OverlayXY, ScreenXY, RotationXY, Size, check
 from simplekml.coordinates import Coordinates
 from simplekml.icon import Icon, Link
+from simplekml.makeunicode import u
 from simplekml.model import Location, Orientation, Scale, ResourceMap
 from simplekml.overlay import ViewVolume, ImagePyramid
 from simplekml.region import LatLonBox, GxLatLonQuad, Region
@@ -400,24 +401,21 @@ class Feature(Kmlable):
     def _setstyle(self, style):
         self._kml['styleUrl'] = "#{0}".format(style.id)
 
-    def __str__(self):
-        buf = []
+    def _write(self, writer):
         for stylemap in self._stylemaps:
             self._addstyle(stylemap.normalstyle)
             self._addstyle(stylemap.highlightstyle)
-        str = '<{0} id="{1}">'.format(self.__class__.__name__, self._id)
-        buf.append(str)
+        writer.start(self.__class__.__name__, [('id', self._id)])
         for style in self._styles:
-            buf.append(style.__str__())
+            style._write(writer)
         for stylemap in self._stylemaps:
-            buf.append(stylemap.__str__())
-        buf.append(super(Feature, self).__str__())
+            stylemap._write(writer)
+        super(Feature, self)._write(writer)
         for folder in self._folders:
-            buf.append(folder.__str__())
+            folder._write(writer)
         for feat in self._features:
-            buf.append(feat.__str__())
-        buf.append("</{0}>".format(self.__class__.__name__))
-        return "".join(buf)
+            feat._write(writer)
+        writer.end(self.__class__.__name__)
 
 
 class Container(Feature):
@@ -1159,8 +1157,10 @@ class LinearRing(PointGeometry):
     def gxaltitudeoffset(self, offset):
         self._kml['gx:altitudeOffset'] = offset
 
-    def __str__(self):
-        return '<LinearRing id="{0}">{1}</LinearRing>'.format(self._id, super(LinearRing, self).__str__())
+    def _write(self, writer):
+        writer.start('LinearRing', [('id', self._id)])
+        super(LinearRing, self)._write(writer)
+        writer.end('LinearRing')
 
 
 class Point(PointGeometry):
@@ -1246,8 +1246,10 @@ class Point(PointGeometry):
     def gxaltitudemode(self, mode):
         self._kml['gx:altitudeMode'] = mode
 
-    def __str__(self):
-        return '<Point id="{0}">{1}</Point>'.format(self._id, super(Point, self).__str__())
+    def _write(self, writer):
+        writer.start('Point', [('id', self._id)])
+        super(Point, self)._write(writer)
+        writer.end('Point')
 
 
 class LineString(PointGeometry):
@@ -1354,8 +1356,18 @@ class LineString(PointGeometry):
     def gxdraworder(self, gxdraworder):
         self._kml['gx:drawOrder'] = gxdraworder
 
-    def __str__(self):
-        return '<LineString id="{0}">{1}</LineString>'.format(self._id, super(LineString, self).__str__())
+    def _write(self, writer):
+        writer.start('LineString', [('id', self._id)])
+        super(LineString, self)._write(writer)
+        writer.end('LineString')
+
+
+class _LinearRings(list):
+    """The rings of a polygon's inner boundary, written one after the other."""
+
+    def _write(self, writer):
+        for ring in self:
+            ring._write(writer)
 
 
 class Polygon(Geometry):
@@ -1465,9 +1477,9 @@ class Polygon(Geometry):
         else:
             if type(rings[0]) == type(()):
                 rings = [rings]
-            self._kml['innerBoundaryIs'] = ''
+            self._kml['innerBoundaryIs'] = _LinearRings()
             for ring in rings:
-                self._kml['innerBoundaryIs'] += LinearRing(ring).__str__()
+                self._kml['innerBoundaryIs'].append(LinearRing(ring))
                 self._innerboundaryis.append(LinearRing(ring))
 
     @property
@@ -1479,8 +1491,10 @@ class Polygon(Geometry):
     def outerboundaryis(self, coords):
         self._kml['outerBoundaryIs'] = LinearRing(coords)
 
-    def __str__(self):
-        return '<Polygon id="{0}">{1}</Polygon>'.format(self._id, super(Polygon, self).__str__())
+    def _write(self, writer):
+        writer.start('Polygon', [('id', self._id)])
+        super(Polygon, self)._write(writer)
+        writer.end('Polygon')
 
 
 class MultiGeometry(Geometry):
@@ -1592,13 +1606,12 @@ class MultiGeometry(Geometry):
         """
         return self._newfeature(Model, **kwargs)
 
-    def __str__(self):
-        buf = ['<MultiGeometry id="{0}">'.format(self._id),
-               super(MultiGeometry, self).__str__()]
+    def _write(self, writer):
+        writer.start('MultiGeometry', [('id', self._id)])
+        super(MultiGeometry, self)._write(writer)
         for geom in self._geometries:
-            buf.append(geom.__str__())
-        buf.append("</MultiGeometry>")
-        return "".join(buf)
+            geom._write(writer)
+        writer.end('MultiGeometry')
 
 
 class Overlay(Feature):
@@ -2112,8 +2125,10 @@ class Model(Geometry):
     def resourcemap(self, resourcemap):
         self._kml['ResourceMap'] = resourcemap
 
-    def __str__(self):
-        return '<Model id="{0}">{1}</Model>'.format(self._id, super(Model, self).__str__())
+    def _write(self, writer):
+        writer.start('Model', [('id', self._id)])
+        super(Model, self)._write(writer)
+        writer.end('Model')
 
 
 class GxTrack(Geometry):
@@ -2270,13 +2285,12 @@ class GxTrack(Geometry):
     def newgxcoord(self, coord):
         """Creates a gx:coord, accepts list of one tuples.
 
-        A gxcoord entry is created for every tuple in the list.
+        A gxcoord entry is created for every tuple in the list. The tuples of a
+        list are kept as they are, rather than in a :class:`simplekml.Coordinates`
+        each, so that tracks of millions of points fit in memory.
         """
         if type(coord) == list:
-            for crd in coord:
-                coords = Coordinates()
-                coords.addcoordinates([crd])
-                self.gxcoords.append(coords)
+            self.gxcoords += [tuple(crd) if len(crd) == 3 else (crd[0], crd[1], 0.0) for crd in coord]
         else:
             coords = Coordinates()
             coords.addcoordinates(list(coord))
@@ -2320,17 +2334,19 @@ class GxTrack(Geometry):
     def model(self, model):
         self._kml['Model_'] = model
 
-    def __str__(self):
-        buf = ['<gx:Track>']
+    def _write(self, writer):
+        writer.start('gx:Track')
         for when in self.whens:
-            buf.append("<when>{0}</when>".format(when))
+            writer.element('when', u("{0}").format(when))
         for angle in self.gxangles:
-            buf.append("<gx:angle>{0}</gx:angle>".format(angle))
+            writer.element('gx:angle', u("{0}").format(angle))
         for gxcoord in self.gxcoords:
-            buf.append("<gx:coord>{0}</gx:coord>".format(gxcoord.__str__().replace(',', ' ')))
-        buf.append(super(GxTrack, self).__str__())
-        buf.append('</gx:Track>')
-        return "".join(buf)
+            if type(gxcoord) == tuple:
+                writer.element('gx:coord', u("{0} {1} {2}").format(*gxcoord))
+            else:
+                writer.element('gx:coord', gxcoord.__str__().replace(',', ' '))
+        super(GxTrack, self)._write(writer)
+        writer.end('gx:Track')
 
 
 class GxMultiTrack(Geometry):
@@ -2366,10 +2382,9 @@ class GxMultiTrack(Geometry):
         self.tracks.append(GxTrack(**kwargs))
         return self.tracks[-1]
 
-    def __str__(self):
-        buf = ['<gx:MultiTrack id="{0}">'.format(self._id),
-               super(GxMultiTrack, self).__str__()]
+    def _write(self, writer):
+        writer.start('gx:MultiTrack', [('id', self._id)])
+        super(GxMultiTrack, self)._write(writer)
         for track in self.tracks:
-            buf.append(track.__str__())
-        buf.append("</gx:MultiTrack>")
-        return "".join(buf)
+            track._write(writer)
+        writer.end('gx:MultiTrack')
@@ -136,11 +136,10 @@ class Link(Kmlable):
     def httpquery(self, httpquery):
         self._kml['httpQuery'] = httpquery
 
-    def __str__(self):
-        buf = ['<Link id="{0}">'.format(self._id),
-               super(Link, self).__str__(),
-               '</Link>'.format(self._id)]
-        return "".join(buf)
+    def _write(self, writer):
+        writer.start('Link', [('id', self._id)])
+        super(Link, self)._write(writer)
+        writer.end('Link')
 
 
 class Icon(Link):
@@ -206,11 +205,10 @@ class Icon(Link):
     def gxh(self, gxh):
         self._kml['gx:h'] = gxh
 
-    def __str__(self):
-        buf = ['<Icon id="{0}">'.format(self._id),
-               super(Link, self).__str__(),
-               '</Icon>'.format(self._id)]
-        return "".join(buf)
+    def _write(self, writer):
+        writer.start('Icon', [('id', self._id)])
+        super(Link, self)._write(writer)
+        writer.end('Icon')
 
 
 
@@ -17,15 +17,25 @@ along with this program.  If not, see <http://www.gnu.org/licenses/>.
 Contact me at kyle.lan@gmail.com
 """
 
-import xml.dom.minidom
-import zipfile
 import codecs
 import os
 
-from simplekml.base import Kmlable, KmlElement, check
-from simplekml.featgeom import Document, Container
+from simplekml.base import Kmlable, check
+from simplekml.featgeom import Document, Container, Feature
 from simplekml.makeunicode import u
 from simplekml.networklinkcontrol import NetworkLinkControl
+from simplekml.kmz import KmzWriter, STORED_EXTENSIONS
+from simplekml.pretty import KmlWriter, PrettyWriter
+from simplekml.stream import KmlStream
+
+
+def _walk(feature):
+    """Yields the feature and all of the features inside it, recursively. Tours and the like are skipped."""
+    yield feature
+    for child in feature._folders + feature._features:
+        if isinstance(child, Feature):
+            for descendant in _walk(child):
+                yield descendant
 
 
 class Kml(object):
@@ -191,26 +201,35 @@ class Kml(object):
     def document(self, doc):
         self._feature = doc
 
+    def _declarenamespaces(self):
+        """Declares the namespaces the features use, which are written with the <kml> tag before the features are."""
+        if self._feature is None:
+            return
+        for feature in _walk(self._feature):
+            for var, val in feature._kml.items():
+                if val is not None:
+                    Kmlable._addnamespace(var)
+
     def _genkml(self, format=True):
         """Returns the kml as a string or "prettyprinted" if format = True."""
-        kml_str = ""
-        if self._feature is not None:
-            kml_str = self._feature.__str__()
-        networklinkcontrol_str = ""
-        if self._networklinkcontrol is not None:
-            networklinkcontrol_str = self._networklinkcontrol.__str__()
-        if self._hint is not None:
-            hint = ' hint="{0}"'.format(self._hint)
-        else:
-            hint = ''
-        xml_str = u("<kml {0}{2}>{1}{3}</kml>").format(Kmlable._getnamespaces(), kml_str, hint, networklinkcontrol_str)
+        buf = []
         if format:
-           KmlElement.patch()
-           kml_str = xml.dom.minidom.parseString(xml_str.encode("utf-8"))
-           KmlElement.unpatch()
-           return kml_str.toprettyxml(indent="    ", newl="\n", encoding="UTF-8").decode("utf-8")
+            writer = PrettyWriter(buf.append)
+            writer.declaration()
         else:
-            return xml_str
+            writer = KmlWriter(buf.append)
+        self._declarenamespaces()
+        attrs = Kmlable._getnamespaceattrs()
+        if self._hint is not None:
+            attrs.append(('hint', self._hint))
+        writer.start('kml', attrs)
+        if self._feature is not None:
+            self._feature._write(writer)
+        if self._networklinkcontrol is not None:
+            self._networklinkcontrol._write(writer)
+        writer.end('kml')
+        writer.close()
+        return u('').join(buf)
 
     def parsetext(self, parse=True):
         """Sets the behavior of how text tags are parsed.
@@ -289,12 +308,18 @@ class Kml(object):
         finally:
             f.close()
 
-    def savekmz(self, path, format=True):
+    def savekmz(self, path, format=True, store=STORED_EXTENSIONS, workers=None):
         """Save the kml as a kmz to the given file supplied by `path`.
 
         The KML is saved to a file in a long string if `format=False` else it
         gets saved "prettyprinted". This works the same as :func:`simplekml.Kml.kml`
 
+        The KML is streamed into the kmz one feature at a time through a
+        :class:`simplekml.KmlStream`, and the images and other local files it
+        refers to are compressed in parallel, see :class:`simplekml.KmzWriter`. Files with an extension in `store`
+        (already compressed media such as mp3, jpg and png by default) are
+        stored without compression, pass `store=()` to compress everything.
+
         Usage::
 
             import simplekml
@@ -302,14 +327,25 @@ class Kml(object):
             kml.savekmz("Saving.kml")
             #kml.savekmz("Saving.kml", False)  # or this
         """
-        Kmlable._setkmz()
-        out = self._genkml(format).encode('utf-8')
-        kmz = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED)
-        kmz.writestr("doc.kml", out)
-        for image in Kmlable._getimages():
-            kmz.write(image, os.path.join('files', os.path.split(image)[1]))
-        kmz.close()
-        Kmlable._clearimages()
+        try:
+            self._declarenamespaces()
+            kmz = KmzWriter(path, store=store, workers=workers)
+            try:
+                doc = kmz.open("doc.kml")
+                stream = KmlStream(doc, kmz=True, format=format)
+                stream.begin(self._feature, self._hint)
+                stream.writeall(self._feature._folders)
+                stream.writeall(self._feature._features)
+                stream.end()
+                if self._networklinkcontrol is not None:
+                    stream.write(self._networklinkcontrol)
+                stream.close()
+                doc.close()
+                kmz.addfiles(stream.images)
+            finally:
+                kmz.close()
+        finally:
+            Kmlable._clearimages()
 
     def newdocument(self, **kwargs):
         """
@@ -0,0 +1,216 @@
+"""
+Copyright 2011-2014-2012 Kyle Lancaster
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Contact me at kyle.lan@gmail.com
+"""
+
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+import zlib
+from multiprocessing.pool import ThreadPool
+
+# Media that is already compressed, deflating it again costs CPU for (almost) nothing.
+STORED_EXTENSIONS = ('.mp3', '.jpg', '.jpeg', '.png')
+
+_CHUNK = 1024 * 64
+
+
+def _compress(path):
+    """Deflates the file at `path` into a temporary file, returns (tmpfile, crc, file_size, compress_size)."""
+    tmp = tempfile.TemporaryFile()
+    cmpr = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    crc = file_size = compress_size = 0
+    f = open(path, 'rb')
+    try:
+        while 1:
+            buf = f.read(_CHUNK)
+            if not buf:
+                break
+            file_size += len(buf)
+            crc = zlib.crc32(buf, crc) & 0xffffffff
+            buf = cmpr.compress(buf)
+            compress_size += len(buf)
+            tmp.write(buf)
+    finally:
+        f.close()
+    buf = cmpr.flush()
+    compress_size += len(buf)
+    tmp.write(buf)
+    tmp.seek(0)
+    return tmp, crc, file_size, compress_size
+
+
+class KmzEntry(object):
+    """A file inside a KMZ that is compressed and written as it receives data.
+
+    Returned by :func:`simplekml.KmzWriter.open`, the total size does not have
+    to be known beforehand and nothing is buffered beyond zlib's own window.
+    """
+
+    def __init__(self, zf, zinfo):
+        self._zf = zf
+        self._zinfo = zinfo
+        self._cmpr = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+        self._crc = 0
+        self._file_size = 0
+        self._compress_size = 0
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+        zinfo.flag_bits = 0x00
+        zinfo.header_offset = zf.fp.tell()
+        zinfo.CRC = zinfo.file_size = zinfo.compress_size = 0
+        zf.fp.write(zinfo.FileHeader(False))
+
+    def _check(self, file_size, compress_size):
+        # the header written before the data has no room for zip64 sizes, so refuse before anything goes past it
+        if file_size > zipfile.ZIP64_LIMIT or compress_size > zipfile.ZIP64_LIMIT:
+            raise zipfile.LargeZipFile("Streamed entries larger than 2 GB are not supported")
+
+    def write(self, data):
+        """Compresses and writes `data`, a byte string.
+
+        Raises zipfile.LargeZipFile, without writing anything, if the entry would grow past 2 GB.
+        """
+        self._check(self._file_size + len(data), self._compress_size)
+        compressed = self._cmpr.compress(data)
+        self._check(self._file_size + len(data), self._compress_size + len(compressed))
+        self._file_size += len(data)
+        self._crc = zlib.crc32(data, self._crc) & 0xffffffff
+        if compressed:
+            self._compress_size += len(compressed)
+            self._zf.fp.write(compressed)
+
+    def close(self):
+        """Flushes the compressor and goes back to fill in the entry's header."""
+        zf = self._zf
+        zinfo = self._zinfo
+        data = self._cmpr.flush()
+        self._check(self._file_size, self._compress_size + len(data))
+        self._compress_size += len(data)
+        zf.fp.write(data)
+        zinfo.CRC = self._crc
+        zinfo.file_size = self._file_size
+        zinfo.compress_size = self._compress_size
+        position = zf.fp.tell()
+        zf.fp.seek(zinfo.header_offset, 0)
+        zf.fp.write(zinfo.FileHeader(False))
+        zf.fp.seek(position, 0)
+        _register(zf, zinfo)
+
+
+def _register(zf, zinfo):
+    """Adds an entry written behind the ZipFile's back to its central directory."""
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[zinfo.filename] = zinfo
+    zf._didModify = True
+    if hasattr(zf, 'start_dir'):
+        zf.start_dir = zf.fp.tell()
+
+
+class KmzWriter(object):
+    """Packages a KMZ, streaming the KML into it and compressing the attached files in parallel.
+
+    The KML is written through the entry returned by
+    :func:`simplekml.KmzWriter.open`, so it never has to be held in memory or
+    written to a temporary file first. Files added with
+    :func:`simplekml.KmzWriter.addfiles` that are larger than `threshold`
+    are deflated in a pool of worker threads (zlib releases the GIL while it
+    works) and copied into the archive already compressed, in the order they
+    were given. Files with an extension in `store` are stored as they are.
+
+    Args:
+      * path: the path of the KMZ to create
+      * store: tuple of lower case file extensions to store without compression (default :data:`simplekml.kmz.STORED_EXTENSIONS`)
+      * workers: int, number of threads compressing files, None for one per CPU (default None)
+      * threshold: int, files smaller than this many bytes are compressed in the calling thread (default 1 MB)
+
+    Usage::
+
+        import simplekml
+        kmz = simplekml.KmzWriter("Streamed.kmz")
+        doc = kmz.open("doc.kml")
+        stream = simplekml.KmlStream(doc, kmz=True)
+        stream.begin()
+        stream.write(simplekml.GxSoundCue(href="/data/narration.mp3"))
+        stream.close()
+        doc.close()
+        kmz.addfiles(stream.images)
+        kmz.close()
+    """
+
+    def __init__(self, path, store=STORED_EXTENSIONS, workers=None, threshold=1024 * 1024):
+        self._zf = zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED, allowZip64=True)
+        self._store = tuple(ext.lower() for ext in store or ())
+        self._workers = workers
+        self._threshold = threshold
+
+    def _zipinfo(self, arcname, path=None):
+        if path is None:
+            date_time = time.localtime(time.time())[:6]
+        else:
+            date_time = time.localtime(os.stat(path).st_mtime)[:6]
+        zinfo = zipfile.ZipInfo(arcname, date_time)
+        zinfo.external_attr = 0o600 << 16
+        return zinfo
+
+    def open(self, arcname):
+        """Returns a :class:`simplekml.KmzEntry` to write the file `arcname` into. It must be closed before anything else is added."""
+        return KmzEntry(self._zf, self._zipinfo(arcname))
+
+    def _writecompressed(self, arcname, path, result):
+        tmp, crc, file_size, compress_size = result
+        try:
+            zinfo = self._zipinfo(arcname, path)
+            zinfo.compress_type = zipfile.ZIP_DEFLATED
+            zinfo.flag_bits = 0x00
+            zinfo.header_offset = self._zf.fp.tell()
+            zinfo.CRC = crc
+            zinfo.file_size = file_size
+            zinfo.compress_size = compress_size
+            self._zf.fp.write(zinfo.FileHeader(file_size > zipfile.ZIP64_LIMIT or compress_size > zipfile.ZIP64_LIMIT))
+            shutil.copyfileobj(tmp, self._zf.fp, _CHUNK)
+            _register(self._zf, zinfo)
+        finally:
+            tmp.close()
+
+    def addfiles(self, paths, folder='files'):
+        """Adds the files at the given paths to the KMZ under `folder`, using only their base names."""
+        paths = list(paths)
+        store = [os.path.splitext(path)[1].lower() in self._store for path in paths]
+        large = [path for path, stored in zip(paths, store) if not stored and os.path.getsize(path) >= self._threshold]
+        pool = ThreadPool(self._workers) if len(large) > 1 else None
+        try:
+            # results come back in order, so the archive is written while the rest is still compressing
+            compressed = pool.imap(_compress, large) if pool is not None else None
+            large = set(large) if pool is not None else set()
+            for path, stored in zip(paths, store):
+                arcname = os.path.join(folder, os.path.split(path)[1])
+                if stored:
+                    self._zf.write(path, arcname, zipfile.ZIP_STORED)
+                elif path in large:
+                    self._writecompressed(arcname, path, next(compressed))
+                else:
+                    self._zf.write(path, arcname, zipfile.ZIP_DEFLATED)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+    def close(self):
+        """Writes the central directory and closes the KMZ."""
+        self._zf.close()
@@ -213,8 +213,6 @@ class ResourceMap(Kmlable):
         self._aliases.append(alias)
         return alias
 
-    def __str__(self):
-        buf = []
+    def _write(self, writer):
         for alias in self._aliases:
-            buf.append(alias.__str__())
-        return "".join(buf)
+            alias._write(writer)
@@ -34,11 +34,11 @@ class LinkSnippet(Snippet):
     def __init__(self, **kwargs):
         super(LinkSnippet, self).__init__(**kwargs)
 
-    def __str__(self):
+    def _write(self, writer):
         if self._kml['maxlines'] is not None:
-            return u'<linkSnippet maxLines="{0}">{1}</linkSnippet>'.format(self._kml['maxlines'],Kmlable._chrconvert(self._kml['content']))
+            writer.element('linkSnippet', Kmlable._chrconvert(self._kml['content']), [('maxLines', self._kml['maxlines'])])
         else:
-            return u'<linkSnippet>{0}</linkSnippet>'.format(Kmlable._chrconvert(self._kml['content']))
+            writer.element('linkSnippet', Kmlable._chrconvert(self._kml['content']))
 
 
 
@@ -231,10 +231,7 @@ class NetworkLinkControl(Kmlable):
     def update(self, update):
         self._kml['Update'] = update
 
-    def __str__(self):
-        buf = []
-        str = '<{0}>'.format(self.__class__.__name__)
-        buf.append(str)
-        buf.append(super(NetworkLinkControl, self).__str__())
-        buf.append("</{0}>".format(self.__class__.__name__))
-        return "".join(buf)
\ No newline at end of file
+    def _write(self, writer):
+        writer.start(self.__class__.__name__)
+        super(NetworkLinkControl, self)._write(writer)
+        writer.end(self.__class__.__name__)
\ No newline at end of file
@@ -0,0 +1,277 @@
+"""
+Copyright 2011-2014-2012 Kyle Lancaster
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Contact me at kyle.lan@gmail.com
+"""
+
+import re
+from xml.parsers import expat
+
+from simplekml.makeunicode import u
+
+_ENTITY = re.compile(r'&(#x[0-9a-fA-F]+|#[0-9]+|lt|gt|amp|quot|apos);')
+_ENTITIES = {'lt': '<', 'gt': '>', 'amp': '&', 'quot': '"', 'apos': "'"}
+_DECLARATION = u('<?xml version="1.0" encoding="UTF-8"?>')
+_START = u("<{0}{1}>")
+_END = u("</{0}>")
+_ELEMENT = u("<{0}{1}>{2}</{0}>")
+_VECTOR = u("<{0}{1} />")
+_LEAF = u("{0}<{1}{2}>{3}</{1}>{4}")
+_EMPTY = u("{0}<{1}{2}/>{3}")
+_OPEN = u("{0}<{1}{2}>{3}")
+_CLOSE = u("{0}</{1}>{2}")
+_CDATA = u("<![CDATA[{0}]]>")
+_ATTR = u(' {0}="{1}"')
+_VALUE = u("{0}")
+
+try:
+    _unichr = unichr
+except NameError:
+    _unichr = chr
+
+
+def _replaceentity(match):
+    name = match.group(1)
+    if name[0] == '#':
+        if name[1] == 'x':
+            return _unichr(int(name[2:], 16))
+        return _unichr(int(name[1:]))
+    return _ENTITIES[name]
+
+
+def _escape(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace("\"", "&quot;").replace(">", "&gt;")
+
+
+def _data(text):
+    """Returns escaped character data the way an xml writer escapes it once it has been parsed.
+
+    Text that holds markup that is not well formed is left as it is.
+    """
+    if '<' in text:
+        return text
+    if '&' in text:
+        text = _ENTITY.sub(_replaceentity, text)
+    elif '>' not in text and '"' not in text:
+        return text
+    return _escape(text)
+
+
+def _newlines(text):
+    """Normalises line ends the way an xml parser does."""
+    if '\r' in text:
+        return text.replace('\r\n', '\n').replace('\r', '\n')
+    return text
+
+
+def _attributes(attrs):
+    """Returns the attributes sorted by name, with their values normalised and escaped."""
+    if not attrs:
+        return ''
+    pairs = []
+    for name, value in attrs:
+        value = _newlines(_VALUE.format(value)).replace('\t', ' ').replace('\n', ' ')
+        pairs.append((name, _data(value)))
+    pairs.sort()
+    return "".join(_ATTR.format(name, value) for name, value in pairs)
+
+
+def _parse(markup):
+    """Returns the (event, value, attrs) of the elements, text and CDATA in markup given as a text value.
+
+    Such markup is the KML of a :class:`simplekml.Update`, or any text when
+    :func:`simplekml.Kml.parsetext` is off. Returns None if it is not well formed.
+    """
+    events = []
+    cdata = []
+
+    def start(tag, attrs):
+        events.append(('start', tag, [(name, _escape(value)) for name, value in attrs.items()]))
+
+    def end(tag):
+        events.append(('end', tag, None))
+
+    def characters(data):
+        if cdata:
+            cdata.append(data)
+        else:
+            events.append(('text', _escape(data), None))
+
+    def startcdata():
+        cdata.append(u(''))
+
+    def endcdata():
+        events.append(('cdata', u('').join(cdata), None))
+        del cdata[:]
+
+    parser = expat.ParserCreate()
+    parser.StartElementHandler = start
+    parser.EndElementHandler = end
+    parser.CharacterDataHandler = characters
+    parser.StartCdataSectionHandler = startcdata
+    parser.EndCdataSectionHandler = endcdata
+    try:
+        parser.Parse(u("<_>{0}</_>").format(markup).encode('utf-8'), True)
+    except expat.ExpatError:
+        return None
+    return events[1:-1]
+
+
+class KmlWriter(object):
+    """Writes the elements of a KML document as they are serialised, on a single line.
+
+    The serialisers of :class:`simplekml.base.Kmlable` describe the document
+    to a writer one start tag, end tag and text value at a time; text values
+    and attribute values are given already escaped. This writer puts them
+    together as they are, :class:`simplekml.pretty.PrettyWriter` indents them.
+
+    Args:
+      * write: a callable that receives each piece of output
+    """
+
+    def __init__(self, write):
+        self._write = write
+
+    def declaration(self):
+        """Writes the xml declaration."""
+        self._write(_DECLARATION)
+
+    def start(self, tag, attrs=()):
+        """Opens the element `tag`, `attrs` is a sequence of (name, value) pairs."""
+        self._write(_START.format(tag, "".join(_ATTR.format(name, value) for name, value in attrs)))
+
+    def end(self, tag):
+        """Closes the element `tag`."""
+        self._write(_END.format(tag))
+
+    def text(self, text):
+        """Writes a text value, which may hold CDATA sections."""
+        self._write(text)
+
+    def element(self, tag, text, attrs=()):
+        """Writes the element `tag` holding a single text value."""
+        self._write(_ELEMENT.format(tag, "".join(_ATTR.format(name, value) for name, value in attrs), text))
+
+    def vector(self, tag, attrs):
+        """Writes the element `tag` that only has attributes, such as a `<hotSpot>`."""
+        self._write(_VECTOR.format(tag, "".join(_ATTR.format(name, value) for name, value in attrs)))
+
+    def close(self):
+        """Writes anything still held back."""
+
+
+class PrettyWriter(KmlWriter):
+    """Indents a KML document as it is serialised, without building a document tree.
+
+    The output is the same as `xml.dom.minidom`'s `toprettyxml` with the
+    :class:`simplekml.base.KmlElement` patch: elements holding a single text
+    value stay on one line, empty elements are collapsed, attributes are sorted
+    and text is re-escaped. A start tag is held back until the writer knows
+    whether the element holds a single text value, nothing else is buffered.
+
+    Args:
+      * write: a callable that receives each piece of pretty output
+      * indent: the string added per level of depth (default four spaces)
+      * newl: the string written after each line (default "\\n")
+    """
+
+    def __init__(self, write, indent="    ", newl="\n"):
+        super(PrettyWriter, self).__init__(write)
+        self._indent = indent
+        self._newl = newl
+        self._indents = [u('')]
+        self._depth = 0
+        self._pendingtag = None
+        self._pendingattrs = None
+        self._pendingtext = None
+
+    def _indentation(self, depth):
+        while len(self._indents) <= depth:
+            self._indents.append(self._indents[-1] + self._indent)
+        return self._indents[depth]
+
+    def _flush(self):
+        """Writes a start tag that turned out to hold more than a single text value, and the text held back."""
+        if self._pendingtag is not None:
+            self._write(_OPEN.format(self._indentation(self._depth), self._pendingtag, self._pendingattrs, self._newl))
+            self._depth += 1
+            self._pendingtag = None
+        if self._pendingtext is not None:
+            self._write(_data(self._indentation(self._depth) + self._pendingtext + self._newl))
+            self._pendingtext = None
+
+    def _addtext(self, text):
+        if text:
+            self._pendingtext = text if self._pendingtext is None else self._pendingtext + text
+
+    def declaration(self):
+        self._write(_DECLARATION + self._newl)
+
+    def start(self, tag, attrs=()):
+        self._flush()
+        self._pendingtag = tag
+        self._pendingattrs = _attributes(attrs)
+
+    def end(self, tag):
+        if self._pendingtag is not None:
+            if self._pendingtext is None:
+                self._write(_EMPTY.format(self._indentation(self._depth), tag, self._pendingattrs, self._newl))
+            else:
+                self._write(_LEAF.format(self._indentation(self._depth), tag, self._pendingattrs, _data(self._pendingtext), self._newl))
+            self._pendingtag = None
+            self._pendingtext = None
+        else:
+            self._flush()
+            self._depth -= 1
+            self._write(_CLOSE.format(self._indentation(self._depth), tag, self._newl))
+
+    def text(self, text):
+        text = _newlines(_VALUE.format(text))
+        events = _parse(text) if '<' in text else None
+        if events is None:
+            self._addtext(text)
+            return
+        for event, value, attrs in events:
+            if event == 'start':
+                self.start(value, attrs)
+            elif event == 'end':
+                self.end(value)
+            elif event == 'text':
+                self._addtext(value)
+            else:
+                # a CDATA section is a node of its own, written as it is without indentation
+                self._flush()
+                self._write(_CDATA.format(value))
+
+    def element(self, tag, text, attrs=()):
+        text = _VALUE.format(text)
+        if self._pendingtag is not None or self._pendingtext is not None:
+            self._flush()
+        if '<' in text or '\r' in text:
+            self.start(tag, attrs)
+            self.text(text)
+            self.end(tag)
+        elif text:
+            self._write(_LEAF.format(self._indentation(self._depth), tag, _attributes(attrs), _data(text), self._newl))
+        else:
+            self._write(_EMPTY.format(self._indentation(self._depth), tag, _attributes(attrs), self._newl))
+
+    def vector(self, tag, attrs):
+        self.start(tag, attrs)
+        self.end(tag)
+
+    def close(self):
+        self._flush()
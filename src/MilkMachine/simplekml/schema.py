@@ -18,6 +18,7 @@ Contact me at kyle.lan@gmail.com
 """
 
 from simplekml.base import Kmlable, check
+from simplekml.makeunicode import u
 
 class SimpleField(Kmlable):
     """Custom field, forms part of a schema.
@@ -58,12 +59,11 @@ class SimpleField(Kmlable):
     def displayname(self, displayname):
         self._kml['displayName'] = displayname
 
-    def __str__(self):
-        buf = [u'<SimpleField type="{0}" name="{1}">'.format(self.type, Kmlable._chrconvert(self.name))]
+    def _write(self, writer):
+        writer.start('SimpleField', [('type', self.type), ('name', Kmlable._chrconvert(self.name))])
         if self.displayname is not None:
-            buf.append(u'<displayName>{0}</displayName>'.format(Kmlable._chrconvert(self.displayname)))
-        buf.append('</SimpleField>')
-        return "".join(buf)
+            writer.element('displayName', Kmlable._chrconvert(self.displayname))
+        writer.end('SimpleField')
 
 
 class GxSimpleArrayField(SimpleField):
@@ -77,13 +77,11 @@ class GxSimpleArrayField(SimpleField):
     def __init__(self, name=None, type='string', displayname=None):
         super(GxSimpleArrayField, self).__init__(name, type, displayname)
 
-    def __str__(self):
-        buf = ['<gx:SimpleArrayField type="{0}" name="{1}">'.format(self.type,
-                                                                    self.name)]
+    def _write(self, writer):
+        writer.start('gx:SimpleArrayField', [('type', self.type), ('name', self.name)])
         if self.displayname is not None:
-            buf.append('<displayName>{0}</displayName>'.format(self.displayname))
-        buf.append('</gx:SimpleArrayField>')
-        return "".join(buf)
+            writer.element('displayName', u("{0}").format(self.displayname))
+        writer.end('gx:SimpleArrayField')
 
 
 class SimpleData(Kmlable):
@@ -115,8 +113,8 @@ class SimpleData(Kmlable):
     def value(self, value):
         self._kml['value'] = value
 
-    def __str__(self):
-        return u'<SimpleData name="{0}">{1}</SimpleData>'.format(Kmlable._chrconvert(self.name), self.value)
+    def _write(self, writer):
+        writer.element('SimpleData', u("{0}").format(self.value), [('name', Kmlable._chrconvert(self.name))])
 
 
 class GxSimpleArrayData(Kmlable):
@@ -145,12 +143,11 @@ class GxSimpleArrayData(Kmlable):
         """Adds a value to the gxsimpledarraydata."""
         self.values.append(value)
 
-    def __str__(self):
-        buf = [u'<gx:SimpleArrayData name="{0}">'.format(Kmlable._chrconvert(self.name))]
+    def _write(self, writer):
+        writer.start('gx:SimpleArrayData', [('name', Kmlable._chrconvert(self.name))])
         for value in self.values:
-            buf.append("<gx:value>{0}</gx:value>".format(value))
-        buf.append("</gx:SimpleArrayData>")
-        return "".join(buf)
+            writer.element('gx:value', u("{0}").format(value))
+        writer.end('gx:SimpleArrayData')
 
 
 
@@ -209,18 +206,16 @@ class Schema(Kmlable):
         self.gxsimplearrayfields.append(GxSimpleArrayField(name, type, displayname))
         return self.gxsimplearrayfields[-1]
 
-    def __str__(self):
-        buf = []
+    def _write(self, writer):
         if self.name is not None:
-            buf.append(u'<Schema name="{0}" id="{1}">'.format(Kmlable._chrconvert(self.name), self._id))
+            writer.start('Schema', [('name', Kmlable._chrconvert(self.name)), ('id', self._id)])
         else:
-            buf.append('<Schema id="{0}">'.format(self._id))
+            writer.start('Schema', [('id', self._id)])
         for field in self.simplefields:
-            buf.append(field.__str__())
+            field._write(writer)
         for field in self.gxsimplearrayfields:
-            buf.append(field.__str__())
-        buf.append('</Schema>')
-        return "".join(buf)
+            field._write(writer)
+        writer.end('Schema')
 
 
 
@@ -263,14 +258,13 @@ class Data(Kmlable):
     def displayname(self, displayname):
         self._kml['displayName'] = displayname
 
-    def __str__(self):
-        buf = [u'<Data name="{0}">'.format(Kmlable._chrconvert(self.name))]
+    def _write(self, writer):
+        writer.start('Data', [('name', Kmlable._chrconvert(self.name))])
         if self._kml['value'] is not None:
-            buf.append("<value>{0}</value>".format(self._kml['value']))
+            writer.element('value', u("{0}").format(self._kml['value']))
         if self._kml['displayName'] is not None:
-            buf.append(u"<displayName>{0}</displayName>".format(Kmlable._chrconvert(self._kml['displayName'])))
-        buf.append('</Data>')
-        return "".join(buf)
+            writer.element('displayName', Kmlable._chrconvert(self._kml['displayName']))
+        writer.end('Data')
 
 
 
@@ -323,14 +317,13 @@ class SchemaData(Kmlable):
         self.gxsimplearraydatas.append(GxSimpleArrayData(name, value))
         return self.gxsimplearraydatas[-1]
 
-    def __str__(self):
-        buf = ['<SchemaData schemaUrl="{0}">'.format(self.schemaurl)]
+    def _write(self, writer):
+        writer.start('SchemaData', [('schemaUrl', self.schemaurl)])
         for field in self.simpledatas:
-            buf.append(field.__str__())
+            field._write(writer)
         for field in self.gxsimplearraydatas:
-            buf.append(field.__str__())
-        buf.append('</SchemaData>')
-        return "".join(buf)
+            field._write(writer)
+        writer.end('SchemaData')
 
 
 
@@ -370,10 +363,8 @@ class ExtendedData(Kmlable):
         self.datas.append(Data(name, value, displayname))
         return self.datas[-1]
 
-    def __str__(self):
-        buf = []
+    def _write(self, writer):
         for data in self.datas:
-            buf.append(data.__str__())
+            data._write(writer)
         if self._kml['schemaData_'] is not None:
-            buf.append(self._kml['schemaData_'].__str__())
-        return "".join(buf)
+            self._kml['schemaData_']._write(writer)
@@ -0,0 +1,182 @@
+"""
+Copyright 2011-2014-2012 Kyle Lancaster
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+Contact me at kyle.lan@gmail.com
+"""
+
+from simplekml.base import Kmlable
+from simplekml.featgeom import Document, Geometry
+from simplekml.makeunicode import u
+from simplekml.pretty import KmlWriter, PrettyWriter
+
+
+class KmlStream(object):
+    """Writes a KML document to a file handle one element at a time.
+
+    Unlike :class:`simplekml.Kml`, nothing is kept in memory once it has been
+    written, so the size of the document is only limited by the disk. Containers
+    (documents, folders and tours) are opened with the `begin` methods and
+    closed with :func:`simplekml.KmlStream.end`; features, geometries and tour
+    primitives are written in between with :func:`simplekml.KmlStream.write`.
+    A geometry's style is written inside its placemark.
+
+    Args:
+      * fileobj: a file handle opened in binary mode, the output is UTF-8
+      * kmz: bool, if True hrefs to local files are rewritten to `files/` and collected in :attr:`simplekml.KmlStream.images` (default False)
+      * format: bool, if True the KML is "prettyprinted" as it is written, the same as :func:`simplekml.Kml.save` (default True)
+
+    :attr:`simplekml.KmlStream.count` is the number of elements and
+    :attr:`simplekml.KmlStream.bytes` the number of bytes written so far.
+
+    Usage::
+
+        import simplekml
+        f = open("Stream.kml", "wb")
+        stream = simplekml.KmlStream(f)
+        stream.begin(simplekml.Document(name="Streamed"))
+        stream.begintour(simplekml.GxTour(name="A Tour"))
+        for i in range(1000000):
+            flyto = simplekml.GxFlyTo(gxduration=1)
+            flyto.camera.longitude = i * 0.0001
+            stream.write(flyto)
+        stream.end()
+        stream.beginfolder(simplekml.Folder(name="Points"))
+        stream.write(simplekml.Point(name="A Point", coords=[(1.0, 2.0)]))
+        stream.close()
+        f.close()
+
+    .. note::
+       The namespaces are written with the opening `<kml>` tag, so atom and xal
+       elements are only declared if they were serialised before
+       :func:`simplekml.KmlStream.begin` was called.
+    """
+
+    def __init__(self, fileobj, kmz=False, format=True):
+        self._fileobj = fileobj
+        self._kmz = kmz
+        # the writer's pieces are collected and written to the file once per call
+        self._pieces = []
+        self._writer = PrettyWriter(self._pieces.append) if format else KmlWriter(self._pieces.append)
+        self._closetags = []
+        self.count = 0
+        self.bytes = 0
+        self.images = set()
+
+    def _flush(self):
+        text = u('').join(self._pieces)
+        del self._pieces[:]
+        text = text.encode('utf-8')
+        self._fileobj.write(text)
+        self.bytes += len(text)
+
+    def _serialise(self, kmlable):
+        Kmlable._setkmz(self._kmz)
+        try:
+            kmlable._write(self._writer)
+            if self._kmz:
+                self.images.update(Kmlable._getimages())
+                Kmlable._clearimages()
+        finally:
+            Kmlable._setkmz(False)
+
+    def begin(self, document=None, hint=None):
+        """Writes the xml declaration, the `<kml>` tag and opens the given :class:`simplekml.Document`.
+
+        The document's own properties (name, camera, lookat, etc.) are written
+        immediately, any features already attached to it are not.
+        """
+        if document is None:
+            document = Document()
+        attrs = Kmlable._getnamespaceattrs()
+        if hint is not None:
+            attrs.append(('hint', hint))
+        self._writer.declaration()
+        self._writer.start('kml', attrs)
+        self._closetags.append(['kml'])
+        self.begincontainer(document)
+
+    def begincontainer(self, container):
+        """Opens the given :class:`simplekml.Document` or :class:`simplekml.Folder`, writing its own properties and styles."""
+        for stylemap in container.stylemaps:
+            container._addstyle(stylemap.normalstyle)
+            container._addstyle(stylemap.highlightstyle)
+        self._writer.start(container.__class__.__name__, [('id', container.id)])
+        for style in container.styles:
+            self._serialise(style)
+        for stylemap in container.stylemaps:
+            self._serialise(stylemap)
+        self._serialise(_Properties(container))
+        self._closetags.append([container.__class__.__name__])
+        self._flush()
+
+    def beginfolder(self, folder):
+        """Opens the given :class:`simplekml.Folder`, same as :func:`simplekml.KmlStream.begincontainer`."""
+        self.begincontainer(folder)
+
+    def begintour(self, tour):
+        """Opens the given :class:`simplekml.GxTour` and a `<gx:Playlist>` inside it.
+
+        Tour primitives written afterwards go into the playlist until
+        :func:`simplekml.KmlStream.end` closes both.
+        """
+        self._writer.start('gx:Tour')
+        self._serialise(_Properties(tour))
+        self._writer.start('gx:Playlist')
+        self._closetags.append(['gx:Playlist', 'gx:Tour'])
+        self._flush()
+
+    def write(self, kmlable):
+        """Writes a feature, geometry or tour primitive and forgets about it.
+
+        A geometry is written as its placemark, with the geometry's style inside the placemark.
+        """
+        if isinstance(kmlable, Geometry):
+            if kmlable._style is not None:
+                kmlable._placemark._addstyle(kmlable._style)
+            if kmlable._stylemap is not None:
+                kmlable._placemark._addstylemap(kmlable._stylemap)
+            kmlable = kmlable._placemark
+        self._serialise(kmlable)
+        self._flush()
+        self.count += 1
+
+    def writeall(self, kmlables):
+        """Writes every element produced by the given iterable or generator."""
+        for kmlable in kmlables:
+            self.write(kmlable)
+
+    def end(self):
+        """Closes the most recently opened container or tour."""
+        for tag in self._closetags.pop():
+            self._writer.end(tag)
+        self._flush()
+
+    def close(self):
+        """Closes everything that is still open, including the `<kml>` tag. The file handle is left open."""
+        while self._closetags:
+            self.end()
+        self._writer.close()
+        self._flush()
+
+
+class _Properties(object):
+    """Serialises only the properties of a feature, without its opening and closing tags or children."""
+
+    def __init__(self, kmlable):
+        self._kmlable = kmlable
+
+    def _write(self, writer):
+        Kmlable._write(self._kmlable, writer)
@@ -69,8 +69,10 @@ class Style(StyleSelector):
         self._kml["BalloonStyle"] = balloonstyle
         self._kml["ListStyle"] = liststyle
 
-    def __str__(self):
-        return '<Style id="{0}">{1}</Style>'.format(self._id, super(Style, self).__str__())
+    def _write(self, writer):
+        writer.start('Style', [('id', self._id)])
+        super(Style, self)._write(writer)
+        writer.end('Style')
       
     @property
     def iconstyle(self):
@@ -168,21 +170,20 @@ class StyleMap(StyleSelector):
         self.normalstyle = normalstyle
         self.highlightstyle = highlightstyle
 
-    def __str__(self):
-        buf = ['<StyleMap id="{0}">'.format(self._id),
-               super(StyleMap, self).__str__()]
+    def _write(self, writer):
+        writer.start('StyleMap', [('id', self._id)])
+        super(StyleMap, self)._write(writer)
         if self._pairnormal is not None:
-            buf.append("<Pair>")
-            buf.append("<key>normal</key>")
-            buf.append("<styleUrl>#{0}</styleUrl>".format(self._pairnormal._id))
-            buf.append("</Pair>")
+            writer.start('Pair')
+            writer.element('key', 'normal')
+            writer.element('styleUrl', "#{0}".format(self._pairnormal._id))
+            writer.end('Pair')
         if self._pairhighlight is not None:
-            buf.append("<Pair>")
-            buf.append("<key>highlight</key>")
-            buf.append("<styleUrl>#{0}</styleUrl>".format(self._pairhighlight._id))
-            buf.append("</Pair>")
-        buf.append("</StyleMap>")
-        return "".join(buf)
+            writer.start('Pair')
+            writer.element('key', 'highlight')
+            writer.element('styleUrl', "#{0}".format(self._pairhighlight._id))
+            writer.end('Pair')
+        writer.end('StyleMap')
 
     @property
     def normalstyle(self):
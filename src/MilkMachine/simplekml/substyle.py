@@ -63,12 +63,10 @@ class ColorStyle(Kmlable):
     def colormode(self, colormode):
         self._kml["colorMode"] = colormode
         
-    def __str__(self):
-        buf = []
-        buf.append('<{0} id="{1}">'.format(self.__class__.__name__, self._id))
-        buf.append(super(ColorStyle, self).__str__())
-        buf.append("</{0}>".format(self.__class__.__name__))
-        return "".join(buf)
+    def _write(self, writer):
+        writer.start(self.__class__.__name__, [('id', self._id)])
+        super(ColorStyle, self)._write(writer)
+        writer.end(self.__class__.__name__)
 
 
 class LineStyle(ColorStyle):
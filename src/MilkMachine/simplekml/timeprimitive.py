@@ -76,11 +76,10 @@ class TimeSpan(TimePrimitive):
     def end(self, end):
         self._kml['end'] = end
 
-    def __str__(self):
-        buf = ['<TimeSpan id="{0}">'.format(self._id),
-               super(TimeSpan, self).__str__(),
-               '</TimeSpan>'.format(self._id)]
-        return "".join(buf)
+    def _write(self, writer):
+        writer.start('TimeSpan', [('id', self._id)])
+        super(TimeSpan, self)._write(writer)
+        writer.end('TimeSpan')
 
 
 class GxTimeSpan(TimeSpan):
@@ -111,11 +110,10 @@ class GxTimeSpan(TimeSpan):
     def __init__(self, **kwargs):
         super(GxTimeSpan, self).__init__(**kwargs)
 
-    def __str__(self):
-        buf = ['<gx:TimeSpan id="{0}">'.format(self._id),
-               super(TimeSpan, self).__str__(),
-               '</gx:TimeSpan>'.format(self._id)]
-        return "".join(buf)
+    def _write(self, writer):
+        writer.start('gx:TimeSpan', [('id', self._id)])
+        super(TimeSpan, self)._write(writer)
+        writer.end('gx:TimeSpan')
 
 
 class TimeStamp(TimePrimitive):
@@ -146,11 +144,10 @@ class TimeStamp(TimePrimitive):
     def when(self, when):
         self._kml['when'] = when
 
-    def __str__(self):
-        buf = ['<TimeStamp id="{0}">'.format(self._id),
-               super(TimeStamp, self).__str__(),
-               '</TimeStamp>'.format(self._id)]
-        return "".join(buf)
+    def _write(self, writer):
+        writer.start('TimeStamp', [('id', self._id)])
+        super(TimeStamp, self)._write(writer)
+        writer.end('TimeStamp')
 
 
 class GxTimeStamp(TimeStamp):
@@ -181,8 +178,7 @@ class GxTimeStamp(TimeStamp):
     def __init__(self, **kwargs):
         super(GxTimeStamp, self).__init__(**kwargs)
 
-    def __str__(self):
-        buf = ['<gx:TimeStamp id="{0}">'.format(self._id),
-               super(TimeStamp, self).__str__(),
-               '</gx:TimeStamp>'.format(self._id)]
-        return "".join(buf)
+    def _write(self, writer):
+        writer.start('gx:TimeStamp', [('id', self._id)])
+        super(TimeStamp, self)._write(writer)
+        writer.end('gx:TimeStamp')
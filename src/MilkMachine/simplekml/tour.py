@@ -69,11 +69,10 @@ class GxSoundCue(GxTourPrimitive):
     def gxdelayedstart(self, gxdelayedstart):
         self._kml['gx:delayedStart'] = gxdelayedstart
 
-    def __str__(self):
-        buf = ['<gx:SoundCue id="{0}">'.format(self._id),
-               super(GxSoundCue, self).__str__(),
-               '</gx:SoundCue>'.format(self._id)]
-        return "".join(buf)
+    def _write(self, writer):
+        writer.start('gx:SoundCue', [('id', self._id)])
+        super(GxSoundCue, self)._write(writer)
+        writer.end('gx:SoundCue')
 
 
 class GxTourControl(GxTourPrimitive):
@@ -95,11 +94,10 @@ class GxTourControl(GxTourPrimitive):
     def gxplaymode(self, gxplaymode):
         self._kml['gx:playMode'] = gxplaymode
 
-    def __str__(self):
-        buf = ['<gx:TourControl id="{0}">'.format(self._id),
-               super(GxTourControl, self).__str__(),
-               '</gx:TourControl>'.format(self._id)]
-        return "".join(buf)
+    def _write(self, writer):
+        writer.start('gx:TourControl', [('id', self._id)])
+        super(GxTourControl, self)._write(writer)
+        writer.end('gx:TourControl')
 
 
 class GxWait(GxTourPrimitive):
@@ -121,10 +119,10 @@ class GxWait(GxTourPrimitive):
     def gxduration(self, gxduration):
         self._kml['gx:duration'] = gxduration
 
-    def __str__(self):
-        buf = ['<gx:Wait id="{0}">'.format(self._id),
-               super(GxWait, self).__str__(), '</gx:Wait>'.format(self._id)]
-        return "".join(buf)
+    def _write(self, writer):
+        writer.start('gx:Wait', [('id', self._id)])
+        super(GxWait, self)._write(writer)
+        writer.end('gx:Wait')
 
 
 class GxFlyTo(GxTourPrimitive):
@@ -199,11 +197,10 @@ class GxFlyTo(GxTourPrimitive):
         self._kml['Camera'] = None
         self._kml['LookAt'] = lookat
 
-    def __str__(self):
-        buf = ['<gx:FlyTo id="{0}">'.format(self._id),
-               super(GxFlyTo, self).__str__(),
-               '</gx:FlyTo>'.format(self._id)]
-        return "".join(buf)
+    def _write(self, writer):
+        writer.start('gx:FlyTo', [('id', self._id)])
+        super(GxFlyTo, self)._write(writer)
+        writer.end('gx:FlyTo')
 
 
 class Update(Kmlable):
@@ -307,11 +304,10 @@ class GxAnimatedUpdate(GxTourPrimitive):
     def update(self, update):
         self._kml['Update'] = update
 
-    def __str__(self):
-        buf = ['<gx:AnimatedUpdate id="{0}">'.format(self._id),
-               super(GxAnimatedUpdate, self).__str__(),
-               '</gx:AnimatedUpdate>'.format(self._id)]
-        return "".join(buf)
+    def _write(self, writer):
+        writer.start('gx:AnimatedUpdate', [('id', self._id)])
+        super(GxAnimatedUpdate, self)._write(writer)
+        writer.end('gx:AnimatedUpdate')
 
 
 class GxPlaylist(Kmlable):
@@ -380,12 +376,11 @@ class GxPlaylist(Kmlable):
         self.addgxtourprimitive(gxwait)
         return gxwait
 
-    def __str__(self):
-        buf = ["<gx:Playlist>"]
+    def _write(self, writer):
+        writer.start('gx:Playlist')
         for gxtourprimitive in self.gxtourprimitives:
-            buf.append(gxtourprimitive.__str__())
-        buf.append("</gx:Playlist>")
-        return "".join(buf)
+            gxtourprimitive._write(writer)
+        writer.end('gx:Playlist')
 
 
 class GxTour(GxTourPrimitive):
@@ -471,10 +466,9 @@ class GxTour(GxTourPrimitive):
         self.gxplaylists.append(gxplaylist)
         return gxplaylist
 
-    def __str__(self):
-        buf = ["<gx:Tour>",
-               super(GxTour, self).__str__()]
+    def _write(self, writer):
+        writer.start('gx:Tour')
+        super(GxTour, self)._write(writer)
         for gxplaylist in self.gxplaylists:
-            buf.append(gxplaylist.__str__())
-        buf.append("</gx:Tour>")
-        return "".join(buf)
+            gxplaylist._write(writer)
+        writer.end('gx:Tour')
@@ -0,0 +1,54 @@
+import unittest
+
+import json
+import os
+import shutil
+import tempfile
+
+import MMBatch
+
+class TestMMBatch(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def writeSpec(self, spec):
+        path = os.path.join(self.tmp, 'tour.json')
+        with open(path, 'wb') as specfile:
+            json.dump(spec, specfile)
+        return path
+
+    def testLoadSpecDefaults(self):
+        spec = MMBatch.loadSpec(self.writeSpec({'camera': {'range': 40}}))
+        self.assertEqual(spec['camera']['mode'], 'follow')
+        self.assertEqual(spec['camera']['range'], 40)
+        self.assertEqual(spec['camera']['smoother'], 10)
+        self.assertEqual(spec['tour']['flyToMode'], 'smooth')
+        self.assertIsNone(spec['durationLimits'])
+        self.assertIsNone(spec['simplify'])
+        self.assertFalse(spec['gxTrack'])
+
+        spec = MMBatch.loadSpec(self.writeSpec({'camera': {'mode': 'static', 'tilt': 60}}))
+        self.assertEqual(spec['camera'], {'mode': 'static', 'tilt': 60})
+        self.assertRaises(ValueError, MMBatch.loadSpec, self.writeSpec({'camera': {'mode': 'orbit'}}))
+        self.assertEqual(MMBatch.loadSpec(self.writeSpec({'simplify': {'tolerance': 5}}))['simplify'], {'tolerance': 5})
+        self.assertRaises(ValueError, MMBatch.loadSpec, self.writeSpec({'simplify': {'tolerance': 5, 'method': 'reumann'}}))
+
+    def testBatchExport(self):
+        # the CSV is imported to a working copy next to it, so work on a copy
+        trackPath = os.path.join(self.tmp, 'amsterdam-yymmdd.csv')
+        shutil.copy(os.path.join(os.path.abspath("../../sampledata/"), "amsterdam-yymmdd.csv"), trackPath)
+        specPath = self.writeSpec({'tour': {'name': 'Batch Tour'}, 'camera': {'smoother': 2}, 'durationLimits': {'maximum': 5}})
+
+        outputDir = os.path.join(self.tmp, 'tours')
+        self.assertEqual(MMBatch.main([specPath, trackPath, '--output-dir', outputDir, '--format', 'kmz']), 0)
+        self.assertTrue(os.path.exists(os.path.join(outputDir, 'amsterdam-yymmdd.kmz')))
+
+        # a track that can not be imported fails without stopping the others
+        self.assertEqual(MMBatch.main([specPath, trackPath, os.path.join(self.tmp, 'missing.gpx'), '--output-dir', outputDir, '--jobs', '2']), 1)
+        self.assertTrue(os.path.exists(os.path.join(outputDir, 'amsterdam-yymmdd.kml')))
+
+if __name__ == '__main__':
+    unittest.main()
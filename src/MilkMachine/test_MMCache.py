@@ -0,0 +1,107 @@
+import unittest
+
+import math
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+
+import MMCache
+import MMUtm
+
+class MockSignal:
+    def connect(self, slot):
+        pass
+
+class MockPoint:
+    def __init__(self, x, y):
+        self.point = (x, y)
+
+    def asPoint(self):
+        return self.point
+
+class MockLayer:
+    # a working copy on disk as far as MMCache can tell, without QGIS
+    def __init__(self, path):
+        self.path = path
+        self.layerModified = MockSignal(); self.editingStopped = MockSignal()
+        self.updatedFields = MockSignal(); self.destroyed = MockSignal()
+
+    def id(self):
+        return 'track'
+
+    def providerType(self):
+        return 'ogr'
+
+    def source(self):
+        return self.path + '|layername=track'
+
+    def isModified(self):
+        return False
+
+    def fieldNameIndex(self, name):
+        return {'datetime': 2, 'altitude': 11}.get(name, -1)
+
+class TestMMCache(unittest.TestCase):
+    def setUp(self):
+        MMCache.clearCache()
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, 'track.gpkg')
+        with open(self.path, 'wb') as gpkg:
+            gpkg.write(b'working copy')
+        count = 50
+        easting = 500000 + np.cumsum(np.arange(count) % 7)
+        northing = 4400000 + np.cumsum(np.arange(count) % 3)
+        longitude, latitude = MMUtm.fromUtm(easting.astype(np.float64), northing.astype(np.float64), 18, False)
+        epoch = 1402051128000000 + np.arange(count, dtype=np.int64) * 500000
+        self.track = MMCache.buildTrack(np.arange(1, count + 1), longitude, latitude, np.arange(count) * 0.5, epoch)
+
+    def tearDown(self):
+        MMCache.clearCache()
+        shutil.rmtree(self.tmp)
+
+    def testSpeeds(self):
+        track = self.track
+        for row in range(1, len(track)):
+            x0, y0 = MMUtm.toUtm(track['lon'][row - 1:row], track['lat'][row - 1:row], 18, False)
+            x1, y1 = MMUtm.toUtm(track['lon'][row:row + 1], track['lat'][row:row + 1], 18, False)
+            self.assertAlmostEqual(track['speed'][row], math.hypot(x1[0] - x0[0], y1[0] - y0[0]) / 0.5, places=6)
+        self.assertEqual(track['speed'][0], 0.0)
+        self.assertEqual(MMCache.rows(track, [3, 1]).tolist(), [2, 0])
+        self.assertRaises(KeyError, MMCache.rows, track, [0])
+
+    def testSidecar(self):
+        layer = MockLayer(self.path)
+        cachePath = MMCache.cachePath(layer)
+        self.assertEqual(cachePath, os.path.join(self.tmp, 'track.mmtrack.npy'))
+        MMCache._save(cachePath, self.track)
+
+        track = MMCache.layerTrack(layer)
+        self.assertIsInstance(track, np.memmap)
+        np.testing.assert_array_equal(track, self.track)
+        self.assertIs(MMCache.layerTrack(layer), track)
+
+        # a batch edit is copied into the mapped rows
+        MMCache.update(layer, {4: {2: u'2014/06/06 11:00:00 000000', 11: None}, 5: {0: u'name'}}, {6: MockPoint(-75.0, 40.0)})
+        track = MMCache.layerTrack(layer)
+        self.assertEqual(track['epoch'][3], 1402052400000000)
+        self.assertTrue(np.isnan(track['alt'][3]))
+        self.assertEqual((track['lon'][5], track['lat'][5]), (-75.0, 40.0))
+        np.testing.assert_allclose(track['speed'], MMCache.trackSpeeds(track['lon'], track['lat'], track['epoch']))
+        # the read only map sees the file as written, NaN altitude included
+        self.assertEqual(np.load(cachePath).tobytes(), np.asarray(track).tobytes())
+
+        # a working copy saved after the sidecar makes it stale, as does an unknown feature
+        self.assertTrue(MMCache._isFresh(cachePath))
+        future = time.time() + 10
+        os.utime(self.path, (future, future))
+        self.assertFalse(MMCache._isFresh(cachePath))
+        os.utime(cachePath, (future + 10, future + 10))
+        self.assertTrue(MMCache._isFresh(cachePath))
+        MMCache.update(layer, {}, {999: MockPoint(0.0, 0.0)})
+        self.assertFalse(MMCache._isFresh(cachePath))
+
+if __name__ == '__main__':
+    unittest.main()
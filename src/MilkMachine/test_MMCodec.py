@@ -0,0 +1,48 @@
+import unittest
+
+import MMCodec
+
+class TestMMCodec(unittest.TestCase):
+    def testRoundTrip(self):
+        camera = dict.fromkeys(MMCodec.CAMERA_KEYS)
+        camera.update({'longitude': -75.172239, 'latitude': 39.965949, 'altitude': u'40', 'altitudemode': u'relativeToModel',
+                       'heading': 359.9, 'range': u'', 'streetview': True, 'hoffset': 5.0})
+        self.assertEqual(MMCodec.decode('camera', MMCodec.encode('camera', camera)), camera)
+
+    def testSeparatorAndPercentInStrings(self):
+        flyto = {'name': u'a|b %7C 100%', 'flyToMode': u'smooth', 'duration': None}
+        self.assertEqual(MMCodec.decode('flyto', MMCodec.encode('flyto', flyto)), flyto)
+
+    def testLegacyCameraExpandsKeys(self):
+        camera = MMCodec.decode('camera', str({'a': -75.1, 'c': 39.9, 'i': 90}))
+        self.assertEqual((camera['longitude'], camera['latitude'], camera['heading']), (-75.1, 39.9, 90))
+        self.assertIsNone(camera['hoffset'])
+
+    def testLegacyModel(self):
+        model = {'link': u'/tmp/model.dae', 'longitude': u'', 'latitude': u'', 'altitude': 1.5, 'scale': u'2'}
+        self.assertEqual(MMCodec.decode('model', str(model)), model)
+
+    def testLegacyIsNotEvaluated(self):
+        self.assertRaises(ValueError, MMCodec.decode, 'model', "__import__('os').getcwd()")
+
+    def testEmpty(self):
+        self.assertIsNone(MMCodec.decode('camera', u''))
+        self.assertIsNone(MMCodec.decode('camera', None))
+
+    def testCacheReturnsCopies(self):
+        value = MMCodec.encode('labelstyle', {'color': u'red', 'colormode': None, 'scale': 0.8})
+        first = MMCodec.decode('labelstyle', value)
+        first['color'] = u'blue'
+        self.assertEqual(MMCodec.decode('labelstyle', value)['color'], u'red')
+
+    def testEncodedIsShorter(self):
+        camera = dict.fromkeys(MMCodec.CAMERA_KEYS)
+        camera.update({'longitude': -75.172239, 'latitude': 39.965949, 'altitude': 40.0, 'heading': 180.0, 'tilt': u'48'})
+        legacy = str(dict((letter, camera[key]) for letter, key in MMCodec.cameraBack.iteritems()))
+        self.assertLess(len(MMCodec.encode('camera', camera)), len(legacy) / 2)
+
+    def testUnknownKey(self):
+        self.assertRaises(KeyError, MMCodec.encode, 'flyto', {'name': u'Tour', 'speed': 1})
+
+if __name__ == '__main__':
+    unittest.main()
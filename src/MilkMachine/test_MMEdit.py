@@ -0,0 +1,86 @@
+import unittest
+
+from qgis.core import QgsApplication, QgsFeature, QgsField, QgsGeometry, QgsPoint, QgsVectorLayer
+from PyQt4.QtCore import QVariant
+
+import MMEdit
+
+def memoryLayer(count):
+    layer = QgsVectorLayer("Point?crs=EPSG:4326", "edit", "memory")
+    layer.dataProvider().addAttributes([QgsField("camera", QVariant.String), QgsField("altitude", QVariant.Double)])
+    layer.updateFields()
+    features = []
+    for i in range(count):
+        feature = QgsFeature(layer.pendingFields())
+        feature.setAttributes(['', float(i)])
+        feature.setGeometry(QgsGeometry.fromPoint(QgsPoint(-75.0 + i * 0.001, 40.0)))
+        features.append(feature)
+    layer.dataProvider().addFeatures(features)
+    return layer
+
+def column(layer, idx):
+    return [f.attributes()[idx] for f in layer.getFeatures()]
+
+class TestMMEdit(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        QgsApplication.setPrefixPath("/usr/share/qgis", True)
+        cls.qgs = QgsApplication([], False)
+        cls.qgs.initQgis()
+
+    def testCommit(self):
+        layer = memoryLayer(100)
+        edit = MMEdit.BatchEdit(layer, 'Camera Editing')
+        for f in layer.getFeatures():
+            edit.changeAttributeValues(f.id(), {0: 'MM1|i{0}'.format(f.id()), 1: 10.0})
+        self.assertEqual(len(edit), 100)
+        command = edit.commit()
+        self.assertIsNotNone(command)
+        self.assertEqual(len(edit), 0)
+        self.assertEqual(column(layer, 1), [10.0] * 100)
+        self.assertEqual(column(layer, 0), ['MM1|i{0}'.format(f.id()) for f in layer.getFeatures()])
+
+    def testUndoRedo(self):
+        layer = memoryLayer(10)
+        layer.startEditing()
+        fids = layer.allFeatureIds()
+        edit = MMEdit.BatchEdit(layer, 'Z Scaling')
+        for fid in fids:
+            edit.changeAttributeValue(fid, 1, 5.0)
+        edit.changeGeometry(fids[0], QgsGeometry.fromPoint(QgsPoint(-74.0, 41.0)))
+        edit.commit()
+        self.assertEqual(layer.undoStack().count(), 1)
+        self.assertEqual(column(layer, 1), [5.0] * 10)
+
+        layer.undoStack().undo()
+        self.assertEqual(column(layer, 1), [float(i) for i in range(10)])
+        self.assertEqual(layer.getFeatures().next().geometry().asPoint(), QgsPoint(-75.0, 40.0))
+
+        layer.undoStack().redo()
+        self.assertEqual(column(layer, 1), [5.0] * 10)
+        self.assertEqual(layer.getFeatures().next().geometry().asPoint(), QgsPoint(-74.0, 41.0))
+        # rolling back unwinds the undo stack, the batch with it
+        layer.rollBack()
+        self.assertEqual(column(layer, 1), [float(i) for i in range(10)])
+
+    def testPendingBufferEdits(self):
+        layer = memoryLayer(10)
+        layer.startEditing()
+        fids = layer.allFeatureIds()
+        layer.changeAttributeValue(fids[0], 1, 99.0)
+        edit = MMEdit.BatchEdit(layer, 'Z Scaling')
+        for fid in fids:
+            edit.changeAttributeValue(fid, 1, 5.0)
+        # the buffer has an edit of the first feature, so the batch goes through the buffer
+        self.assertIsNone(edit.commit())
+        self.assertEqual(column(layer, 1), [5.0] * 10)
+        self.assertEqual([f.attributes()[1] for f in layer.dataProvider().getFeatures()], [float(i) for i in range(10)])
+        self.assertTrue(layer.commitChanges())
+        self.assertEqual([f.attributes()[1] for f in layer.dataProvider().getFeatures()], [5.0] * 10)
+
+    def testEmpty(self):
+        layer = memoryLayer(1)
+        self.assertIsNone(MMEdit.BatchEdit(layer, 'nothing').commit())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -3,10 +3,14 @@ import unittest
 from datetime import datetime
 import logging
 import os
+import xml.dom.minidom
+
+import numpy as np
 
 from qgis.core import QgsApplication, QgsVectorLayer
 from MMImport import loadCSVLayer
-from MMExport import exportToFile, makeCoordinateReferenceSystem, wgs84LatLonToUTMZone
+from MMExport import ExportCancelled, exportToFile, flyToDurations, makeCoordinateReferenceSystem, trackRuns, wgs84LatLonToUTMZone, writeTrack
+from MMTrack import TrackColumns, readLayer
 
 import test_MMImport
 
@@ -81,6 +85,78 @@ class TestMMExport(unittest.TestCase):
         self.assertIsNotNone(crs)
         self.assertTrue(crs.isValid())
 
+    def testFlyToDurations(self):
+        epoch = np.array([0, 1000000, 1500000, 2500000], dtype=np.int64)
+        self.assertEqual(flyToDurations(epoch).tolist(), [1.0, 0.5, 1.0, 1.0])
+        self.assertEqual(flyToDurations(epoch[:1]).tolist(), [0.0])
+
+    def testFlyToDurationsLimits(self):
+        # a point out of order, then a 10 minute pause in the recording
+        epoch = np.array([0, 1000000, 500000, 1500000, 601500000, 602500000], dtype=np.int64)
+        self.assertEqual(flyToDurations(epoch).tolist(), [1.0, 0.0, 1.0, 600.0, 1.0, 1.0])
+        self.assertEqual(flyToDurations(epoch, minimum=0.1, maximum=5).tolist(), [1.0, 0.1, 1.0, 5.0, 1.0, 1.0])
+        self.assertEqual(flyToDurations(epoch, minimum=0.1, gap=60).tolist(), [1.0, 0.1, 1.0, 1.0, 1.0, 1.0])
+
+    def testWriteTrackProgressAndCancel(self):
+        QgsApplication.setPrefixPath("/usr/share/qgis", True)
+        qgs = QgsApplication([], False)
+        # load providers
+        qgs.initQgis()
+
+        aroundtheblockPath = os.path.join(os.path.abspath("../../sampledata/"), "amsterdam-yymmdd.csv")
+        logger = test_MMImport.mockLogger()
+        messageBar = test_MMImport.MockMessageBar(logger)
+        layer = loadCSVLayer(
+            dateFormat='yyyy/mm/dd',
+            gpsPath=aroundtheblockPath,
+            logger=logger,
+            mainWindow=None,
+            messageBar=messageBar,
+            messageBox=test_MMImport.MockMessageBox
+        )
+        track = readLayer(layer, test_MMImport.field_indices(layer))
+
+        calls = []
+        writeTrack("amsterdam-yymmdd-progress.kml", track, None, 0, logger, progress=lambda *args: calls.append(args))
+        self.assertEqual(calls[0], (0, 3 * len(track), 0))
+        self.assertEqual(calls[-1], (3 * len(track), 3 * len(track), os.path.getsize("amsterdam-yymmdd-progress.kml")))
+
+        def cancel(rows, total, written):
+            raise ExportCancelled()
+        self.assertRaises(ExportCancelled, writeTrack, "amsterdam-yymmdd-cancelled.kmz", track, None, 0, logger, progress=cancel)
+        self.assertFalse(os.path.exists("amsterdam-yymmdd-cancelled.kmz"))
+
+    def testWriteTrackGxTrack(self):
+        logger = test_MMImport.mockLogger()
+        red = {'color': 'red', 'transparency': None, 'colormode': None, 'scale': 1.5, 'heading': None, 'icon': None, 'hotspot': None}
+        blue = dict(red, color='blue')
+        count = 6
+        track = TrackColumns(
+            fids=np.arange(1, count + 1), x=-75.17 + np.arange(count) * 1e-4, y=39.96 + np.arange(count) * 1e-4,
+            altitude=np.full(count, np.nan), epoch=1402051128000000 + np.arange(count, dtype=np.int64) * 1000000,
+            description=[u''] * count, camera=[None] * count, lookat=[None] * count, flyto=[None] * count,
+            iconstyle=[red, dict(red), None, red, blue, red], labelstyle=[None] * count, model=[None] * count)
+
+        styles, runs = trackRuns(track)
+        self.assertEqual(len(styles), 3)
+        self.assertIsNone(styles[1])
+        self.assertEqual(runs, [(0, 0, 2), (1, 2, 3), (0, 3, 4), (2, 4, 5), (0, 5, 6)])
+
+        writeTrack("gxtrack.kml", track, None, 0, logger, gxtrack=True)
+        dom = xml.dom.minidom.parse("gxtrack.kml")
+        folder = [f for f in dom.getElementsByTagName('Folder') if f.getElementsByTagName('name')[0].firstChild.data == 'Points'][0]
+        placemarks = folder.getElementsByTagName('Placemark')
+        self.assertEqual(len(placemarks), 3)
+        # the red points are one placemark and style, with a track for each of their runs
+        self.assertEqual(len(placemarks[0].getElementsByTagName('Style')), 1)
+        self.assertEqual(len(placemarks[0].getElementsByTagName('gx:MultiTrack')), 1)
+        self.assertEqual(len(placemarks[0].getElementsByTagName('gx:Track')), 3)
+        self.assertEqual(len(placemarks[1].getElementsByTagName('Style')), 0)
+        self.assertEqual(len(folder.getElementsByTagName('when')), count)
+        self.assertEqual(len(folder.getElementsByTagName('gx:coord')), count)
+        self.assertEqual(placemarks[0].getElementsByTagName('when')[0].firstChild.data, '2014-06-06T10:38:48.000000Z')
+        self.assertEqual(placemarks[1].getElementsByTagName('gx:coord')[0].firstChild.data, '-75.1698 39.9602 0.0')
+
     def testExportToFileWithCameraOffset(self):
         QgsApplication.setPrefixPath("/usr/share/qgis", True)
         qgs = QgsApplication([], False)
@@ -0,0 +1,135 @@
+import unittest
+
+import numpy as np
+
+import MMUtm
+from MMFilter import kalmanSmooth, kalmanSmoothTrack, movingAverage, noiseOf, splineSmooth, splineSmoothTrack
+
+def windowMeans(values, window):
+    # the loop filtering_apply ran, one np.mean per window with the ends kept
+    pad = (window - 1) // 2
+    result = list(values[:pad])
+    for i in range(len(values) - window + 1):
+        result.append(np.mean(values[i:i + window]))
+    result.extend(values[len(values) - pad:])
+    return np.array(result)
+
+def rtsSmooth(values, seconds, measurementError, acceleration):
+    # the textbook filter and smoother, one 2x2 matrix product at a time
+    r = measurementError ** 2; q = acceleration ** 2
+    H = np.array([[1.0, 0.0]])
+    x = np.array([values[0], 0.0]); P = np.diag([r, 1e4])
+    filtered = [(x, P)]; predicted = []
+    for k in range(1, len(values)):
+        dt = max(seconds[k] - seconds[k - 1], 0.0)
+        F = np.array([[1.0, dt], [0.0, 1.0]])
+        Q = q * np.array([[dt ** 3 / 3, dt ** 2 / 2], [dt ** 2 / 2, dt]])
+        xp = F.dot(x); Pp = F.dot(P).dot(F.T) + Q
+        K = Pp[:, 0] / (Pp[0, 0] + r)
+        x = xp + K * (values[k] - xp[0]); P = (np.eye(2) - np.outer(K, H)).dot(Pp)
+        filtered.append((x, P)); predicted.append((F, xp, Pp))
+    smoothed = [filtered[-1][0]]
+    for k in range(len(values) - 2, -1, -1):
+        (x, P), (F, xp, Pp) = filtered[k], predicted[k]
+        C = P.dot(F.T).dot(np.linalg.inv(Pp))
+        smoothed.insert(0, x + C.dot(smoothed[0] - xp))
+    return np.array([s[0] for s in smoothed])
+
+class TestMMFilter(unittest.TestCase):
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self.x = -75.17 + np.cumsum(random.normal(0, 0.0001, 1000))
+        self.y = 39.96 + np.cumsum(random.normal(0, 0.0001, 1000))
+        self.z = 10 + np.cumsum(random.normal(0, 0.5, 1000))
+
+    def testMatchesWindowMeans(self):
+        for window in (1, 3, 11, 101):
+            for column in (self.x, self.y, self.z):
+                np.testing.assert_allclose(movingAverage(column, window), windowMeans(column, window), rtol=0, atol=1e-10)
+
+    def testColumnsTogether(self):
+        xyz = np.column_stack([self.x, self.y, self.z])
+        smoothed = movingAverage(xyz, 7)
+        self.assertEqual(smoothed.shape, xyz.shape)
+        for i, column in enumerate((self.x, self.y, self.z)):
+            np.testing.assert_allclose(smoothed[:, i], movingAverage(column, 7), rtol=0, atol=1e-12)
+
+    def testPaddingModes(self):
+        values = np.array([1.0, 2.0, 4.0, 8.0])
+        np.testing.assert_allclose(movingAverage(values, 3, 'keep'), [1.0, 7.0 / 3, 14.0 / 3, 8.0])
+        np.testing.assert_allclose(movingAverage(values, 3, 'edge'), [4.0 / 3, 7.0 / 3, 14.0 / 3, 20.0 / 3])
+        np.testing.assert_allclose(movingAverage(values, 3, 'reflect'), [5.0 / 3, 7.0 / 3, 14.0 / 3, 16.0 / 3])
+
+    def testInvalid(self):
+        self.assertRaises(ValueError, movingAverage, self.x, 4)
+        self.assertRaises(ValueError, movingAverage, self.x, 3, 'wrap')
+
+    def testKalmanMatchesRts(self):
+        random = np.random.RandomState(1)
+        seconds = np.cumsum(random.uniform(0.5, 3, 400))
+        # a repeated and an out of order time
+        seconds[100] = seconds[99]; seconds[200] = seconds[199] - 1
+        easting = 500000 + self.z[:400] * 10
+        np.testing.assert_allclose(kalmanSmooth(easting, seconds, 3.0, 0.5), rtsSmooth(easting, seconds, 3.0, 0.5), rtol=0, atol=1e-8)
+
+        # a steady interval with a gap, where the gains are reused once they settle
+        seconds = np.arange(3000.0); seconds[1000:] += 30
+        easting = 500000 + np.cumsum(random.normal(0, 5, 3000))
+        np.testing.assert_allclose(kalmanSmooth(easting, seconds), rtsSmooth(easting, seconds, 5.0, 1.0), rtol=0, atol=1e-8)
+
+    def testKalmanColumnsTogether(self):
+        seconds = np.arange(1000.0)
+        xyz = np.column_stack([self.x, self.y, self.z]) * 1000
+        smoothed = kalmanSmooth(xyz, seconds)
+        self.assertEqual(smoothed.shape, xyz.shape)
+        for i in range(3):
+            np.testing.assert_allclose(smoothed[:, i], kalmanSmooth(xyz[:, i], seconds), rtol=0, atol=1e-9)
+        self.assertEqual(kalmanSmooth(xyz[:1], seconds[:1]).tolist(), xyz[:1].tolist())
+        self.assertRaises(ValueError, kalmanSmooth, xyz, seconds[1:])
+        self.assertRaises(ValueError, kalmanSmooth, xyz, seconds, 0)
+
+    def testKalmanTrack(self):
+        # a straight walk at 1.5 m/s with 5 m of GPS noise comes back closer to the line
+        random = np.random.RandomState(2)
+        seconds = np.arange(600.0)
+        easting = 500000 + 1.5 * seconds; northing = 4400000 + np.zeros(600)
+        longitude, latitude = MMUtm.fromUtm(easting + random.normal(0, 5, 600), northing + random.normal(0, 5, 600), 18, False)
+        x, y = MMUtm.toUtm(longitude, latitude, 18, False)
+        noisy = np.hypot(x - easting, y - northing).mean()
+        x, y = MMUtm.toUtm(*kalmanSmoothTrack(longitude, latitude, seconds), zone=18, south=False)
+        self.assertLess(np.hypot(x - easting, y - northing).mean(), noisy / 2)
+
+    def testNoiseOf(self):
+        random = np.random.RandomState(3)
+        walk = np.cumsum(random.normal(0, 0.5, 5000))
+        self.assertAlmostEqual(noiseOf(walk + random.normal(0, 4, 5000)), 4, delta=0.3)
+        self.assertEqual(noiseOf([1.0, 2.0]), 0.0)
+
+    def testSplineLoops(self):
+        # a circle ridden twice, which a spline of y against x can not follow
+        random = np.random.RandomState(4)
+        seconds = np.arange(2500.0)
+        circle = 500000 + 100 * np.column_stack([np.cos(seconds / 200), np.sin(seconds / 200)])
+        noisy = circle + random.normal(0, 3, circle.shape)
+        smoothed = splineSmooth(noisy, seconds)
+        self.assertLess(np.hypot(*(smoothed - circle).T).mean(), np.hypot(*(noisy - circle).T).mean() / 3)
+
+        # the windows are cross-faded, the seams do not show as kinks
+        self.assertLess(np.abs(np.diff(smoothed, 2, axis=0)).max(), 0.1)
+
+        longitude, latitude = MMUtm.fromUtm(noisy[:, 0], noisy[:, 1], 18, False)
+        x, y = MMUtm.toUtm(*splineSmoothTrack(longitude, latitude, seconds), zone=18, south=False)
+        np.testing.assert_allclose(np.column_stack([x, y]), smoothed, rtol=0, atol=1e-3)
+
+    def testSplineTimes(self):
+        # repeated times and a short track are smoothed, not refused
+        seconds = np.arange(10.0); seconds[5] = seconds[4]
+        smoothed = splineSmooth(self.z[:10], seconds, 2)
+        self.assertEqual(smoothed.shape, (10,))
+        self.assertEqual(splineSmooth(self.z[:3], seconds[:3]).tolist(), self.z[:3].tolist())
+        self.assertRaises(ValueError, splineSmooth, self.z, np.arange(1000.0), 6)
+        self.assertRaises(ValueError, splineSmooth, self.z, np.arange(1000.0), 3, None, 100, 50)
+        self.assertRaises(ValueError, splineSmooth, self.z, np.arange(999.0))
+
+if __name__ == '__main__':
+    unittest.main()
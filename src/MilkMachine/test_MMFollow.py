@@ -0,0 +1,54 @@
+import unittest
+
+from cmath import phase, rect
+import math
+
+import numpy as np
+
+from MMFollow import followHeadings
+
+def scalarHeadings(longitude, latitude, smoother):
+    # the loop follow_apply ran, with compass_bearing and mean_angle written inline as TeatDip had them, so the
+    # reference does not depend on the code under test
+    def compass_bearing(pointA, pointB):
+        lat1 = math.radians(pointA[0]); lat2 = math.radians(pointB[0])
+        diffLong = math.radians(pointB[1] - pointA[1])
+        x = math.sin(diffLong) * math.cos(lat2)
+        y = math.cos(lat1) * math.sin(lat2) - (math.sin(lat1) * math.cos(lat2) * math.cos(diffLong))
+        return (math.degrees(math.atan2(x, y)) + 360) % 360
+
+    def mean_angle(deg):
+        return math.degrees(phase(sum(rect(1, math.radians(d)) for d in deg)/len(deg))) % 360
+
+    headinglist = []
+    forwardlen = len(longitude) - 1 - smoother
+    for i in range(len(longitude)):
+        if i <= forwardlen:
+            forwardlist = [compass_bearing((latitude[i], longitude[i]), (latitude[i+ii+1], longitude[i+ii+1])) for ii in range(smoother)]
+            headinglist.append(mean_angle(forwardlist) % 360)
+        else:
+            headinglist.append(headinglist[i-1])
+    return headinglist
+
+class TestMMFollow(unittest.TestCase):
+    def testMatchesScalarHeadings(self):
+        random = np.random.RandomState(0)
+        longitude = -75.17 + np.cumsum(random.normal(0, 0.0001, 500))
+        latitude = 39.96 + np.cumsum(random.normal(0, 0.0001, 500))
+        for smoother in (1, 2, 10, 499):
+            expected = scalarHeadings(longitude.tolist(), latitude.tolist(), smoother)
+            headings = followHeadings(longitude, latitude, smoother)
+            # compare on the circle, 359.9999 and 0.0001 are close
+            difference = (headings - np.array(expected) + 180) % 360 - 180
+            self.assertLess(np.abs(difference).max(), 1e-6)
+            self.assertEqual(np.round(headings, 1).tolist(), [round(h, 1) for h in expected])
+
+    def testRepeatedPoint(self):
+        self.assertEqual(followHeadings([0.0, 0.0, 0.0], [0.0, 0.0, 0.001], 1).tolist(), [0.0, 0.0, 0.0])
+
+    def testSmootherTooLarge(self):
+        self.assertRaises(ValueError, followHeadings, [0.0, 0.0], [0.0, 0.001], 2)
+        self.assertRaises(ValueError, followHeadings, [0.0, 0.0], [0.0, 0.001], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,6 +2,9 @@ import unittest
 
 import logging
 import os
+import shutil
+import sqlite3
+import tempfile
 
 # make sure SIP versions are correct
 import sip
@@ -14,7 +17,7 @@ sip.setapi('QTime', 2)
 sip.setapi('QUrl', 2)
 
 from qgis.core import QgsApplication, QgsVectorLayer
-from MMImport import loadCSVLayer
+from MMImport import loadCSVLayer, loadGPXLayer, loadKMLLayer, readGPX, readKML, workingFormat, writeLineCopy
 
 def mockLogger():
     logger = logging.getLogger('milkmachine')
@@ -59,6 +62,49 @@ def field_indices(qgsvectorlayer):
         field_dict[f.name()] = qgsvectorlayer.fieldNameIndex(f.name())
     return field_dict
 
+GPX = b'''<?xml version="1.0" encoding="UTF-8"?>
+<gpx version="1.1" creator="test" xmlns="http://www.topografix.com/GPX/1/1">
+ <trk>
+  <trkseg>
+   <trkpt lat="52.37" lon="4.89"><ele>1.5</ele><time>2014-06-06T10:38:48Z</time></trkpt>
+   <trkpt lat="52.371" lon="4.891"><time>2014-06-06T10:38:49.5Z</time></trkpt>
+  </trkseg>
+  <trkseg>
+   <trkpt lat="52.372" lon="4.892"><ele>2</ele><time>2014-06-06T12:38:51+02:00</time></trkpt>
+  </trkseg>
+ </trk>
+</gpx>
+'''
+
+KML = b'''<?xml version="1.0" encoding="UTF-8"?>
+<kml xmlns="http://www.opengis.net/kml/2.2">
+ <Document>
+  <name>Logger</name>
+  <Folder>
+   <name>Points</name>
+   <Placemark>
+    <name>2014/06/06 10:38:48</name>
+    <description>Time:10:38:48, Latitude: 39.965949, Longitude: -75.172239, Speed: 0.102851, Altitude: -3.756733</description>
+    <Point><coordinates>-75.172239,39.965949,0</coordinates></Point>
+   </Placemark>
+   <Placemark>
+    <name>2014/06/06 10:38:49.5</name>
+    <description>Time:10:38:49, Latitude: 39.96596, Longitude: -75.17223, Speed: 0.2, Altitude: -3.1</description>
+    <Point><coordinates> -75.17223,39.96596 </coordinates></Point>
+   </Placemark>
+   <Placemark>
+    <name>Track</name>
+    <LineString><coordinates>-75.172239,39.965949 -75.17223,39.96596</coordinates></LineString>
+   </Placemark>
+  </Folder>
+  <Placemark>
+   <TimeStamp><when>2014-06-06T10:38:51Z</when></TimeStamp>
+   <Point><coordinates>-75.17222,39.96597,12.5</coordinates></Point>
+  </Placemark>
+ </Document>
+</kml>
+'''
+
 class TestMMImport(unittest.TestCase):
     def testImportCSVFile(self):
         QgsApplication.setPrefixPath("/usr/share/qgis", True)
@@ -84,12 +130,107 @@ class TestMMImport(unittest.TestCase):
         self.assertIsInstance(layer, QgsVectorLayer)
         self.assertTrue(layer.isValid())
 
-        featuresCount = sum(1 for _ in layer.getFeatures())
-        self.assertEqual(featuresCount, 587)
+        features = list(layer.getFeatures())
+        self.assertEqual(len(features), 587)
+        fields = field_indices(layer)
+        self.assertEqual(features[0].attributes()[fields['datetime']], u'2014/06/06 10:29:00 000000')
+        self.assertEqual(features[0].attributes()[fields['altitude']], 0.62)
+        self.assertEqual(features[0].attributes()[fields['date']], u'6/6/2014')
+        self.assertEqual(features[0].geometry().asPoint().x(), -75.172303)
 
         # both segfault:
         # QgsApplication.exitQgis()
         # qgs.exitQgis()
 
+    def testImportGPXFile(self):
+        QgsApplication.setPrefixPath("/usr/share/qgis", True)
+        qgs = QgsApplication([], False)
+        qgs.initQgis()
+
+        tmp = tempfile.mkdtemp()
+        try:
+            gpxPath = os.path.join(tmp, 'track.gpx')
+            with open(gpxPath, 'wb') as gpxfile:
+                gpxfile.write(GPX)
+
+            longitude, latitude, elevation, epoch = readGPX(gpxPath)
+            self.assertEqual(longitude.tolist(), [4.89, 4.891, 4.892])
+            self.assertEqual(latitude.tolist(), [52.37, 52.371, 52.372])
+            self.assertEqual(elevation[0], 1.5)
+            self.assertTrue(elevation[1] != elevation[1])  # no <ele>
+            self.assertEqual(epoch.tolist(), [1402051128000000, 1402051129500000, 1402051131000000])
+
+            layer = loadGPXLayer(gpxPath, mockLogger())
+            self.assertTrue(layer.isValid())
+            fields = field_indices(layer)
+            features = list(layer.getFeatures())
+            self.assertEqual(len(features), 3)
+            self.assertEqual(features[1].attributes()[fields['datetime']], u'2014/06/06 10:38:49 500000')
+            self.assertEqual(features[2].attributes()[fields['altitude']], 2.0)
+            self.assertEqual(features[1].attributes()[fields['Name']], u'2014/06/06 10:38:49 500000')
+            self.assertFalse(features[1].attributes()[fields['Description']])  # None or QGIS' NULL
+
+            driver, extension = workingFormat()
+            self.assertEqual(layer.storageType(), driver)
+            self.assertTrue(os.path.exists(os.path.join(tmp, 'track' + extension)))
+            if driver == 'GPKG':
+                # the datetime column is indexed
+                connection = sqlite3.connect(os.path.join(tmp, 'track.gpkg'))
+                indexes = [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql LIKE '%datetime%'")]
+                connection.close()
+                self.assertEqual(indexes, ['track_datetime_idx'])
+        finally:
+            shutil.rmtree(tmp)
+
+    def testReadKMLNamespace(self):
+        # the first element closed is in the atom namespace, the placemarks are still read
+        tmp = tempfile.mkdtemp()
+        try:
+            kmlPath = os.path.join(tmp, 'atom.kml')
+            with open(kmlPath, 'wb') as kmlfile:
+                kmlfile.write(KML.replace(b'<kml xmlns="http://www.opengis.net/kml/2.2">', b'<kml xmlns="http://www.opengis.net/kml/2.2" xmlns:atom="http://www.w3.org/2005/Atom">')
+                              .replace(b'<Document>', b'<Document><atom:author><atom:name>Logger</atom:name></atom:author><ExtendedData><Data name="device"><value>X</value></Data></ExtendedData>'))
+            names, descriptions, longitude, latitude, altitude, epoch = readKML(kmlPath)
+            self.assertEqual(len(names), 3)
+            self.assertEqual(longitude.tolist(), [-75.172239, -75.17223, -75.17222])
+        finally:
+            shutil.rmtree(tmp)
+
+    def testImportKMLFile(self):
+        QgsApplication.setPrefixPath("/usr/share/qgis", True)
+        qgs = QgsApplication([], False)
+        qgs.initQgis()
+
+        tmp = tempfile.mkdtemp()
+        try:
+            kmlPath = os.path.join(tmp, 'logger.kml')
+            with open(kmlPath, 'wb') as kmlfile:
+                kmlfile.write(KML)
+
+            names, descriptions, longitude, latitude, altitude, epoch = readKML(kmlPath)
+            # the line is skipped, and the last point has neither a name nor a description
+            self.assertEqual(names, ['2014/06/06 10:38:48', '2014/06/06 10:38:49.5', None])
+            self.assertIsNone(descriptions[2])
+            self.assertEqual(longitude.tolist(), [-75.172239, -75.17223, -75.17222])
+            self.assertEqual(latitude.tolist(), [39.965949, 39.96596, 39.96597])
+            self.assertEqual(altitude.tolist(), [-3.756733, -3.1, 12.5])
+            self.assertEqual(epoch.tolist(), [1402051128000000, 1402051129500000, 1402051131000000])
+
+            layer = loadKMLLayer(kmlPath, mockLogger())
+            self.assertTrue(layer.isValid())
+            fields = field_indices(layer)
+            features = list(layer.getFeatures())
+            self.assertEqual(len(features), 3)
+            self.assertEqual(features[0].attributes()[fields['datetime']], u'2014/06/06 10:38:48 000000')
+            self.assertEqual(features[0].attributes()[fields['altitude']], -3.76)
+            self.assertEqual(features[2].attributes()[fields['datetime']], u'2014/06/06 10:38:51 000000')
+            self.assertFalse(os.path.exists(os.path.join(tmp, 'logger_duplicate.shp')))
+
+            line = writeLineCopy(layer, os.path.join(tmp, 'logger_line'))
+            self.assertTrue(line.isValid())
+            self.assertEqual(len(list(line.getFeatures())[0].geometry().asPolyline()), 3)
+        finally:
+            shutil.rmtree(tmp)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+
+from MMProjection import ProjectionRegistry
+from MMUtm import toUtm
+
+class TestMMProjection(unittest.TestCase):
+    def testHitsAndMisses(self):
+        registry = ProjectionRegistry(maxsize=2)
+        self.assertIs(registry.get(18, False), registry.get(18, False))
+        registry.get(18, True)
+        registry.get(33, False) # evicts 18N, the least recently used
+        registry.get(18, False)
+        self.assertEqual((registry.hits, registry.misses), (1, 4))
+
+    def testCrsIsCached(self):
+        utm = ProjectionRegistry().get(18, False)
+        self.assertIs(utm.crs(), utm.crs())
+        self.assertTrue(utm.crs().isValid())
+
+    def testForwardAcrossZones(self):
+        registry = ProjectionRegistry()
+        longitude = np.array([-75.17, 2.29, -75.16, 151.21])
+        latitude = np.array([39.96, 48.86, 39.97, -33.86])
+        easting, northing, zones, south = registry.forward(longitude, latitude)
+        self.assertEqual(list(zones), [18, 31, 18, 56])
+        self.assertEqual((registry.hits, registry.misses), (0, 3))
+        expected = toUtm(longitude, latitude, zones, south)
+        np.testing.assert_allclose(easting, expected[0])
+        np.testing.assert_allclose(northing, expected[1])
+        lon, lat = registry.inverse(easting, northing, zones, south)
+        np.testing.assert_allclose(lon, longitude)
+        np.testing.assert_allclose(lat, latitude)
+        self.assertEqual((registry.hits, registry.misses), (3, 3))
+
+    def testZoneOf(self):
+        utm = ProjectionRegistry().zoneOf([-75.18, -75.16], [39.96, 39.97])
+        self.assertEqual((utm.zone, utm.south), (18, False))
+
+if __name__ == '__main__':
+    unittest.main()
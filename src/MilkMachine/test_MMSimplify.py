@@ -0,0 +1,105 @@
+import unittest
+
+import numpy as np
+
+import MMUtm
+from MMSimplify import douglasPeucker, simplify, simplifyTrack, visvalingam
+from MMTrack import TrackColumns
+
+def recursiveDouglasPeucker(points, tolerance):
+    # the textbook recursion, on a list of (x, y) tuples
+    if len(points) < 3:
+        return list(points)
+    (x0, y0), (x1, y1) = points[0], points[-1]
+    length = (x1 - x0) ** 2 + (y1 - y0) ** 2
+    distances = []
+    for x, y in points[1:-1]:
+        # from the closest point of the segment, not of the whole line through it
+        fraction = min(max(((x - x0) * (x1 - x0) + (y - y0) * (y1 - y0)) / length, 0.0), 1.0)
+        distances.append(np.hypot(x - x0 - fraction * (x1 - x0), y - y0 - fraction * (y1 - y0)))
+    furthest = int(np.argmax(distances)) + 1
+    if distances[furthest - 1] <= tolerance:
+        return [points[0], points[-1]]
+    return recursiveDouglasPeucker(points[:furthest + 1], tolerance)[:-1] + recursiveDouglasPeucker(points[furthest:], tolerance)
+
+def slowVisvalingam(x, y, tolerance):
+    # removes the smallest triangle one at a time, searching all of them every time
+    area = lambda a, b, c: abs((x[a] - x[c]) * (y[b] - y[c]) - (x[b] - x[c]) * (y[a] - y[c])) / 2.0
+    rows = list(range(len(x)))
+    areas = [area(a, b, c) for a, b, c in zip(rows, rows[1:], rows[2:])]
+    while areas and min(areas) < tolerance ** 2:
+        smallest = areas.index(min(areas))
+        removed = areas.pop(smallest)
+        del rows[smallest + 1]
+        for i in (smallest - 1, smallest):
+            if 0 <= i < len(areas):
+                areas[i] = max(area(rows[i], rows[i + 1], rows[i + 2]), removed)
+    return rows
+
+class TestMMSimplify(unittest.TestCase):
+    def setUp(self):
+        random = np.random.RandomState(0)
+        count = 2000
+        heading = np.cumsum(random.normal(0, 0.05, count))
+        self.x = np.cumsum(np.cos(heading)) + random.normal(0, 0.3, count)
+        self.y = np.cumsum(np.sin(heading)) + random.normal(0, 0.3, count)
+
+    def testMatchesRecursion(self):
+        for tolerance in (0.5, 2.0, 10.0):
+            keep = douglasPeucker(self.x, self.y, tolerance)
+            expected = recursiveDouglasPeucker(list(zip(self.x.tolist(), self.y.tolist())), tolerance)
+            kept = list(zip(self.x[keep].tolist(), self.y[keep].tolist()))
+            self.assertEqual(kept, expected)
+
+    def testDeepTrack(self):
+        # a zigzag splits at every point, far deeper than the recursion limit
+        count = 5000
+        x = np.arange(count, dtype=np.float64)
+        y = np.where(np.arange(count) % 2, 1.0, 0.0) * np.arange(count)
+        self.assertTrue(douglasPeucker(x, y, 0.1).all())
+
+    def testTimeAware(self):
+        # a straight line with a stop in the middle: only the time aware version keeps the stop
+        x = np.concatenate([np.arange(0.0, 50.0), np.full(30, 50.0), np.arange(50.0, 100.0)])
+        y = np.zeros(len(x))
+        seconds = np.arange(len(x), dtype=np.float64)
+        self.assertEqual(np.count_nonzero(douglasPeucker(x, y, 1.0)), 2)
+        keep = douglasPeucker(x, y, 1.0, seconds)
+        self.assertEqual(np.flatnonzero(keep).tolist(), [0, 50, 80, 129])
+
+    def testVisvalingam(self):
+        x = self.x[:300]; y = self.y[:300]
+        for tolerance in (0.5, 2.0):
+            self.assertEqual(np.flatnonzero(visvalingam(x, y, tolerance)).tolist(), slowVisvalingam(x.tolist(), y.tolist(), tolerance))
+        self.assertEqual(visvalingam([0.0, 1.0], [0.0, 1.0], 1.0).tolist(), [True, True])
+
+    def testSimplifyMetres(self):
+        longitude, latitude = MMUtm.fromUtm(500000 + self.x * 10, 4400000 + self.y * 10, 18, False)
+        keep = simplify(longitude, latitude, 5.0)
+        np.testing.assert_array_equal(keep, douglasPeucker(self.x * 10, self.y * 10, 5.0))
+        self.assertRaises(ValueError, simplify, longitude, latitude, 5.0, method='reumann')
+
+    def testSimplifyTrack(self):
+        count = 10
+        flyto = [{'name': None, 'flyToMode': 'smooth', 'duration': None} for i in range(count)]
+        flyto[0] = dict(flyto[0], duration=2.0)
+        flyto[2] = dict(flyto[2], duration=3.0)
+        lookat = [None] * count
+        lookat[4] = {'range': 10}
+        longitude, latitude = MMUtm.fromUtm(500000 + np.arange(count) * 10.0, np.full(count, 4400000.0), 18, False)
+        track = TrackColumns(
+            fids=np.arange(count, dtype=np.int64), x=longitude, y=latitude, altitude=np.zeros(count),
+            epoch=np.arange(count, dtype=np.int64) * 1000000, description=[None] * count, camera=[None] * count,
+            lookat=lookat, flyto=flyto, iconstyle=[None] * count, labelstyle=[None] * count, model=[None] * count)
+
+        simplified = simplifyTrack(track, 1.0)
+        # a straight line at a steady speed keeps its ends and the lookat
+        self.assertEqual(simplified.fids.tolist(), [0, 4, 9])
+        self.assertEqual(simplified.epoch.tolist(), [0, 4000000, 9000000])
+        # the first point's own duration takes in those of the points dropped after it, 1 s each but 3 s for row 2
+        self.assertEqual(simplified.flyto[0]['duration'], 2.0 + 1.0 + 3.0 + 1.0)
+        self.assertIsNone(simplified.flyto[1]['duration'])
+        self.assertEqual(track.flyto[0]['duration'], 2.0)
+
+if __name__ == '__main__':
+    unittest.main()
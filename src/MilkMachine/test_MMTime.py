@@ -0,0 +1,67 @@
+import unittest
+
+import datetime
+
+import numpy as np
+
+from MMTime import LayerTimes, epochToDatetime, formatColumn, parseColumn, parseDateTimeColumns, parseDatetime, parseIsoColumn
+
+class TestMMTime(unittest.TestCase):
+    def testParseDatetimeRoundTrip(self):
+        epoch = parseDatetime(u'2014/06/06 10:38:48 250000')
+        self.assertEqual(epochToDatetime(epoch).strftime("%Y/%m/%d %H:%M:%S %f"), '2014/06/06 10:38:48 250000')
+
+    def testParseDatetimeWithoutMicroseconds(self):
+        self.assertEqual(parseDatetime(u'2014/06/06 10:38:48'), parseDatetime(u'2014/06/06 10:38:48 000000'))
+
+    def testParseColumnMatchesParseDatetime(self):
+        values = [u'2014/06/06 10:38:48 250000', u'2014/06/06 10:38:48', u'2014/06/06 10:38:48.5', u'2014/06/06 10:38:48 5',
+                  u'2016/02/29 23:59:59 999999', u'1969/12/31 23:59:59 000001', u'2000/01/01 00:00:00.123456',
+                  u'2014/6/6 9:38:48', '2014/06/06 10:38:48 000001']
+        self.assertEqual(parseColumn(values).tolist(), [parseDatetime(v) for v in values])
+
+    def testParseColumnRandomDates(self):
+        rng = np.random.RandomState(7)
+        epoch = rng.randint(-10 ** 15, 4 * 10 ** 15, 1000).astype(np.int64)
+        self.assertEqual(parseColumn(formatColumn(epoch)).tolist(), epoch.tolist())
+        self.assertEqual(formatColumn(epoch), [epochToDatetime(e).strftime("%Y/%m/%d %H:%M:%S %f") for e in epoch])
+
+    def testParseColumnInvalid(self):
+        self.assertRaises(ValueError, parseColumn, [u'2014/06/06 10:38:48', u'2014/02/30 10:38:48'])
+        self.assertRaises(ValueError, parseColumn, [u'2014/06/06 25:38:48'])
+        self.assertEqual(len(parseColumn([])), 0)
+
+    def testParseDateTimeColumns(self):
+        expected = parseDatetime(u'2014/06/07 10:38:48.25')
+        self.assertEqual(parseDateTimeColumns([u'06/07/2014'], [u'10:38:48.25'], 'mm/dd/yyyy')[0], expected)
+        self.assertEqual(parseDateTimeColumns([u'07/06/2014'], [u'10:38:48.25'], 'dd/mm/yyyy')[0], expected)
+        self.assertEqual(parseDateTimeColumns([u'2014/06/07'], [u'10:38:48.25'], 'yyyy/mm/dd')[0], expected)
+
+        # across midnight and a leap day, with unpadded dates and times
+        dates = [u'2016/2/28', u'2016/2/29', u'2016/2/29', u'2016/3/1']
+        times = [u'23:59:59', u'0:00:00', u'12:00:00.5', u'00:00:01']
+        self.assertEqual(list(parseDateTimeColumns(dates, times, 'yyyy/mm/dd')),
+                         [parseDatetime(u'{0} {1}'.format(d, t)) for d, t in zip(dates, times)])
+        self.assertRaises(ValueError, parseDateTimeColumns, [u'2014/2/29'], [u'10:38:48'], 'yyyy/mm/dd')
+
+    def testParseIsoColumn(self):
+        values = [u'2014-06-06T10:38:48Z', u'2014-06-06T10:38:48.250Z', u' 2014-06-06T10:38:48 ', u'2014-06-06T05:08:48-05:30',
+                  u'2014-06-07T00:38:48+14:00', u'2014-06-06T10:38:48.1234567Z']
+        self.assertEqual(list(parseIsoColumn(values)), [1402051128000000, 1402051128250000, 1402051128000000, 1402051128000000,
+                                                        1402051128000000, 1402051128123456])
+        self.assertEqual(len(parseIsoColumn([])), 0)
+
+    def testLayerTimes(self):
+        epoch = parseColumn([u'2014/06/06 10:38:50 700000', u'2014/06/06 10:38:48 250000', u'2014/06/06 10:38:49'])
+        times = LayerTimes([7, 3, 5], epoch)
+        self.assertEqual(times.fids.tolist(), [3, 5, 7])
+        self.assertEqual(times.datetime(7), datetime.datetime(2014, 6, 6, 10, 38, 50, 700000))
+        self.assertEqual(times.datetime(7, True), datetime.datetime(2014, 6, 6, 10, 38, 50))
+        self.assertEqual(times.at(0), datetime.datetime(2014, 6, 6, 10, 38, 48, 250000))
+        self.assertEqual(times.datetimes(True), [datetime.datetime(2014, 6, 6, 10, 38, s) for s in (48, 49, 50)])
+        self.assertEqual(times.rows([5, 7]).tolist(), [1, 2])
+        self.assertRaises(KeyError, times.datetime, 4)
+        self.assertRaises(KeyError, times.datetime, 8)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,20 @@
+import unittest
+
+import numpy as np
+
+from MMTime import epochToDatetime, parseDatetime
+from MMTrack import descriptionAltitude, kmlTimes
+
+class TestMMTrack(unittest.TestCase):
+    def testKmlTimesMatchStrftime(self):
+        values = [u'2014/06/06 10:38:48 000000', u'2014/12/31 23:59:59 999999', u'2016/02/29 00:00:00 000001']
+        epoch = np.array([parseDatetime(v) for v in values], dtype=np.int64)
+        expected = [epochToDatetime(e).strftime('%Y-%m-%dT%H:%M:%S.%fZ') for e in epoch]
+        self.assertEqual(list(kmlTimes(epoch)), expected)
+
+    def testDescriptionAltitude(self):
+        self.assertEqual(descriptionAltitude(u'Time:10:38:48, Latitude: 39.965949, Longitude: -75.172239, Speed: 0.102851, Altitude: -3.756733'), u'-3.756733')
+        self.assertIsNone(descriptionAltitude(u'no altitude here'))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+
+import numpy as np
+
+from MMUtm import fromUtm, toUtm, utmZones
+
+class TestMMUtm(unittest.TestCase):
+    def testZones(self):
+        zones, bands = utmZones(np.array([13.41250188, 60.0, 60.0, 78.0, 78.0, -33.9]), np.array([103.86666901, 2.0, 5.0, 8.0, 10.0, 151.2]))
+        self.assertEqual(list(zones), [48, 31, 32, 31, 33, 56])
+        self.assertEqual(list(bands), ['P', 'V', 'V', 'X', 'X', 'H'])
+
+    def testToUtm(self):
+        easting, northing = toUtm(np.array([2.2945, 151.2153]), np.array([48.8583, -33.8568]), np.array([31, 56]), np.array([False, True]))
+        np.testing.assert_allclose(easting, [448251.898, 334900.570], atol=0.001)
+        np.testing.assert_allclose(northing, [5411943.794, 6252288.753], atol=0.001)
+
+    def testRoundTrip(self):
+        rng = np.random.RandomState(0)
+        latitude = rng.uniform(-80, 84, 1000)
+        longitude = rng.uniform(-180, 180, 1000)
+        zones, bands = utmZones(latitude, longitude)
+        easting, northing = toUtm(longitude, latitude, zones, latitude < 0)
+        lon, lat = fromUtm(easting + 10.0, northing - 5.0, zones, latitude < 0)
+        e2, n2 = toUtm(lon, lat, zones, latitude < 0)
+        np.testing.assert_allclose(e2, easting + 10.0, atol=1e-6)
+        np.testing.assert_allclose(n2, northing - 5.0, atol=1e-6)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+from cmath import phase, rect
+import math
+
+import numpy as np
+
+from TeatDip import compass_bearing, mean_angle, unit_vector
+
+def scalarBearing(pointA, pointB):
+    # compass_bearing as it was, with the math module
+    lat1 = math.radians(pointA[0]); lat2 = math.radians(pointB[0])
+    diffLong = math.radians(pointB[1] - pointA[1])
+    x = math.sin(diffLong) * math.cos(lat2)
+    y = math.cos(lat1) * math.sin(lat2) - (math.sin(lat1) * math.cos(lat2) * math.cos(diffLong))
+    return (math.degrees(math.atan2(x, y)) + 360) % 360
+
+class TestTeatDip(unittest.TestCase):
+    def setUp(self):
+        random = np.random.RandomState(0)
+        self.lat1 = random.uniform(-80, 80, 200); self.lon1 = random.uniform(-180, 180, 200)
+        self.lat2 = random.uniform(-80, 80, 200); self.lon2 = random.uniform(-180, 180, 200)
+
+    def testCompassBearingScalar(self):
+        for i in range(200):
+            bearing = compass_bearing((self.lat1[i], self.lon1[i]), (self.lat2[i], self.lon2[i]))
+            self.assertIsInstance(bearing, float)
+            self.assertAlmostEqual(bearing, scalarBearing((self.lat1[i], self.lon1[i]), (self.lat2[i], self.lon2[i])), places=9)
+        # lists are points too
+        self.assertAlmostEqual(compass_bearing([39.96, -75.17], [39.97, -75.17]), 0.0)
+        self.assertRaises(TypeError, compass_bearing, (39.96, -75.17, 0.0), (39.97, -75.17))
+
+    def testCompassBearingArrays(self):
+        bearings = compass_bearing((self.lat1, self.lon1), (self.lat2, self.lon2))
+        expected = [scalarBearing((a, b), (c, d)) for a, b, c, d in zip(self.lat1, self.lon1, self.lat2, self.lon2)]
+        np.testing.assert_allclose(bearings, expected, atol=1e-9)
+
+        # one point to many
+        bearings = compass_bearing((self.lat1[0], self.lon1[0]), (self.lat2, self.lon2))
+        np.testing.assert_allclose(bearings, [scalarBearing((self.lat1[0], self.lon1[0]), (c, d)) for c, d in zip(self.lat2, self.lon2)], atol=1e-9)
+
+    def testMeanAngle(self):
+        random = np.random.RandomState(1)
+        for count in (1, 2, 7):
+            deg = random.uniform(0, 360, count).tolist()
+            expected = math.degrees(phase(sum(rect(1, math.radians(d)) for d in deg)/len(deg))) % 360
+            self.assertAlmostEqual(mean_angle(deg), expected, places=9)
+
+        self.assertAlmostEqual(mean_angle([0, 90], weights=[1, 1]), 45.0)
+        self.assertAlmostEqual(mean_angle([0, 90], weights=[0, 1]), 90.0)
+        np.testing.assert_allclose(mean_angle(np.array([[0, 90], [180, 270]])), [45.0, 225.0])
+        np.testing.assert_allclose(mean_angle(np.array([[0, 90], [0, 90]]), axis=0), [0.0, 90.0])
+
+    def testUnitVector(self):
+        deg = np.random.RandomState(2).uniform(0, 360, 50)
+        sines, cosines = unit_vector(deg)
+        np.testing.assert_allclose(sines, [math.sin(math.radians(d)) for d in deg], atol=1e-12)
+        np.testing.assert_allclose(cosines, [math.cos(math.radians(d)) for d in deg], atol=1e-12)
+        self.assertEqual(unit_vector(90.0)[0], 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+import math
+
+import numpy as np
+
+import gpxpy
+import gpxpy.geo
+import gpxpy.gpx
+
+def recursiveSimplify(x, y, first, last, max_distance):
+    # the recursion replaced by simplify_polyline_mask, on projected coordinates, returning the rows kept
+    if last - first < 2:
+        return [first, last]
+    dx = x[last] - x[first]; dy = y[last] - y[first]
+    length = math.hypot(dx, dy)
+    distances = [abs((x[i] - x[first]) * dy - (y[i] - y[first]) * dx) / length for i in range(first + 1, last)]
+    furthest = first + 1 + distances.index(max(distances))
+    if max(distances) < max_distance:
+        return [first, last]
+    return recursiveSimplify(x, y, first, furthest, max_distance)[:-1] + recursiveSimplify(x, y, furthest, last, max_distance)
+
+def buildGpx(latitudes, longitudes):
+    segment = gpxpy.gpx.GPXTrackSegment([gpxpy.gpx.GPXTrackPoint(lat, lon) for lat, lon in zip(latitudes, longitudes)])
+    track = gpxpy.gpx.GPXTrack()
+    track.segments.append(segment)
+    return gpxpy.gpx.GPX(tracks=[track])
+
+class TestGpxpy(unittest.TestCase):
+    def setUp(self):
+        random = np.random.RandomState(0)
+        count = 2000
+        heading = np.cumsum(random.normal(0, 0.05, count))
+        self.latitudes = 52.37 + np.cumsum(np.sin(heading)) * 1e-5 + random.normal(0, 3e-6, count)
+        self.longitudes = 4.89 + np.cumsum(np.cos(heading)) * 1.6e-5 + random.normal(0, 5e-6, count)
+
+    def testMatchesRecursion(self):
+        coef = math.cos(math.radians((self.latitudes.min() + self.latitudes.max()) / 2.))
+        x = (self.longitudes * coef * gpxpy.geo.ONE_DEGREE).tolist()
+        y = (self.latitudes * gpxpy.geo.ONE_DEGREE).tolist()
+        for max_distance in (0.5, 2.0, 10.0):
+            keep = gpxpy.geo.simplify_polyline_mask(self.latitudes, self.longitudes, max_distance)
+            self.assertEqual(np.flatnonzero(keep).tolist(), recursiveSimplify(x, y, 0, len(x) - 1, max_distance))
+
+    def testLongTrack(self):
+        # a zigzag splits at every point, far deeper than the recursion limit
+        count = 5000
+        latitudes = np.where(np.arange(count) % 2, 1e-4, 0.0)
+        longitudes = np.arange(count) * 1e-4
+        self.assertTrue(gpxpy.geo.simplify_polyline_mask(latitudes, longitudes, 1.0).all())
+        self.assertEqual(gpxpy.geo.simplify_polyline_mask([1.0, 2.0], [1.0, 2.0], 1.0).tolist(), [True, True])
+
+    def testSimplifyPolyline(self):
+        points = [gpxpy.geo.Location(52.37, 4.89 + i * 1e-4) for i in range(10)] + [gpxpy.geo.Location(52.371, 4.8999)]
+        simplified = gpxpy.geo.simplify_polyline(points, 1.0)
+        self.assertEqual(simplified, [points[0], points[9], points[10]])
+
+    def testGpxSimplify(self):
+        gpx = buildGpx(self.latitudes, self.longitudes)
+        gpx.simplify(5.0)
+        points = gpx.tracks[0].segments[0].points
+        keep = gpxpy.geo.simplify_polyline_mask(self.latitudes, self.longitudes, 5.0)
+        self.assertEqual(len(points), np.count_nonzero(keep))
+        self.assertEqual([point.latitude for point in points], self.latitudes[keep].tolist())
+
+        # the segment default of 10 metres
+        gpx = buildGpx(self.latitudes, self.longitudes)
+        gpx.simplify()
+        self.assertEqual(len(gpx.tracks[0].segments[0].points), np.count_nonzero(gpxpy.geo.simplify_polyline_mask(self.latitudes, self.longitudes, 10)))
+
+if __name__ == '__main__':
+    unittest.main()
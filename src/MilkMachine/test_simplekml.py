@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+import io
+import os
+import shutil
+import tempfile
+import xml.dom.minidom
+import zipfile
+
+import simplekml
+from simplekml.base import KmlElement, Kmlable
+
+def minidomPretty(xml_str):
+    KmlElement.patch()
+    dom = xml.dom.minidom.parseString(xml_str.encode("utf-8"))
+    KmlElement.unpatch()
+    return dom.toprettyxml(indent="    ", newl="\n", encoding="UTF-8").decode("utf-8")
+
+def buildKml():
+    kml = simplekml.Kml(name=u'Caf\xe9 & "friends"')
+    playlist = kml.newgxtour(name='Tour').newgxplaylist()
+    playlist.newgxsoundcue(href='files/audio.mp3', gxdelayedstart=2)
+    for i in range(3):
+        flyto = playlist.newgxflyto(gxduration=1.5)
+        flyto.camera.longitude = -75.17 + i
+        flyto.camera.latitude = 39.96
+        flyto.camera.gxtimespan.begin = '2014-06-06T10:38:48.000000Z'
+    folder = kml.newfolder(name='Points')
+    pnt = folder.newpoint(name='<b>1</b>', coords=[(1.0, 2.0)], description='more & <![CDATA[<i>cdata</i>]]>')
+    pnt.style.iconstyle.hotspot = simplekml.HotSpot(x=0.5, y=0, xunits='fraction', yunits='fraction')
+    kml.newfolder()
+    return kml
+
+class TestPrettyXml(unittest.TestCase):
+    def tearDown(self):
+        Kmlable._parsetext(True)
+
+    def testMatchesMinidom(self):
+        kml = buildKml()
+        self.assertEqual(kml.kml(), minidomPretty(kml._genkml(format=False)))
+
+    def testEntitiesAndAttributes(self):
+        kml = simplekml.Kml()
+        kml.parsetext(False)
+        pnt = kml.newpoint(name=u'&#233; &gt; &amp; &apos;x&apos;', coords=[(1.0, 2.0)])
+        pnt.description = u'<a z="1" b="&apos;x&apos;"><b>&#233;</b><c></c>text<d/></a>'
+        pnt.address = u'<![CDATA[<i>x < y & z</i>]]> tail'
+        self.assertEqual(kml.kml(), minidomPretty(kml._genkml(format=False)))
+
+    def testUpdateMarkup(self):
+        kml = simplekml.Kml()
+        update = kml.newgxtour(name='Tour').newgxplaylist().newgxanimatedupdate(gxduration=2).update
+        update.targethref = 'http://example.com/x.kml'
+        update.change = u'<IconStyle targetId="x"><scale>10</scale><![CDATA[<b>]]></IconStyle>'
+        self.assertEqual(kml.kml(), minidomPretty(kml._genkml(format=False)))
+
+    def testTextThatIsNotMarkup(self):
+        kml = simplekml.Kml()
+        kml.parsetext(False)
+        kml.newpoint(name=u'x < y')
+        self.assertTrue(u'<name>x < y</name>' in kml.kml())
+
+class TestKmlStream(unittest.TestCase):
+    def testStreamMatchesKml(self):
+        kml = simplekml.Kml()
+        kml.document.camera.longitude = 1.0
+        tour = kml.newgxtour(name='Tour')
+        flyto = tour.newgxplaylist().newgxflyto(gxduration=1)
+        folder = kml.newfolder(name='Points')
+        pnt = folder.newpoint(name='A Point', coords=[(1.0, 2.0)])
+        expected = kml.kml()
+
+        out = io.BytesIO()
+        stream = simplekml.KmlStream(out)
+        stream.begin(kml.document)
+        stream.begintour(tour)
+        stream.write(flyto)
+        stream.end()
+        stream.beginfolder(folder)
+        stream.write(pnt._placemark)
+        stream.close()
+        self.assertEqual(out.getvalue().decode('utf-8').split('\n')[2:], expected.split('\n')[2:])
+        self.assertEqual(stream.count, 2)
+        self.assertEqual(stream.bytes, len(out.getvalue()))
+
+    def testGeometryStyleGoesInsidePlacemark(self):
+        out = io.BytesIO()
+        stream = simplekml.KmlStream(out, format=False)
+        stream.begin()
+        pnt = simplekml.Point(coords=[(1.0, 2.0)])
+        pnt.style.iconstyle.scale = 2
+        stream.write(pnt)
+        stream.close()
+        dom = xml.dom.minidom.parseString(out.getvalue())
+        placemark = dom.getElementsByTagName('Placemark')[0]
+        self.assertEqual(len(placemark.getElementsByTagName('Style')), 1)
+
+    def testGxTrackCoordinates(self):
+        trk = simplekml.GxTrack()
+        trk.newwhen(['2014-06-06T10:38:48Z', '2014-06-06T10:38:49Z'])
+        trk.newgxcoord([(1.5, 2.0), (-75.17, 39.96, 12.5)])
+        coords = simplekml.Coordinates()
+        coords.addcoordinates([(1.5, 2.0)])
+        self.assertEqual(trk.gxcoords, [(1.5, 2.0, 0.0), (-75.17, 39.96, 12.5)])
+        self.assertIn('<gx:coord>{0}</gx:coord>'.format(str(coords).replace(',', ' ')), str(trk))
+
+        out = io.BytesIO()
+        stream = simplekml.KmlStream(out, format=False)
+        stream.begin()
+        multitrack = simplekml.GxMultiTrack(tracks=[trk, trk], gxinterpolate=0, name='Track')
+        multitrack.style.iconstyle.scale = 2
+        stream.write(multitrack)
+        stream.close()
+        dom = xml.dom.minidom.parseString(out.getvalue())
+        placemark = dom.getElementsByTagName('Placemark')[0]
+        self.assertEqual(len(placemark.getElementsByTagName('Style')), 1)
+        self.assertEqual(len(placemark.getElementsByTagName('gx:Track')), 2)
+        self.assertEqual([node.firstChild.data for node in placemark.getElementsByTagName('gx:coord')[:2]], ['1.5 2.0 0.0', '-75.17 39.96 12.5'])
+
+    def testGxTrackCoordinateLists(self):
+        trk = simplekml.GxTrack()
+        trk.newgxcoord([[1, 2, 3], [4, 5]])
+        self.assertEqual(trk.gxcoords, [(1, 2, 3), (4, 5, 0.0)])
+        self.assertIn('<gx:coord>1 2 3</gx:coord><gx:coord>4 5 0.0</gx:coord>', trk.__str__())
+
+class TestKmzWriter(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def makeFile(self, name, size):
+        path = os.path.join(self.tmpdir, name)
+        with open(path, 'wb') as f:
+            f.write((b'MilkMachine ' * (size // 12 + 1))[:size])
+        return path
+
+    def testSaveKmzMatchesKml(self):
+        audio = self.makeFile('audio.mp3', 1000)
+        model = self.makeFile('model.dae', 5000)
+        kml = buildKml()
+        kml.newgxtour().newgxplaylist().newgxsoundcue(href=audio)
+        kml.newmodel(link=simplekml.Link(href=model))
+        kml.newfolder(name='Author', atomauthor='MilkMachine')
+        kml.document.stylemap.normalstyle.labelstyle.scale = 2
+        kml.hint = 'target=sky'
+        path = os.path.join(self.tmpdir, 'out.kmz')
+        kml.savekmz(path)
+        # the document as it used to be built in memory
+        Kmlable._setkmz()
+        expected = kml._genkml()
+        Kmlable._setkmz(False)
+        Kmlable._clearimages()
+
+        kmz = zipfile.ZipFile(path)
+        self.assertIsNone(kmz.testzip())
+        self.assertEqual(kmz.namelist()[0], 'doc.kml')
+        self.assertEqual(kmz.read('doc.kml').decode('utf-8'), expected)
+        self.assertIn(b'<href>files/audio.mp3</href>', kmz.read('doc.kml'))
+        self.assertEqual(kmz.getinfo('files/audio.mp3').compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(kmz.getinfo('files/model.dae').compress_type, zipfile.ZIP_DEFLATED)
+        kmz.close()
+        self.assertIn(audio, kml.kml())
+
+    def testLargeEntryRefusedBeforeWriting(self):
+        path = os.path.join(self.tmpdir, 'out.kmz')
+        kmz = simplekml.KmzWriter(path)
+        doc = kmz.open('doc.kml')
+        doc.write(b'<kml>')
+        position = kmz._zf.fp.tell()
+        limit = zipfile.ZIP64_LIMIT
+        zipfile.ZIP64_LIMIT = 100
+        try:
+            self.assertRaises(zipfile.LargeZipFile, doc.write, b'x' * 200)
+        finally:
+            zipfile.ZIP64_LIMIT = limit
+        self.assertEqual(kmz._zf.fp.tell(), position)
+        kmz.close()
+
+    def testParallelCompression(self):
+        paths = [self.makeFile('texture{0}.dae'.format(i), 20000 + i) for i in range(4)]
+        path = os.path.join(self.tmpdir, 'out.kmz')
+        kmz = simplekml.KmzWriter(path, workers=2, threshold=10000)
+        doc = kmz.open('doc.kml')
+        doc.write(b'<kml/>')
+        doc.close()
+        kmz.addfiles(paths)
+        kmz.close()
+
+        kmz = zipfile.ZipFile(path)
+        self.assertIsNone(kmz.testzip())
+        self.assertEqual(kmz.namelist(), ['doc.kml'] + ['files/texture{0}.dae'.format(i) for i in range(4)])
+        for p in paths:
+            with open(p, 'rb') as f:
+                self.assertEqual(kmz.read('files/' + os.path.basename(p)), f.read())
+        kmz.close()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -199,6 +199,15 @@ class Ui_MilkMachine(object):
         sizePolicy.setHeightForWidth(self.label_68.sizePolicy().hasHeightForWidth())
         self.label_68.setSizePolicy(sizePolicy)
         self.label_68.setObjectName(_fromUtf8("label_68"))
+        self.label_71 = QtGui.QLabel(self.tab_import)
+        self.label_71.setGeometry(QtCore.QRect(440, 60, 51, 30))
+        self.label_71.setObjectName(_fromUtf8("label_71"))
+        self.doubleSpinBox_import_simplify = QtGui.QDoubleSpinBox(self.tab_import)
+        self.doubleSpinBox_import_simplify.setGeometry(QtCore.QRect(490, 60, 121, 30))
+        self.doubleSpinBox_import_simplify.setDecimals(1)
+        self.doubleSpinBox_import_simplify.setMaximum(1000.0)
+        self.doubleSpinBox_import_simplify.setSingleStep(1.0)
+        self.doubleSpinBox_import_simplify.setObjectName(_fromUtf8("doubleSpinBox_import_simplify"))
         self.tabWidget.addTab(self.tab_import, _fromUtf8(""))
         self.tab_2 = QtGui.QWidget()
         self.tab_2.setObjectName(_fromUtf8("tab_2"))
@@ -347,6 +356,36 @@ class Ui_MilkMachine(object):
         self.lineEdit_filtering_max.setEnabled(False)
         self.lineEdit_filtering_max.setGeometry(QtCore.QRect(330, 160, 31, 20))
         self.lineEdit_filtering_max.setObjectName(_fromUtf8("lineEdit_filtering_max"))
+        self.radioButton_filtering_kalman = QtGui.QRadioButton(self.frame)
+        self.radioButton_filtering_kalman.setEnabled(False)
+        self.radioButton_filtering_kalman.setGeometry(QtCore.QRect(30, 190, 111, 22))
+        self.radioButton_filtering_kalman.setObjectName(_fromUtf8("radioButton_filtering_kalman"))
+        self.label_69 = QtGui.QLabel(self.frame)
+        self.label_69.setEnabled(False)
+        self.label_69.setGeometry(QtCore.QRect(180, 190, 51, 22))
+        self.label_69.setObjectName(_fromUtf8("label_69"))
+        self.doubleSpinBox_filtering_kalman_error = QtGui.QDoubleSpinBox(self.frame)
+        self.doubleSpinBox_filtering_kalman_error.setEnabled(False)
+        self.doubleSpinBox_filtering_kalman_error.setGeometry(QtCore.QRect(230, 190, 51, 22))
+        self.doubleSpinBox_filtering_kalman_error.setDecimals(1)
+        self.doubleSpinBox_filtering_kalman_error.setMinimum(0.1)
+        self.doubleSpinBox_filtering_kalman_error.setMaximum(100.0)
+        self.doubleSpinBox_filtering_kalman_error.setSingleStep(0.5)
+        self.doubleSpinBox_filtering_kalman_error.setProperty("value", 5.0)
+        self.doubleSpinBox_filtering_kalman_error.setObjectName(_fromUtf8("doubleSpinBox_filtering_kalman_error"))
+        self.label_70 = QtGui.QLabel(self.frame)
+        self.label_70.setEnabled(False)
+        self.label_70.setGeometry(QtCore.QRect(300, 190, 51, 22))
+        self.label_70.setObjectName(_fromUtf8("label_70"))
+        self.doubleSpinBox_filtering_kalman_accel = QtGui.QDoubleSpinBox(self.frame)
+        self.doubleSpinBox_filtering_kalman_accel.setEnabled(False)
+        self.doubleSpinBox_filtering_kalman_accel.setGeometry(QtCore.QRect(350, 190, 51, 22))
+        self.doubleSpinBox_filtering_kalman_accel.setDecimals(2)
+        self.doubleSpinBox_filtering_kalman_accel.setMinimum(0.01)
+        self.doubleSpinBox_filtering_kalman_accel.setMaximum(20.0)
+        self.doubleSpinBox_filtering_kalman_accel.setSingleStep(0.1)
+        self.doubleSpinBox_filtering_kalman_accel.setProperty("value", 1.0)
+        self.doubleSpinBox_filtering_kalman_accel.setObjectName(_fromUtf8("doubleSpinBox_filtering_kalman_accel"))
         self.radioButton_filtering_center = QtGui.QRadioButton(self.frame)
         self.radioButton_filtering_center.setEnabled(False)
         self.radioButton_filtering_center.setGeometry(QtCore.QRect(30, 100, 121, 22))
@@ -1155,6 +1194,46 @@ class Ui_MilkMachine(object):
         self.label_33 = QtGui.QLabel(self.tab_export)
         self.label_33.setGeometry(QtCore.QRect(20, 50, 61, 20))
         self.label_33.setObjectName(_fromUtf8("label_33"))
+        self.label_72 = QtGui.QLabel(self.tab_export)
+        self.label_72.setEnabled(False)
+        self.label_72.setGeometry(QtCore.QRect(270, 50, 51, 20))
+        self.label_72.setObjectName(_fromUtf8("label_72"))
+        self.doubleSpinBox_export_simplify = QtGui.QDoubleSpinBox(self.tab_export)
+        self.doubleSpinBox_export_simplify.setEnabled(False)
+        self.doubleSpinBox_export_simplify.setGeometry(QtCore.QRect(320, 50, 71, 20))
+        self.doubleSpinBox_export_simplify.setDecimals(1)
+        self.doubleSpinBox_export_simplify.setMaximum(1000.0)
+        self.doubleSpinBox_export_simplify.setSingleStep(1.0)
+        self.doubleSpinBox_export_simplify.setObjectName(_fromUtf8("doubleSpinBox_export_simplify"))
+        self.checkBox_export_gxtrack = QtGui.QCheckBox(self.tab_export)
+        self.checkBox_export_gxtrack.setEnabled(False)
+        self.checkBox_export_gxtrack.setGeometry(QtCore.QRect(280, 96, 111, 17))
+        self.checkBox_export_gxtrack.setObjectName(_fromUtf8("checkBox_export_gxtrack"))
+        self.label_73 = QtGui.QLabel(self.tab_export)
+        self.label_73.setEnabled(False)
+        self.label_73.setGeometry(QtCore.QRect(20, 140, 61, 20))
+        self.label_73.setObjectName(_fromUtf8("label_73"))
+        self.doubleSpinBox_export_flyto_min = QtGui.QDoubleSpinBox(self.tab_export)
+        self.doubleSpinBox_export_flyto_min.setEnabled(False)
+        self.doubleSpinBox_export_flyto_min.setGeometry(QtCore.QRect(90, 140, 71, 20))
+        self.doubleSpinBox_export_flyto_min.setDecimals(1)
+        self.doubleSpinBox_export_flyto_min.setMaximum(3600.0)
+        self.doubleSpinBox_export_flyto_min.setSingleStep(1.0)
+        self.doubleSpinBox_export_flyto_min.setObjectName(_fromUtf8("doubleSpinBox_export_flyto_min"))
+        self.doubleSpinBox_export_flyto_max = QtGui.QDoubleSpinBox(self.tab_export)
+        self.doubleSpinBox_export_flyto_max.setEnabled(False)
+        self.doubleSpinBox_export_flyto_max.setGeometry(QtCore.QRect(170, 140, 71, 20))
+        self.doubleSpinBox_export_flyto_max.setDecimals(1)
+        self.doubleSpinBox_export_flyto_max.setMaximum(3600.0)
+        self.doubleSpinBox_export_flyto_max.setSingleStep(1.0)
+        self.doubleSpinBox_export_flyto_max.setObjectName(_fromUtf8("doubleSpinBox_export_flyto_max"))
+        self.doubleSpinBox_export_flyto_gap = QtGui.QDoubleSpinBox(self.tab_export)
+        self.doubleSpinBox_export_flyto_gap.setEnabled(False)
+        self.doubleSpinBox_export_flyto_gap.setGeometry(QtCore.QRect(250, 140, 71, 20))
+        self.doubleSpinBox_export_flyto_gap.setDecimals(1)
+        self.doubleSpinBox_export_flyto_gap.setMaximum(3600.0)
+        self.doubleSpinBox_export_flyto_gap.setSingleStep(1.0)
+        self.doubleSpinBox_export_flyto_gap.setObjectName(_fromUtf8("doubleSpinBox_export_flyto_gap"))
         self.tabWidget.addTab(self.tab_export, _fromUtf8(""))
 
         self.retranslateUi(MilkMachine)
@@ -1166,7 +1245,8 @@ class Ui_MilkMachine(object):
         MilkMachine.setTabOrder(self.buttonImportGPS, self.lineEdit_ImportGPS)
         MilkMachine.setTabOrder(self.lineEdit_ImportGPS, self.buttonDrawTrack)
         MilkMachine.setTabOrder(self.buttonDrawTrack, self.checkBox_headoftrack)
-        MilkMachine.setTabOrder(self.checkBox_headoftrack, self.buttonImport_audio)
+        MilkMachine.setTabOrder(self.checkBox_headoftrack, self.doubleSpinBox_import_simplify)
+        MilkMachine.setTabOrder(self.doubleSpinBox_import_simplify, self.buttonImport_audio)
         MilkMachine.setTabOrder(self.buttonImport_audio, self.lineEdit_InAudio1)
         MilkMachine.setTabOrder(self.lineEdit_InAudio1, self.pushButton_clearAudio1)
         MilkMachine.setTabOrder(self.pushButton_clearAudio1, self.pushButton_Audio1info)
@@ -1196,7 +1276,10 @@ class Ui_MilkMachine(object):
         MilkMachine.setTabOrder(self.spinBox_filtering_moving, self.radioButton_filtering_zscale)
         MilkMachine.setTabOrder(self.radioButton_filtering_zscale, self.lineEdit_filtering_min)
         MilkMachine.setTabOrder(self.lineEdit_filtering_min, self.lineEdit_filtering_max)
-        MilkMachine.setTabOrder(self.lineEdit_filtering_max, self.checkBox_filtering_showplot)
+        MilkMachine.setTabOrder(self.lineEdit_filtering_max, self.radioButton_filtering_kalman)
+        MilkMachine.setTabOrder(self.radioButton_filtering_kalman, self.doubleSpinBox_filtering_kalman_error)
+        MilkMachine.setTabOrder(self.doubleSpinBox_filtering_kalman_error, self.doubleSpinBox_filtering_kalman_accel)
+        MilkMachine.setTabOrder(self.doubleSpinBox_filtering_kalman_accel, self.checkBox_filtering_showplot)
         MilkMachine.setTabOrder(self.checkBox_filtering_showplot, self.pushButton_filtering_apply)
         MilkMachine.setTabOrder(self.pushButton_filtering_apply, self.lineEdit_rendering_active)
         MilkMachine.setTabOrder(self.lineEdit_rendering_active, self.checkBox_rendering_edit)
@@ -1276,7 +1359,12 @@ class Ui_MilkMachine(object):
         MilkMachine.setTabOrder(self.pushButton_circle_apply, self.lineEdit_export_active)
         MilkMachine.setTabOrder(self.lineEdit_export_active, self.lineEdit_export_audio)
         MilkMachine.setTabOrder(self.lineEdit_export_audio, self.pushButton_export_audio_file)
-        MilkMachine.setTabOrder(self.pushButton_export_audio_file, self.buttonExportTrack)
+        MilkMachine.setTabOrder(self.pushButton_export_audio_file, self.doubleSpinBox_export_simplify)
+        MilkMachine.setTabOrder(self.doubleSpinBox_export_simplify, self.checkBox_export_gxtrack)
+        MilkMachine.setTabOrder(self.checkBox_export_gxtrack, self.doubleSpinBox_export_flyto_min)
+        MilkMachine.setTabOrder(self.doubleSpinBox_export_flyto_min, self.doubleSpinBox_export_flyto_max)
+        MilkMachine.setTabOrder(self.doubleSpinBox_export_flyto_max, self.doubleSpinBox_export_flyto_gap)
+        MilkMachine.setTabOrder(self.checkBox_export_gxtrack, self.buttonExportTrack)
         MilkMachine.setTabOrder(self.buttonExportTrack, self.pushButton_TrackInfo)
         MilkMachine.setTabOrder(self.pushButton_TrackInfo, self.pushButton_google_earth)
         MilkMachine.setTabOrder(self.pushButton_google_earth, self.checkBox_sync_point)
@@ -1284,7 +1372,7 @@ class Ui_MilkMachine(object):
     def retranslateUi(self, MilkMachine):
         MilkMachine.setWindowTitle(_translate("MilkMachine", "MilkMachine", None))
         self.pushButton_Audio1info.setToolTip(_translate("MilkMachine", "<html><head/><body><p>Click for information about the current audio track</p></body></html>", None))
-        self.buttonImportGPS.setToolTip(_translate("MilkMachine", "<html><head/><body><p>Browse to a .csv file that is formatted for Milk Machine.</p></body></html>", None))
+        self.buttonImportGPS.setToolTip(_translate("MilkMachine", "<html><head/><body><p>Browse to a .csv file that is formatted for Milk Machine, a .kml file from a GPS logger or a .gpx file with timed track points.</p></body></html>", None))
         self.buttonImportGPS.setText(_translate("MilkMachine", "Import GPS", None))
         self.label_2.setToolTip(_translate("MilkMachine", "<html><head/><body><p>Feature ID (FID) number. For point data layers, this is a automatic number that is generated by QGIS to indicate sequential point number from the &quot;starting point&quot; of the track. The numbering starts at 0</p></body></html>", None))
         self.label_2.setText(_translate("MilkMachine", "Feature ID (FID)", None))
@@ -1315,8 +1403,12 @@ class Ui_MilkMachine(object):
         self.comboBox_importDateFormat.setToolTip(_translate("MilkMachine", "<html><head/><body><p>Date format must be one of; mm/dd/yyyy, dd/mm/yyyy, or yyyy/mm/dd. Yes, a forward slash is required. Time must be in HH:MM:SS format. </p></body></html>", None))
         self.label_68.setToolTip(_translate("MilkMachine", "<html><head/><body><p>The duration into the audio file that is currently playing.</p></body></html>", None))
         self.label_68.setText(_translate("MilkMachine", "Format:", None))
+        self.label_71.setToolTip(_translate("MilkMachine", "<html><head/><body><p>Drops the points of the track that are within this many metres of the simplified track when it is drawn, keeping the stops and changes of speed. 0 keeps every point.</p></body></html>", None))
+        self.label_71.setText(_translate("MilkMachine", "Simplify:", None))
+        self.doubleSpinBox_import_simplify.setToolTip(_translate("MilkMachine", "<html><head/><body><p>Drops the points of the track that are within this many metres of the simplified track when it is drawn, keeping the stops and changes of speed. 0 keeps every point.</p></body></html>", None))
+        self.doubleSpinBox_import_simplify.setSuffix(_translate("MilkMachine", " m", None))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab_import), _translate("MilkMachine", "Import and Sync", None))
-        self.tabWidget.setTabToolTip(self.tabWidget.indexOf(self.tab_import), _translate("MilkMachine", "<html><head/><body><p>Import raw .kml files and render as an ESRI shapefile for editing, and import audio files for interactive time syncronization.</p></body></html>", None))
+        self.tabWidget.setTabToolTip(self.tabWidget.indexOf(self.tab_import), _translate("MilkMachine", "<html><head/><body><p>Import raw .kml, .gpx and .csv files and render as a GeoPackage for editing, and import audio files for interactive time syncronization.</p></body></html>", None))
         self.dateTimeEdit_start.setDisplayFormat(_translate("MilkMachine", "M/d/yyyy hh:mm:ss AP", None))
         self.checkBox_time_edit.setToolTip(_translate("MilkMachine", "<html><head/><body><p>Checking this box will enable the &quot;Time&quot; fields for editing. The user must select a layer in the table of contents, have editing &quot;on&quot;, and have at least one selected point.</p></body></html>", None))
         self.checkBox_time_edit.setText(_translate("MilkMachine", "Edit Time Stamps", None))
@@ -1337,7 +1429,7 @@ class Ui_MilkMachine(object):
         self.label_66.setText(_translate("MilkMachine", "Window:", None))
         self.radioButton_filtering_linear.setToolTip(_translate("MilkMachine", "<html><head/><body><p>After selecting a number of points within an edit session, the linear regression filter will place all points along a line. The line is fit using a geometric mean least squares regression. </p><p>Use the X and Y weights to adjust the regression. The values range from 0-1. If 1, the values will be placed along the line. If 0.5, the values will be place 50% between the original value and the estimated value.</p></body></html>", None))
         self.radioButton_filtering_linear.setText(_translate("MilkMachine", "Linear", None))
-        self.radioButton_filtering_quad.setToolTip(_translate("MilkMachine", "<html><head/><body><p>After selecting a number of points within an edit session, the quadratic regression filter will place all points along a line. The line is fit using a least squares regression.</p></body></html>", None))
+        self.radioButton_filtering_quad.setToolTip(_translate("MilkMachine", "<html><head/><body><p>After selecting a number of points within an edit session, the spline filter fits a smoothing spline of the chosen order to the X and Y (or Z) values against the time of each point, from the datetime field. Loops and back-tracking are smoothed like any other part of the track. Long selections are fitted a few hundred points at a time, and how closely the spline follows the points is set from the noise of the track.</p></body></html>", None))
         self.radioButton_filtering_quad.setText(_translate("MilkMachine", "Spline", None))
         self.spinBox_filtering_moving.setToolTip(_translate("MilkMachine", "<html><head/><body><p>An odd positive integer.</p></body></html>", None))
         self.pushButton_filtering_apply.setToolTip(_translate("MilkMachine", "<html><head/><body><p>Apply the selected filter to the selected points in the active layer. To roll back these edits, select &quot;Cancel for selected layer&quot; in the editor options.</p></body></html>", None))
@@ -1354,6 +1446,12 @@ class Ui_MilkMachine(object):
         self.radioButton_filtering_zscale.setText(_translate("MilkMachine", "Scale Z to Range", None))
         self.label_48.setText(_translate("MilkMachine", "Minimum:", None))
         self.label_52.setText(_translate("MilkMachine", "Maximum:", None))
+        self.radioButton_filtering_kalman.setToolTip(_translate("MilkMachine", "<html><head/><body><p>After selecting a number of points within an edit session, the Kalman filter treats the track as a point moving at a steady speed, pushed around by random accelerations, and seen through a noisy GPS. It runs forwards and then backwards over the selection (a Rauch-Tung-Striebel smoother), using the time between the points from the datetime field, so longer gaps allow larger moves. The X, Y points are smoothed in UTM metres.</p><p>Set the GPS error to the accuracy of the receiver, and lower the acceleration for straighter, smoother tracks.</p></body></html>", None))
+        self.radioButton_filtering_kalman.setText(_translate("MilkMachine", "Kalman", None))
+        self.label_69.setText(_translate("MilkMachine", "GPS error:", None))
+        self.doubleSpinBox_filtering_kalman_error.setToolTip(_translate("MilkMachine", "<html><head/><body><p>The standard deviation of the GPS error, in metres.</p></body></html>", None))
+        self.label_70.setText(_translate("MilkMachine", "Accel.:", None))
+        self.doubleSpinBox_filtering_kalman_accel.setToolTip(_translate("MilkMachine", "<html><head/><body><p>The standard deviation of the acceleration between points, in metres per second squared. Lower values give straighter, smoother tracks.</p></body></html>", None))
         self.radioButton_filtering_center.setToolTip(_translate("MilkMachine", "<html><head/><body><p>&quot;Magically Centering&quot; a group of selected points will move all of the selected points towards the geometric center of those points. If the weight is set at 1, then the points will be moved 100% of the distance between the original locations and the center. If the weight is 0.5, then the points will only be moved 50% of the distance between their original location and the center.</p><p><span style=\" font-size:16pt; font-weight:600;\">Figure 1</span><span style=\" font-size:16pt;\">. Uncentered points</span></p><p><img src=\":/plugins/milkmachine/uncentered.png\"/></p><p><span style=\" font-size:16pt; font-weight:600;\">Figure 2</span><span style=\" font-size:16pt;\">. Centered points (weight = 1)</span></p><p><img src=\":/plugins/milkmachine/centered.png\"/></p></body></html>", None))
         self.radioButton_filtering_center.setText(_translate("MilkMachine", "Magically Center", None))
         self.label_63.setToolTip(_translate("MilkMachine", "<html><head/><body><p><br/></p></body></html>", None))
@@ -1556,7 +1654,7 @@ class Ui_MilkMachine(object):
         self.tabWidget_3.setTabToolTip(self.tabWidget_3.indexOf(self.tab_7), _translate("MilkMachine", "<html><head/><body><p>The &quot;Circle Around&quot; visualization creates 1 (or more) full rotations around 1 point or a selection of points. If there is a selection of mulitple points, then Milk Machine will find the geometric centroid of those points and that location will be used for the &lt;LookAt&gt;. If only 1 point is selected Latitude and longitude will be automatically calculated (i.e. the x,y of the point).</p></body></html>", None))
         self.checkBox_visualization_streetview.setText(_translate("MilkMachine", "StreetView Mode", None))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab_visualization), _translate("MilkMachine", "Tour", None))
-        self.buttonExportTrack.setToolTip(_translate("MilkMachine", "<html><head/><body><p>Export the selected track to .kml. If the active track is an ESRI shapefile point layer, the user will be able to export.</p></body></html>", None))
+        self.buttonExportTrack.setToolTip(_translate("MilkMachine", "<html><head/><body><p>Export the selected track to .kml. If the active track is a GeoPackage or ESRI shapefile point layer, the user will be able to export.</p></body></html>", None))
         self.buttonExportTrack.setText(_translate("MilkMachine", "Export Track", None))
         self.pushButton_TrackInfo.setToolTip(_translate("MilkMachine", "<html><head/><body><p>Click for information about the current audio track</p></body></html>", None))
         self.pushButton_google_earth.setToolTip(_translate("MilkMachine", "<html><head/><body><p>View selected track in Google Earth</p></body></html>", None))
@@ -1565,6 +1663,25 @@ class Ui_MilkMachine(object):
         self.pushButton_export_audio_file.setToolTip(_translate("MilkMachine", "<html><head/><body><p>Browse to .wav file that will be attached to the kmz or kml file. The name of the file must be formatted by date and time. example;</p><p>YYYYMMDDHHMMSS.wav</p><p>~/20140130124357.wav</p><p>Note: any text after the seconds is ignored, which can be used for other information.</p><p>The difference between the start of the audio and the start of the GPS track will be automatically applied to the &quot;time delay&quot; of the audio in the .kml/.kmz.</p></body></html>", None))
         self.lineEdit_export_audio.setToolTip(_translate("MilkMachine", "<html><head/><body><p>Path to audio file that will be attached to kmz or kml.</p></body></html>", None))
         self.label_33.setText(_translate("MilkMachine", "Audio File:", None))
+        self.label_72.setToolTip(_translate("MilkMachine", "<html><head/><body><p>Leaves the points of the track that are within this many metres of the simplified track out of the export, leaving the layer as it is. The tour keeps its timing. 0 exports every point.</p></body></html>", None))
+        self.label_72.setText(_translate("MilkMachine", "Simplify:", None))
+        self.doubleSpinBox_export_simplify.setToolTip(_translate("MilkMachine", "<html><head/><body><p>Leaves the points of the track that are within this many metres of the simplified track out of the export, leaving the layer as it is. The tour keeps its timing. 0 exports every point.</p></body></html>", None))
+        self.doubleSpinBox_export_simplify.setSuffix(_translate("MilkMachine", " m", None))
+        self.checkBox_export_gxtrack.setToolTip(_translate("MilkMachine", "<html><head/><body><p>Writes the points of the track as a single gx:Track with one style, rather than a placemark and style for each point. The file is several times smaller and Google Earth animates the track with the time slider. Points with different icon or label styles get a track each.</p></body></html>", None))
+        self.checkBox_export_gxtrack.setText(_translate("MilkMachine", "gx:Track points", None))
+        self.label_73.setToolTip(_translate("MilkMachine", "<html><head/><body><p>Limits the FlyTo duration between each point and the next, which is otherwise the time between the points.</p></body></html>", None))
+        self.label_73.setText(_translate("MilkMachine", "FlyTo:", None))
+        self.doubleSpinBox_export_flyto_min.setToolTip(_translate("MilkMachine", "<html><head/><body><p>The shortest FlyTo duration. Shorter steps, and those of points out of order, are raised to it.</p></body></html>", None))
+        self.doubleSpinBox_export_flyto_min.setPrefix(_translate("MilkMachine", "min ", None))
+        self.doubleSpinBox_export_flyto_min.setSuffix(_translate("MilkMachine", " s", None))
+        self.doubleSpinBox_export_flyto_max.setToolTip(_translate("MilkMachine", "<html><head/><body><p>The longest FlyTo duration. Longer steps are lowered to it. none leaves them as they are.</p></body></html>", None))
+        self.doubleSpinBox_export_flyto_max.setSpecialValueText(_translate("MilkMachine", "max none", None))
+        self.doubleSpinBox_export_flyto_max.setPrefix(_translate("MilkMachine", "max ", None))
+        self.doubleSpinBox_export_flyto_max.setSuffix(_translate("MilkMachine", " s", None))
+        self.doubleSpinBox_export_flyto_gap.setToolTip(_translate("MilkMachine", "<html><head/><body><p>Steps longer than this are a gap in the recording, e.g. a paused GPS, and take the median step instead. none keeps every step.</p></body></html>", None))
+        self.doubleSpinBox_export_flyto_gap.setSpecialValueText(_translate("MilkMachine", "gap none", None))
+        self.doubleSpinBox_export_flyto_gap.setPrefix(_translate("MilkMachine", "gap ", None))
+        self.doubleSpinBox_export_flyto_gap.setSuffix(_translate("MilkMachine", " s", None))
         self.tabWidget.setTabText(self.tabWidget.indexOf(self.tab_export), _translate("MilkMachine", "Export and Details", None))
 
 import resources_rc